@@ -9,31 +9,45 @@
 
 #Your Custom A2A server class
 
-from server.server import A2AServer
+from server.server import A2AServer, DEFAULT_MAX_BATCH_SIZE, DEFAULT_BATCH_CONCURRENCY
 
 from models.agent import AgentCard, AgentCapabilities, AgentSkill
 
 #Task Manager and agent logic
 from agents.google_adk.task_manager import AgentTaskManager
-from agents.google_adk.agent import TellTimeAgent
+from agents.google_adk.agent import TellTimeAgent, DEFAULT_MODEL, MODEL_ENV_VAR
+from agents.google_adk.context_policy import ContextPolicy
+from server.task_store import InMemoryTaskStore
+from server.sqlite_task_store import SQLiteTaskStore
+from server.response_cache import ResponseCache
+from server.task_queue import TaskQueue
+from server.admission import AdmissionController, RateLimiter
+from server.blob_store import DiskBlobStore, InMemoryBlobStore
+from server.uploads import UploadManager, DEFAULT_CHUNK_BYTES
+from server.image_preprocess import ImagePreprocessor, parse_size
+from server.micro_batch import MicroBatcher
+from server.workers import run_workers
 
 #CLI and Logging support
+import asyncio
 import click #For creating a clean command line interface
 import logging #For logging errors and info to console
+import os
+import tempfile
+from server.log import configure_logging, LEVEL_ENV_VAR, FORMAT_ENV_VAR, SAMPLE_RATE_ENV_VAR
 
-#Set up logging to print info to console
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-#Main entry function - Configurable via CLI
-@click.command()
-@click.option("--host", default = "localhost", help = "Host to bind the server to")
-@click.option("--port",default = 10002, help = "Port number for the server")
-def main(host, port):
-    #This function sets up everything needed to start the agent server
-    #You can run it iwht 'python -m agents.google_adk --host 0.0.0.0 --port 12345'
+#Builds the A2A server (agent card, task store, task manager and agent) from CLI options
+def build_server(host, port, model, task_store, db_path, max_tasks, max_history_messages, max_history_bytes, task_ttl, idle_ttl,
+                 response_cache, cache_max_entries, idempotency_window, async_tasks, task_workers, task_queue_size,
+                 max_in_flight, max_waiting, max_wait, rate_limit, rate_burst, trusted_proxy,
+                 session_store, session_db, max_session_events, keep_session_events,
+                 context_turns, context_tokens, context_summary, artifact_dir, artifact_store_bytes, max_batch_size, batch_concurrency,
+                 blob_store_bytes, max_blob_bytes, blob_dir, upload_dir, upload_chunk_bytes, image_workers, image_max_size, image_format, image_quality,
+                 micro_batch_window_ms, micro_batch_size):
     #Define what this agent can do
-    capabilities = AgentCapabilities(streaming= False)
+    capabilities = AgentCapabilities(streaming= True) #Supports tasks/sendSubscribe (SSE)
 
     #Define the skill this agent offers(used in directories and UIs)
     skill = AgentSkill(
@@ -60,18 +74,207 @@ def main(host, port):
     #1. Given host/port
     #2. The agent's metadata
     #3. A task manager than runs the TellTimeAgent
-    server = A2AServer(
+    if task_store == "sqlite":
+        store = SQLiteTaskStore(db_path, terminal_ttl = task_ttl, idle_ttl = idle_ttl, max_tasks = max_tasks)
+    else:
+        store = InMemoryTaskStore(
+            max_tasks = max_tasks,
+            max_history_messages = max_history_messages,
+            max_history_bytes = max_history_bytes,
+            terminal_ttl = task_ttl,
+            idle_ttl = idle_ttl,
+        )
+    #Cache replies to repeated questions; the current time is only valid for about a second
+    cache = ResponseCache(max_entries = cache_max_entries, skill_ttls = {skill.id: 1.0}) if response_cache else None
+
+    #How much of a long conversation the model sees per turn (no policy = everything)
+    context_policy = None
+    if context_turns or context_tokens:
+        context_policy = ContextPolicy(max_turns = context_turns, max_tokens = context_tokens, summarize = context_summary)
+
+    #Admission control: bounded agent concurrency, and a per-client request rate (0 = unlimited)
+    admission = AdmissionController(max_in_flight = max_in_flight, max_waiting = max_waiting, max_wait = max_wait) if max_in_flight else None
+    rate_limiter = RateLimiter(rate = rate_limit, burst = rate_burst) if rate_limit else None
+
+    #File content of FileParts (e.g. images), uploaded to /blobs instead of inlined into the JSON
+    #(on disk with --blob-dir, so every worker process finds what was uploaded through another)
+    blob_store = None
+    if blob_store_bytes and blob_dir:
+        blob_store = DiskBlobStore(blob_dir, max_bytes = blob_store_bytes, max_blob_bytes = max_blob_bytes)
+    elif blob_store_bytes:
+        blob_store = InMemoryBlobStore(max_bytes = blob_store_bytes, max_blob_bytes = max_blob_bytes)
+    #Large files can also arrive in resumable chunks, written to disk until they are complete
+    uploads = UploadManager(blob_store, directory = upload_dir, chunk_size = upload_chunk_bytes) if blob_store is not None else None
+    #Attached images are resized and re-encoded in worker processes before they reach the model
+    image_preprocessor = None
+    if image_workers and blob_store is not None:
+        image_preprocessor = ImagePreprocessor(
+            workers = image_workers, max_size = parse_size(image_max_size), format = image_format, quality = image_quality,
+        )
+
+    agent = TellTimeAgent(
+        model = model,
+        session_db = session_db if session_store == "sqlite" else None,
+        max_session_events = max_session_events,
+        keep_session_events = keep_session_events,
+        context_policy = context_policy,
+        artifact_dir = artifact_dir,
+        max_artifact_bytes = artifact_store_bytes or None,
+    )
+    #Opt-in: tasks/send calls arriving within the window share one model call (without session history)
+    micro_batcher = None
+    if micro_batch_window_ms > 0:
+        micro_batcher = MicroBatcher(agent.invoke_batch, window = micro_batch_window_ms / 1000, max_batch = micro_batch_size)
+
+    return A2AServer(
         host = host,
         port = port,
         agent_card = agent_card,
-        task_manager = AgentTaskManager(agent=TellTimeAgent())
+        rate_limiter = rate_limiter,
+        max_batch_size = max_batch_size,
+        batch_concurrency = batch_concurrency,
+        blob_store = blob_store,
+        uploads = uploads,
+        trusted_proxies = trusted_proxy,
+        task_manager = AgentTaskManager(
+            agent = agent,
+            store = store, cache = cache, default_skill = skill.id, skills = [s.id for s in agent_card.skills],
+            idempotency_window = idempotency_window,
+            #Background execution: at most task_workers agent calls at once, task_queue_size more waiting
+            task_queue = TaskQueue(concurrency = task_workers, max_queued = task_queue_size) if async_tasks else None,
+            admission = admission,
+            image_preprocessor = image_preprocessor,
+            blob_store = blob_store,
+            micro_batcher = micro_batcher,
+        )
     )
 
+#Tasks a previous run left submitted / working will never finish (their server is gone): fail them
+#before serving. Done once, before any worker starts: a worker starting later would fail the tasks
+#of the others. (The in-memory store starts empty, so there is nothing to recover.)
+def fail_interrupted_tasks(db_path: str) -> None:
+    store = SQLiteTaskStore(db_path)
+    try:
+        failed = asyncio.run(store.fail_interrupted())
+    finally:
+        store.close()
+    if failed:
+        logger.warning("Marked %d task(s) left in progress by the last run as failed", failed)
+
+#App factory used by every worker process in --workers mode
+def create_app(**options):
+    return build_server(**options).app
 
-    #Start listening for tasks
-    server.start()
+#Main entry function - Configurable via CLI
+@click.command()
+@click.option("--host", default = "localhost", help = "Host to bind the server to")
+@click.option("--port",default = 10002, help = "Port number for the server")
+#Model backend, e.g. "gemini-2.5-flash" or "stub:latency_ms=200,tokens_per_s=50" for offline load tests
+@click.option("--model", default = DEFAULT_MODEL, envvar = MODEL_ENV_VAR, show_default = True, help = f"Gemini model name or stub[:options] (env {MODEL_ENV_VAR})")
+#Scale across CPU cores: N worker processes behind a router that keeps each session on one worker
+@click.option("--workers", default = 1, type = click.IntRange(min = 1), help = "Number of worker processes (>1 implies --task-store sqlite)")
+#Where tasks are stored: "memory" (lost on restart) or "sqlite" (durable file)
+@click.option("--task-store", default = "memory", type = click.Choice(["memory", "sqlite"]), help = "Task storage backend")
+@click.option("--db-path", default = "tasks.db", help = "SQLite database file (with --task-store sqlite)")
+#Where ADK sessions, memory and artifacts live: "memory" (lost on restart) or "sqlite" (durable file)
+@click.option("--session-store", default = "memory", type = click.Choice(["memory", "sqlite"]), help = "ADK session/memory/artifact backend")
+@click.option("--session-db", default = "adk.db", help = "SQLite database file (with --session-store sqlite)")
+@click.option("--max-session-events", default = 100, type = click.IntRange(min = 1), help = "Newest session events loaded per turn (sqlite)")
+@click.option("--keep-session-events", default = 1000, type = click.IntRange(min = 1), help = "Events stored per session before old turns are compacted (sqlite)")
+#Context window: keeps prompt size (and latency) flat on long conversations
+@click.option("--context-turns", default = None, type = click.IntRange(min = 1), help = "Turns of a session sent to the model (incl. the current one)")
+@click.option("--context-tokens", default = None, type = click.IntRange(min = 1), help = "Estimated tokens of history sent to the model")
+@click.option("--context-summary/--no-context-summary", default = False, help = "Summarize turns left out of the prompt into session state")
+#Agent artifacts on disk, one file per distinct content (shared by every worker)
+@click.option("--artifact-dir", default = None, help = "Directory for ADK artifacts (default: with the session store)")
+@click.option("--artifact-store-bytes", default = 2**30, type = click.IntRange(min = 0), help = "Disk space for artifact content in --artifact-dir (0 = unbounded)")
+#Task store limits (keep memory and disk use bounded on long-running servers)
+@click.option("--max-tasks", default = 10000, type = int, help = "Max tasks kept (least recently used finished tasks are evicted)")
+@click.option("--max-history-messages", default = None, type = int, help = "Max messages kept across all task histories (memory store only)")
+@click.option("--max-history-bytes", default = None, type = int, help = "Max approximate size of all task histories (memory store only)")
+@click.option("--task-ttl", default = 3600.0, type = float, help = "Seconds to keep completed/failed/canceled tasks")
+@click.option("--idle-ttl", default = None, type = float, help = "Seconds a task not in progress may go unused before it is dropped")
+#Asynchronous execution: tasks/send returns SUBMITTED at once, clients poll tasks/get
+@click.option("--async-tasks/--sync-tasks", default = False, help = "Run tasks in the background and answer tasks/send immediately")
+@click.option("--task-workers", default = 16, type = click.IntRange(min = 1), help = "Agent calls running at once (with --async-tasks)")
+@click.option("--task-queue-size", default = 1000, type = click.IntRange(min = 0), help = "Tasks allowed to wait before tasks/send answers 429")
+#Admission control (off by default): overload is answered with 429 right away instead of slowing every request down
+@click.option("--max-in-flight", default = 0, type = click.IntRange(min = 0), help = "Agent calls running at once (0 = unlimited)")
+@click.option("--max-waiting", default = 64, type = click.IntRange(min = 0), help = "Requests allowed to wait for an agent slot")
+@click.option("--max-wait", default = 5.0, type = click.FloatRange(min = 0), help = "Seconds a request waits for an agent slot before 429")
+@click.option("--rate-limit", default = 0.0, type = click.FloatRange(min = 0), help = "tasks/send per second per client (0 = unlimited)")
+@click.option("--rate-burst", default = None, type = click.IntRange(min = 1), help = "Requests a client may send in a burst (default: the rate, rounded up)")
+#Clients are told apart by address: behind a reverse proxy, name it so its X-Forwarded-For is used
+@click.option("--trusted-proxy", multiple = True, help = "Address of a proxy whose X-Forwarded-For is trusted (repeatable)")
+#JSON-RPC batches: many small tasks in one HTTP request (see A2AClient.send_tasks)
+@click.option("--max-batch-size", default = DEFAULT_MAX_BATCH_SIZE, type = click.IntRange(min = 1), help = "Max requests in one JSON-RPC batch")
+@click.option("--batch-concurrency", default = DEFAULT_BATCH_CONCURRENCY, type = click.IntRange(min = 1), help = "Requests of one batch handled at once")
+#Binary file content (images) for FileParts: POST /blobs, GET /blobs/<id>
+@click.option("--blob-store-bytes", default = 256 * 2**20, type = click.IntRange(min = 0), help = "Memory for uploaded file content (0 = no /blobs endpoints)")
+@click.option("--max-blob-bytes", default = 32 * 2**20, type = click.IntRange(min = 1), help = "Largest file accepted by /blobs")
+@click.option("--blob-dir", default = None, help = "Keep blobs as files in this directory (default: in memory; a temporary directory with --workers)")
+@click.option("--upload-dir", default = None, help = "Directory for chunked uploads in progress (default: a temporary directory)")
+@click.option("--upload-chunk-bytes", default = DEFAULT_CHUNK_BYTES, type = click.IntRange(min = 1), help = "Chunk size of /uploads")
+#Image preprocessing (needs Pillow): decode, downscale, strip EXIF and re-encode attached images off the event loop
+@click.option("--image-workers", default = 0, type = click.IntRange(min = 0), help = "Processes preparing attached images for the model (0 = images are not sent)")
+@click.option("--image-max-size", default = "1024x1024", help = "WIDTHxHEIGHT images are scaled down to fit in")
+@click.option("--image-format", default = "JPEG", type = click.Choice(["JPEG", "PNG", "WEBP"], case_sensitive = False), help = "Format images are re-encoded to")
+@click.option("--image-quality", default = 85, type = click.IntRange(1, 100), help = "JPEG / WEBP quality of re-encoded images")
+#Micro-batching (off by default): concurrent tasks/send questions that start a conversation share one model call
+#(each question and answer is added to its session; questions in an ongoing conversation are asked on their own)
+@click.option("--micro-batch-window-ms", default = 0.0, type = click.FloatRange(min = 0), help = "Milliseconds a question waits for others to batch with (0 = off)")
+@click.option("--micro-batch-size", default = 16, type = click.IntRange(min = 1), help = "Max questions in one batched model call")
+#Retries of the same task (same ID and message) get the stored result instead of a second model call;
+#off by default for completed tasks: a client sending the same question again may want a new answer
+@click.option("--idempotency-window", default = 0.0, type = click.FloatRange(min = 0), help = "Seconds a completed task answers resubmissions (0 = off)")
+#Response cache for repeated questions (TTL per skill, single-flight for concurrent duplicates); off by default:
+#a cached reply skips the agent, so the question and answer are not added to the session
+@click.option("--response-cache/--no-response-cache", default = False, help = "Reuse recent replies to identical questions (not added to the session)")
+@click.option("--cache-max-entries", default = 10000, type = int, help = "Max replies kept in the response cache")
+#Logging: per-request records are DEBUG, so they are off unless --log-level debug
+@click.option("--log-level", default = "info", envvar = LEVEL_ENV_VAR, type = click.Choice(["off", "error", "warning", "info", "debug"]), help = "Log level")
+@click.option("--log-format", default = "text", envvar = FORMAT_ENV_VAR, type = click.Choice(["text", "json"]), help = "Log line format")
+@click.option("--log-sample-rate", default = 1.0, envvar = SAMPLE_RATE_ENV_VAR, type = click.FloatRange(0, 1), help = "Fraction of requests to log")
+def main(host, port, workers, log_level, log_format, log_sample_rate, **options):
+    #This function sets up everything needed to start the agent server
+    #You can run it iwht 'python -m agents.google_adk --host 0.0.0.0 --port 12345'
+
+    #The SQLite store can't drop single history messages: refuse rather than silently ignore the limits
+    sqlite = options["task_store"] == "sqlite" or workers > 1
+    if sqlite and (options["max_history_messages"] is not None or options["max_history_bytes"] is not None):
+        raise click.UsageError("--max-history-messages / --max-history-bytes need --task-store memory (and --workers 1)")
+
+    #Worker processes read the same settings from the environment
+    os.environ.update({LEVEL_ENV_VAR: log_level, FORMAT_ENV_VAR: log_format, SAMPLE_RATE_ENV_VAR: str(log_sample_rate)})
+    configure_logging(log_level, log_format, log_sample_rate)
+    if sqlite:
+        fail_interrupted_tasks(options["db_path"])
+    if workers == 1:
+        #Start listening for tasks
+        build_server(host, port, **options).start()
+        return
+
+    #Workers are separate processes, so tasks must live in a store they all can open
+    if options["task_store"] != "sqlite":
+        logger.info("--workers %d: using the shared SQLite task store at %s", workers, options["db_path"])
+        options["task_store"] = "sqlite"
+    #The router is the workers' proxy (the --trusted-proxy addresses are the router's): workers take
+    #the client's address from the X-Forwarded-For it sends them
+    trusted_proxies = options["trusted_proxy"]
+    options["trusted_proxy"] = ("127.0.0.1", "::1")
+    #Uploads land on worker 0 but tasks run on their session's worker: blobs must be on disk
+    if options["blob_store_bytes"] and not options["blob_dir"]:
+        options["blob_dir"] = tempfile.mkdtemp(prefix = "a2a-blobs-")
+        logger.info("--workers %d: keeping blobs in %s", workers, options["blob_dir"])
+    run_workers(
+        "agents.google_adk.__main__:create_app",
+        dict(host = host, port = port, **options),
+        host = host,
+        port = port,
+        workers = workers,
+        trusted_proxies = trusted_proxies,
+    )
 
 #This runs only when executing the script directly via 'python -m'
 if __name__ == "__main__":
     main()
-    
\ No newline at end of file
@@ -8,52 +8,147 @@ from google.adk.agents.llm_agent import LlmAgent
 
 #Adk services for session, memory, and file-like "artifacts"
 from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
+#Durable versions of the same services (one SQLite file, survives restarts)
+from agents.google_adk.sqlite_services import (
+    ADK_SCHEMA, SQLiteSessionService, SQLiteMemoryService, SQLiteArtifactService,
+)
+from agents.google_adk.disk_artifacts import DiskArtifactService
+from server.sqlite_db import SQLiteDatabase
+from server.image_preprocess import PreparedImage
 
 #Runner connects the agent, sesssion, memory, and files into a complete system
 from google.adk.runners import Runner
+#RunConfig lets us ask the runner for partial (streamed) events
+from google.adk.agents.run_config import RunConfig, StreamingMode
+#A raw model request, for micro-batches that go to the model without a session
+from google.adk.models.llm_request import LlmRequest
+#Session events, to record the turns of a micro-batch in their sessions
+from google.adk.events import Event
 
 from google.genai import types
 
-import traceback
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import Any, AsyncIterator
+from uuid import uuid4
 
 #Load env files
 from dotenv import load_dotenv
 load_dotenv() #loads env var
 
+logger = logging.getLogger(__name__)
+
+#Model backend: a Gemini model name, or "stub[:options]" for the offline fake LLM (see stub_llm.py)
+from agents.google_adk.stub_llm import resolve_model
+
+#Optional trimming of long conversations before they are sent to the model
+from agents.google_adk.context_policy import ContextPolicy, record_prompt_tokens
+
+#Stage timings (session lookup, time inside the ADK runner)
+from server.metrics import span
+DEFAULT_MODEL = "gemini-2.5-flash"
+MODEL_ENV_VAR = "TELL_TIME_MODEL"
+
+#System prompt of a micro-batched model call (several numbered questions, one JSON array of answers)
+BATCH_INSTRUCTION = (
+    "You get several independent, numbered questions. Answer each of them with the current time "
+    "in the format YYYY-MM-DD HH:MM:SS. Reply with only a JSON array of strings: one answer per "
+    "question, in the same order."
+)
+#The JSON array in a batched reply (models like to wrap it in a ```json fence)
+_JSON_ARRAY = re.compile(r"\[.*\]", re.DOTALL)
+
 #TellTimeAgent: Your AI agent that responds with the current time
 class TellTimeAgent:
     #This agent only supports plain text input/output. 
     SUPPORTED_CONTENT_TYPES = {"text", "text/plain"}
 
+    #Reply sent when something goes wrong (never worth caching)
+    ERROR_REPLY = "Sorry, I encountered an internal error and couldn't process your request."
 
-    def __init__(self):
+    def __init__(
+        self,
+        model: str | None = None,
+        session_db: str | None = None,
+        max_session_events: int | None = 100,
+        keep_session_events: int | None = 1000,
+        context_policy: ContextPolicy | None = None,
+        artifact_dir: str | None = None,
+        max_artifact_bytes: int | None = 2**30,
+    ):
         #Initialize telltime agent: Creates LLM Agent and sets up session handling, memory, and runner to execute tasks
+        #model: Gemini model name or stub spec; defaults to $TELL_TIME_MODEL, then gemini-2.5-flash
+        #session_db: SQLite file for sessions, memory and artifacts (None = in memory, lost on restart)
+        #max_session_events: events of a session the model sees per turn (newest first, sqlite only)
+        #keep_session_events: events stored per session before old turns are compacted (sqlite only)
+        #context_policy: how much of the conversation the model sees per turn (None = everything loaded)
+        #artifact_dir: directory for artifacts on disk, deduplicated by content (None = with the sessions)
+        #max_artifact_bytes: disk space for artifact content (least recently used are deleted beyond it)
+        self._model = model or os.getenv(MODEL_ENV_VAR) or DEFAULT_MODEL
+        self._context_policy = context_policy
         self._agent = self._build_agent() # Set up Gemini agent
         self._user_id = "time_agent_user" # Set user ID (fixed for simplciity)
 
+        self._session_db: SQLiteDatabase | None = None
+        if session_db:
+            #One database file (and writer thread) for all three services
+            db = self._session_db = SQLiteDatabase(session_db, ADK_SCHEMA, name = "sqlite-adk")
+            memory_service = SQLiteMemoryService(db)
+            session_service = SQLiteSessionService(
+                db, max_events = max_session_events, keep_events = keep_session_events, memory = memory_service,
+            )
+            artifact_service = SQLiteArtifactService(db)
+        else:
+            memory_service = InMemoryMemoryService()
+            session_service = InMemorySessionService()
+            artifact_service = InMemoryArtifactService()
+        self._artifact_store: DiskArtifactService | None = None
+        if artifact_dir:
+            #The same image saved by many sessions is stored once, outside the Python heap
+            artifact_service = self._artifact_store = DiskArtifactService(artifact_dir, max_bytes = max_artifact_bytes)
 
         #The runner is what actually manages the agent and its environment
         self._runner = Runner( #We provide the runner with the agent name, the agent itself, and services it needs
             app_name = self._agent.name,
             agent = self._agent,
-            artifact_service = InMemoryArtifactService(), #For files(not used here)
-            memory_service = InMemoryMemoryService(), #Keeps track of conversations
-            session_service = InMemorySessionService(),#Optional: remembers past messages
+            artifact_service = artifact_service, #For files(not used here)
+            memory_service = memory_service, #Keeps track of conversations
+            session_service = session_service,#Optional: remembers past messages
         )
 
+    #Closes the session database and the artifact index; their writer threads are daemons,
+    #so without this the writes still queued when the server stops are lost
+    def close(self) -> None:
+        if self._session_db is not None:
+            self._session_db.close()
+        if self._artifact_store is not None:
+            self._artifact_store.close()
+
+    #The model spec this agent runs on (part of the response cache key)
+    @property
+    def model(self) -> str:
+        return self._model
+
     #This is where we actually build the agent
     def _build_agent(self) -> LlmAgent:
         #BCreates and returns a gemini agent with basic settings
         #Returns an LlmAgent object from Google ADK
         return LlmAgent(
-            model = "gemini-2.5-flash", #Gemini model version
+            model = resolve_model(self._model), #Gemini model version (or the local stub)
             name = "tell_time_agent", #Name of agent for the metadata
             description = "Tells the current time", #Description for metadata
             instruction = "Reply with the current time in the format YYYY-MM-DD HH:MM:SS.", #System prompt for the agent
+            #Trims the history (only when a policy is configured) and records prompt sizes
+            before_model_callback = self._context_policy.before_model if self._context_policy else None,
+            after_model_callback = record_prompt_tokens,
         )
-    async def invoke(self, query: str, session_id: str) -> str:
+    async def invoke(self, query: str, session_id: str, images: list[PreparedImage] | None = None) -> str:
         """
         📥 Handle a user query and return a response string.
         Note - function updated 28 May 2025
@@ -72,6 +167,7 @@ class TellTimeAgent:
         Args:
             query (str): What the user said (e.g., "what time is it?")
             session_id (str): Helps group messages into a session
+            images (list[PreparedImage]): Attached images, already resized and re-encoded
 
         Returns:
             str: Agent's reply (usually the current time)
@@ -79,55 +175,240 @@ class TellTimeAgent:
         try:
 
             # 🔁 Try to reuse an existing session (or create one if needed)
-            session = await self._runner.session_service.get_session(
-                app_name=self._agent.name,
-                user_id=self._user_id,
-                session_id=session_id
-            )
-
-            if session is None:
-                session = await self._runner.session_service.create_session(
-                    app_name=self._agent.name,
-                    user_id=self._user_id,
-                    session_id=session_id,
-                    state={}  # Optional dictionary to hold session state
-                )
+            with span("session"):
+                session = await self._get_or_create_session(session_id)
 
             # 📨 Format the user message in a way the Gemini model expects
-           # Get the actual current time
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Include current time in the query to the AI
-            enhanced_query = f"Current time is {current_time}. User asked: {query}"
-            
-            content = types.Content(
-                role = "user",
-                parts = [types.Part.from_text(text = enhanced_query)]
-            )
+            content = self._build_content(query, images)
 
             # 🚀 Run the agent using the Runner and collect the last event
             last_event = None
-            async for event in self._runner.run_async(
-                user_id=self._user_id,
-                session_id=session.id,
-                new_message=content
-            ):
-                last_event = event
+            with span("runner"):
+                async for event in self._runner.run_async(
+                    user_id=self._user_id,
+                    session_id=session.id,
+                    new_message=content
+                ):
+                    last_event = event
 
             # 🧹 Fallback: return empty string if something went wrong
             if not last_event or not last_event.content or not last_event.content.parts:
                 return ""
 
             # 📤 Extract and join all text responses into one string
-            return "\n".join([p.text for p in last_event.content.parts if p.text])
+            return self._event_text(last_event)
         except Exception as e:
-            # Print a user-friendly error message
-            print(f"🔥🔥🔥 An error occurred in TellTimeAgent.invoke: {e}")
-
-            # Print the full, detailed stack trace to the console
-            traceback.print_exc()
+            # Log a user-friendly error message with the full, detailed stack trace
+            logger.exception("🔥🔥🔥 An error occurred in TellTimeAgent.invoke: %s", e)
 
             # Return a helpful error message to the user/client
-            return "Sorry, I encountered an internal error and couldn't process your request."
+            return self.ERROR_REPLY
+
+
+    async def stream(self, query: str, session_id: str, images: list[PreparedImage] | None = None) -> AsyncIterator[dict[str, Any]]:
+        """
+        Same as invoke(), but yields the reply while the model is still generating it.
+
+        Each yielded item is a dict:
+            {"is_task_complete": False, "content": "<next chunk of text>"}  (zero or more times)
+            {"is_task_complete": True,  "content": "<full reply text>"}     (exactly once, last)
+
+        Args:
+            query (str): What the user said
+            session_id (str): Helps group messages into a session
+            images (list[PreparedImage]): Attached images, already resized and re-encoded
+        """
+        try:
+            with span("session"):
+                session = await self._get_or_create_session(session_id)
+            content = self._build_content(query, images)
+
+            #SSE streaming mode makes the runner emit partial events as tokens arrive
+            run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+
+            chunks = []  #Partial chunks seen so far (fallback if no final event arrives)
+            final_text = None
+            async for event in self._runner.run_async(
+                user_id=self._user_id,
+                session_id=session.id,
+                new_message=content,
+                run_config=run_config,
+            ):
+                if not event.content or not event.content.parts:
+                    continue
+                text = self._event_text(event)
+                if event.partial:
+                    #Partial events carry only the newly generated piece of text
+                    if text:
+                        chunks.append(text)
+                        yield {"is_task_complete": False, "content": text}
+                else:
+                    #The non-partial event carries the complete, aggregated reply
+                    final_text = text
+
+            yield {
+                "is_task_complete": True,
+                "content": final_text if final_text is not None else "".join(chunks),
+            }
+        except Exception as e:
+            logger.exception("🔥🔥🔥 An error occurred in TellTimeAgent.stream: %s", e)
+            yield {
+                "is_task_complete": True,
+                "content": self.ERROR_REPLY,
+            }
+
+    async def invoke_batch(self, requests: list[tuple[str, str, list[PreparedImage] | None]]) -> list[str]:
+        """
+        Answers several questions with one model call where that gives the same answer
+        (see server/micro_batch.py).
+
+        Only questions that start a conversation (their session has no events yet) are
+        batched: with no history to consider, one prompt can hold all of them. Each batched
+        question and its answer are then added to the question's session, like a normal
+        turn, so the conversation continues from there. Questions in a conversation that
+        already has turns (and a batch of one) go through invoke(), history, context policy
+        and all. If the reply can't be split into one answer per question, each question is
+        asked on its own.
+
+        Args:
+            requests: (query, session_id, images) per question
+
+        Returns:
+            list[str]: One reply per request, in the same order
+        """
+        if len(requests) == 1:
+            query, session_id, images = requests[0]
+            return [await self.invoke(query, session_id, images)]
+
+        replies: list[str | None] = [None] * len(requests)
+        try:
+            with span("session"):
+                sessions = await asyncio.gather(*(
+                    self._get_or_create_session(session_id, recent_events = 1) for _, session_id, _ in requests
+                ))
+            #Questions that start their conversation (the first one only, if a session comes twice)
+            fresh, seen = [], set()
+            for index, session in enumerate(sessions):
+                if not session.events and session.id not in seen:
+                    fresh.append(index)
+                    seen.add(session.id)
+            if len(fresh) > 1:
+                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                questions = [(requests[index][0], requests[index][2]) for index in fresh]
+                with span("model_batch"):
+                    answers = self._split_batch_reply(await self._call_model_batch(questions, current_time), len(fresh))
+                if answers is None:
+                    logger.warning("Batched reply unusable, asking %d questions one by one", len(fresh))
+                else:
+                    with span("session"):
+                        await asyncio.gather(*(
+                            self._record_turn(sessions[index], self._build_content(query, images, current_time), answer)
+                            for index, (query, images), answer in zip(fresh, questions, answers)
+                        ))
+                    for index, answer in zip(fresh, answers):
+                        replies[index] = answer
+        except Exception as e:
+            logger.exception("🔥🔥🔥 An error occurred in TellTimeAgent.invoke_batch: %s", e)
+
+        #Everything not answered by the batch: one normal turn each
+        rest = [index for index, reply in enumerate(replies) if reply is None]
+        for index, reply in zip(rest, await asyncio.gather(*(self.invoke(*requests[index]) for index in rest))):
+            replies[index] = reply
+        return replies
+
+    #One model call for all questions of a batch; returns the reply's text
+    async def _call_model_batch(self, questions: list[tuple[str, list[PreparedImage] | None]], current_time: str) -> str:
+        llm = self._agent.canonical_model
+        request = LlmRequest(
+            model = llm.model,
+            contents = [self._build_batch_content(questions, current_time)],
+            config = types.GenerateContentConfig(system_instruction = BATCH_INSTRUCTION),
+        )
+        text = ""
+        async for response in llm.generate_content_async(request, stream = False):
+            if response.content and response.content.parts:
+                text = self._event_text(response)
+            record_prompt_tokens(None, response)  # As the agent's after_model_callback does for a turn
+        return text
+
+    #Adds a question and its answer to a session, as the runner does for a turn
+    async def _record_turn(self, session, content: types.Content, answer: str) -> None:
+        invocation_id = f"e-{uuid4()}"
+        await self._runner.session_service.append_event(
+            session, Event(invocation_id = invocation_id, author = "user", content = content),
+        )
+        await self._runner.session_service.append_event(
+            session,
+            Event(
+                invocation_id = invocation_id, author = self._agent.name,
+                content = types.Content(role = "model", parts = [types.Part.from_text(text = answer)]),
+            ),
+        )
+
+    #The answers of a batched reply, or None if it isn't a JSON array of exactly `count` answers
+    @staticmethod
+    def _split_batch_reply(text: str, count: int) -> list[str] | None:
+        match = _JSON_ARRAY.search(text)
+        try:
+            answers = json.loads(match.group(0)) if match else None
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(answers, list) or len(answers) != count:
+            return None
+        return [answer if isinstance(answer, str) else json.dumps(answer) for answer in answers]
+
+    #Looks up the ADK session for this session id, creating it on first use
+    #(loads no events by default: the runner loads the session's events itself)
+    async def _get_or_create_session(self, session_id: str, recent_events: int = 0):
+        session = await self._runner.session_service.get_session(
+            app_name=self._agent.name,
+            user_id=self._user_id,
+            session_id=session_id,
+            config=GetSessionConfig(num_recent_events=recent_events),
+        )
+
+        if session is None:
+            try:
+                session = await self._runner.session_service.create_session(
+                    app_name=self._agent.name,
+                    user_id=self._user_id,
+                    session_id=session_id,
+                    state={}  # Optional dictionary to hold session state
+                )
+            except Exception:
+                #Another request (or worker) created the same session first
+                session = await self._runner.session_service.get_session(
+                    app_name=self._agent.name, user_id=self._user_id, session_id=session_id,
+                    config=GetSessionConfig(num_recent_events=recent_events),
+                )
+                if session is None:
+                    raise
+        return session
+
+    #Wraps the user's query (plus the real current time, and any images) into a Gemini Content object
+    def _build_content(self, query: str, images: list[PreparedImage] | None = None, current_time: str | None = None) -> types.Content:
+        # Get the actual current time
+        current_time = current_time or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        # Include current time in the query to the AI
+        enhanced_query = f"Current time is {current_time}. User asked: {query}"
+
+        return types.Content(
+            role = "user",
+            parts = [types.Part.from_text(text = enhanced_query)] + [
+                types.Part.from_bytes(data = image.data, mime_type = image.mime_type) for image in images or []
+            ]
+        )
+
+    #Numbered questions (each followed by its images) under one current time, for invoke_batch
+    def _build_batch_content(self, questions: list[tuple[str, list[PreparedImage] | None]], current_time: str) -> types.Content:
+        parts = [types.Part.from_text(text = f"Current time is {current_time}. Answer these {len(questions)} questions.")]
+        for number, (query, images) in enumerate(questions, 1):
+            parts.append(types.Part.from_text(text = f"Question {number}: {query}"))
+            parts.extend(types.Part.from_bytes(data = image.data, mime_type = image.mime_type) for image in images or [])
+        return types.Content(role = "user", parts = parts)
 
-        
+    #Joins all text parts of an event into one string
+    @staticmethod
+    def _event_text(event) -> str:
+        return "\n".join([p.text for p in event.content.parts if p.text])
@@ -0,0 +1,185 @@
+#agents/google_adk/context_policy.py
+#  Purpose:
+# Keeps the prompt of a long conversation from growing without bound.
+#
+# Every turn of a session adds events to the ADK session, and ADK sends all of them
+# to the model, so prompt size and per-turn latency keep growing. A ContextPolicy is
+# installed as the agent's before_model_callback and trims the request's history:
+#
+# - Sliding window: keep only the last `max_turns` turns (a turn = a user message plus
+#   everything up to the next one, e.g. tool calls and the agent's reply)
+# - Token budget: then drop the oldest remaining turns until the history fits in
+#   `max_tokens` (estimated, ~4 characters per token); the current turn always stays
+# - Summary (optional): turns that leave the window are added, one short line each, to
+#   a summary kept in session state ("context_summary"), and the summary is sent
+#   ahead of the remaining history. It is built incrementally, without a model call,
+#   and capped at `max_summary_chars` (with a token budget, only as much of it as fits
+#   next to the history is sent)
+#
+# Metrics: estimated prompt tokens per model call (before / after trimming), the
+# prompt tokens the model reports (recorded by every TellTimeAgent, with or without
+# a policy, see record_prompt_tokens) and how many turns were dropped.
+
+
+import zlib
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from server import metrics
+
+#Rough size of a token in characters (good enough for budgeting English text)
+CHARS_PER_TOKEN = 4
+#Session state keys used by the summary
+SUMMARY_KEY = "context_summary"
+SUMMARY_LAST_KEY = "context_summary_last"  #Checksum of the last turn added to the summary
+#Characters of each side of a turn kept in its summary line
+_SUMMARY_LINE_CHARS = 120
+
+
+#after_model_callback: records the prompt size the model reports (final responses only)
+def record_prompt_tokens(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    usage = llm_response.usage_metadata
+    if not llm_response.partial and usage is not None and usage.prompt_token_count is not None:
+        metrics.PROMPT_TOKENS.labels("reported").observe(usage.prompt_token_count)
+    return None
+
+
+#Estimated tokens of one Content (text, plus a flat cost for non-text parts like tool calls)
+def estimate_tokens(content: types.Content) -> int:
+    tokens = 0
+    for part in content.parts or []:
+        if part.text:
+            tokens += len(part.text) // CHARS_PER_TOKEN + 1
+        else:
+            tokens += 16
+    return tokens
+
+
+#True for a user message that starts a turn (tool responses also have role "user")
+def _starts_turn(content: types.Content) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts or [])
+
+
+#Splits a request's contents into turns; anything before the first user message is its own turn
+def split_turns(contents: list[types.Content]) -> list[list[types.Content]]:
+    turns: list[list[types.Content]] = []
+    for content in contents:
+        if not turns or _starts_turn(content):
+            turns.append([content])
+        else:
+            turns[-1].append(content)
+    return turns
+
+
+class ContextPolicy:
+    """
+    ✂️ Trims the history sent to the model (sliding window, token budget, summary).
+
+    Args:
+        max_turns: Turns sent to the model, including the current one (None = no limit)
+        max_tokens: Estimated tokens of history sent to the model (None = no limit)
+        summarize: Keep a short summary of dropped turns in session state and send it along
+        max_summary_chars: Size cap of the summary (its oldest lines are dropped first)
+
+    Usage:
+        policy = ContextPolicy(max_turns=10, max_tokens=4000, summarize=True)
+        LlmAgent(..., before_model_callback=policy.before_model, after_model_callback=record_prompt_tokens)
+    """
+
+    def __init__(
+        self,
+        max_turns: int | None = None,
+        max_tokens: int | None = None,
+        summarize: bool = False,
+        max_summary_chars: int = 2000,
+    ):
+        if max_turns is not None and max_turns < 1:
+            raise ValueError("max_turns must be at least 1 (the current turn)")
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summarize = summarize
+        self.max_summary_chars = max_summary_chars
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_turns is not None or self.max_tokens is not None
+
+    #before_model_callback: trims llm_request.contents in place (returns None, so the model is called)
+    def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        turns = split_turns(llm_request.contents)
+        sizes = [sum(estimate_tokens(content) for content in turn) for turn in turns]
+        metrics.PROMPT_TOKENS.labels("history").observe(sum(sizes))
+
+        keep = len(turns)
+        if self.max_turns is not None and keep > self.max_turns:
+            metrics.CONTEXT_TURNS_DROPPED.labels("window").inc(keep - self.max_turns)
+            keep = self.max_turns
+        if self.max_tokens is not None:
+            budget_keep = keep
+            while budget_keep > 1 and sum(sizes[len(turns) - budget_keep:]) > self.max_tokens:
+                budget_keep -= 1
+            if budget_keep < keep:
+                metrics.CONTEXT_TURNS_DROPPED.labels("budget").inc(keep - budget_keep)
+                keep = budget_keep
+
+        dropped, kept = turns[:len(turns) - keep], turns[len(turns) - keep:]
+        contents = [content for turn in kept for content in turn]
+        if self.summarize:
+            summary = self._update_summary(callback_context, dropped) if dropped else callback_context.state.get(SUMMARY_KEY)
+            if summary and self.max_tokens is not None:
+                #The summary shares the budget: send only its newest lines that still fit
+                room = (self.max_tokens - sum(sizes[len(turns) - keep:])) * CHARS_PER_TOKEN
+                lines = summary.splitlines()
+                while lines and sum(len(line) + 1 for line in lines) > room:
+                    lines.pop(0)
+                summary = "\n".join(lines)
+            if summary:
+                contents.insert(0, types.Content(
+                    role="user", parts=[types.Part(text=f"Summary of the earlier conversation:\n{summary}")]
+                ))
+        if dropped or self.summarize:
+            llm_request.contents = contents
+        metrics.PROMPT_TOKENS.labels("sent").observe(sum(estimate_tokens(content) for content in contents))
+        return None
+
+    #Adds the turns that left the window since the last call to the summary in session state
+    def _update_summary(self, callback_context: CallbackContext, dropped: list[list[types.Content]]) -> str:
+        state = callback_context.state
+        summary = state.get(SUMMARY_KEY) or ""
+        last = state.get(SUMMARY_LAST_KEY)
+
+        #Newest first, back to the last turn already summarized (usually just one turn)
+        new_turns = []
+        for turn in reversed(dropped):
+            if self._checksum(turn) == last:
+                break
+            new_turns.append(turn)
+        if not new_turns:
+            return summary
+
+        lines = summary.splitlines() + [self._summary_line(turn) for turn in reversed(new_turns)]
+        while lines and sum(len(line) + 1 for line in lines) > self.max_summary_chars:
+            lines.pop(0)
+        summary = "\n".join(lines)
+        #Written through the callback context, so it is saved with the session (state_delta)
+        state[SUMMARY_KEY] = summary
+        state[SUMMARY_LAST_KEY] = self._checksum(new_turns[0])
+        return summary
+
+    @staticmethod
+    def _checksum(turn: list[types.Content]) -> int:
+        text = "".join(part.text or "" for content in turn for part in content.parts or [])
+        return zlib.crc32(text.encode())
+
+    #"user: <question> -> <reply>" with both sides shortened
+    @staticmethod
+    def _summary_line(turn: list[types.Content]) -> str:
+        def text_of(role: str) -> str:
+            texts = [part.text for content in turn if content.role == role for part in content.parts or [] if part.text]
+            text = " ".join(" ".join(texts).split())
+            return text if len(text) <= _SUMMARY_LINE_CHARS else text[:_SUMMARY_LINE_CHARS - 1] + "…"
+        return f"user: {text_of('user')} -> {text_of('model')}"
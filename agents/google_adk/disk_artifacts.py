@@ -0,0 +1,364 @@
+#  Purpose:
+# An ADK artifact service that keeps artifact content on disk, stored once per content.
+#
+# Layout of the artifact directory:
+#   objects/ab/abcdef...   One file per distinct content, named by its SHA-256
+#   index.db               SQLite: every artifact version, and which object holds its bytes
+#
+# - Deduplication: the same image saved by a hundred sessions (or twice by one) is one
+#   file; each version only references it
+# - Memory-mapped reads: content is read through mmap, straight from the OS page cache
+#   (which every worker process on the machine shares); open_artifact() returns a view
+#   of the mapping without copying anything (e.g. for ImagePreprocessor.prepare)
+# - Size-bounded GC: once the objects exceed `max_bytes`, the least recently used are
+#   deleted, together with the artifact versions that referenced them. Objects no
+#   version references anymore (after delete_artifact) are deleted right away
+#
+# Artifacts that are not inline bytes (text, file_data) are small and live in the index.
+# Files are written to a temporary name and renamed, so a reader never sees half an
+# object; content and index survive restarts and can be shared by several workers.
+#
+# A file is only unlinked inside a write transaction that finds no index row for it, and
+# a save checks its file exists inside the transaction that adds the row (writing it again
+# if a delete got there first), so an indexed object always has its file.
+#
+# Usage:
+#   Runner(..., artifact_service=DiskArtifactService("artifacts", max_bytes=2**30))
+
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Optional, Union
+from uuid import uuid4
+
+from google.adk.artifacts.base_artifact_service import ArtifactVersion, BaseArtifactService
+from google.genai import types
+
+from server import metrics
+from server.sqlite_db import SQLiteDatabase
+
+
+# -----------------------------------------------------------------------------
+# SQL
+# -----------------------------------------------------------------------------
+
+ARTIFACT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifact_objects (
+    digest    TEXT PRIMARY KEY,       -- SHA-256 of the content (= its file name)
+    size      INTEGER NOT NULL,
+    last_used REAL NOT NULL           -- Last save or load (LRU order of the GC)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS artifact_objects_lru ON artifact_objects (last_used);
+CREATE TABLE IF NOT EXISTS artifact_versions (
+    app_name        TEXT NOT NULL,
+    user_id         TEXT NOT NULL,
+    scope           TEXT NOT NULL,    -- Session ID, or '' for user-scoped ("user:...") artifacts
+    filename        TEXT NOT NULL,
+    version         INTEGER NOT NULL,
+    mime_type       TEXT,
+    digest          TEXT,             -- Object holding the inline_data bytes
+    part            TEXT,             -- Any other Part (text, file_data) as JSON
+    custom_metadata TEXT,
+    create_time     REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, scope, filename, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS artifact_versions_digest ON artifact_versions (digest);
+"""
+
+_SELECT_VERSION = (
+    "SELECT mime_type, digest, part FROM artifact_versions"
+    " WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? AND version = ?"
+)
+_SELECT_LATEST_VERSION = (
+    "SELECT mime_type, digest, part FROM artifact_versions"
+    " WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? ORDER BY version DESC LIMIT 1"
+)
+_NEXT_VERSION = (
+    "SELECT COALESCE(MAX(version) + 1, 0) FROM artifact_versions WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?"
+)
+_INSERT_VERSION = (
+    "INSERT INTO artifact_versions (app_name, user_id, scope, filename, version, mime_type, digest, part, custom_metadata, create_time)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_LIST_KEYS = "SELECT DISTINCT filename FROM artifact_versions WHERE app_name = ? AND user_id = ? AND scope IN (?, '')"
+_LIST_VERSIONS = (
+    "SELECT version, mime_type, digest, custom_metadata, create_time FROM artifact_versions"
+    " WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? ORDER BY version"
+)
+_SELECT_FILE_DIGESTS = (
+    "SELECT DISTINCT digest FROM artifact_versions"
+    " WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? AND digest IS NOT NULL"
+)
+_DELETE_FILE = "DELETE FROM artifact_versions WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?"
+
+_UPSERT_OBJECT = (
+    "INSERT INTO artifact_objects (digest, size, last_used) VALUES (?, ?, ?)"
+    " ON CONFLICT (digest) DO UPDATE SET last_used = excluded.last_used"
+)
+_TOUCH_OBJECT = "UPDATE artifact_objects SET last_used = MAX(last_used, ?) WHERE digest = ?"
+_TOTAL_SIZE = "SELECT COALESCE(SUM(size), 0) FROM artifact_objects"
+_LRU_OBJECTS = "SELECT digest, size FROM artifact_objects ORDER BY last_used"
+_IS_REFERENCED = "SELECT 1 FROM artifact_versions WHERE digest = ? LIMIT 1"
+_OBJECT_EXISTS = "SELECT 1 FROM artifact_objects WHERE digest = ?"
+_DELETE_OBJECT = "DELETE FROM artifact_objects WHERE digest = ?"
+_DELETE_OBJECT_VERSIONS = "DELETE FROM artifact_versions WHERE digest = ?"
+
+
+class DiskArtifactService(BaseArtifactService):
+    """
+    💽 ADK artifact service on disk: content-addressed, deduplicated, mmap reads, LRU GC.
+
+    Filenames starting with "user:" are user-scoped, all others belong to a session.
+
+    Args:
+        root: Directory of the objects and the index (created if missing)
+        max_bytes: Total size of all stored content; least recently used objects (and
+                   their artifact versions) are deleted beyond it (None = unbounded)
+    """
+
+    def __init__(self, root: str | os.PathLike, max_bytes: int | None = 2**30):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        (self.root / "objects").mkdir(parents = True, exist_ok = True)
+        self.db = SQLiteDatabase(str(self.root / "index.db"), ARTIFACT_SCHEMA, name = "artifacts")
+        #Loads only note when an object was used; the next save writes that to the index
+        self._touched: dict[str, float] = {}
+
+    def close(self) -> None:
+        self.db.close()
+
+    async def save_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        artifact: Union[types.Part, dict[str, Any]],
+        session_id: Optional[str] = None,
+        custom_metadata: Optional[dict[str, Any]] = None,
+    ) -> int:
+        scope = self._scope(filename, session_id)
+        part = artifact if isinstance(artifact, types.Part) else types.Part.model_validate(artifact)
+        digest = size = None
+        if part.inline_data is not None:
+            mime_type, part_json = part.inline_data.mime_type, None
+            data = part.inline_data.data or b""
+            #Hashing and writing a large file would hold up the event loop
+            digest, size, existed = await asyncio.to_thread(self._write_object, data)
+            if existed:
+                metrics.ARTIFACT_DEDUP_HITS.inc()
+        elif part.text is not None:
+            mime_type, part_json = "text/plain", part.model_dump_json(exclude_none = True)
+        elif part.file_data is not None:
+            mime_type, part_json = part.file_data.mime_type, part.model_dump_json(exclude_none = True)
+        else:
+            raise ValueError("Not supported artifact type.")
+        metadata = json.dumps(custom_metadata) if custom_metadata else None
+        touched, self._touched = self._touched, {}
+
+        def write(conn: sqlite3.Connection) -> tuple[int, list[str], int]:
+            now = time.time()
+            conn.executemany(_TOUCH_OBJECT, [(used, touched_digest) for touched_digest, used in touched.items()])
+            if digest is not None:
+                #A delete may have unlinked the file we found since; nobody can now (we hold the write lock)
+                if not self._object_path(digest).exists():
+                    self._write_object(data)
+                conn.execute(_UPSERT_OBJECT, (digest, size, now))
+            (version,) = conn.execute(_NEXT_VERSION, (app_name, user_id, scope, filename)).fetchone()
+            conn.execute(
+                _INSERT_VERSION,
+                (app_name, user_id, scope, filename, version, mime_type, digest, part_json, metadata, now),
+            )
+            return version, *self._collect(conn, keep = digest)
+
+        version, evicted, total = await self.db.write(write)
+        metrics.ARTIFACT_STORE_BYTES.set(total)
+        await self._unlink(evicted, "size")
+        return version
+
+    async def load_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> Optional[types.Part]:
+        row = await self._select(app_name, user_id, filename, session_id, version)
+        if row is None:
+            return None
+        mime_type, digest, part_json = row
+        if part_json is not None:
+            return types.Part.model_validate_json(part_json)
+        #types.Blob holds bytes: one copy, straight out of the mapped page cache
+        data = await asyncio.to_thread(self._read_object, digest, True)
+        if data is None:
+            return None
+        return types.Part(inline_data = types.Blob(mime_type = mime_type, data = data))
+
+    async def open_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> Optional[memoryview]:
+        """
+        Like load_artifact, but returns a read-only view of the memory-mapped content
+        (nothing is copied; pages are read from disk as they are touched). Only for
+        inline-data artifacts; None for others and for missing ones.
+        """
+        row = await self._select(app_name, user_id, filename, session_id, version)
+        if row is None or row[1] is None:
+            return None
+        return await asyncio.to_thread(self._read_object, row[1], False)
+
+    async def list_artifact_keys(self, *, app_name: str, user_id: str, session_id: Optional[str] = None) -> list[str]:
+        rows = await self.db.read(lambda conn: conn.execute(_LIST_KEYS, (app_name, user_id, session_id or "")).fetchall())
+        return sorted(filename for (filename,) in rows)
+
+    async def delete_artifact(self, *, app_name: str, user_id: str, filename: str, session_id: Optional[str] = None) -> None:
+        scope = self._scope(filename, session_id)
+
+        def write(conn: sqlite3.Connection) -> list[str]:
+            digests = [digest for (digest,) in conn.execute(_SELECT_FILE_DIGESTS, (app_name, user_id, scope, filename))]
+            conn.execute(_DELETE_FILE, (app_name, user_id, scope, filename))
+            #Objects still referenced by other artifacts (the same content elsewhere) stay
+            orphans = [digest for digest in digests if conn.execute(_IS_REFERENCED, (digest,)).fetchone() is None]
+            conn.executemany(_DELETE_OBJECT, [(digest,) for digest in orphans])
+            return orphans
+
+        await self._unlink(await self.db.write(write), "deleted")
+
+    async def list_versions(self, *, app_name: str, user_id: str, filename: str, session_id: Optional[str] = None) -> list[int]:
+        return [v.version for v in await self.list_artifact_versions(
+            app_name = app_name, user_id = user_id, filename = filename, session_id = session_id
+        )]
+
+    async def list_artifact_versions(
+        self, *, app_name: str, user_id: str, filename: str, session_id: Optional[str] = None
+    ) -> list[ArtifactVersion]:
+        scope = self._scope(filename, session_id)
+        rows = await self.db.read(lambda conn: conn.execute(_LIST_VERSIONS, (app_name, user_id, scope, filename)).fetchall())
+        return [
+            ArtifactVersion(
+                version = version,
+                canonical_uri = self._object_path(digest).as_uri() if digest else self._uri(app_name, user_id, scope, filename, version),
+                custom_metadata = json.loads(metadata) if metadata else {},
+                create_time = create_time,
+                mime_type = mime_type,
+            )
+            for version, mime_type, digest, metadata, create_time in rows
+        ]
+
+    async def get_artifact_version(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> Optional[ArtifactVersion]:
+        versions = await self.list_artifact_versions(app_name = app_name, user_id = user_id, filename = filename, session_id = session_id)
+        if not versions:
+            return None
+        if version is None:
+            return versions[-1]
+        return next((v for v in versions if v.version == version), None)
+
+    #The (mime_type, digest, part) row of one version (the latest if version is None)
+    async def _select(self, app_name: str, user_id: str, filename: str, session_id: Optional[str], version: Optional[int]):
+        scope = self._scope(filename, session_id)
+
+        def read(conn: sqlite3.Connection):
+            if version is None:
+                return conn.execute(_SELECT_LATEST_VERSION, (app_name, user_id, scope, filename)).fetchone()
+            return conn.execute(_SELECT_VERSION, (app_name, user_id, scope, filename, version)).fetchone()
+
+        return await self.db.read(read)
+
+    #Deletes least recently used objects (and their versions) until the total fits max_bytes
+    #(runs inside the save's transaction; returns the digests whose files can go, and the new total)
+    def _collect(self, conn: sqlite3.Connection, keep: str | None) -> tuple[list[str], int]:
+        (total,) = conn.execute(_TOTAL_SIZE).fetchone()
+        evicted = []
+        if self.max_bytes is not None and total > self.max_bytes:
+            for digest, size in conn.execute(_LRU_OBJECTS).fetchall():
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue  # Never the content that is being saved right now
+                conn.execute(_DELETE_OBJECT_VERSIONS, (digest,))
+                conn.execute(_DELETE_OBJECT, (digest,))
+                total -= size
+                evicted.append(digest)
+        return evicted, total
+
+    #Deletes the files of objects the index no longer has; in a write transaction of its own, so a
+    #save that indexed the same content again since (and found the file) keeps it
+    async def _unlink(self, digests: list[str], reason: str) -> None:
+        if not digests:
+            return
+        def unlink(conn: sqlite3.Connection) -> int:
+            removed = 0
+            for digest in digests:
+                if conn.execute(_OBJECT_EXISTS, (digest,)).fetchone() is None:
+                    self._object_path(digest).unlink(missing_ok = True)
+                    removed += 1
+            return removed
+        metrics.ARTIFACT_OBJECTS_REMOVED.labels(reason).inc(await self.db.write(unlink))
+
+    #Stores content under its hash unless an object with that hash exists; returns (digest, size, existed)
+    def _write_object(self, data: bytes) -> tuple[str, int, bool]:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            return digest, len(data), True
+        path.parent.mkdir(exist_ok = True)
+        temp = path.with_name(f".{digest}.{uuid4().hex}")
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)  # Atomic: readers see no file or the whole file
+        return digest, len(data), False
+
+    #The content of an object as bytes (copy) or as a read-only view of its mapping; None if it is gone
+    def _read_object(self, digest: str, copy: bool) -> bytes | memoryview | None:
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b"" if copy else memoryview(b"")
+                mapped = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None  # Collected (e.g. by another worker) after the index was read
+        self._touched[digest] = time.time()
+        if not copy:
+            return memoryview(mapped)  # The mapping lives as long as the view
+        with mapped:
+            return mapped[:]
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    #'' for user-scoped ("user:...") artifacts, else the session ID (required)
+    @staticmethod
+    def _scope(filename: str, session_id: Optional[str]) -> str:
+        if filename.startswith("user:"):
+            return ""
+        if not session_id:
+            raise ValueError("Session ID must be provided for session-scoped artifacts.")
+        return session_id
+
+    @staticmethod
+    def _uri(app_name: str, user_id: str, scope: str, filename: str, version: int) -> str:
+        session = f"/sessions/{scope}" if scope else ""
+        return f"artifact://apps/{app_name}/users/{user_id}{session}/artifacts/{filename}/versions/{version}"
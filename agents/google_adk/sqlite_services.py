@@ -0,0 +1,641 @@
+#  Purpose:
+# Durable replacements for ADK's InMemorySessionService, InMemoryMemoryService and
+# InMemoryArtifactService, all stored in one local SQLite file.
+#
+# - Sessions survive restarts and are shared by every worker process on the machine
+# - Events are stored incrementally: append_event writes one row and updates the
+#   small session row; nothing else of the session is read or rewritten
+# - Events are loaded lazily: get_session reads only the newest `max_events` events
+#   (starting at a user turn), so a long conversation doesn't make every turn slower
+# - Compaction: sessions keep at most `keep_events` events; older turns are deleted
+#   (and, with a memory service, kept searchable there). Session state is stored
+#   separately, so nothing in it is lost
+# - Memory search uses SQLite full-text search (FTS5) instead of scanning every event
+#
+# Writes go through server/sqlite_db.py (one writer thread, group commit); reads run on
+# reader threads, so the event loop never waits on disk.
+#
+# Usage:
+#   db = SQLiteDatabase("adk.db", ADK_SCHEMA)
+#   memory = SQLiteMemoryService(db)
+#   Runner(..., session_service=SQLiteSessionService(db, memory=memory),
+#          memory_service=memory, artifact_service=SQLiteArtifactService(db))
+
+
+import json
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Optional, Union
+from uuid import uuid4
+
+from google.adk.artifacts.base_artifact_service import ArtifactVersion, BaseArtifactService
+from google.adk.events import Event
+from google.adk.memory.base_memory_service import BaseMemoryService, SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.sessions import Session
+from google.adk.sessions.base_session_service import BaseSessionService, GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+from google.genai import types
+from pydantic_core import to_json
+
+from server.sqlite_db import SQLiteDatabase
+
+
+# -----------------------------------------------------------------------------
+# SQL (constant strings, so sqlite3 prepares each of them once per connection)
+# -----------------------------------------------------------------------------
+
+ADK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS adk_sessions (
+    app_name    TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    state       TEXT NOT NULL,        -- Session-scoped state as JSON (app: / user: state live below)
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    next_seq    INTEGER NOT NULL,     -- seq of the next event
+    first_seq   INTEGER NOT NULL,     -- seq of the oldest stored event (older ones were compacted)
+    PRIMARY KEY (app_name, user_id, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS adk_sessions_updated ON adk_sessions (app_name, update_time);
+CREATE TABLE IF NOT EXISTS adk_events (
+    app_name   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq        INTEGER NOT NULL,      -- 0, 1, 2, ... in session order
+    event_id   TEXT NOT NULL,
+    author     TEXT NOT NULL,
+    timestamp  REAL NOT NULL,
+    body       TEXT NOT NULL,         -- Event as JSON
+    PRIMARY KEY (app_name, user_id, session_id, seq)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS adk_events_id ON adk_events (app_name, user_id, session_id, event_id);
+CREATE TABLE IF NOT EXISTS adk_app_state (
+    app_name TEXT PRIMARY KEY,
+    state    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS adk_user_state (
+    app_name TEXT NOT NULL,
+    user_id  TEXT NOT NULL,
+    state    TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+CREATE TABLE IF NOT EXISTS adk_memory (
+    app_name   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    event_id   TEXT NOT NULL,
+    author     TEXT,
+    timestamp  REAL NOT NULL,
+    content    TEXT NOT NULL,         -- types.Content as JSON
+    UNIQUE (app_name, user_id, session_id, event_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS adk_memory_text USING fts5 (text);  -- rowid = adk_memory.rowid
+CREATE TABLE IF NOT EXISTS adk_artifacts (
+    app_name        TEXT NOT NULL,
+    user_id         TEXT NOT NULL,
+    scope           TEXT NOT NULL,    -- Session ID, or '' for user-scoped ("user:...") artifacts
+    filename        TEXT NOT NULL,
+    version         INTEGER NOT NULL,
+    mime_type       TEXT,
+    data            BLOB,             -- inline_data bytes
+    part            TEXT,             -- Any other Part (text, file_data) as JSON
+    custom_metadata TEXT,
+    create_time     REAL NOT NULL,
+    UNIQUE (app_name, user_id, scope, filename, version)
+);
+"""
+
+_SELECT_SESSION = "SELECT state, update_time, next_seq, first_seq FROM adk_sessions WHERE app_name = ? AND user_id = ? AND id = ?"
+_INSERT_SESSION = (
+    "INSERT INTO adk_sessions (app_name, user_id, id, state, create_time, update_time, next_seq, first_seq)"
+    " VALUES (?, ?, ?, ?, ?, ?, 0, 0)"
+)
+_UPDATE_SESSION = (
+    "UPDATE adk_sessions SET state = ?, update_time = ?, next_seq = next_seq + 1"
+    " WHERE app_name = ? AND user_id = ? AND id = ?"
+)
+_SET_FIRST_SEQ = "UPDATE adk_sessions SET first_seq = ? WHERE app_name = ? AND user_id = ? AND id = ?"
+_LIST_SESSIONS = "SELECT user_id, id, state, update_time FROM adk_sessions WHERE app_name = ? ORDER BY update_time, user_id, id"
+_LIST_USER_SESSIONS = (
+    "SELECT user_id, id, state, update_time FROM adk_sessions WHERE app_name = ? AND user_id = ? ORDER BY update_time, id"
+)
+_DELETE_SESSION = "DELETE FROM adk_sessions WHERE app_name = ? AND user_id = ? AND id = ?"
+_DELETE_SESSION_EVENTS = "DELETE FROM adk_events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+
+_INSERT_EVENT = (
+    "INSERT OR IGNORE INTO adk_events (app_name, user_id, session_id, seq, event_id, author, timestamp, body)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_SELECT_EVENTS = (
+    "SELECT body FROM adk_events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+    " AND seq >= ? AND seq < ? AND timestamp >= ? ORDER BY seq"
+)
+_SELECT_EVENT_ROWS = (
+    "SELECT event_id, author, timestamp, body FROM adk_events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+    " AND seq >= ? AND seq < ? ORDER BY seq"
+)
+#First user message at or after a given seq (where a turn starts)
+_SELECT_TURN_START = (
+    "SELECT MIN(seq) FROM adk_events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+    " AND seq >= ? AND seq < ? AND author = 'user'"
+)
+_DELETE_EVENTS_BEFORE = "DELETE FROM adk_events WHERE app_name = ? AND user_id = ? AND session_id = ? AND seq < ?"
+
+_SELECT_APP_STATE = "SELECT state FROM adk_app_state WHERE app_name = ?"
+_UPSERT_APP_STATE = (
+    "INSERT INTO adk_app_state (app_name, state) VALUES (?, ?) ON CONFLICT (app_name) DO UPDATE SET state = excluded.state"
+)
+_SELECT_USER_STATE = "SELECT state FROM adk_user_state WHERE app_name = ? AND user_id = ?"
+_UPSERT_USER_STATE = (
+    "INSERT INTO adk_user_state (app_name, user_id, state) VALUES (?, ?, ?)"
+    " ON CONFLICT (app_name, user_id) DO UPDATE SET state = excluded.state"
+)
+
+_INSERT_MEMORY = (
+    "INSERT OR IGNORE INTO adk_memory (app_name, user_id, session_id, event_id, author, timestamp, content)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_MEMORY_TEXT = "INSERT INTO adk_memory_text (rowid, text) VALUES (?, ?)"
+_SEARCH_MEMORY = (
+    "SELECT m.author, m.timestamp, m.content FROM adk_memory_text"
+    " JOIN adk_memory AS m ON m.rowid = adk_memory_text.rowid"
+    " WHERE adk_memory_text MATCH ? AND m.app_name = ? AND m.user_id = ?"
+    " ORDER BY bm25(adk_memory_text) LIMIT ?"
+)
+
+_SELECT_ARTIFACT = (
+    "SELECT version, mime_type, data, part FROM adk_artifacts"
+    " WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? AND version = ?"
+)
+_SELECT_LATEST_ARTIFACT = (
+    "SELECT version, mime_type, data, part FROM adk_artifacts"
+    " WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? ORDER BY version DESC LIMIT 1"
+)
+_NEXT_ARTIFACT_VERSION = (
+    "SELECT COALESCE(MAX(version) + 1, 0) FROM adk_artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?"
+)
+_INSERT_ARTIFACT = (
+    "INSERT INTO adk_artifacts (app_name, user_id, scope, filename, version, mime_type, data, part, custom_metadata, create_time)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_LIST_ARTIFACT_KEYS = "SELECT DISTINCT filename FROM adk_artifacts WHERE app_name = ? AND user_id = ? AND scope IN (?, '')"
+_LIST_ARTIFACT_VERSIONS = (
+    "SELECT version, mime_type, custom_metadata, create_time FROM adk_artifacts"
+    " WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ? ORDER BY version"
+)
+_DELETE_ARTIFACT = "DELETE FROM adk_artifacts WHERE app_name = ? AND user_id = ? AND scope = ? AND filename = ?"
+
+
+#Opens the shared database file (creating the tables) unless an open one is passed in
+def _database(db: SQLiteDatabase | str) -> SQLiteDatabase:
+    return db if isinstance(db, SQLiteDatabase) else SQLiteDatabase(db, ADK_SCHEMA, name="sqlite-adk")
+
+
+#State values as JSON (datetimes, pydantic models etc. included; anything else as its str())
+def _dump_state(state: dict[str, Any]) -> str:
+    return to_json(state, fallback=str).decode()
+
+
+#Splits a state dict (or delta) into its app:, user: and session parts (temp: is never stored)
+def _split_state(state: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key.removeprefix(State.APP_PREFIX)] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key.removeprefix(State.USER_PREFIX)] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+#Joins the text parts of a Content (what memory search matches on)
+def _content_text(content: types.Content | None) -> str:
+    if content is None or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+# -----------------------------------------------------------------------------
+# Sessions
+# -----------------------------------------------------------------------------
+
+class SQLiteSessionService(BaseSessionService):
+    """
+    💾 ADK session service persisted in SQLite.
+
+    Args:
+        db: An open SQLiteDatabase (shared with the other services) or a file path
+        max_events: Events get_session loads when the caller doesn't ask for a number
+                    (the newest ones, from the start of a user turn; None = all stored events)
+        keep_events: Events stored per session; older turns are compacted away (None = keep all)
+        memory: Where compacted events go, so they stay searchable (None = just delete them)
+    """
+
+    def __init__(
+        self,
+        db: SQLiteDatabase | str,
+        max_events: int | None = 100,
+        keep_events: int | None = 1000,
+        memory: "SQLiteMemoryService | None" = None,
+    ):
+        self.db = _database(db)
+        self.max_events = max_events
+        self.keep_events = keep_events
+        self.memory = memory
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or uuid4().hex
+        app_delta, user_delta, session_state = _split_state(state or {})
+
+        def write(conn: sqlite3.Connection) -> None:
+            if conn.execute(_SELECT_SESSION, (app_name, user_id, session_id)).fetchone() is not None:
+                raise ValueError(f"Session with id {session_id} already exists.")
+            now = time.time()
+            conn.execute(_INSERT_SESSION, (app_name, user_id, session_id, _dump_state(session_state), now, now))
+            self._apply_shared_state(conn, app_name, user_id, app_delta, user_delta)
+
+        await self.db.write(write)
+        #Read back once committed (the state includes app: / user: state set by other sessions)
+        return await self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=GetSessionConfig(num_recent_events=0)
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        """
+        Loads the session, its merged state and its newest events.
+
+        config.num_recent_events: exactly this many events (0 = none, e.g. just to check it exists)
+        config.after_timestamp: only events at or after this time
+        Neither: the newest `max_events` events, starting at a user message
+        """
+        num_recent = config.num_recent_events if config is not None else None
+        after = (config.after_timestamp if config is not None else None) or 0.0
+        return await self.db.read(lambda conn: self._load(conn, app_name, user_id, session_id, num_recent, after))
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        def read(conn: sqlite3.Connection) -> ListSessionsResponse:
+            if user_id is None:
+                rows = conn.execute(_LIST_SESSIONS, (app_name,)).fetchall()
+            else:
+                rows = conn.execute(_LIST_USER_SESSIONS, (app_name, user_id)).fetchall()
+            app_state = self._read_state(conn, _SELECT_APP_STATE, (app_name,))
+            user_states: dict[str, dict[str, Any]] = {}
+            sessions = []
+            for uid, sid, state_json, update_time in rows:
+                if uid not in user_states:
+                    user_states[uid] = self._read_state(conn, _SELECT_USER_STATE, (app_name, uid))
+                state = self._merge_state(json.loads(state_json), app_state, user_states[uid])
+                sessions.append(Session(id=sid, app_name=app_name, user_id=uid, state=state, last_update_time=update_time))
+            return ListSessionsResponse(sessions=sessions)
+
+        return await self.db.read(read)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute(_DELETE_SESSION_EVENTS, (app_name, user_id, session_id))
+            conn.execute(_DELETE_SESSION, (app_name, user_id, session_id))
+
+        await self.db.write(write)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> dict[str, Any]:
+        return await self.db.read(lambda conn: self._read_state(conn, _SELECT_USER_STATE, (app_name, user_id)))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        """Adds the event to `session` (in memory) and stores it as one new row."""
+        if event.partial:
+            return event
+        #Applies temp: state, drops it from the delta, updates session.state and session.events
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        delta = event.actions.state_delta if event.actions and event.actions.state_delta else {}
+        app_delta, user_delta, session_delta = _split_state(delta)
+        body = event.model_dump_json(exclude_none=True)
+        app_name, user_id, session_id = session.app_name, session.user_id, session.id
+
+        def write(conn: sqlite3.Connection) -> None:
+            row = conn.execute(_SELECT_SESSION, (app_name, user_id, session_id)).fetchone()
+            if row is None:
+                raise ValueError(f"Session {session_id} not found.")
+            state_json, _, next_seq, first_seq = row
+            inserted = conn.execute(
+                _INSERT_EVENT, (app_name, user_id, session_id, next_seq, event.id, event.author, event.timestamp, body)
+            ).rowcount
+            if not inserted:
+                return  # The same event delivered twice: already stored, state already applied
+            if session_delta:
+                state = json.loads(state_json)
+                state.update(session_delta)
+                state_json = _dump_state(state)
+            conn.execute(_UPDATE_SESSION, (state_json, event.timestamp, app_name, user_id, session_id))
+            self._apply_shared_state(conn, app_name, user_id, app_delta, user_delta)
+
+            #Compact in steps of a quarter of keep_events, so it runs on few appends
+            if self.keep_events is not None and next_seq + 1 - first_seq > self.keep_events + max(1, self.keep_events // 4):
+                self._compact(conn, app_name, user_id, session_id, next_seq + 1, self.keep_events)
+
+        await self.db.write(write)
+        return event
+
+    async def compact_session(self, *, app_name: str, user_id: str, session_id: str, keep_events: int) -> int:
+        """Deletes all but (about) the newest `keep_events` events of a session. Returns how many were deleted."""
+        def write(conn: sqlite3.Connection) -> int:
+            row = conn.execute(_SELECT_SESSION, (app_name, user_id, session_id)).fetchone()
+            if row is None:
+                return 0
+            return self._compact(conn, app_name, user_id, session_id, row[2], keep_events)
+
+        return await self.db.write(write)
+
+    # -------------------------------------------------------------------------
+    # Internals (run on the database threads)
+    # -------------------------------------------------------------------------
+
+    def _load(
+        self, conn: sqlite3.Connection, app_name: str, user_id: str, session_id: str, num_recent: int | None, after: float
+    ) -> Session | None:
+        row = conn.execute(_SELECT_SESSION, (app_name, user_id, (session_id or "").strip())).fetchone()
+        if row is None:
+            return None
+        state_json, update_time, next_seq, first_seq = row
+
+        limit = num_recent if num_recent is not None else self.max_events
+        start = first_seq if limit is None else max(first_seq, next_seq - limit)
+        if num_recent is None and limit is not None and start > first_seq:
+            #Don't start halfway through a turn (e.g. at a tool response without its call)
+            start = self._turn_start(conn, app_name, user_id, session_id, start, next_seq)
+        events = []
+        if limit != 0 and start < next_seq:
+            #Events are append-only, so rows below `next_seq` can be read without a transaction
+            events = [
+                Event.model_validate_json(body)
+                for (body,) in conn.execute(_SELECT_EVENTS, (app_name, user_id, session_id, start, next_seq, after))
+            ]
+
+        state = self._merge_state(
+            json.loads(state_json),
+            self._read_state(conn, _SELECT_APP_STATE, (app_name,)),
+            self._read_state(conn, _SELECT_USER_STATE, (app_name, user_id)),
+        )
+        return Session(id=session_id, app_name=app_name, user_id=user_id, state=state, events=events, last_update_time=update_time)
+
+    #The seq of the first user message at or after `seq` (or `seq` itself if there is none)
+    @staticmethod
+    def _turn_start(conn: sqlite3.Connection, app_name: str, user_id: str, session_id: str, seq: int, end: int) -> int:
+        (turn,) = conn.execute(_SELECT_TURN_START, (app_name, user_id, session_id, seq, end)).fetchone()
+        return turn if turn is not None else seq
+
+    def _compact(self, conn: sqlite3.Connection, app_name: str, user_id: str, session_id: str, next_seq: int, keep: int) -> int:
+        cutoff = self._turn_start(conn, app_name, user_id, session_id, max(0, next_seq - keep), next_seq)
+        if self.memory is not None:
+            rows = conn.execute(_SELECT_EVENT_ROWS, (app_name, user_id, session_id, 0, cutoff)).fetchall()
+            self.memory._insert(conn, app_name, user_id, session_id, [
+                (event_id, author, timestamp, Event.model_validate_json(body).content)
+                for event_id, author, timestamp, body in rows
+            ])
+        deleted = conn.execute(_DELETE_EVENTS_BEFORE, (app_name, user_id, session_id, cutoff)).rowcount
+        conn.execute(_SET_FIRST_SEQ, (cutoff, app_name, user_id, session_id))
+        return deleted
+
+    @staticmethod
+    def _read_state(conn: sqlite3.Connection, sql: str, params: tuple) -> dict[str, Any]:
+        row = conn.execute(sql, params).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    @staticmethod
+    def _merge_state(session_state: dict[str, Any], app_state: dict[str, Any], user_state: dict[str, Any]) -> dict[str, Any]:
+        state = dict(session_state)
+        state.update({State.APP_PREFIX + key: value for key, value in app_state.items()})
+        state.update({State.USER_PREFIX + key: value for key, value in user_state.items()})
+        return state
+
+    def _apply_shared_state(
+        self, conn: sqlite3.Connection, app_name: str, user_id: str, app_delta: dict[str, Any], user_delta: dict[str, Any]
+    ) -> None:
+        if app_delta:
+            state = self._read_state(conn, _SELECT_APP_STATE, (app_name,))
+            state.update(app_delta)
+            conn.execute(_UPSERT_APP_STATE, (app_name, _dump_state(state)))
+        if user_delta:
+            state = self._read_state(conn, _SELECT_USER_STATE, (app_name, user_id))
+            state.update(user_delta)
+            conn.execute(_UPSERT_USER_STATE, (app_name, user_id, _dump_state(state)))
+
+
+# -----------------------------------------------------------------------------
+# Memory
+# -----------------------------------------------------------------------------
+
+class SQLiteMemoryService(BaseMemoryService):
+    """
+    🧠 ADK memory service persisted in SQLite, searched with FTS5 full-text search.
+
+    Args:
+        db: An open SQLiteDatabase (shared with the other services) or a file path
+        max_results: Memories returned per search (best matches first)
+    """
+
+    def __init__(self, db: SQLiteDatabase | str, max_results: int = 10):
+        self.db = _database(db)
+        self.max_results = max_results
+
+    async def add_session_to_memory(self, session: Session) -> None:
+        #Adding a session again only stores the events that are new since last time
+        await self.add_events_to_memory(
+            app_name=session.app_name, user_id=session.user_id, events=session.events, session_id=session.id
+        )
+
+    async def add_events_to_memory(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        events,
+        session_id: str | None = None,
+        custom_metadata=None,
+    ) -> None:
+        rows = [(event.id, event.author, event.timestamp, event.content) for event in events]
+        await self.db.write(lambda conn: self._insert(conn, app_name, user_id, session_id or "", rows))
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        words = [word for word in query.split() if word.strip('"')]
+        if not words:
+            return SearchMemoryResponse()
+        #Any of the words, best matches (BM25) first; quoting keeps FTS5 syntax out of user text
+        match = " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+        def read(conn: sqlite3.Connection) -> list[tuple]:
+            return conn.execute(_SEARCH_MEMORY, (match, app_name, user_id, self.max_results)).fetchall()
+
+        rows = await self.db.read(read)
+        return SearchMemoryResponse(memories=[
+            MemoryEntry(
+                content=types.Content.model_validate_json(content),
+                author=author,
+                timestamp=datetime.fromtimestamp(timestamp).isoformat(),
+            )
+            for author, timestamp, content in rows
+        ])
+
+    #Stores events with text content (writer thread; also used by session compaction)
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, app_name: str, user_id: str, session_id: str, rows: list[tuple]) -> None:
+        for event_id, author, timestamp, content in rows:
+            text = _content_text(content)
+            if not text:
+                continue
+            cursor = conn.execute(
+                _INSERT_MEMORY,
+                (app_name, user_id, session_id, event_id, author, timestamp, content.model_dump_json(exclude_none=True)),
+            )
+            if cursor.rowcount:
+                conn.execute(_INSERT_MEMORY_TEXT, (cursor.lastrowid, text))
+
+
+# -----------------------------------------------------------------------------
+# Artifacts
+# -----------------------------------------------------------------------------
+
+class SQLiteArtifactService(BaseArtifactService):
+    """
+    🗃️ ADK artifact service persisted in SQLite (every save is a new version).
+
+    Filenames starting with "user:" are user-scoped, all others belong to a session.
+    """
+
+    def __init__(self, db: SQLiteDatabase | str):
+        self.db = _database(db)
+
+    async def save_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        artifact: Union[types.Part, dict[str, Any]],
+        session_id: Optional[str] = None,
+        custom_metadata: Optional[dict[str, Any]] = None,
+    ) -> int:
+        scope = self._scope(filename, session_id)
+        part = artifact if isinstance(artifact, types.Part) else types.Part.model_validate(artifact)
+        if part.inline_data is not None:
+            mime_type, data, part_json = part.inline_data.mime_type, part.inline_data.data, None
+        elif part.text is not None:
+            mime_type, data, part_json = "text/plain", None, part.model_dump_json(exclude_none=True)
+        elif part.file_data is not None:
+            mime_type, data, part_json = part.file_data.mime_type, None, part.model_dump_json(exclude_none=True)
+        else:
+            raise ValueError("Not supported artifact type.")
+        metadata = json.dumps(custom_metadata) if custom_metadata else None
+
+        def write(conn: sqlite3.Connection) -> int:
+            (version,) = conn.execute(_NEXT_ARTIFACT_VERSION, (app_name, user_id, scope, filename)).fetchone()
+            conn.execute(
+                _INSERT_ARTIFACT,
+                (app_name, user_id, scope, filename, version, mime_type, data, part_json, metadata, time.time()),
+            )
+            return version
+
+        return await self.db.write(write)
+
+    async def load_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> Optional[types.Part]:
+        scope = self._scope(filename, session_id)
+
+        def read(conn: sqlite3.Connection):
+            if version is None:
+                return conn.execute(_SELECT_LATEST_ARTIFACT, (app_name, user_id, scope, filename)).fetchone()
+            return conn.execute(_SELECT_ARTIFACT, (app_name, user_id, scope, filename, version)).fetchone()
+
+        row = await self.db.read(read)
+        if row is None:
+            return None
+        _, mime_type, data, part_json = row
+        if part_json is not None:
+            return types.Part.model_validate_json(part_json)
+        return types.Part(inline_data=types.Blob(mime_type=mime_type, data=data))
+
+    async def list_artifact_keys(self, *, app_name: str, user_id: str, session_id: Optional[str] = None) -> list[str]:
+        rows = await self.db.read(lambda conn: conn.execute(_LIST_ARTIFACT_KEYS, (app_name, user_id, session_id or "")).fetchall())
+        return sorted(filename for (filename,) in rows)
+
+    async def delete_artifact(self, *, app_name: str, user_id: str, filename: str, session_id: Optional[str] = None) -> None:
+        scope = self._scope(filename, session_id)
+        await self.db.write(lambda conn: conn.execute(_DELETE_ARTIFACT, (app_name, user_id, scope, filename)))
+
+    async def list_versions(self, *, app_name: str, user_id: str, filename: str, session_id: Optional[str] = None) -> list[int]:
+        return [v.version for v in await self.list_artifact_versions(
+            app_name=app_name, user_id=user_id, filename=filename, session_id=session_id
+        )]
+
+    async def list_artifact_versions(
+        self, *, app_name: str, user_id: str, filename: str, session_id: Optional[str] = None
+    ) -> list[ArtifactVersion]:
+        scope = self._scope(filename, session_id)
+        rows = await self.db.read(
+            lambda conn: conn.execute(_LIST_ARTIFACT_VERSIONS, (app_name, user_id, scope, filename)).fetchall()
+        )
+        return [
+            ArtifactVersion(
+                version=version,
+                canonical_uri=self._uri(app_name, user_id, scope, filename, version),
+                custom_metadata=json.loads(metadata) if metadata else {},
+                create_time=create_time,
+                mime_type=mime_type,
+            )
+            for version, mime_type, metadata, create_time in rows
+        ]
+
+    async def get_artifact_version(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> Optional[ArtifactVersion]:
+        versions = await self.list_artifact_versions(app_name=app_name, user_id=user_id, filename=filename, session_id=session_id)
+        if not versions:
+            return None
+        if version is None:
+            return versions[-1]
+        return next((v for v in versions if v.version == version), None)
+
+    #'' for user-scoped ("user:...") artifacts, else the session ID (required)
+    @staticmethod
+    def _scope(filename: str, session_id: Optional[str]) -> str:
+        if filename.startswith("user:"):
+            return ""
+        if not session_id:
+            raise ValueError("Session ID must be provided for session-scoped artifacts.")
+        return session_id
+
+    @staticmethod
+    def _uri(app_name: str, user_id: str, scope: str, filename: str, version: int) -> str:
+        session = f"/sessions/{scope}" if scope else ""
+        return f"sqlite://apps/{app_name}/users/{user_id}{session}/artifacts/{filename}/versions/{version}"
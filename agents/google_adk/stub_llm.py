@@ -0,0 +1,156 @@
+#agents/google_adk/stub_llm.py
+#  Purpose:
+# A fake, fully local LLM for TellTimeAgent, so the whole server path
+# (A2A server → task manager → ADK Runner → model) can be load-tested and profiled
+# without network access or an API quota.
+#
+# - It is a real ADK `BaseLlm`, so requests still go through `Runner.run_async`
+#   (sessions, events, streaming) exactly like with Gemini
+# - Deterministic: it answers with the "Current time is ..." value TellTimeAgent puts
+#   into every prompt (or a fixed reply if there is none); a micro-batched prompt
+#   ("Question 1: ...", "Question 2: ...") gets a JSON array with one answer per question
+# - Tunable: time to first token, tokens per second and tokens per streamed chunk, and
+#   optionally a prompt processing speed, so long prompts answer more slowly like real models,
+#   and a limit of concurrent calls (like a backend with a fixed number of slots)
+#
+# Selected with a model spec string (CLI `--model` or env var TELL_TIME_MODEL):
+#
+#   stub                                            defaults below
+#   stub:latency_ms=200,tokens_per_s=50,chunk_tokens=2
+#   stub:latency_ms=50,prompt_tokens_per_s=5000     time to first token grows with the prompt
+#   stub:latency_ms=100,max_concurrent=4            at most 4 calls at once, the others queue
+
+
+import asyncio
+import json
+import re
+from typing import AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+
+#Prefix of every stub model spec
+STUB_PREFIX = "stub"
+
+#Finds the time TellTimeAgent._build_content adds to the prompt
+_CURRENT_TIME = re.compile(r"Current time is (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+#A "token" is a word plus the whitespace after it (close enough for rate limiting)
+_TOKEN = re.compile(r"\S+\s*")
+#One question of a micro-batched prompt (TellTimeAgent._build_batch_content)
+_BATCH_QUESTION = re.compile(r"^Question \d+:")
+
+
+class StubLlm(BaseLlm):
+    """
+    🧪 Deterministic local stand-in for Gemini.
+
+    Fields:
+        latency_ms: Time to first token
+        tokens_per_s: Generation speed after the first token (0 = instant)
+        chunk_tokens: Tokens per partial response when streaming
+        reply: Answer used when the prompt carries no current time
+        prompt_tokens_per_s: Prompt processing speed, added to the time to first token (0 = instant)
+        max_concurrent: Calls served at once, the others wait (0 = unlimited)
+    """
+
+    model: str = STUB_PREFIX
+    latency_ms: float = 100.0
+    tokens_per_s: float = 100.0
+    chunk_tokens: int = 1
+    reply: str = "The current time is unknown."
+    prompt_tokens_per_s: float = 0.0
+    max_concurrent: int = 0
+
+    _slots: asyncio.Semaphore | None = PrivateAttr(default = None)
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "StubLlm":
+        """Builds a stub from "stub" or "stub:key=value,key=value"."""
+        name, _, options = spec.partition(":")
+        if name != STUB_PREFIX:
+            raise ValueError(f"Not a stub model spec: {spec!r}")
+        fields = {}
+        for option in filter(None, options.split(",")):
+            key, sep, value = option.partition("=")
+            if not sep or key.strip() not in ("latency_ms", "tokens_per_s", "chunk_tokens", "reply", "prompt_tokens_per_s", "max_concurrent"):
+                raise ValueError(f"Invalid stub model option {option!r} in {spec!r}")
+            fields[key.strip()] = value.strip()
+        return cls(model=spec, **fields)  # Pydantic converts the numbers
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.max_concurrent <= 0:
+            async for response in self._respond(llm_request, stream):
+                yield response
+            return
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            async for response in self._respond(llm_request, stream):
+                yield response
+
+    async def _respond(self, llm_request: LlmRequest, stream: bool) -> AsyncGenerator[LlmResponse, None]:
+        text = self._answer(llm_request)
+        tokens = _TOKEN.findall(text) or [text]
+        prompt_tokens = self._prompt_tokens(llm_request)
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count = prompt_tokens,
+            candidates_token_count = len(tokens),
+            total_token_count = prompt_tokens + len(tokens),
+        )
+
+        prefill = prompt_tokens / self.prompt_tokens_per_s if self.prompt_tokens_per_s > 0 else 0.0
+        await asyncio.sleep(self.latency_ms / 1000 + prefill)
+
+        if stream:
+            #Partial responses carry only the new text; ADK shows them as partial events
+            step = max(self.chunk_tokens, 1)
+            for start in range(0, len(tokens), step):
+                chunk = tokens[start:start + step]
+                await self._generate(len(chunk))
+                yield LlmResponse(content=self._content("".join(chunk)), partial=True)
+        else:
+            await self._generate(len(tokens))
+
+        #The final (non-partial) response always carries the complete reply, like Gemini's
+        yield LlmResponse(content=self._content(text), usage_metadata=usage, turn_complete=True)
+
+    #Sleeps for the time it takes to "generate" n tokens
+    async def _generate(self, n: int) -> None:
+        if self.tokens_per_s > 0:
+            await asyncio.sleep(n / self.tokens_per_s)
+
+    def _answer(self, llm_request: LlmRequest) -> str:
+        for content in reversed(llm_request.contents):
+            if content.role != "user":
+                continue
+            parts = content.parts or []
+            for part in parts:
+                match = _CURRENT_TIME.search(part.text or "")
+                if match:
+                    questions = sum(1 for p in parts if _BATCH_QUESTION.match(p.text or ""))
+                    return json.dumps([match.group(1)] * questions) if questions else match.group(1)
+        return self.reply
+
+    @staticmethod
+    def _prompt_tokens(llm_request: LlmRequest) -> int:
+        return sum(
+            len(_TOKEN.findall(part.text or ""))
+            for content in llm_request.contents
+            for part in content.parts or []
+        )
+
+    @staticmethod
+    def _content(text: str) -> types.Content:
+        return types.Content(role="model", parts=[types.Part.from_text(text=text)])
+
+
+#Turns a model spec into what LlmAgent(model=...) expects: a StubLlm or a model name
+def resolve_model(spec: str) -> str | BaseLlm:
+    if spec == STUB_PREFIX or spec.startswith(STUB_PREFIX + ":"):
+        return StubLlm.from_spec(spec)
+    return spec
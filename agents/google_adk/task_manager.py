@@ -1,16 +1,31 @@
 #This fole connects Gemini powered Agent to the task handling system
 # Receives task, extracts the question("What time is it?"), asks the agent to respond, then saves and returns agent answer
 
+import asyncio
 import logging
 
+from server.log import log_event
+
 from server.task_manager import InMemoryTaskManager
+from server.task_store import TaskStore
+from server.response_cache import ResponseCache
+from server.task_queue import TaskQueue, QueueFullError
+from server.admission import AdmissionController, AdmissionRejected
+from server.blob_store import BlobStore
+from server.image_preprocess import ImagePreprocessor, PreparedImage
+from server.micro_batch import MicroBatcher
 #import the actual agent we're using
 from agents.google_adk.agent import TellTimeAgent
 
 
 #Import data models used to structure nad return tasks
-from models.request import SendTaskRequest, SendTaskResponse
-from models.task import Message, Task, TextPart, TaskStatus, TaskState
+from models.request import (
+    SendTaskRequest, SendTaskResponse,
+    SendTaskStreamingRequest, SendTaskStreamingResponse,
+)
+from models.task import Message, Task, TextPart, FilePart, TaskStatus, TaskState, TaskStatusUpdateEvent
+from models.json_rpc import ServerBusyError
+from typing import AsyncIterable
 
 
 #Logger setup
@@ -21,35 +36,204 @@ class AgentTaskManager(InMemoryTaskManager):
     #Connects gemini agent to task system
     # Uses the gemini agent to generate a response
 
-    def __init__(self, agent: TellTimeAgent):
-        super().__init__() #Calls parent class constructor
+    def __init__(
+        self,
+        agent: TellTimeAgent,
+        store: TaskStore | None = None,
+        cache: ResponseCache | None = None,
+        default_skill: str = "default",
+        skills: list[str] | None = None,
+        idempotency_window: float = 0.0,
+        task_queue: TaskQueue | None = None,
+        admission: AdmissionController | None = None,
+        image_preprocessor: ImagePreprocessor | None = None,
+        blob_store: BlobStore | None = None,
+        micro_batcher: MicroBatcher | None = None,
+    ):
+        #Calls parent class constructor (in-memory store by default, completed tasks replayed for idempotency_window seconds)
+        super().__init__(store=store, idempotency_window=idempotency_window)
         self.agent = agent #Store gemini based agent as property
+        self.cache = cache #Optional cache of replies to repeated queries (None = always ask the agent)
+        self.default_skill = default_skill #Skill assumed when a task doesn't name one in metadata["skill"]
+        #Skills a task may ask for (the agent card's); any other name counts as default_skill
+        self.skills = set(skills or ()) | {default_skill}
+        #With a task queue, tasks/send answers right away (SUBMITTED) and the agent runs in the background
+        self.task_queue = task_queue
+        #Optional global limit on agent calls running at once (extra requests wait briefly, then get 429)
+        self.admission = admission
+        #Optional: images attached as FileParts (uploaded to blob_store) are decoded, resized and
+        #re-encoded off the event loop, then handed to the agent (without it, the agent only gets text)
+        self.image_preprocessor = image_preprocessor
+        self.blob_store = blob_store
+        #Optional: tasks/send calls arriving together (same skill) share one batched model call
+        #(streams are never batched: each one streams its own reply)
+        self.micro_batcher = micro_batcher
+
+    #Stops the image preprocessing processes (a process exits only after its child processes do),
+    #then closes the agent's session and artifact stores and the task store, flushing their writes
+    def close(self) -> None:
+        if self.image_preprocessor is not None:
+            self.image_preprocessor.close()
+        #Agents without anything to close (e.g. the benchmarks' stubs) need no close()
+        close_agent = getattr(self.agent, "close", None)
+        if close_agent is not None:
+            close_agent()
+        super().close()
+
+    #Stops the task queue's workers before the stores they write to are closed; tasks they were
+    #running, or that were still queued, stay SUBMITTED / WORKING (see SQLiteTaskStore.fail_interrupted)
+    async def aclose(self) -> None:
+        if self.task_queue is not None:
+            await self.task_queue.aclose()
+        self.close()
+
+    #Extracts user query from incoming task (the text parts; files and data are not read by this agent)
+    def _get_user_query(self, request: SendTaskRequest | SendTaskStreamingRequest) -> str:
+        return request.params.message.text()
+
+    #The attached images, ready for the model (only FileParts whose content was uploaded to our /blobs)
+    async def _get_images(self, request: SendTaskRequest | SendTaskStreamingRequest) -> list[PreparedImage]:
+        if self.image_preprocessor is None or self.blob_store is None:
+            return []
+        blobs = []
+        for part in request.params.message.parts:
+            if not isinstance(part, FilePart) or not (part.file.mimeType or "").startswith("image/"):
+                continue
+            _, found, blob_id = part.file.uri.rpartition("/blobs/")
+            blob = self.blob_store.get(blob_id) if found else None
+            if blob is None:
+                #Not ours, or already evicted: the agent answers from the text alone
+                log_event(logger, logging.WARNING, "image.skipped", task_id=request.params.id, uri=part.file.uri)
+                continue
+            blobs.append(blob)
+        #Each image goes to its own worker process; the loop keeps serving other requests meanwhile
+        prepared = await asyncio.gather(*(self.image_preprocessor.prepare(blob.data) for blob in blobs), return_exceptions=True)
+        images = []
+        for blob, image in zip(blobs, prepared):
+            if isinstance(image, ValueError):
+                #Claims to be an image but isn't one Pillow can read: same as a missing image
+                log_event(logger, logging.WARNING, "image.skipped", task_id=request.params.id, blob_id=blob.id, error=str(image))
+            elif isinstance(image, BaseException):
+                raise image
+            else:
+                images.append(image)
+        return images
 
-    #Extracts user query from incoming task
-    def _get_user_query(self, request: SendTaskRequest) -> str:
-        return request.params.message.parts[0].text
+    #Which skill a task asks for (decides its cache TTL / opt-out and micro-batch); a client can't
+    #invent one (to get another skill's cache TTL, or a new metrics label per request)
+    def _get_skill(self, request: SendTaskRequest) -> str:
+        metadata = request.params.metadata or {}
+        skill = metadata.get("skill")
+        return skill if isinstance(skill, str) and skill in self.skills else self.default_skill
+
+    #Asks the agent, unless the response cache already has (or is fetching) the same answer
+    #(only real agent calls take an admission slot; cache hits and shared calls don't)
+    async def _invoke(self, request: SendTaskRequest, query: str, background: bool = False) -> str:
+        async def call_agent() -> str:
+            #Images are prepared before taking an admission slot: the slot is for the agent call only
+            images = await self._get_images(request)
+            #Agents that don't take images keep working as long as no image is attached
+            extra = {"images": images} if images else {}
+            if self.admission is None:
+                return await ask_agent(images, extra)
+            async with self.admission.slot(background):
+                return await ask_agent(images, extra)
+
+        async def ask_agent(images: list[PreparedImage], extra: dict) -> str:
+            if self.micro_batcher is not None:
+                item = (query, request.params.sessionId, images or None)
+                return await self.micro_batcher.submit(item, key = self._get_skill(request))
+            return await self.agent.invoke(query, request.params.sessionId, **extra)
+
+        if self.cache is None:
+            return await call_agent()
+        #Attached files and data are part of the question too: the same text with another image
+        #must not get a cached reply (blob URIs name the content, so equal files share entries)
+        attachments = [
+            part.file.uri if isinstance(part, FilePart) else part.model_dump_json()
+            for part in request.params.message.parts if not isinstance(part, TextPart)
+        ]
+        return await self.cache.get_or_compute(
+            self._get_skill(request),
+            query,
+            call_agent,
+            context = "\n".join([getattr(self.agent, "model", ""), *attachments]),
+            cacheable = lambda reply: reply != getattr(self.agent, "ERROR_REPLY", None),
+        )
     
     #Main Logic to handle and complete a task
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        """
+        Processes the task once (see _process_task). A retry of the same task and message
+        gets the result of the run in progress, or the stored result if it completed recently,
+        instead of asking the agent again.
+
+        With a task queue (asynchronous mode) the task is only saved and queued; the response
+        holds it in SUBMITTED state and the client polls tasks/get until it is completed.
+
+        With admission control, a request that can't get an agent slot in time is answered
+        with a ServerBusyError (HTTP 429) and the task is marked FAILED.
+        """
+        if self.task_queue is not None:
+            try:
+                task = await self.run_idempotent(
+                    request.params,
+                    lambda: self._enqueue_task(request),
+                    history_length = request.params.historyLength,
+                    attach_active = True,
+                )
+            except QueueFullError:
+                #Backpressure: the server answers HTTP 429 and the client retries later
+                return SendTaskResponse(id = request.id, error = ServerBusyError(data = {"queued": self.task_queue.depth}))
+            return SendTaskResponse(id = request.id, result = task)
+
+        try:
+            task = await self.run_idempotent(
+                request.params,
+                lambda: self._process_task(request),
+                history_length = request.params.historyLength,
+            )
+        except AdmissionRejected as e:
+            #Overloaded: answer at once with HTTP 429 instead of making every request slower
+            return SendTaskResponse(id = request.id, error = self._busy_error(e))
+
+        #Return a structured response back to the A2A Client
+        return SendTaskResponse(id = request.id, result = task)
+
+    async def _process_task(self, request: SendTaskRequest) -> Task:
         """
         Does the following:
         1. Saves task into memory(or update it)
         2. Ask the gemini agent for a reply
         3. Format that reply as a message
         4. Save agent's reply into task history
-        5. Return updated task to the caller
+        5. Return updated task
         """
 
-        logger.info(f"Processing new task: {request.params.id}")
+        log_event(logger, logging.DEBUG, "task.processing", task_id=request.params.id, session_id=request.params.sessionId)
+
+        #Step 1:  Save task using base class helper (we don't need its history back here)
+        await self.upsert_task(request.params, history_length=0)
 
-        #Step 1:  Save task using base class helper
-        task = await self.upsert_task(request.params)
+        #Steps 2-5
+        try:
+            return await self._complete_task(request, history_length = request.params.historyLength)
+        except AdmissionRejected as e:
+            #The agent never ran: record why, so tasks/get doesn't show the task as pending forever
+            await self._fail_task(request, f"Server busy ({e.reason}), try again later")
+            raise
+        except Exception as e:
+            #Same for any other failure (the client still gets the error as the JSON-RPC response)
+            logger.exception("Task %s failed", request.params.id)
+            await self._fail_task(request, f"Task failed: {e}")
+            raise
 
+    async def _complete_task(self, request: SendTaskRequest, history_length: int | None, background: bool = False) -> Task:
         #Step 2: Get what the user asked
         query = self._get_user_query(request)
 
-        #Step 3: Ask gemini agent to respond(synchronous call)
-        result_text = await self.agent.invoke(query, request.params.sessionId)
+        #Step 3: Ask gemini agent to respond (or reuse a cached reply to the same question)
+        result_text = await self._invoke(request, query, background)
 
         #Step 4: Turn agents response into a message object
 
@@ -58,11 +242,134 @@ class AgentTaskManager(InMemoryTaskManager):
             parts = [TextPart(text = result_text)]
         )
         #Step 5: Update task state and add message to history
+        #(only the last historyLength messages come back if the client asked for a limit)
+        return await self.update_task(
+            request.params.id,
+            TaskStatus(state=TaskState.COMPLETED),
+            agent_message,
+            history_length = history_length,
+        )
 
-        async with self.lock:
-            task.status = TaskStatus(state=TaskState.COMPLETED)
-            task.history.append(agent_message)
+    #Asynchronous mode: saves the task and queues the agent call (raises QueueFullError if full)
+    async def _enqueue_task(self, request: SendTaskRequest) -> Task:
+        #Take a queue slot first, so a full queue is refused before anything is stored
+        self.task_queue.reserve()
+        try:
+            task = await self.upsert_task(request.params, history_length = request.params.historyLength)
+        except BaseException:
+            self.task_queue.release()
+            raise
+        self.task_queue.put(lambda: self._run_queued_task(request))
+        return task
+
+    #Runs on a task queue worker: WORKING -> agent -> COMPLETED (or FAILED)
+    async def _run_queued_task(self, request: SendTaskRequest) -> None:
+        log_event(logger, logging.DEBUG, "task.processing", task_id=request.params.id, session_id=request.params.sessionId, queued=True)
+        try:
+            await self.update_task(request.params.id, TaskStatus(state=TaskState.WORKING), history_length=0)
+            #Already queued, so wait for an admission slot however long it takes
+            await self._complete_task(request, history_length=0, background=True)
+        except Exception as e:
+            logger.exception("Background task %s failed", request.params.id)
+            await self._fail_task(request, f"Task failed: {e}")
+
+    #Marks a task FAILED with an explanation as its status message
+    async def _fail_task(self, request: SendTaskRequest, text: str) -> Task:
+        error_message = Message(role="agent", parts=[TextPart(text=text)])
+        return await self.update_task(
+            request.params.id, TaskStatus(state=TaskState.FAILED, message=error_message), history_length=0
+        )
+
+    #The JSON-RPC error for a request refused by admission control (HTTP 429 + Retry-After)
+    @staticmethod
+    def _busy_error(rejected: AdmissionRejected) -> ServerBusyError:
+        return ServerBusyError(data = {"reason": rejected.reason, "retry_after": round(rejected.retry_after, 3)})
+
+    #Streaming version of on_send_task (JSON-RPC method "tasks/sendSubscribe")
+    async def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """
+        Same steps as on_send_task, but yields an update at every step instead of
+        one response at the end:
+        1. SUBMITTED once the task is saved
+        2. WORKING once the agent starts
+        3. WORKING with a partial agent message for every chunk of text (only the new chunk)
+        4. COMPLETED with the full agent message (final=True)
+
+        If admission control refuses the stream, it is a single ServerBusyError event instead.
+        If the agent fails (or stops without a complete reply), the last event is FAILED (final=True).
+        """
+
+        log_event(logger, logging.DEBUG, "task.processing", task_id=request.params.id, session_id=request.params.sessionId, streaming=True)
+
+        if self.admission is None:
+            async for event in self._stream_task(request):
+                yield event
+            return
+
+        #Every stream is an agent call: take a slot before storing anything, hold it until the stream ends
+        try:
+            await self.admission.acquire()
+        except AdmissionRejected as e:
+            yield SendTaskStreamingResponse(id = request.id, error = self._busy_error(e))
+            return
+        try:
+            async for event in self._stream_task(request):
+                yield event
+        finally:
+            self.admission.release()
+
+    async def _stream_task(self, request: SendTaskStreamingRequest) -> AsyncIterable[SendTaskStreamingResponse]:
+        #Step 1: Save task and tell the client we have it
+        task = await self.upsert_task(request.params, history_length=0)
+        yield self._status_event(request, task.status)
+
+        #Step 2: Mark the task as in progress
+        task = await self.update_task(request.params.id, TaskStatus(state=TaskState.WORKING), history_length=0)
+        yield self._status_event(request, task.status)
+
+        #Step 3: Forward every chunk of text as soon as the agent produces it
+        try:
+            query = self._get_user_query(request)
+            images = await self._get_images(request)
+            extra = {"images": images} if images else {}
+            async for item in self.agent.stream(query, request.params.sessionId, **extra):
+                agent_message = Message(
+                    role = "agent",
+                    parts = [TextPart(text = item["content"])]
+                )
+
+                if not item["is_task_complete"]:
+                    yield self._status_event(
+                        request, TaskStatus(state=TaskState.WORKING, message=agent_message)
+                    )
+                    continue
+
+                #Step 4: Save the complete reply and send the final update
+                task = await self.update_task(
+                    request.params.id,
+                    TaskStatus(state=TaskState.COMPLETED, message=agent_message),
+                    agent_message,
+                    history_length = 0,
+                )
+                yield self._status_event(request, task.status, final=True)
+                return
+            error = "Agent stopped without a complete reply"
+        except Exception as e:
+            logger.exception("Streaming task %s failed", request.params.id)
+            error = f"Task failed: {e}"
+
+        #The task must not stay WORKING forever, and the client must get a final event
+        task = await self._fail_task(request, error)
+        yield self._status_event(request, task.status, final=True)
+
+    #Wraps a status into the JSON-RPC response object sent as one SSE event
+    def _status_event(
+        self, request: SendTaskStreamingRequest, status: TaskStatus, final: bool = False
+    ) -> SendTaskStreamingResponse:
+        return SendTaskStreamingResponse(
+            id = request.id,
+            result = TaskStatusUpdateEvent(id = request.params.id, status = status, final = final)
+        )
 
-        #Step 6: Return a structured response back to the A2A Client
-        return SendTaskResponse(id = request.id, result = task)
-       
\ No newline at end of file
@@ -6,8 +6,11 @@
 #
 # This version supports:
 # - basic task sending via A2AClient
+# - streaming replies as they are generated (--stream)
 # - session reuse
 # - optional task history printing
+# - several agents at once (--agent given more than once): every message is fanned
+#   out to all of them concurrently (see client/orchestrator.py)
 
 
 import asyncclick as click #async version of click, allows for async functions
@@ -16,9 +19,11 @@ from uuid import uuid4 #Used to generate unique task and session IDs
 
 #Import A2a client from client module(this handles request/response logic)
 from client.client import A2AClient
+#Fan-out to several agents (discovery, per-agent timeouts, hedging, first-k)
+from client.orchestrator import Orchestrator
 
 #Import Task model for response type
-from models.task import Task
+from models.task import Task, TERMINAL_STATES
 
 
 
@@ -26,28 +31,40 @@ from models.task import Task
 #Click command turns fxn below into command-line command
 @click.command()
 #Provide the Command line app with the agent that the client needs to connect to
-@click.option("--agent", default="http://localhost:10002", help="Base URL of the A2A agent server")
+@click.option("--agent", multiple=True, default=["http://localhost:10002"], help="Base URL of an A2A agent server (repeat to talk to several agents)")
 # ^ This defines the --agent option. It's a string with a default of localhost:10002
 # ^ Used to point to the running agent server (adjust if server runs elsewhere)
+# ^ Given more than once, every message goes to all agents at the same time
 
 @click.option("--session", default=0, help="Session ID (use 0 to generate a new one)")
 # ^ This defines the --session option. A session groups multiple tasks together.
 # ^ If user passes 0, we generate a random session ID using uuid4.
 
 @click.option("--history", is_flag=True, help="Print full task history after receiving a response")
-async def cli(agent: str, session: str, history: bool):
+@click.option("--stream", is_flag=True, help="Print the agent's reply while it is being generated")
+#Only used with several agents
+@click.option("--first-k", default=0, help="Print the first K replies and cancel the rest (0 = wait for all agents)")
+@click.option("--timeout", default=30.0, help="Seconds to wait for each agent")
+@click.option("--hedge-after", default=None, type=float, help="Seconds before a slow agent gets a second copy of the request")
+async def cli(agent: tuple[str, ...], session: str, history: bool, stream: bool, first_k: int, timeout: float, hedge_after: float | None):
     """
     Command Line interface to send user messages to an A2A Agent and display the response
 
     Args:
-    agent: Base url of the A2A Agent server( e.g. http://localhost:10002)
+    agent: Base url(s) of the A2A Agent server( e.g. http://localhost:10002)
     session: Either s tring session id or 0 to generate a new one
     history: If true, prints the full task history
+    stream: If true, uses tasks/sendSubscribe and prints text chunks as they arrive
+    first_k, timeout, hedge_after: fan-out settings when talking to several agents
     """
+    if len(agent) > 1:
+        await fan_out_cli(list(agent), session, first_k, timeout, hedge_after)
+        return
+    agent = agent[0]
 
     #Initialize A2AClient by providing it with full POST endpoint(URL) for sending tasks
     print(f"Connecting to agent at: {agent}")
-    client = A2AClient(url=f"{agent}") #Now knows what agent it needs to connect to
+    client = A2AClient(url=f"{agent}") #Now knows what agent it needs to connect to (keeps its connection open between prompts)
 
     #generate new session id if not provided (user passed 0)
     session_id = uuid4().hex if str(session) == "0" else str(session)
@@ -61,6 +78,7 @@ async def cli(agent: str, session: str, history: bool):
 
         #Exit loop if user types ':q' or 'quit'
         if prompt.strip().lower() in [":q", "quit"]:
+            await client.aclose() #Close the client's pooled connections
             break
 
 
@@ -74,11 +92,31 @@ async def cli(agent: str, session: str, history: bool):
             }
         }
 
+        #Streaming mode: print every chunk as soon as the server pushes it
+        if stream:
+            try:
+                print("\n Agent says: ", end="", flush=True)
+                async for update in client.send_task_subscribe(payload):
+                    if update.error:
+                        print(f"\n Error from agent: {update.error.message}")
+                        break
+                    status = update.result.status
+                    if not update.result.final and status.message:
+                        print(status.message.parts[0].text, end="", flush=True)
+                print()
+            except Exception as e:
+                print(f"\n Error while streaming task: {e}")
+            continue
+
         #Use the client to send the task to the agent
         try:
             #Send the task to the agent and get a Task response
             task: Task = await client.send_task(payload)
 
+            #Servers running tasks in the background answer right away; poll until the task is done
+            if task.status.state not in TERMINAL_STATES:
+                task = await client.wait_for_task(task.id)
+
             #Check if agent responded(expecting at least 2 messages: user + agent)
             if task.history and len(task.history) > 1:
                 reply = task.history[-1] #Last message is usually from the agent
@@ -96,6 +134,33 @@ async def cli(agent: str, session: str, history: bool):
             print(f"\n Error while sending task: {e}")
 
 
+#Prompt loop for several agents: every message goes to all of them concurrently
+async def fan_out_cli(agents: list[str], session: str, first_k: int, timeout: float, hedge_after: float | None):
+    session_id = uuid4().hex if str(session) == "0" else str(session)
+    print(f"Using session ID: {session_id}")
+
+    async with Orchestrator(timeout = timeout, hedge_after = hedge_after) as orchestrator:
+        #Discover every agent up front (their cards are cached for later messages)
+        for url, card in (await orchestrator.directory.discover(agents)).items():
+            print(f"Agent at {url}: {card.name if not isinstance(card, Exception) else f'unreachable ({card})'}")
+
+        while True:
+            prompt = click.prompt("\n What do you want to send to the agents? (type ':q' or 'quit' to exit)")
+            if prompt.strip().lower() in [":q", "quit"]:
+                break
+
+            payload = {
+                "sessionId": session_id,
+                "message": {"role": "user", "parts": [{"type": "text", "text": prompt}]},
+            }
+            results = await orchestrator.fan_out(agents, payload, first_k = first_k or None)
+            for result in results:
+                if result.task is not None and result.task.history and len(result.task.history) > 1:
+                    print(f"\n [{result.url}] ({result.latency * 1000:.0f} ms) {result.task.history[-1].parts[0].text}")
+                else:
+                    print(f"\n [{result.url}] {result.status}{f': {result.error}' if result.error else ''}")
+
+
 # -----------------------------------------------------------------------------
 # Entrypoint: This ensures the CLI only runs when executing `python cmd.py`
 # -----------------------------------------------------------------------------
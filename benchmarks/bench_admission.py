@@ -0,0 +1,107 @@
+# =============================================================================
+# benchmarks/bench_admission.py
+# =============================================================================
+# Purpose:
+# Shows how the server behaves under overload with and without admission control
+# (server/admission.py).
+#
+# The stub backend has a fixed capacity: up to --capacity calls at once take
+# --latency-ms each, beyond that every call slows down in proportion (like an LLM
+# endpoint that is being throttled). --clients clients send tasks/send in a loop
+# through A2AServer (in-process ASGI transport) for --duration seconds.
+#
+# Rejected clients wait for Retry-After and try again. For every setting it reports
+# answered / rejected (429) requests per second and the latency of the answered ones.
+# Without admission control every request is answered, slowly; with it the accepted
+# ones stay fast and the rest fail fast.
+#
+# Run:
+#   python -m benchmarks.bench_admission --clients 200 --capacity 20
+# =============================================================================
+
+import asyncio
+import time
+
+import click
+import httpx
+
+from benchmarks.bench_request_path import build_server, request_body
+from benchmarks.common import percentile
+from server.admission import AdmissionController
+
+
+class ContendedAgent:
+    """Takes latency_s per call while at most `capacity` calls run, proportionally longer beyond that."""
+
+    def __init__(self, latency_s: float, capacity: int):
+        self.latency_s = latency_s
+        self.capacity = capacity
+        self.running = 0
+
+    async def invoke(self, query: str, session_id: str) -> str:
+        self.running += 1
+        try:
+            await asyncio.sleep(self.latency_s * max(1.0, self.running / self.capacity))
+        finally:
+            self.running -= 1
+        return "2025-01-01 00:00:00"
+
+
+async def overload(admission: AdmissionController | None, clients: int, duration: float, latency_s: float, capacity: int) -> dict[str, float]:
+    server = build_server(ContendedAgent(latency_s, capacity))
+    server.task_manager.admission = admission
+    ok: list[float] = []
+    rejected: list[float] = []
+    counter = iter(range(10**9))
+    deadline = time.perf_counter() + duration
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def run_client():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/", content=request_body(next(counter)), headers={"content-type": "application/json"})
+                elapsed = time.perf_counter() - start
+                if response.status_code == 429:
+                    rejected.append(elapsed)
+                    await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+                else:
+                    response.raise_for_status()
+                    ok.append(elapsed)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_client() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "ok_rps": len(ok) / elapsed,
+        "rejected_rps": len(rejected) / elapsed,
+        "ok_p50_ms": percentile(ok, 50) * 1000,
+        "ok_p99_ms": percentile(ok, 99) * 1000,
+        "rejected_p99_ms": percentile(rejected, 99) * 1000,
+    }
+
+
+@click.command()
+@click.option("--clients", default=200, help="Clients sending requests in a loop")
+@click.option("--capacity", default=20, help="Calls the stub backend handles without slowing down")
+@click.option("--latency-ms", default=100.0, help="Stub backend latency within capacity")
+@click.option("--duration", default=5.0, help="Seconds per setting")
+def main(clients, capacity, latency_ms, duration):
+    latency_s = latency_ms / 1000
+    settings = {
+        "no admission control": None,
+        f"max_in_flight={capacity}, wait 0.5s": lambda: AdmissionController(capacity, max_waiting=capacity, max_wait=0.5),
+        f"max_in_flight={capacity}, no wait": lambda: AdmissionController(capacity, max_waiting=0),
+    }
+    print(f"{'':<36} {'ok/s':>8} {'429/s':>8} {'ok p50':>10} {'ok p99':>10} {'429 p99':>10}")
+    for name, make in settings.items():
+        result = asyncio.run(overload(make() if make else None, clients, duration, latency_s, capacity))
+        print(
+            f"{name:<36} {result['ok_rps']:>8.1f} {result['rejected_rps']:>8.1f} "
+            f"{result['ok_p50_ms']:>7.1f} ms {result['ok_p99_ms']:>7.1f} ms {result['rejected_p99_ms']:>7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# =============================================================================
+# benchmarks/bench_artifacts.py
+# =============================================================================
+# Purpose:
+# Compares ADK's InMemoryArtifactService with DiskArtifactService
+# (agents/google_adk/disk_artifacts.py) on an image workload where the same images
+# come back in many sessions:
+#
+# --sessions sessions each save the same --images images of --size KB, then every
+# artifact is loaded once. Reported per service:
+# - heap:    Python memory still held afterwards (tracemalloc)
+# - stored:  bytes of content kept (heap for in-memory, files on disk for disk)
+# - save / load: mean time per artifact
+#
+# Run:
+#   python -m benchmarks.bench_artifacts --sessions 50 --images 4 --size 512
+# =============================================================================
+
+import asyncio
+import gc
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import click
+from google.adk.artifacts import InMemoryArtifactService
+from google.genai import types
+
+from agents.google_adk.disk_artifacts import DiskArtifactService
+
+
+def disk_bytes(root: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(os.path.join(root, "objects")) for name in names)
+
+
+async def run(service, images: list[bytes], sessions: int) -> tuple[float, float]:
+    keys = [(f"s{session}", f"image{i}.jpg") for session in range(sessions) for i in range(len(images))]
+    start = time.perf_counter()
+    for session_id, filename in keys:
+        #A new bytes object per save, as when each upload is decoded from its own request
+        image = bytes(bytearray(images[int(filename[5:-4])]))
+        await service.save_artifact(
+            app_name="bench", user_id="u", session_id=session_id, filename=filename,
+            artifact=types.Part.from_bytes(data=image, mime_type="image/jpeg"),
+        )
+    saved = time.perf_counter()
+    for session_id, filename in keys:
+        await service.load_artifact(app_name="bench", user_id="u", session_id=session_id, filename=filename)
+    loaded = time.perf_counter()
+    return (saved - start) / len(keys), (loaded - saved) / len(keys)
+
+
+@click.command()
+@click.option("--sessions", default=50, help="Sessions saving the same images")
+@click.option("--images", default=4, help="Distinct images")
+@click.option("--size", default=512, help="Image size in KB")
+def main(sessions, images, size):
+    content = [os.urandom(size * 1024) for _ in range(images)]
+    root = tempfile.mkdtemp()
+    print(f"{sessions} sessions x {images} images of {size} KB ({sessions * images * size / 1024:.0f} MB saved in total)")
+    print(f"{'service':<10} {'heap':>10} {'stored':>10} {'save':>10} {'load':>10}")
+    try:
+        for name in ("memory", "disk"):
+            gc.collect()
+            tracemalloc.start()
+            service = InMemoryArtifactService() if name == "memory" else DiskArtifactService(root, max_bytes=None)
+            save_s, load_s = asyncio.run(run(service, content, sessions))
+            gc.collect()
+            heap = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            stored = heap if name == "memory" else disk_bytes(root)
+            print(
+                f"{name:<10} {heap / 2**20:>7.1f} MB {stored / 2**20:>7.1f} MB "
+                f"{save_s * 1000:>7.2f} ms {load_s * 1000:>7.2f} ms"
+            )
+            if name == "disk":
+                service.close()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# =============================================================================
+# benchmarks/bench_batch.py
+# =============================================================================
+# Purpose:
+# Compares sending many small independent tasks one request at a time with
+# sending them as JSON-RPC batches (A2AClient.send_tasks).
+#
+# The A2A server (real AgentTaskManager, in-memory store, stub agent) runs under
+# uvicorn on a local socket. Each case sends --tasks tasks and reports the wall
+# time and throughput:
+# - single:  send_task per task, --concurrency requests in flight
+# - batch:   send_tasks with --batch-size tasks per HTTP request
+#
+# With a fast agent the per-request cost (HTTP round trip, parsing, response
+# encoding) dominates, which is what batching saves.
+#
+# Run:
+#   python -m benchmarks.bench_batch --tasks 2000 --batch-size 50
+# =============================================================================
+
+import asyncio
+import time
+
+import click
+
+from benchmarks.bench_request_path import build_server
+from benchmarks.common import StubAgent, StubServer
+from client.client import A2AClient
+
+
+def payload(i: int) -> dict:
+    return {
+        "id": f"task-{i}",
+        "sessionId": f"session-{i % 100}",
+        "message": {"role": "user", "parts": [{"type": "text", "text": "What time is it?"}]},
+    }
+
+
+async def single(url: str, tasks: int, concurrency: int, offset: int) -> float:
+    async with A2AClient(url=url) as client:
+        counter = iter(range(offset, offset + tasks))
+
+        async def worker():
+            for i in counter:
+                await client.send_task(payload(i))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+async def batched(url: str, tasks: int, batch_size: int, offset: int) -> float:
+    async with A2AClient(url=url) as client:
+        start = time.perf_counter()
+        await client.send_tasks([payload(i) for i in range(offset, offset + tasks)], batch_size=batch_size)
+        return time.perf_counter() - start
+
+
+@click.command()
+@click.option("--tasks", default=2000, help="Tasks sent per case")
+@click.option("--concurrency", default=8, help="Requests in flight for the single case")
+@click.option("--batch-size", default=50, help="Tasks per batch")
+@click.option("--batch-concurrency", default=8, help="Server: requests of one batch handled at once")
+@click.option("--latency-ms", default=0.0, help="Stub agent latency")
+def main(tasks, concurrency, batch_size, batch_concurrency, latency_ms):
+    server = build_server(StubAgent(latency_s=latency_ms / 1000))
+    server.batch_concurrency = batch_concurrency
+    with StubServer(server.app) as running:
+        asyncio.run(single(running.url, min(tasks, 200), concurrency, offset=10**6))  # Warm-up
+        cases = {
+            f"single (x{concurrency})": asyncio.run(single(running.url, tasks, concurrency, offset=0)),
+            f"batch ({batch_size}/request)": asyncio.run(batched(running.url, tasks, batch_size, offset=tasks)),
+        }
+    for name, elapsed in cases.items():
+        print(f"{name:<24} {elapsed * 1000:>9.1f} ms   {tasks / elapsed:>9.1f} tasks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# =============================================================================
+# benchmarks/bench_blobs.py
+# =============================================================================
+# Purpose:
+# Compares two ways of getting an image to an agent, by time and by peak memory
+# (tracemalloc, client and server together, in multiples of the image size):
+#
+# - inline:  the image base64-encoded into a DataPart of the tasks/send JSON (what
+#            clients had to do before FilePart existed)
+# - blob:    the raw bytes uploaded to POST /blobs (A2AClient.upload_file), and a
+#            FilePart referencing them in tasks/send
+#
+# The server (real AgentTaskManager, stub agent, InMemoryBlobStore) runs in-process
+# behind httpx's ASGI transport, so no sockets are involved.
+#
+# Run:
+#   python -m benchmarks.bench_blobs --sizes 1,8,32
+# =============================================================================
+
+import asyncio
+import base64
+import os
+import time
+import tracemalloc
+from uuid import uuid4
+
+import click
+import httpx
+
+from agents.google_adk.task_manager import AgentTaskManager
+from benchmarks.common import StubAgent
+from client.client import A2AClient
+from models.agent import AgentCapabilities, AgentCard
+from server.blob_store import InMemoryBlobStore
+from server.server import A2AServer
+
+URL = "http://agent/"
+
+
+def message(part: dict) -> dict:
+    return {"id": uuid4().hex, "message": {"role": "user", "parts": [{"type": "text", "text": "What is in this image?"}, part]}}
+
+
+async def inline(client: A2AClient, image: bytes) -> None:
+    encoded = base64.b64encode(image).decode()
+    await client.send_task(message({"type": "data", "data": {"mimeType": "image/png", "bytes": encoded}}))
+
+
+async def blob(client: A2AClient, image: bytes) -> None:
+    part = await client.upload_file(image, "image/png")
+    await client.send_task(message(part.model_dump(exclude_none=True)))
+
+
+#Seconds and peak traced memory (in image sizes) of sending one image
+async def measure(case, image: bytes) -> tuple[float, float]:
+    card = AgentCard(name="Stub", description="Benchmark stub", url=URL, version="0", capabilities=AgentCapabilities(), skills=[])
+    store = InMemoryBlobStore(max_bytes=4 * len(image), max_blob_bytes=2 * len(image))
+    server = A2AServer(agent_card=card, task_manager=AgentTaskManager(agent=StubAgent()), blob_store=store)
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app))
+    async with A2AClient(url=URL, http_client=http) as client:
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            await case(client, image)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    await http.aclose()
+    return elapsed, peak / len(image)
+
+
+@click.command()
+@click.option("--sizes", default="1,8,32", help="Comma-separated image sizes in MB")
+def main(sizes):
+    print(f"{'size':>6} {'inline':>22} {'blob':>22}")
+    for size in [int(mb) for mb in sizes.split(",")]:
+        image = os.urandom(size * 2**20)
+        inline_s, inline_peak = asyncio.run(measure(inline, image))
+        blob_s, blob_peak = asyncio.run(measure(blob, image))
+        print(f"{size:>4}MB {inline_s * 1000:>9.1f} ms {inline_peak:>6.1f}x  {blob_s * 1000:>9.1f} ms {blob_peak:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
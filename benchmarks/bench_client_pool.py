@@ -0,0 +1,94 @@
+# =============================================================================
+# benchmarks/bench_client_pool.py
+# =============================================================================
+# Purpose:
+# Compares A2AClient's pooled, keep-alive transport against the old behaviour of
+# opening a new httpx.AsyncClient (new connection pool + TCP handshake) per call.
+#
+# Both cases send the same tasks/send requests to a local stub server.
+#
+# Run:
+#   python -m benchmarks.bench_client_pool --requests 2000 --concurrency 32
+# =============================================================================
+
+import asyncio
+import time
+from uuid import uuid4
+
+import click
+import httpx
+
+from benchmarks.common import StubServer, latency_summary, print_summary, stub_a2a_app
+from client.client import A2AClient, close_shared_http_client
+from models.request import SendTaskRequest
+from models.task import TaskSendParams
+
+
+#Builds one small tasks/send request
+def make_request() -> SendTaskRequest:
+    return SendTaskRequest(
+        id = uuid4().hex,
+        params = TaskSendParams(
+            id = uuid4().hex,
+            sessionId = "bench",
+            message = {"role": "user", "parts": [{"type": "text", "text": "What time is it?"}]},
+        ),
+    )
+
+
+#The pre-pooling transport: one throwaway httpx.AsyncClient per request
+async def per_call_send(url: str, request: SendTaskRequest) -> dict:
+    async with httpx.AsyncClient() as client:
+        response = await client.post(url, json = request.model_dump(), timeout = 30)
+        response.raise_for_status()
+        return response.json()
+
+
+#Fires `total` requests with at most `concurrency` in flight, returns per-request latencies
+async def drive(send, total: int, concurrency: int) -> tuple[list[float], float]:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await send(make_request())
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies, time.perf_counter() - start
+
+
+async def run(url: str, total: int, concurrency: int, http2: bool) -> None:
+    #Warm up the server so the first case doesn't pay for its startup
+    await drive(lambda request: per_call_send(url, request), min(50, total), concurrency)
+
+    latencies, elapsed = await drive(lambda request: per_call_send(url, request), total, concurrency)
+    print_summary("per-call httpx client", latency_summary(latencies, elapsed))
+
+    async with A2AClient(url = url, max_connections = concurrency, max_keepalive_connections = concurrency, http2 = http2) as client:
+        latencies, elapsed = await drive(client._send_request, total, concurrency)
+    print_summary("pooled A2AClient", latency_summary(latencies, elapsed))
+
+    #Many clients (one per "agent") sharing one pool
+    shared = [A2AClient.shared(url = url) for _ in range(8)]
+    counter = iter(range(total * 2))
+    latencies, elapsed = await drive(
+        lambda request: shared[next(counter) % len(shared)]._send_request(request), total, concurrency
+    )
+    print_summary("shared pool, 8 clients", latency_summary(latencies, elapsed))
+    await close_shared_http_client()
+
+
+@click.command()
+@click.option("--requests", "total", default = 2000, help = "Requests per case")
+@click.option("--concurrency", default = 32, help = "Requests in flight at once")
+@click.option("--http2", is_flag = True, help = "Use HTTP/2 for the pooled client (needs 'h2')")
+def main(total: int, concurrency: int, http2: bool):
+    with StubServer(stub_a2a_app()) as server:
+        asyncio.run(run(server.url, total, concurrency, http2))
+
+
+if __name__ == "__main__":
+    main()
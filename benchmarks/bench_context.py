@@ -0,0 +1,64 @@
+# =============================================================================
+# benchmarks/bench_context.py
+# =============================================================================
+# Purpose:
+# Shows how prompt size and turn latency grow over a long conversation, with and
+# without a ContextPolicy (agents/google_adk/context_policy.py).
+#
+# One TellTimeAgent session answers --turns questions in a row, using the stub
+# model with a prompt processing speed, so a longer prompt means a slower reply
+# (like a real model). Every --every turns the benchmark prints the prompt tokens
+# the model reported and the turn latency.
+#
+# Without a policy every turn resends the whole conversation, so both keep
+# growing. With a sliding window (--context-turns) or token budget
+# (--context-tokens) they level off once the window is full.
+#
+# Run:
+#   python -m benchmarks.bench_context --turns 200 --context-turns 10
+# =============================================================================
+
+import asyncio
+import time
+
+import click
+
+from agents.google_adk.agent import TellTimeAgent
+from agents.google_adk.context_policy import ContextPolicy
+from server import metrics
+
+
+async def run(policy: ContextPolicy | None, model: str, turns: int, every: int) -> list[tuple[int, int, float]]:
+    agent = TellTimeAgent(model=model, context_policy=policy)
+    rows = []
+    for turn in range(1, turns + 1):
+        #Prompt tokens the model reports for this turn (the stub fills usage_metadata)
+        reported = metrics.PROMPT_TOKENS.labels("reported")
+        before = reported.sum
+        start = time.perf_counter()
+        await agent.invoke(f"Question {turn}: what time is it right now?", "bench-session")
+        elapsed = time.perf_counter() - start
+        if turn == 1 or turn % every == 0:
+            rows.append((turn, int(reported.sum - before), elapsed * 1000))
+    return rows
+
+
+@click.command()
+@click.option("--turns", default=200, help="Turns in the conversation")
+@click.option("--every", default=25, help="Print every N-th turn")
+@click.option("--context-turns", default=10, help="Sliding window of the policy run")
+@click.option("--context-tokens", default=None, type=int, help="Token budget of the policy run")
+@click.option("--summary/--no-summary", default=False, help="Summarize dropped turns in the policy run")
+@click.option("--model", default="stub:latency_ms=5,tokens_per_s=0,prompt_tokens_per_s=2000", help="Stub model spec")
+def main(turns, every, context_turns, context_tokens, summary, model):
+    policy = ContextPolicy(max_turns=context_turns, max_tokens=context_tokens, summarize=summary)
+    full = asyncio.run(run(None, model, turns, every))
+    trimmed = asyncio.run(run(policy, model, turns, every))
+
+    print(f"{'turn':>6} {'tokens (full)':>14} {'ms (full)':>10} {'tokens (policy)':>16} {'ms (policy)':>12}")
+    for (turn, full_tokens, full_ms), (_, trimmed_tokens, trimmed_ms) in zip(full, trimmed):
+        print(f"{turn:>6} {full_tokens:>14} {full_ms:>10.1f} {trimmed_tokens:>16} {trimmed_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# =============================================================================
+# benchmarks/bench_fanout.py
+# =============================================================================
+# Purpose:
+# Shows what client/orchestrator.py saves when one task goes to several agents.
+#
+# Starts --agents A2A servers on local sockets (real AgentTaskManager, stub agents
+# answering after 20, 40, 60, ... ms) and one "flaky" agent that usually answers
+# in --fast-ms but takes --slow-ms on --slow-pct percent of its calls.
+#
+# Cases (each repeated --rounds times, p50 / p95 / p99 end-to-end latency):
+# - sequential:   one agent after the other with A2AClient (the old way)
+# - gather-all:   Orchestrator.fan_out to every agent
+# - first-k:      fan_out with first_k=--first-k, the rest is cancelled
+# - flaky:        the flaky agent alone, without and with hedge_after=--hedge-ms
+#
+# Run:
+#   python -m benchmarks.bench_fanout --agents 4 --rounds 100
+# =============================================================================
+
+import asyncio
+import random
+import time
+from uuid import uuid4
+
+import click
+
+from agents.google_adk.task_manager import AgentTaskManager
+from benchmarks.common import StubAgent, StubServer, free_port, percentile
+from client.client import A2AClient
+from client.orchestrator import Orchestrator
+from models.agent import AgentCapabilities, AgentCard
+from server.server import A2AServer
+
+PAYLOAD = {"sessionId": "bench", "message": {"role": "user", "parts": [{"type": "text", "text": "What time is it?"}]}}
+
+
+class FlakyAgent(StubAgent):
+    """Answers after fast_s, but after slow_s on a share `slow` of its calls (a latency tail)."""
+
+    def __init__(self, fast_s: float, slow_s: float, slow: float):
+        super().__init__()
+        self.fast_s, self.slow_s, self.slow = fast_s, slow_s, slow
+
+    async def invoke(self, query: str, session_id: str) -> str:
+        await asyncio.sleep(self.slow_s if random.random() < self.slow else self.fast_s)
+        return "2025-01-01 00:00:00"
+
+
+#An A2A server app for `agent` whose card points at its own port
+def agent_app(agent, port: int):
+    card = AgentCard(
+        name=f"Agent{port}", description="Benchmark stub", url=f"http://127.0.0.1:{port}/", version="0",
+        capabilities=AgentCapabilities(), skills=[],
+    )
+    return A2AServer(host="127.0.0.1", port=port, agent_card=card, task_manager=AgentTaskManager(agent=agent)).app
+
+
+#p50 / p95 / p99 in ms of `rounds` runs of `call`
+async def measure(call, rounds: int) -> str:
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+    return "   ".join(f"p{pct} {percentile(latencies, pct) * 1000:>7.1f} ms" for pct in (50, 95, 99))
+
+
+async def run(urls: list[str], flaky_url: str, rounds: int, first_k: int, hedge_s: float) -> None:
+    clients = [A2AClient(url=url) for url in urls]
+    async with Orchestrator() as orchestrator:
+        await orchestrator.directory.discover(urls + [flaky_url])  # Cards are cached from here on
+
+        async def sequential():
+            for client in clients:
+                await client.send_task({**PAYLOAD, "id": uuid4().hex})
+
+        cases = {
+            "sequential": sequential,
+            "gather-all": lambda: orchestrator.fan_out(urls, PAYLOAD),
+            f"first-k ({first_k})": lambda: orchestrator.fan_out(urls, PAYLOAD, first_k=first_k),
+            "flaky": lambda: orchestrator.send(flaky_url, PAYLOAD),
+            f"flaky, hedged ({hedge_s * 1000:.0f} ms)": lambda: orchestrator.send(flaky_url, PAYLOAD, hedge_after=hedge_s),
+        }
+        for name, call in cases.items():
+            print(f"{name:<28} {await measure(call, rounds)}")
+    for client in clients:
+        await client.aclose()
+
+
+@click.command()
+@click.option("--agents", default=4, help="Agents to fan out to (answering after 20, 40, 60, ... ms)")
+@click.option("--rounds", default=100, help="Runs per case")
+@click.option("--first-k", default=1, help="Answers needed in the first-k case")
+@click.option("--fast-ms", default=20.0, help="Usual latency of the flaky agent")
+@click.option("--slow-ms", default=500.0, help="Latency of the flaky agent's slow calls")
+@click.option("--slow-pct", default=10.0, help="Percent of slow calls of the flaky agent")
+@click.option("--hedge-ms", default=60.0, help="Hedge delay for the flaky agent")
+def main(agents, rounds, first_k, fast_ms, slow_ms, slow_pct, hedge_ms):
+    ports = [free_port() for _ in range(agents + 1)]
+    servers = [StubServer(agent_app(StubAgent(latency_s=0.02 * (i + 1)), port), port=port) for i, port in enumerate(ports[:-1])]
+    flaky = FlakyAgent(fast_ms / 1000, slow_ms / 1000, slow_pct / 100)
+    servers.append(StubServer(agent_app(flaky, ports[-1]), port=ports[-1]))
+    for server in servers:
+        server.__enter__()
+    try:
+        asyncio.run(run([server.url for server in servers[:-1]], servers[-1].url, rounds, first_k, hedge_ms / 1000))
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
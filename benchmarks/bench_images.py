@@ -0,0 +1,116 @@
+# =============================================================================
+# benchmarks/bench_images.py
+# =============================================================================
+# Purpose:
+# Shows that image preprocessing (server/image_preprocess.py) no longer stalls the
+# event loop that serves every other request.
+#
+# A ticker coroutine sleeps 5 ms over and over and records how late it wakes up
+# (loop lag: what any other request on the loop would wait on top of its own work)
+# while --images photos of --size pixels are decoded, downscaled to --max-size,
+# stripped of EXIF and re-encoded as JPEG:
+#
+# - idle:    no images, the lag of an idle loop (the baseline)
+# - on-loop: the same preprocessing code called directly on the loop (what doing it
+#            in the request handler would mean)
+# - pool:    ImagePreprocessor with --workers processes
+#
+# Run:
+#   python -m benchmarks.bench_images --images 16 --workers 4
+# =============================================================================
+
+import asyncio
+import io
+import time
+from multiprocessing import shared_memory
+
+import click
+from PIL import Image
+
+from benchmarks.common import percentile
+from server.image_preprocess import ImagePreprocessor, _prepare_in_worker
+
+TICK_S = 0.005
+
+
+#A camera-like JPEG: noise (compresses like a photo) with an EXIF orientation tag
+def make_photo(width: int, height: int) -> bytes:
+    noise = Image.effect_noise((width, height), 64)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotated 90 degrees
+    out = io.BytesIO()
+    Image.merge("RGB", (noise, gradient, noise)).save(out, "JPEG", quality=90, exif=exif.tobytes())
+    return out.getvalue()
+
+
+#The worker function, called right on the loop (same shared memory hand-off, no pool)
+async def prepare_on_loop(data: bytes, max_size: tuple[int, int]) -> None:
+    inbox = shared_memory.SharedMemory(create=True, size=len(data))
+    outbox = shared_memory.SharedMemory(create=True, size=max_size[0] * max_size[1] * 4 + max_size[1] + 65536)
+    try:
+        inbox.buf[:len(data)] = data
+        _prepare_in_worker(inbox.name, len(data), outbox.name, max_size, "JPEG", 85)
+    finally:
+        for block in (inbox, outbox):
+            block.close()
+            block.unlink()
+    await asyncio.sleep(0)
+
+
+#Seconds the ticker woke up late, for as long as `work` runs
+async def loop_lag(work) -> tuple[list[float], float]:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_S)
+            lags.append(time.perf_counter() - start - TICK_S)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK_S)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return lags, elapsed
+
+
+async def run(photos: list[bytes], workers: int, max_size: tuple[int, int]) -> None:
+    preprocessor = ImagePreprocessor(workers=workers, max_size=max_size)
+    await preprocessor.warm_up()  # Process start-up and the Pillow import are not what we measure
+    cases = {
+        "idle": lambda: asyncio.sleep(0.5),
+        "on-loop": lambda: asyncio.gather(*(prepare_on_loop(photo, max_size) for photo in photos)),
+        f"pool ({workers} workers)": lambda: asyncio.gather(*(preprocessor.prepare(photo) for photo in photos)),
+    }
+    print(f"{'case':<20} {'images/s':>9} {'lag p50':>10} {'lag p99':>10} {'lag max':>10}")
+    for name, work in cases.items():
+        lags, elapsed = await loop_lag(work)
+        rate = f"{len(photos) / elapsed:>9.1f}" if name != "idle" else f"{'-':>9}"
+        print(
+            f"{name:<20} {rate} {percentile(lags, 50) * 1000:>7.1f} ms "
+            f"{percentile(lags, 99) * 1000:>7.1f} ms {max(lags) * 1000:>7.1f} ms"
+        )
+    preprocessor.close()
+
+
+@click.command()
+@click.option("--images", default=16, help="Images per case")
+@click.option("--size", default="4000x3000", help="WIDTHxHEIGHT of the test photos")
+@click.option("--max-size", default="1024x1024", help="WIDTHxHEIGHT the photos are scaled down to fit in")
+@click.option("--workers", default=4, help="Worker processes of the pool")
+def main(images, size, max_size, workers):
+    width, height = (int(n) for n in size.split("x"))
+    photo = make_photo(width, height)
+    print(f"{images} photos of {width}x{height} ({len(photo) / 2**20:.1f} MB JPEG) -> fit in {max_size}")
+    #Different bytes per photo, as real uploads would be
+    photos = [photo + bytes(i) for i in range(images)]
+    asyncio.run(run(photos, workers, tuple(int(n) for n in max_size.split("x"))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# =============================================================================
+# benchmarks/bench_metrics.py
+# =============================================================================
+# Purpose:
+# Shows what the built-in tracing and metrics (server/metrics.py) cost.
+#
+# 1. Per-operation cost of a span, a counter increment and a histogram observation
+# 2. Whole tasks/send requests through A2AServer (in-process ASGI transport, stub
+#    agent) with recording on vs. off. Rounds alternate on/off so drift hits both.
+#
+# Run:
+#   python -m benchmarks.bench_metrics --requests 2000 --rounds 5
+# =============================================================================
+
+import asyncio
+import statistics
+import time
+
+import click
+import httpx
+
+from benchmarks.bench_request_path import build_server, request_body, time_step
+from server import metrics
+
+
+#Nanoseconds per call of fn (best of 5 runs of `calls` calls)
+def ns_per_call(fn, calls: int = 200_000) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e9
+
+
+def span_once():
+    with metrics.span("bench"):
+        pass
+
+
+async def asgi_rps(requests: int, concurrency: int, offset: int) -> float:
+    server = build_server()
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def send(i):
+            response = await client.post("/", content=request_body(offset + i), headers={"content-type": "application/json"})
+            response.raise_for_status()
+        return (await time_step(send, requests, concurrency))["rps"]
+
+
+@click.command()
+@click.option("--requests", default=2000, help="Requests per round")
+@click.option("--concurrency", default=16, help="Requests in flight")
+@click.option("--rounds", default=5, help="Rounds with recording on and off (alternating)")
+def main(requests, concurrency, rounds):
+    counter = metrics.TASKS.labels("bench")
+    histogram = metrics.STAGE_SECONDS.labels("bench")
+    print(f"span              {ns_per_call(span_once):>8.0f} ns")
+    print(f"counter.inc       {ns_per_call(counter.inc):>8.0f} ns")
+    print(f"histogram.observe {ns_per_call(lambda: histogram.observe(0.003)):>8.0f} ns")
+
+    results = {True: [], False: []}
+    for round_number in range(rounds):
+        for enabled in (True, False) if round_number % 2 == 0 else (False, True):
+            metrics.set_enabled(enabled)
+            offset = (round_number * 2 + enabled) * requests
+            results[enabled].append(asyncio.run(asgi_rps(requests, concurrency, offset)))
+    metrics.set_enabled(True)
+
+    on, off = statistics.median(results[True]), statistics.median(results[False])
+    print(f"tasks/send with metrics on  {on:>10.1f} req/s (median of {rounds})")
+    print(f"tasks/send with metrics off {off:>10.1f} req/s")
+    print(f"overhead                    {(off - on) / off * 100:>10.1f} %")
+
+
+if __name__ == "__main__":
+    main()
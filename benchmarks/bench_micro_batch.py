@@ -0,0 +1,105 @@
+# =============================================================================
+# benchmarks/bench_micro_batch.py
+# =============================================================================
+# Purpose:
+# Measures what micro-batching (server/micro_batch.py) buys and costs: throughput
+# against a model backend with few slots, versus the latency each question waits
+# for its batch.
+#
+# --clients clients send tasks/send to AgentTaskManager + TellTimeAgent (the real
+# task manager and ADK agent, no response cache) for --seconds each; every question
+# starts a new conversation (a new session), the kind of question that is batched:
+# one in a session with history is asked on its own. The model is the stub with --latency-ms per call and at most
+# --slots calls at once, like a backend with a fixed number of slots.
+#
+# - off:      every question is its own model call (queues for a slot)
+# - N ms:     MicroBatcher with an N ms window and --max-batch questions per call
+#
+# Reported per case: tasks/s, p50 / p99 latency and the mean questions per model call.
+# Under load (clients >> slots) batches fill up and throughput grows with the batch size;
+# with few clients (e.g. --clients 2) the window is mostly added latency.
+#
+# Run:
+#   python -m benchmarks.bench_micro_batch --clients 64 --latency-ms 100 --slots 4
+# =============================================================================
+
+import asyncio
+import logging
+import time
+from uuid import uuid4
+
+import click
+
+from agents.google_adk.agent import TellTimeAgent
+from agents.google_adk.task_manager import AgentTaskManager
+from benchmarks.common import latency_summary
+from models.request import SendTaskRequest
+from models.task import TaskSendParams
+from server.micro_batch import MicroBatcher
+
+
+def make_request(session_id: str) -> SendTaskRequest:
+    return SendTaskRequest(
+        id = uuid4().hex,
+        params = TaskSendParams(
+            id = uuid4().hex,
+            sessionId = session_id,
+            message = {"role": "user", "parts": [{"type": "text", "text": "What time is it?"}]},
+        ),
+    )
+
+
+async def run(model: str, window_ms: float | None, max_batch: int, clients: int, seconds: float) -> tuple[dict, float]:
+    agent = TellTimeAgent(model = model)
+    batch_sizes: list[int] = []
+
+    async def invoke_batch(requests):
+        batch_sizes.append(len(requests))
+        return await agent.invoke_batch(requests)
+
+    batcher = MicroBatcher(invoke_batch, window = window_ms / 1000, max_batch = max_batch) if window_ms else None
+    manager = AgentTaskManager(agent = agent, micro_batcher = batcher)
+    latencies: list[float] = []
+    deadline = time.perf_counter() + seconds
+
+    async def client() -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await manager.on_send_task(make_request(uuid4().hex))
+            if response.error is not None:
+                raise RuntimeError(response.error)
+            latencies.append(time.perf_counter() - start)
+
+    #Warm-up: session creation and first-call setup don't count
+    await asyncio.gather(*(manager.on_send_task(make_request(uuid4().hex)) for _ in range(min(clients, 4))))
+    batch_sizes.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    mean_batch = sum(batch_sizes) / len(batch_sizes) if batch_sizes else 1.0
+    return latency_summary(latencies, elapsed), mean_batch
+
+
+@click.command()
+@click.option("--clients", default = 64, help = "Concurrent clients (a new session per question)")
+@click.option("--seconds", default = 5.0, help = "Duration of each case")
+@click.option("--latency-ms", default = 100.0, help = "Stub model latency per call")
+@click.option("--slots", default = 4, help = "Model calls the stub serves at once")
+@click.option("--max-batch", default = 16, help = "Max questions per batched call")
+@click.option("--windows", default = "2,5,10,20", help = "Comma-separated batch windows in ms")
+def main(clients, seconds, latency_ms, slots, max_batch, windows):
+    logging.getLogger("agents").setLevel(logging.WARNING)
+    model = f"stub:latency_ms={latency_ms},tokens_per_s=0,max_concurrent={slots}"
+    print(f"{clients} clients, model {model}, max batch {max_batch}")
+    print(f"{'case':<10} {'tasks/s':>10} {'p50':>12} {'p99':>12} {'batch':>8}")
+    for window_ms in [None, *(float(w) for w in windows.split(","))]:
+        summary, mean_batch = asyncio.run(run(model, window_ms, max_batch, clients, seconds))
+        name = "off" if window_ms is None else f"{window_ms:g} ms"
+        print(
+            f"{name:<10} {summary['rps']:>10.1f} {summary['p50_ms']:>9.1f} ms {summary['p99_ms']:>9.1f} ms "
+            f"{mean_batch:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# =============================================================================
+# benchmarks/bench_request_path.py
+# =============================================================================
+# Purpose:
+# End-to-end benchmark of the A2A server request path, with a stub agent so the
+# model's latency doesn't hide our own overhead.
+#
+# Stages, measured separately (in-process, one request at a time):
+# - parse:       JSON body -> A2ARequest.validate_python (what _handle_request does)
+# - upsert:      task manager upsert_task (task store write)
+# - invoke:      TellTimeAgent.invoke through the ADK Runner with a zero-latency stub LLM
+# - on_send:     AgentTaskManager.on_send_task with a stub agent (upsert + invoke + update)
+# - serialize:   A2AServer._create_response (JSONRPCResponse -> HTTP body)
+#
+# Whole path (many requests in flight):
+# - asgi:        A2AServer.app through httpx's in-process ASGI transport (no sockets)
+# - socket:      A2AServer.app under uvicorn on a real local socket
+#
+# For every case it reports throughput, p50/p95/p99 latency and memory allocated per
+# request (tracemalloc, measured in a separate pass so it doesn't skew timings).
+#
+# Results can be saved as JSON and compared with an earlier run; the script exits
+# with status 1 if any case got slower than the baseline by more than --threshold.
+#
+# Run:
+#   python -m benchmarks.bench_request_path --output baseline.json
+#   ... change something ...
+#   python -m benchmarks.bench_request_path --baseline baseline.json --threshold 0.15
+# =============================================================================
+
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable
+
+import click
+import httpx
+
+from benchmarks.common import StubAgent, StubServer, latency_summary, print_summary
+from models.agent import AgentCapabilities, AgentCard
+from models.request import A2ARequest, SendTaskRequest
+from server.server import A2AServer
+
+#One benchmark step: runs request number i
+Step = Callable[[int], Awaitable[None]]
+
+
+# -----------------------------------------------------------------------------
+# Fixtures
+# -----------------------------------------------------------------------------
+
+#Raw tasks/send body for request i (a new task per request, sessions reused)
+def request_body(i: int, sessions: int = 100) -> bytes:
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "id": i,
+        "method": "tasks/send",
+        "params": {
+            "id": f"task-{i}",
+            "sessionId": f"session-{i % sessions}",
+            "message": {"role": "user", "parts": [{"type": "text", "text": "What time is it?"}]},
+        },
+    }).encode()
+
+
+#A2AServer with the real AgentTaskManager and an in-memory store, around a stub agent
+def build_server(agent=None) -> A2AServer:
+    from agents.google_adk.task_manager import AgentTaskManager
+
+    card = AgentCard(
+        name="StubAgent", description="Benchmark stub", url="http://127.0.0.1/", version="0",
+        capabilities=AgentCapabilities(), skills=[],
+    )
+    manager = AgentTaskManager(agent=agent or StubAgent())
+    return A2AServer(host="127.0.0.1", port=0, agent_card=card, task_manager=manager)
+
+
+# -----------------------------------------------------------------------------
+# Measurement
+# -----------------------------------------------------------------------------
+
+#Times `requests` calls of step with at most `concurrency` in flight
+async def time_step(step: Step, requests: int, concurrency: int) -> dict[str, float]:
+    latencies: list[float] = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await step(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_summary(latencies, time.perf_counter() - start)
+
+
+#Memory allocated while running one request (median of `requests` sequential runs)
+async def allocations(step: Step, requests: int, offset: int) -> dict[str, float]:
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(offset, offset + requests):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await step(i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_kb": statistics.median(peaks) / 1024,      # Peak extra memory while handling one request
+        "retained_kb": retained / requests / 1024,         # Memory still held afterwards (e.g. stored tasks)
+    }
+
+
+async def run_case(name: str, step: Step, requests: int, concurrency: int = 1) -> dict[str, float]:
+    warmup = max(requests // 10, 1)
+    await time_step(lambda i: step(requests * 3 + i), warmup, concurrency)
+    summary = await time_step(step, requests, concurrency)
+    summary.update(await allocations(step, min(requests, 200), requests * 2))
+    print_summary(name, summary, file=sys.stderr)
+    return summary
+
+
+# -----------------------------------------------------------------------------
+# Cases
+# -----------------------------------------------------------------------------
+
+async def stage_cases(requests: int) -> dict[str, dict[str, float]]:
+    from agents.google_adk.agent import TellTimeAgent
+
+    server = build_server()
+    manager = server.task_manager
+    bodies = [request_body(i) for i in range(requests * 4)]
+    parsed: list[SendTaskRequest] = [A2ARequest.validate_python(json.loads(body)) for body in bodies]
+    results = {}
+
+    async def parse(i):
+        A2ARequest.validate_python(json.loads(bodies[i]))
+    results["parse"] = await run_case("parse", parse, requests)
+
+    async def upsert(i):
+        await manager.upsert_task(parsed[i].params, history_length=0)
+    results["upsert"] = await run_case("upsert", upsert, requests)
+
+    agent = TellTimeAgent(model="stub:latency_ms=0,tokens_per_s=0")
+    async def invoke(i):
+        await agent.invoke("What time is it?", f"session-{i % 100}")
+    results["invoke"] = await run_case("invoke", invoke, requests)
+
+    #Fresh manager, so these tasks are new like in production
+    manager = build_server().task_manager
+    async def on_send(i):
+        await manager.on_send_task(parsed[i])
+    results["on_send"] = await run_case("on_send", on_send, requests)
+
+    response = await build_server().task_manager.on_send_task(parsed[0])
+    async def serialize(i):
+        server._create_response(response)
+    results["serialize"] = await run_case("serialize", serialize, requests)
+    return results
+
+
+async def asgi_case(requests: int, concurrency: int) -> dict[str, float]:
+    server = build_server()
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def send(i):
+            response = await client.post("/", content=request_body(i), headers={"content-type": "application/json"})
+            response.raise_for_status()
+        return await run_case("asgi", send, requests, concurrency)
+
+
+async def socket_case(url: str, requests: int, concurrency: int) -> dict[str, float]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def send(i):
+            response = await client.post(url, content=request_body(i), headers={"content-type": "application/json"})
+            response.raise_for_status()
+        return await run_case("socket", send, requests, concurrency)
+
+
+# -----------------------------------------------------------------------------
+# Baseline comparison
+# -----------------------------------------------------------------------------
+
+#Returns one message per case whose p50 latency or throughput regressed past threshold
+def regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    found = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before["p50_ms"] > 0 and current["p50_ms"] > before["p50_ms"] * (1 + threshold):
+            found.append(f"{name}: p50 {before['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms")
+        if before["rps"] > 0 and current["rps"] < before["rps"] * (1 - threshold):
+            found.append(f"{name}: throughput {before['rps']:.0f} -> {current['rps']:.0f} req/s")
+    return found
+
+
+@click.command()
+@click.option("--requests", default=2000, help="Requests per case")
+@click.option("--concurrency", default=16, help="Requests in flight for the asgi / socket cases")
+@click.option("--case", "cases", multiple=True, type=click.Choice(["stages", "asgi", "socket"]), help="Cases to run (default: all)")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write results to this JSON file")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="Compare with results from an earlier run")
+@click.option("--threshold", default=0.15, help="Allowed slowdown vs. the baseline (0.15 = 15%)")
+def main(requests, concurrency, cases, output, baseline, threshold):
+    cases = cases or ("stages", "asgi", "socket")
+    results: dict[str, dict[str, float]] = {}
+
+    if "stages" in cases:
+        results.update(asyncio.run(stage_cases(requests)))
+    if "asgi" in cases:
+        results["asgi"] = asyncio.run(asgi_case(requests, concurrency))
+    if "socket" in cases:
+        with StubServer(build_server().app) as server:
+            results["socket"] = asyncio.run(socket_case(server.url, requests, concurrency))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "requests": requests,
+            "concurrency": concurrency,
+        },
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            found = regressions(results, json.load(f)["results"], threshold)
+        for message in found:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+        print(f"No regressions past {threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# =============================================================================
+# benchmarks/bench_serialization.py
+# =============================================================================
+# Purpose:
+# Compares how A2AServer turns a JSONRPCResponse into an HTTP body:
+#
+# - legacy:  model_dump() -> FastAPI jsonable_encoder() -> Starlette JSONResponse (json.dumps)
+#            (three walks over the task history; needs fastapi installed)
+# - fast:    server.server.json_response(): pydantic-core writes JSON bytes in one pass
+#
+# Tasks with longer histories make the difference grow, so several sizes are measured.
+#
+# Run:
+#   python -m benchmarks.bench_serialization --history 1 --history 100 --history 1000
+# =============================================================================
+
+import time
+
+import click
+from starlette.responses import JSONResponse
+
+from models.request import SendTaskResponse
+from models.task import Message, Task, TaskState, TaskStatus, TextPart
+from server.server import json_response
+
+
+#A completed task whose history has `messages` user/agent messages
+def make_response(messages: int) -> SendTaskResponse:
+    history = [
+        Message(role="user" if i % 2 == 0 else "agent", parts=[TextPart(text=f"Message {i}: what time is it?")])
+        for i in range(messages)
+    ]
+    task = Task(id="bench", sessionId="bench", status=TaskStatus(state=TaskState.COMPLETED), history=history)
+    return SendTaskResponse(id=1, result=task)
+
+
+def legacy_response(result: SendTaskResponse) -> JSONResponse:
+    from fastapi.encoders import jsonable_encoder
+    return JSONResponse(content=jsonable_encoder(result.model_dump(exclude_none=True)))
+
+
+#Mean seconds per call, over at least `min_time` seconds
+def time_per_call(fn, min_time: float) -> float:
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+@click.command()
+@click.option("--history", "sizes", multiple=True, type=int, help="History lengths to test (default 1 10 100 1000)")
+@click.option("--min-time", default=1.0, help="Seconds spent per measurement")
+def main(sizes, min_time):
+    try:
+        import fastapi  # noqa: F401
+        has_legacy = True
+    except ImportError:
+        has_legacy = False
+        print("fastapi is not installed: only the fast path is measured")
+
+    for size in sizes or (1, 10, 100, 1000):
+        result = make_response(size)
+        fast = time_per_call(lambda: json_response(result), min_time)
+        line = f"history {size:>5}   fast {fast * 1e6:>10.1f} us"
+        if has_legacy:
+            assert legacy_response(result).body == json_response(result).body  # Same bytes on the wire
+            legacy = time_per_call(lambda: legacy_response(result), min_time)
+            line += f"   legacy {legacy * 1e6:>10.1f} us   speedup {legacy / fast:>5.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# =============================================================================
+# benchmarks/bench_sessions.py
+# =============================================================================
+# Purpose:
+# Shows how the cost of one conversation turn grows with the length of the session,
+# for ADK's InMemorySessionService and our SQLiteSessionService
+# (agents/google_adk/sqlite_services.py).
+#
+# A turn is what the Runner does with the session service: get_session, then
+# append_event for the user message and for the reply. The session is first filled
+# with --events events; the benchmark then times --turns turns.
+#
+# With the in-memory service get_session copies every event of the session, so a
+# turn gets slower as the conversation grows. SQLiteSessionService loads only the
+# newest max_events events and compacts beyond keep_events, so its cost stays flat.
+#
+# Run:
+#   python -m benchmarks.bench_sessions --events 100,1000,5000
+# =============================================================================
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import click
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.google_adk.sqlite_services import SQLiteSessionService
+
+APP, USER, SESSION = "bench", "user", "session"
+
+
+def make_event(i: int) -> Event:
+    author = "user" if i % 2 == 0 else "tell_time_agent"
+    text = f"Message {i}: what time is it?" if author == "user" else "2025-01-01 00:00:00"
+    return Event(author=author, invocation_id=f"inv-{i // 2}", content=types.Content(role=author, parts=[types.Part(text=text)]))
+
+
+async def turn_ms(service, events: int, turns: int) -> float:
+    session = await service.create_session(app_name=APP, user_id=USER, session_id=SESSION)
+    for i in range(events):
+        await service.append_event(session, make_event(i))
+
+    timings = []
+    for i in range(events, events + turns * 2, 2):
+        start = time.perf_counter()
+        session = await service.get_session(app_name=APP, user_id=USER, session_id=SESSION)
+        await service.append_event(session, make_event(i))
+        await service.append_event(session, make_event(i + 1))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+@click.command()
+@click.option("--events", default="100,1000,5000", help="Comma-separated session lengths to test")
+@click.option("--turns", default=50, help="Turns timed per session length")
+@click.option("--max-events", default=100, help="SQLiteSessionService max_events")
+@click.option("--keep-events", default=1000, help="SQLiteSessionService keep_events")
+def main(events, turns, max_events, keep_events):
+    print(f"{'events':>8} {'in-memory':>14} {'sqlite':>14}")
+    for count in [int(n) for n in events.split(",")]:
+        in_memory = asyncio.run(turn_ms(InMemorySessionService(), count, turns))
+        with tempfile.TemporaryDirectory() as directory:
+            service = SQLiteSessionService(os.path.join(directory, "adk.db"), max_events=max_events, keep_events=keep_events)
+            sqlite = asyncio.run(turn_ms(service, count, turns))
+            service.db.close()
+        print(f"{count:>8} {in_memory:>11.2f} ms {sqlite:>11.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# =============================================================================
+# benchmarks/bench_task_store.py
+# =============================================================================
+# Purpose:
+# Contention benchmark for task stores.
+#
+# Thousands of concurrent sessions run tasks/send-like traffic (upsert the user message,
+# "think", append the agent reply) while pollers hammer tasks/get-like reads. We report
+# send throughput and tasks/get latency percentiles, once with no send traffic and
+# once under heavy send traffic.
+#
+# Compared stores:
+# - global-lock: the old InMemoryTaskManager behaviour (one asyncio.Lock for everything,
+#   model_copy() + slice of the whole history on every read)
+# - in-memory:   InMemoryTaskStore (sharded write locks, lock-free snapshot reads)
+# - sqlite:      SQLiteTaskStore in a temporary file (WAL, batched append-only writes)
+#
+# Run:
+#   python -m benchmarks.bench_task_store --sessions 2000 --turns 10
+# =============================================================================
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import click
+
+from benchmarks.common import latency_summary
+from models.task import Message, Task, TaskSendParams, TaskState, TaskStatus, TextPart
+from server.sqlite_task_store import SQLiteTaskStore
+from server.task_store import InMemoryTaskStore, TaskStore
+
+
+# -----------------------------------------------------------------------------
+# Baseline: the single-global-lock store this repo used before TaskStore existed
+# -----------------------------------------------------------------------------
+
+class GlobalLockTaskStore(TaskStore):
+    def __init__(self):
+        self.tasks: dict[str, Task] = {}
+        self.lock = asyncio.Lock()
+
+    async def get_task(self, task_id, history_length=None):
+        async with self.lock:
+            task = self.tasks.get(task_id)
+            if not task:
+                return None
+            task_copy = task.model_copy()
+            if history_length is not None:
+                task_copy.history = task_copy.history[-history_length:]
+            return task_copy
+
+    async def upsert_task(self, params, history_length=None):
+        async with self.lock:
+            task = self.tasks.get(params.id)
+            if task is None:
+                task = Task(id=params.id, status=TaskStatus(state=TaskState.SUBMITTED), history=[params.message])
+                self.tasks[params.id] = task
+            else:
+                task.history.append(params.message)
+            return task
+
+    async def update_task(self, task_id, status, message=None, history_length=None):
+        async with self.lock:
+            task = self.tasks[task_id]
+            task.status = status
+            if message is not None:
+                task.history.append(message)
+            return task
+
+
+#A fresh SQLite database in a temporary directory
+def temp_sqlite_store() -> SQLiteTaskStore:
+    return SQLiteTaskStore(os.path.join(tempfile.mkdtemp(prefix="bench-tasks-"), "tasks.db"))
+
+
+STORES = {
+    "global-lock": GlobalLockTaskStore,
+    "in-memory": InMemoryTaskStore,
+    "sqlite": temp_sqlite_store,
+}
+
+
+# -----------------------------------------------------------------------------
+# Workload
+# -----------------------------------------------------------------------------
+
+USER_MESSAGE = Message(role="user", parts=[TextPart(text="What time is it?")])
+AGENT_MESSAGE = Message(role="agent", parts=[TextPart(text="2025-01-01 00:00:00")])
+
+
+#One session: `turns` tasks/send round trips on the same task ID
+async def session(store: TaskStore, task_id: str, turns: int, think_s: float) -> int:
+    params = TaskSendParams(id=task_id, sessionId=task_id, message=USER_MESSAGE)
+    for _ in range(turns):
+        await store.upsert_task(params, history_length=0)
+        await asyncio.sleep(random.uniform(0, think_s))  # Stand-in for the model call
+        await store.update_task(task_id, TaskStatus(state=TaskState.COMPLETED), AGENT_MESSAGE, history_length=0)
+    return turns
+
+
+#One poller: repeatedly reads random tasks, returns per-read latencies
+async def poller(store: TaskStore, task_ids: list[str], polls: int, history_length: int) -> list[float]:
+    latencies = []
+    for _ in range(polls):
+        task_id = random.choice(task_ids)
+        start = time.perf_counter()
+        await store.get_task(task_id, history_length)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0)  # Let writers interleave with reads
+    return latencies
+
+
+async def run_store(name: str, sessions: int, turns: int, pollers: int, polls: int,
+                    history_length: int, think_s: float) -> None:
+    store = STORES[name]()
+    task_ids = [f"task-{i}" for i in range(sessions)]
+
+    #Pre-populate so polls hit real tasks with real history
+    await asyncio.gather(*(session(store, task_id, turns, 0) for task_id in task_ids))
+
+    #1) Reads with no write traffic
+    start = time.perf_counter()
+    results = await asyncio.gather(*(poller(store, task_ids, polls, history_length) for _ in range(pollers)))
+    idle = latency_summary([x for r in results for x in r], time.perf_counter() - start)
+
+    #2) Reads while every session is sending
+    start = time.perf_counter()
+    senders = asyncio.gather(*(session(store, task_id, turns, think_s) for task_id in task_ids))
+    results = await asyncio.gather(*(poller(store, task_ids, polls, history_length) for _ in range(pollers)))
+    sends = sum(await senders)
+    send_elapsed = time.perf_counter() - start
+    busy = latency_summary([x for r in results for x in r], send_elapsed)
+
+    store.close()
+    print(
+        f"{name:<12} sends {sends / send_elapsed:>10.0f}/s   "
+        f"get p50/p99 idle {idle['p50_ms'] * 1000:>7.1f}/{idle['p99_ms'] * 1000:>7.1f} us   "
+        f"busy {busy['p50_ms'] * 1000:>7.1f}/{busy['p99_ms'] * 1000:>7.1f} us"
+    )
+
+
+@click.command()
+@click.option("--sessions", default=2000, help="Concurrent sessions sending tasks")
+@click.option("--turns", default=10, help="tasks/send calls per session")
+@click.option("--pollers", default=200, help="Concurrent tasks/get pollers")
+@click.option("--polls", default=50, help="tasks/get calls per poller")
+@click.option("--history-length", default=5, help="historyLength requested by pollers")
+@click.option("--think-ms", default=2.0, help="Max simulated model time per send (ms)")
+@click.option("--store", "stores", multiple=True, type=click.Choice(sorted(STORES)), help="Stores to run (default: all)")
+def main(sessions, turns, pollers, polls, history_length, think_ms, stores):
+    for name in stores or STORES:
+        random.seed(0)
+        asyncio.run(run_store(name, sessions, turns, pollers, polls, history_length, think_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
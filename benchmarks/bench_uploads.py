@@ -0,0 +1,102 @@
+# =============================================================================
+# benchmarks/bench_uploads.py
+# =============================================================================
+# Purpose:
+# Compares one POST /blobs of a whole file with the chunked, resumable /uploads
+# (A2AClient.upload_file_resumable), by time and by the server's peak Python heap
+# (tracemalloc, in multiples of the file size):
+#
+# - single:           the whole file in one request, buffered in memory by the server
+# - chunked (c=N):    --chunk-mb chunks, N at once, written to disk as they arrive and
+#                     memory-mapped when complete
+# - chunked, lossy:   the same, but --drop-pct percent of the chunk requests fail
+#                     midway (connection reset) and are resent; a single POST would
+#                     have to start over from the first byte instead
+#
+# The server runs in-process behind httpx's ASGI transport, so no sockets are involved.
+#
+# Run:
+#   python -m benchmarks.bench_uploads --sizes 8,32 --chunk-mb 4
+# =============================================================================
+
+import asyncio
+import os
+import random
+import shutil
+import time
+import tracemalloc
+
+import click
+import httpx
+
+from agents.google_adk.task_manager import AgentTaskManager
+from benchmarks.common import StubAgent
+from client.client import A2AClient
+from models.agent import AgentCapabilities, AgentCard
+from server.blob_store import InMemoryBlobStore
+from server.server import A2AServer
+from server.uploads import UploadManager
+
+URL = "http://agent/"
+
+
+class LossyTransport(httpx.AsyncBaseTransport):
+    """Fails a share `drop` of the chunk PUTs with a connection reset."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, drop: float):
+        self.inner, self.drop, self.dropped = inner, drop, 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "PUT" and random.random() < self.drop:
+            self.dropped += 1
+            raise httpx.ReadError("Connection reset by peer")
+        return await self.inner.handle_async_request(request)
+
+
+#Seconds, peak traced memory (in file sizes) and chunks resent of uploading one file
+async def measure(data: bytes, chunk_bytes: int, concurrency: int | None, drop: float) -> tuple[float, float, int]:
+    card = AgentCard(name="Stub", description="Benchmark stub", url=URL, version="0", capabilities=AgentCapabilities(), skills=[])
+    store = InMemoryBlobStore(max_bytes=4 * len(data), max_blob_bytes=2 * len(data))
+    uploads = UploadManager(store, chunk_size=chunk_bytes)
+    server = A2AServer(agent_card=card, task_manager=AgentTaskManager(agent=StubAgent()), blob_store=store, uploads=uploads)
+    transport = LossyTransport(httpx.ASGITransport(app=server.app), drop)
+    http = httpx.AsyncClient(transport=transport)
+    async with A2AClient(url=URL, http_client=http) as client:
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            if concurrency is None:
+                await client.upload_file(data, "image/png")
+            else:
+                await client.upload_file_resumable(data, "image/png", concurrency=concurrency, retries=50)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    await http.aclose()
+    shutil.rmtree(uploads.directory, ignore_errors=True)
+    return elapsed, peak / len(data), transport.dropped
+
+
+@click.command()
+@click.option("--sizes", default="8,32", help="Comma-separated file sizes in MB")
+@click.option("--chunk-mb", default=4, help="Chunk size of the chunked uploads in MB")
+@click.option("--concurrency", default=4, help="Chunks sent at once")
+@click.option("--drop-pct", default=20.0, help="Percent of chunk requests that fail in the lossy case")
+def main(sizes, chunk_mb, concurrency, drop_pct):
+    cases = {
+        "single": (None, 0.0),
+        "chunked (c=1)": (1, 0.0),
+        f"chunked (c={concurrency})": (concurrency, 0.0),
+        f"chunked, {drop_pct:.0f}% lost": (concurrency, drop_pct / 100),
+    }
+    for size in [int(mb) for mb in sizes.split(",")]:
+        data = os.urandom(size * 2**20)
+        print(f"{size} MB file")
+        for name, (case_concurrency, drop) in cases.items():
+            elapsed, peak, resent = asyncio.run(measure(data, chunk_mb * 2**20, case_concurrency, drop))
+            print(f"  {name:<22} {elapsed * 1000:>8.1f} ms  heap peak {peak:>5.2f}x  chunks resent {resent}")
+
+
+if __name__ == "__main__":
+    main()
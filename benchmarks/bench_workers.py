@@ -0,0 +1,129 @@
+# =============================================================================
+# benchmarks/bench_workers.py
+# =============================================================================
+# Purpose:
+# Scaling benchmark for --workers mode.
+#
+# For each worker count (default 1, 2, 4, 8) it starts the server stack with a stubbed
+# agent (fixed latency, optional CPU burn) and a shared SQLiteTaskStore, then drives it
+# from several client processes over real sockets and reports requests/sec and latency.
+#
+# - 1 worker: one plain uvicorn process, like `python -m agents.google_adk`
+# - N > 1:    run_workers(): N worker processes behind the session-affinity router
+#
+# Run:
+#   python -m benchmarks.bench_workers --workers 1 --workers 2 --workers 4 --workers 8
+# =============================================================================
+
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from uuid import uuid4
+
+import click
+
+from benchmarks.common import StubAgent, free_port, latency_summary, print_summary
+from server.workers import _wait_for_port, _worker_main, run_workers
+
+
+# -----------------------------------------------------------------------------
+# Server side: app factory with a stub agent (imported by the worker processes)
+# -----------------------------------------------------------------------------
+
+def create_stub_app(host: str, port: int, db_path: str, latency_ms: float, cpu_ms: float):
+    from agents.google_adk.task_manager import AgentTaskManager
+    from models.agent import AgentCapabilities, AgentCard
+    from server.server import A2AServer
+    from server.sqlite_task_store import SQLiteTaskStore
+
+    card = AgentCard(
+        name="StubAgent", description="Benchmark stub", url=f"http://{host}:{port}/", version="0",
+        capabilities=AgentCapabilities(), skills=[],
+    )
+    manager = AgentTaskManager(
+        agent=StubAgent(latency_ms / 1000, cpu_ms / 1000), store=SQLiteTaskStore(db_path)
+    )
+    return A2AServer(host=host, port=port, agent_card=card, task_manager=manager).app
+
+
+# -----------------------------------------------------------------------------
+# Client side: load generator processes
+# -----------------------------------------------------------------------------
+
+async def _drive(url: str, duration: float, concurrency: int, sessions: int) -> list[float]:
+    from client.client import A2AClient
+    from models.request import SendTaskRequest
+    from models.task import TaskSendParams
+
+    latencies: list[float] = []
+    stop_at = time.monotonic() + duration
+
+    async with A2AClient(url=url, max_connections=concurrency, max_keepalive_connections=concurrency) as client:
+        async def loop():
+            while time.monotonic() < stop_at:
+                request = SendTaskRequest(params=TaskSendParams(
+                    id=uuid4().hex,
+                    sessionId=f"session-{random.randrange(sessions)}",
+                    message={"role": "user", "parts": [{"type": "text", "text": "What time is it?"}]},
+                ))
+                start = time.perf_counter()
+                await client._send_request(request)
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return latencies
+
+
+def _client_process(url: str, duration: float, concurrency: int, sessions: int) -> list[float]:
+    return asyncio.run(_drive(url, duration, concurrency, sessions))
+
+
+def _server_process(workers: int, port: int, factory_kwargs: dict) -> None:
+    if workers == 1:
+        _worker_main("benchmarks.bench_workers:create_stub_app", factory_kwargs, port, "warning")
+    else:
+        run_workers("benchmarks.bench_workers:create_stub_app", factory_kwargs, "127.0.0.1", port, workers, log_level="warning")
+
+
+def run_case(workers: int, duration: float, clients: int, concurrency: int, sessions: int,
+             latency_ms: float, cpu_ms: float) -> dict[str, float]:
+    context = multiprocessing.get_context("spawn")
+    port = free_port()
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench-workers-"), "tasks.db")
+    factory_kwargs = dict(host="127.0.0.1", port=port, db_path=db_path, latency_ms=latency_ms, cpu_ms=cpu_ms)
+
+    server = context.Process(target=_server_process, args=(workers, port, factory_kwargs), daemon=False)
+    server.start()
+    try:
+        _wait_for_port(port, server)
+        time.sleep(0.5 * workers)  # Let the router's workers finish warming up
+        url = f"http://127.0.0.1:{port}/"
+        start = time.perf_counter()
+        with context.Pool(clients) as pool:
+            results = pool.starmap(_client_process, [(url, duration, concurrency, sessions)] * clients)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.join(timeout=30)
+    return latency_summary([x for r in results for x in r], elapsed)
+
+
+@click.command()
+@click.option("--workers", "worker_counts", multiple=True, type=int, help="Worker counts to test (default 1 2 4 8)")
+@click.option("--duration", default=10.0, help="Seconds of load per case")
+@click.option("--clients", default=4, help="Load generator processes")
+@click.option("--concurrency", default=64, help="Requests in flight per load generator process")
+@click.option("--sessions", default=1000, help="Distinct session IDs")
+@click.option("--latency-ms", default=20.0, help="Stub model latency")
+@click.option("--cpu-ms", default=1.0, help="CPU burned per request by the stub agent")
+def main(worker_counts, duration, clients, concurrency, sessions, latency_ms, cpu_ms):
+    for workers in worker_counts or (1, 2, 4, 8):
+        summary = run_case(workers, duration, clients, concurrency, sessions, latency_ms, cpu_ms)
+        print_summary(f"{workers} worker(s)", summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# =============================================================================
+# benchmarks/common.py
+# =============================================================================
+# Purpose:
+# Small helpers shared by the benchmark scripts in this package:
+# - latency statistics (percentiles, summaries)
+# - a stub agent (fixed latency / CPU cost instead of a model call)
+# - a stub A2A server running in a background thread on a real socket
+#
+# Benchmarks are plain scripts, run them with e.g.
+#   python -m benchmarks.bench_client_pool
+# =============================================================================
+
+import asyncio
+import socket
+import threading
+import time
+from typing import Any
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+
+# -----------------------------------------------------------------------------
+# Statistics
+# -----------------------------------------------------------------------------
+
+#Returns the pct-th percentile (0-100) of samples using nearest-rank
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+#Summarizes per-request latencies (seconds) and total wall time into a dict of numbers
+def latency_summary(latencies: list[float], elapsed: float) -> dict[str, float]:
+    count = len(latencies)
+    return {
+        "requests": count,
+        "elapsed_s": elapsed,
+        "rps": count / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": (sum(latencies) / count * 1000) if count else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+#Prints a one-line summary for a benchmark case (plus allocations, if measured)
+def print_summary(name: str, summary: dict[str, float], file=None) -> None:
+    line = (
+        f"{name:<28} {summary['rps']:>10.1f} req/s   "
+        f"p50 {summary['p50_ms']:>8.2f} ms   p95 {summary['p95_ms']:>8.2f} ms   "
+        f"p99 {summary['p99_ms']:>8.2f} ms"
+    )
+    if "alloc_kb" in summary:
+        line += f"   alloc {summary['alloc_kb']:>7.1f} KB/req"
+    print(line, file=file)
+
+
+# -----------------------------------------------------------------------------
+# Stub agent
+# -----------------------------------------------------------------------------
+
+class StubAgent:
+    """Replies after `latency_s`, burning `cpu_s` of CPU first (stand-in for prompt/response work)."""
+
+    def __init__(self, latency_s: float = 0.0, cpu_s: float = 0.0):
+        self.latency_s = latency_s
+        self.cpu_s = cpu_s
+
+    async def invoke(self, query: str, session_id: str) -> str:
+        deadline = time.perf_counter() + self.cpu_s
+        while time.perf_counter() < deadline:
+            pass
+        await asyncio.sleep(self.latency_s)
+        return "2025-01-01 00:00:00"
+
+
+# -----------------------------------------------------------------------------
+# Stub A2A server
+# -----------------------------------------------------------------------------
+
+#Finds a free local TCP port
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+#A Starlette app that answers every POST with a canned, already-completed task
+def stub_a2a_app() -> Starlette:
+    async def handle(request: Request) -> JSONResponse:
+        body = await request.json()
+        params: dict[str, Any] = body.get("params") or {}
+        return JSONResponse({
+            "jsonrpc": "2.0",
+            "id": body.get("id"),
+            "result": {
+                "id": params.get("id", "stub"),
+                "status": {"state": "completed", "timestamp": "2025-01-01T00:00:00"},
+                "history": [
+                    params.get("message", {"role": "user", "parts": [{"type": "text", "text": ""}]}),
+                    {"role": "agent", "parts": [{"type": "text", "text": "2025-01-01 00:00:00"}]},
+                ],
+            },
+        })
+
+    app = Starlette()
+    app.add_route("/", handle, methods=["POST"])
+    return app
+
+
+class StubServer:
+    """
+    Runs an ASGI app with uvicorn on a real socket in a background thread.
+
+    Usage:
+        with StubServer(app) as server:
+            ... send requests to server.url ...
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int | None = None):
+        import uvicorn
+
+        self.host = host
+        self.port = port or free_port()
+        config = uvicorn.Config(app, host=self.host, port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        #Wait until uvicorn has bound the socket
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub server did not start in time")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
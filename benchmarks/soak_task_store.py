@@ -0,0 +1,133 @@
+# =============================================================================
+# benchmarks/soak_task_store.py
+# =============================================================================
+# Purpose:
+# Long-running soak test for task store memory.
+#
+# A local load generator keeps creating sessions and multi-turn tasks through
+# AgentTaskManager (with an instant echo agent instead of the LLM) and polls them
+# with tasks/get. Every --sample-every seconds it prints the process RSS, the store
+# size and the eviction counters. With limits / TTLs set, RSS should go flat after
+# warm-up instead of growing for the whole run.
+#
+# Run (24h):
+#   python -m benchmarks.soak_task_store --duration 86400 --max-tasks 10000 --task-ttl 600
+# =============================================================================
+
+import asyncio
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from uuid import uuid4
+
+import click
+
+from agents.google_adk.task_manager import AgentTaskManager
+from models.request import GetTaskRequest, SendTaskRequest
+from models.task import TaskQueryParams, TaskSendParams
+from server.task_store import InMemoryTaskStore
+
+
+#Stands in for TellTimeAgent: answers instantly with a reply of realistic size
+class EchoAgent:
+    async def invoke(self, query: str, session_id: str) -> str:
+        return f"Current time is 2025-01-01 00:00:00. You asked: {query}"
+
+
+#Resident set size of this process in MB
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() / 1e6
+    except OSError:
+        #Not Linux: fall back to peak RSS (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+async def client_loop(manager: AgentTaskManager, stop_at: float, turns: int, text_size: int) -> int:
+    sent = 0
+    while time.monotonic() < stop_at:
+        task_id, session_id = uuid4().hex, uuid4().hex
+        for _ in range(random.randint(1, turns)):
+            text = "x" * random.randint(1, text_size)
+            await manager.on_send_task(SendTaskRequest(params=TaskSendParams(
+                id=task_id, sessionId=session_id,
+                message={"role": "user", "parts": [{"type": "text", "text": text}]},
+            )))
+            await manager.on_get_task(GetTaskRequest(params=TaskQueryParams(id=task_id, historyLength=2)))
+            sent += 1
+            await asyncio.sleep(0)  # Yield like a real network round trip would
+    return sent
+
+
+async def sampler(store: InMemoryTaskStore, stop_at: float, every: float, samples: list[float]) -> None:
+    start = time.monotonic()
+    while time.monotonic() < stop_at:
+        await asyncio.sleep(every)
+        store.evict()  # Apply TTLs even if traffic pauses
+        traced = f"   traced {tracemalloc.get_traced_memory()[0] / 1e6:8.1f} MB" if tracemalloc.is_tracing() else ""
+        samples.append(rss_mb())
+        stats = await store.stats()
+        print(
+            f"t={time.monotonic() - start:>8.0f}s   rss {samples[-1]:8.1f} MB{traced}   "
+            f"tasks {stats['tasks']:>8}   messages {stats['history_messages']:>9}   "
+            f"evictions {stats['evictions']}",
+            flush=True,
+        )
+
+
+async def run(duration, clients, turns, text_size, sample_every, store: InMemoryTaskStore) -> list[float]:
+    manager = AgentTaskManager(agent=EchoAgent(), store=store)
+    stop_at = time.monotonic() + duration
+    samples: list[float] = []
+    results = await asyncio.gather(
+        sampler(store, stop_at, sample_every, samples),
+        *(client_loop(manager, stop_at, turns, text_size) for _ in range(clients)),
+    )
+    print(f"sent {sum(results[1:])} tasks/send requests in {duration:.0f}s")
+    return samples
+
+
+@click.command()
+@click.option("--duration", default=86400.0, help="Seconds to run (default 24h)")
+@click.option("--clients", default=50, help="Concurrent load generator clients")
+@click.option("--turns", default=10, help="Max tasks/send calls per task")
+@click.option("--text-size", default=512, help="Max characters per user message")
+@click.option("--sample-every", default=60.0, help="Seconds between memory samples")
+@click.option("--max-tasks", default=10000, type=int)
+@click.option("--max-history-messages", default=None, type=int)
+@click.option("--max-history-bytes", default=None, type=int)
+@click.option("--task-ttl", default=600.0, type=float)
+@click.option("--idle-ttl", default=None, type=float)
+@click.option("--max-growth-mb", default=None, type=float,
+              help="Exit with status 1 if RSS grows more than this between the first and last quarter of the run")
+@click.option("--tracemalloc", "trace", is_flag=True, help="Also report Python heap size (slower)")
+def main(duration, clients, turns, text_size, sample_every, max_tasks, max_history_messages,
+         max_history_bytes, task_ttl, idle_ttl, max_growth_mb, trace):
+    if trace:
+        tracemalloc.start()
+    store = InMemoryTaskStore(
+        max_tasks=max_tasks,
+        max_history_messages=max_history_messages,
+        max_history_bytes=max_history_bytes,
+        terminal_ttl=task_ttl,
+        idle_ttl=idle_ttl,
+    )
+    samples = asyncio.run(run(duration, clients, turns, text_size, sample_every, store))
+
+    #Compare the average RSS of the first and last quarter of the samples (skipping warm-up noise)
+    if len(samples) >= 4:
+        quarter = len(samples) // 4
+        early = sum(samples[:quarter]) / quarter
+        late = sum(samples[-quarter:]) / quarter
+        print(f"rss first quarter {early:.1f} MB, last quarter {late:.1f} MB, growth {late - early:+.1f} MB")
+        if max_growth_mb is not None and late - early > max_growth_mb:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,26 +3,95 @@
 # with an Agent2Agent (A2A) server.
 #
 # It supports:
-# - Sending tasks and receiving responses
-# - Getting task status or history
+# - Sending tasks and receiving responses over a pooled, keep-alive connection
+# - Sending many tasks in a few round trips (JSON-RPC batches, send_tasks)
+# - Uploading / downloading file content (e.g. images) for FileParts as raw bytes
+# - Uploading large files in chunks, several at once, resuming after a dropped connection
+# - Streaming task updates as they happen (Server-Sent Events)
+# - Getting task status or history (tasks/get)
 
 
+import asyncio #For waiting between polls
+import hashlib #Content hash of chunked uploads
 import json #to encode/encode JSON data
+import logging
+import time
 from uuid import uuid4
 import httpx
-from httpx_sse import connect_sse
-from typing import Any
+from httpx_sse import aconnect_sse, SSEError
+from typing import Any, AsyncIterator
 
 #import supported requet types
 from models.request import SendTaskRequest, GetTaskRequest #Removed canceltaskrequest
+from models.request import SendTaskStreamingRequest, SendTaskStreamingResponse
 
 #Base request format for JSON-RPC 2.0
 from models.json_rpc import JSONRPCRequest
 
 #Models for task results and agent identity
-from models.task import Task, TaskSendParams
+from models.task import Task, TaskSendParams, TaskQueryParams, FileContent, FilePart, UploadStatus, TERMINAL_STATES
 from models.agent import AgentCard
 
+#Structured logging (lazy, off the event loop) and request ID propagation
+from models.request_context import REQUEST_ID_HEADER, log_event, request_id_var
+
+logger = logging.getLogger(__name__)
+
+
+#Default connection pool settings (used when the client creates its own pool)
+DEFAULT_MAX_CONNECTIONS = 100           #Max open sockets in the pool (across all hosts)
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20  #Max idle sockets kept open for reuse
+DEFAULT_KEEPALIVE_EXPIRY = 30.0         #Seconds an idle socket is kept before closing it
+DEFAULT_TIMEOUT = 30                    #Seconds to wait for a (non-streaming) response
+DEFAULT_BATCH_SIZE = 50                 #Requests per JSON-RPC batch in send_tasks (the server allows 100)
+UPLOAD_CHUNK_BYTES = 1 << 20            #Size of the slices a file upload is handed to the socket in
+DEFAULT_UPLOAD_CONCURRENCY = 4          #Chunks of a resumable upload sent at once
+DEFAULT_UPLOAD_RETRIES = 5              #Rounds of resending missing chunks before a resumable upload gives up
+
+
+#Creates an httpx client with a configured connection pool
+def create_http_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    http2: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> httpx.AsyncClient:
+    """
+    Builds a long-lived httpx.AsyncClient whose connections are kept alive and reused.
+
+    http2=True needs the optional 'h2' package (pip install "httpx[http2]").
+    """
+    limits = httpx.Limits(
+        max_connections = max_connections,
+        max_keepalive_connections = max_keepalive_connections,
+        keepalive_expiry = keepalive_expiry,
+    )
+    return httpx.AsyncClient(limits = limits, http2 = http2, timeout = timeout)
+
+
+#One process-wide pool that every client created with A2AClient.shared() reuses
+_shared_http_client: httpx.AsyncClient | None = None
+
+def get_shared_http_client(**pool_options) -> httpx.AsyncClient:
+    """
+    Returns the process-wide pooled httpx client, creating it on first use.
+
+    pool_options (same as create_http_client) only apply when the pool is first created.
+    The pool is tied to the event loop that first uses it, so share it within one loop only.
+    """
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = create_http_client(**pool_options)
+    return _shared_http_client
+
+async def close_shared_http_client() -> None:
+    """Closes the process-wide pool (call once on shutdown)."""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
+
 
 #Custom Error Classes
 class A2AClientHTTPError(Exception):
@@ -32,14 +101,45 @@ class A2AClientJSONError(Exception):
     """When response is not valid JSON"""
     pass
 
+class A2AClientUploadError(Exception):
+    """A resumable upload stopped with chunks missing; pass upload_id to resume it later"""
+    def __init__(self, upload_id: str, missing: list[int], error: BaseException | None):
+        super().__init__(f"Upload {upload_id} incomplete ({len(missing)} chunks missing): {error}")
+        self.upload_id = upload_id
+        self.missing = missing
+        self.error = error
+
+class A2AClientJSONRPCError(Exception):
+    """When the server answers with a JSON-RPC error object (e.g. task not found)"""
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(f"JSON-RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
 
 #A2AClient :Main interface for talking to an A2A Agent
 class A2AClient:
     #Constructor
-    def __init__(self, agent_card: AgentCard = None, url: str = None):
+    def __init__(
+        self,
+        agent_card: AgentCard = None,
+        url: str = None,
+        http_client: httpx.AsyncClient | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = False,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
         """
         Initializes the client using either an agent card or a direct url
         One of the two must be provided
+
+        Connections are pooled and kept alive between calls:
+        - http_client: reuse an existing pool (e.g. get_shared_http_client()), the client will not close it
+        - otherwise a private pool is created from max_connections, max_keepalive_connections,
+          keepalive_expiry and http2, and closed by aclose() / "async with"
         """
         #Doing manual discovery here to discover the agent 
         #Client only needs to know URL in constructor
@@ -49,6 +149,48 @@ class A2AClient:
             self.url = url
         else:
             raise ValueError("Either agent_card or url must be provided")
+
+        self.timeout = timeout
+        if http_client is not None:
+            self._http = http_client
+            self._owns_http = False #Someone else manages this pool's lifetime
+        else:
+            self._http = create_http_client(
+                max_connections = max_connections,
+                max_keepalive_connections = max_keepalive_connections,
+                keepalive_expiry = keepalive_expiry,
+                http2 = http2,
+                timeout = timeout,
+            )
+            self._owns_http = True
+
+    #Factory: a client for one agent that shares sockets with every other shared client
+    @classmethod
+    def shared(cls, agent_card: AgentCard = None, url: str = None, **pool_options) -> "A2AClient":
+        """
+        Creates a client backed by the process-wide pool from get_shared_http_client().
+        Many clients pointing at different agents can be created cheaply this way.
+        """
+        timeout = pool_options.get("timeout", DEFAULT_TIMEOUT)
+        return cls(
+            agent_card = agent_card,
+            url = url,
+            http_client = get_shared_http_client(**pool_options),
+            timeout = timeout,
+        )
+
+    #Async context manager support: "async with A2AClient(url=...) as client:"
+    async def __aenter__(self) -> "A2AClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Closes the connection pool if this client created it."""
+        if self._owns_http:
+            await self._http.aclose()
+
     #Send a new task to the agent, this uses send_request fxn to send request to server
     async def send_task(self, payload: dict[str, Any]) -> Task:
         request = SendTaskRequest(
@@ -57,30 +199,310 @@ class A2AClient:
             #TaskSendParams has an id, sessionid, message, historylength, metadata
             )
 
-        print("\n Sending JSON-RPC request:")
-        print(json.dumps(request.model_dump(), indent=2))
+        log_event(logger, logging.DEBUG, "request.sending", method=request.method, url=self.url, request=request)
 
         response = await self._send_request(request) #Once request object is made, use send_request function to send request to agent,
         #We wait for response then return the task with the result from the response
-        return Task(**response["result"]) #Extract just the "result" field 
-    
+        return self._task_from_response(response) #Extract just the "result" field
+
+    #Send many independent tasks, several per HTTP round trip
+    async def send_tasks(
+        self,
+        payloads: list[dict[str, Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        return_exceptions: bool = False,
+    ) -> list[Task | A2AClientJSONRPCError]:
+        """
+        Sends every payload as a "tasks/send" request, batch_size of them per JSON-RPC batch
+        (batches go out concurrently, the server runs the requests of a batch concurrently too).
+
+        Returns the tasks in the order of the payloads.
+        return_exceptions: like asyncio.gather, put the A2AClientJSONRPCError of a failed task in
+        its place instead of raising the first one
+        """
+        requests = [SendTaskRequest(id = uuid4().hex, params = TaskSendParams(**payload)) for payload in payloads]
+        batches = [requests[i:i + batch_size] for i in range(0, len(requests), batch_size)]
+        log_event(logger, logging.DEBUG, "request.sending", method="batch", url=self.url, requests=len(requests))
+
+        responses = await asyncio.gather(*(self._send_batch(batch) for batch in batches))
+        results: list[Task | A2AClientJSONRPCError] = []
+        for response in (response for batch in responses for response in batch):
+            try:
+                results.append(self._task_from_response(response))
+            except A2AClientJSONRPCError as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    #Upload file content (e.g. an image) and get a FilePart that references it
+    async def upload_file(
+        self,
+        data: bytes | bytearray | memoryview,
+        mime_type: str = "application/octet-stream",
+        name: str | None = None,
+    ) -> FilePart:
+        """
+        POSTs the raw bytes to the agent's /blobs endpoint (no base64, no JSON) and returns
+        a FilePart to put into a message next to the text parts.
+
+        The content is sent in slices of a view of `data`, so it is not copied on the way out.
+        """
+        view = memoryview(data).cast("B")
+        try:
+            response = await self._http.post(
+                self.url.rstrip("/") + "/blobs",
+                content = _slices(view),
+                params = {"name": name} if name else None,
+                headers = {**(self._headers() or {}), "Content-Type": mime_type, "Content-Length": str(view.nbytes)},
+                timeout = self.timeout,
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        return FilePart(file = FileContent.model_validate_json(response.content))
+
+    #Upload a large file in chunks, several at once, picking up where it stopped after a failure
+    async def upload_file_resumable(
+        self,
+        data: bytes | bytearray | memoryview,
+        mime_type: str = "application/octet-stream",
+        name: str | None = None,
+        concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        retries: int = DEFAULT_UPLOAD_RETRIES,
+        upload_id: str | None = None,
+    ) -> FilePart:
+        """
+        Sends the bytes through the agent's /uploads endpoints and returns a FilePart, like
+        upload_file. The agent chooses the chunk size; up to `concurrency` chunks are sent at
+        once. After a dropped connection or a failed chunk the client asks which chunks the
+        agent is still missing and sends only those (up to `retries` more rounds).
+
+        Content the agent already has (same SHA-256) is not sent again, and the agent checks
+        the finished upload against that hash.
+
+        Args:
+            upload_id: Resume an earlier upload of the same data (A2AClientUploadError.upload_id)
+
+        Raises:
+            A2AClientUploadError: chunks were still missing after the last round (resumable)
+            A2AClientHTTPError: the agent refused the upload (e.g. 413: too large, 404: expired)
+        """
+        view = memoryview(data).cast("B")
+        base = self.url.rstrip("/")
+        digest = await asyncio.to_thread(lambda: hashlib.sha256(view).hexdigest())
+        try:
+            if upload_id is None:
+                #Content-addressed: if the agent has this content, its URI is already known
+                response = await self._http.head(f"{base}/blobs/{digest}", timeout = self.timeout, headers = self._headers())
+                if response.status_code == 200:
+                    uri = f"{base}/blobs/{digest}"
+                    mime_type = response.headers.get("content-type", mime_type)
+                    return FilePart(file = FileContent(uri = uri, mimeType = mime_type, name = name, size = view.nbytes))
+                response = await self._http.post(
+                    f"{base}/uploads", json = {"size": view.nbytes, "mimeType": mime_type, "name": name},
+                    timeout = self.timeout, headers = self._headers(),
+                )
+                response.raise_for_status()
+                status = UploadStatus.model_validate_json(response.content)
+            else:
+                status = await self._upload_status(base, upload_id)
+
+            error = None
+            for attempt in range(retries + 1):
+                if not status.missing:
+                    break
+                if attempt:
+                    await asyncio.sleep(min(0.1 * 2 ** attempt, 5.0))
+                error = await self._send_chunks(base, status, view, concurrency)
+                try:
+                    status = await self._upload_status(base, status.id)
+                except httpx.TransportError as e:
+                    #Can't tell what arrived: the next round asks again (and resends what is still missing)
+                    error = e
+            if status.missing:
+                raise A2AClientUploadError(status.id, status.missing, error)
+
+            response = await self._http.post(
+                f"{base}/uploads/{status.id}/complete", params = {"sha256": digest},
+                timeout = self.timeout, headers = self._headers(),
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        return FilePart(file = FileContent.model_validate_json(response.content))
+
+    #Sends every missing chunk (at most `concurrency` at once); returns the last retryable error, if any
+    async def _send_chunks(
+        self, base: str, status: UploadStatus, view: memoryview, concurrency: int,
+    ) -> BaseException | None:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def send(index: int) -> None:
+            chunk = view[index * status.chunkSize:(index + 1) * status.chunkSize]
+            async with slots:
+                response = await self._http.put(
+                    f"{base}/uploads/{status.id}/{index}", content = _slices(chunk),
+                    headers = {**(self._headers() or {}), "Content-Length": str(chunk.nbytes)},
+                    timeout = self.timeout,
+                )
+                response.raise_for_status()
+
+        error = None
+        for result in await asyncio.gather(*(send(index) for index in status.missing), return_exceptions = True):
+            if isinstance(result, httpx.HTTPStatusError) and result.response.status_code not in (409, 429) and result.response.status_code < 500:
+                raise result  # The upload is gone or the chunk is wrong: resending won't help
+            if isinstance(result, (httpx.TransportError, httpx.HTTPStatusError)):
+                error = result
+            elif isinstance(result, BaseException):
+                raise result
+        return error
+
+    async def _upload_status(self, base: str, upload_id: str) -> UploadStatus:
+        response = await self._http.get(f"{base}/uploads/{upload_id}", timeout = self.timeout, headers = self._headers())
+        response.raise_for_status()
+        return UploadStatus.model_validate_json(response.content)
+
+    #Download the content a FilePart references
+    async def download_file(self, part: FilePart | str) -> bytes:
+        """Returns the bytes behind a FilePart (or a blob URI)."""
+        uri = part if isinstance(part, str) else part.file.uri
+        try:
+            response = await self._http.get(uri, timeout = self.timeout, headers = self._headers())
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        return response.content
+
+    #Fetch the current state of a task (e.g. to poll a long-running task)
+    async def get_task(self, payload: dict[str, Any]) -> Task:
+        """
+        Sends a "tasks/get" request.
+
+        payload: {"id": "<task id>", "historyLength": <optional int>}
+        historyLength limits the returned history to the last N messages.
+        """
+        request = GetTaskRequest(
+            id = uuid4().hex,
+            params = TaskQueryParams(**payload)
+            )
+        response = await self._send_request(request)
+        return self._task_from_response(response)
+
+    #Poll a task until it is completed, failed or canceled (for servers running tasks in the background)
+    async def wait_for_task(
+        self,
+        task_id: str,
+        history_length: int | None = None,
+        poll_interval: float = 0.5,
+        max_poll_interval: float = 5.0,
+        timeout: float | None = None,
+    ) -> Task:
+        """
+        Calls tasks/get until the task reaches a terminal state and returns it.
+        The wait between polls starts at poll_interval and grows by 1.5x up to max_poll_interval.
+
+        Raises:
+            TimeoutError: if `timeout` seconds pass first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = poll_interval
+        while True:
+            task = await self.get_task({"id": task_id, "historyLength": history_length})
+            if task.status.state in TERMINAL_STATES:
+                return task
+            if deadline is not None and time.monotonic() + interval > deadline:
+                raise TimeoutError(f"Task {task_id} did not finish within {timeout}s")
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, max_poll_interval)
+
+    #Returns the Task in a JSON-RPC response, or raises if the server returned an error
+    @staticmethod
+    def _task_from_response(response: dict[str, Any]) -> Task:
+        error = response.get("error")
+        if error:
+            raise A2AClientJSONRPCError(error.get("code", 0), error.get("message", ""), error.get("data"))
+        return Task(**response["result"])
+
+    #Send a new task and receive its updates while the agent is still working on it
+    async def send_task_subscribe(self, payload: dict[str, Any]) -> AsyncIterator[SendTaskStreamingResponse]:
+        """
+        Sends a "tasks/sendSubscribe" request and yields every update the server pushes.
+
+        WORKING updates carry only the newest chunk of agent text in result.status.message,
+        the last update has result.final == True and carries the complete reply.
+
+        Usage:
+            async for update in client.send_task_subscribe(payload):
+                ...
+        """
+        request = SendTaskStreamingRequest(
+            id = uuid4().hex,
+            params = TaskSendParams(**payload)
+            )
+
+        #No read timeout: the gap between two updates can be as long as the model takes to think
+        timeout = httpx.Timeout(self.timeout, read=None)
+        try:
+            async with aconnect_sse(
+                self._http, "POST", self.url, json=request.model_dump(), timeout=timeout, headers=self._headers() or {}
+            ) as event_source:
+                event_source.response.raise_for_status() #Raise error if status is 4xx/5xx
+                async for sse in event_source.aiter_sse():
+                    yield SendTaskStreamingResponse(**json.loads(sse.data))
+
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+
+        except SSEError as e: #Server did not answer with an event stream
+            raise A2AClientHTTPError(400, str(e)) from e
+
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+
+
+    #Passes on the ID of the request being handled (when an agent calls another agent)
+    @staticmethod
+    def _headers() -> dict[str, str] | None:
+        request_id = request_id_var.get()
+        return {REQUEST_ID_HEADER: request_id} if request_id else None
 
     #Internal helper to send a JSON-RPC request to server
     async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                response = await client.post( #Send POST request to Agent's URL
-                    self.url, #Send to agent's URL
-                    json = request.model_dump(), #Convert request to JSON
-                    timeout = 30
-                    )
-                response.raise_for_status() #Raise error if status is 4xx/5xx
-                return response.json() #Return parsed response as a dict
-                
-            except httpx.HTTPStatusError as e:
-                raise A2AClientHTTPError(e.response.status_code, str(e)) from e
-            
-            except json.JSONDecodeError as e:
-                raise A2AClientJSONError(str(e)) from e
+        return await self._post(request.model_dump()) #Convert request to JSON
+
+    #Sends requests as one JSON-RPC batch and returns their responses in the same order
+    async def _send_batch(self, requests: list[JSONRPCRequest]) -> list[dict[str, Any]]:
+        responses = await self._post([request.model_dump() for request in requests])
+        if not isinstance(responses, list):
+            raise A2AClientJSONError(f"Expected a JSON array in answer to a batch, got {type(responses).__name__}")
+        #Matched by ID: the spec allows the server to answer a batch in any order
+        by_id = {response.get("id"): response for response in responses if isinstance(response, dict)}
+        missing = {"error": {"code": -32603, "message": "No response to this request in the batch"}}
+        return [by_id.get(request.id, missing) for request in requests]
+
+    #POSTs a JSON body to the agent and returns the parsed JSON answer
+    async def _post(self, body: Any) -> Any:
+        #Reuses a kept-alive connection from the pool instead of opening a new one per call
+        try:
+
+            response = await self._http.post( #Send POST request to Agent's URL
+                self.url, #Send to agent's URL
+                json = body,
+                timeout = self.timeout,
+                headers = self._headers(),
+                )
+            response.raise_for_status() #Raise error if status is 4xx/5xx
+            return response.json() #Return parsed response as a dict
+
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+
 
+#A view handed to httpx in slices (httpx takes an iterator of bytes-like pieces, not a memoryview)
+async def _slices(view: memoryview) -> AsyncIterator[memoryview]:
+    for offset in range(0, view.nbytes, UPLOAD_CHUNK_BYTES):
+        yield view[offset:offset + UPLOAD_CHUNK_BYTES]
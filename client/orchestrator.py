@@ -0,0 +1,329 @@
+#  Purpose:
+# The orchestrator side of a multi-agent setup: talks to many A2A agents at once
+# instead of one agent, one request at a time.
+#
+# - AgentDirectory: discovers agents through GET <url>/.well-known/agent.json and
+#   caches their AgentCards (TTL; concurrent lookups of the same agent share one
+#   fetch; a stale card is kept when a refresh fails)
+# - Orchestrator.fan_out: sends one task to N agents concurrently over one shared
+#   connection pool, with
+#   - a timeout per agent
+#   - hedged requests: an agent that hasn't answered after `hedge_after` seconds gets
+#     a second copy of the request, and whichever copy answers first wins
+#   - first-k-wins (return as soon as k agents answered) or gather-all (first_k=None)
+#   - cancellation of every request still running once the result is known
+#
+# End-to-end latency becomes that of the slowest agent needed, not the sum of all.
+#
+# Cancelling only abandons the HTTP request: this server has no tasks/cancel, so an
+# agent may still finish (and store) a task whose answer nobody waits for anymore.
+#
+# Usage:
+#   async with Orchestrator() as orchestrator:
+#       results = await orchestrator.fan_out(urls, payload, first_k=2, timeout=10, hedge_after=1.5)
+#       replies = [result.task for result in results if result.ok]
+
+
+import asyncio
+import logging
+import time
+from typing import Any
+from uuid import uuid4
+
+import httpx
+
+from client.client import A2AClient, create_http_client
+from models.agent import AgentCard
+from models.task import Task, TaskState, TERMINAL_STATES
+from models.request_context import log_event
+from server.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+#Where an A2A agent publishes its card, relative to its base URL
+AGENT_CARD_PATH = "/.well-known/agent.json"
+
+
+# -----------------------------------------------------------------------------
+# Agent discovery
+# -----------------------------------------------------------------------------
+
+class AgentDirectory:
+    """
+    📇 Cache of AgentCards, fetched from each agent's /.well-known/agent.json.
+
+    Args:
+        http_client: Pool used for the lookups (a private one is created if omitted)
+        ttl: Seconds a card is used before it is fetched again
+        timeout: Seconds to wait for an agent card
+    """
+
+    def __init__(self, http_client: httpx.AsyncClient | None = None, ttl: float = 300.0, timeout: float = 5.0):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._http = http_client or create_http_client(timeout = timeout)
+        self._owns_http = http_client is None
+        self._cards: dict[str, tuple[AgentCard, float]] = {}  # base URL -> (card, fetched at)
+        self._flight = SingleFlight()
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
+
+    def invalidate(self, url: str) -> None:
+        """Forgets the card of an agent (e.g. after it moved), so the next get() fetches it."""
+        self._cards.pop(self._key(url), None)
+
+    async def get(self, url: str, refresh: bool = False) -> AgentCard:
+        """
+        Returns the card of the agent at `url` (its base URL), from the cache while it is fresh.
+
+        Raises:
+            httpx.HTTPError, pydantic.ValidationError: the agent can't be reached or sent no valid
+            card, and no earlier card of it is cached
+        """
+        key = self._key(url)
+        cached = self._cards.get(key)
+        if cached is not None and not refresh and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        try:
+            card, _ = await self._flight.do(key, lambda: self._fetch(key))
+        except Exception as e:
+            if cached is None:
+                raise
+            #Better an old card than no agent: keep using it until the agent is back
+            log_event(logger, logging.WARNING, "agent_card.refresh_failed", url=key, error=str(e))
+            return cached[0]
+        return card
+
+    async def discover(self, urls: list[str]) -> dict[str, AgentCard | Exception]:
+        """Looks up many agents concurrently; agents that can't be reached map to their error."""
+        cards = await asyncio.gather(*(self.get(url) for url in urls), return_exceptions=True)
+        return dict(zip(urls, cards))
+
+    async def _fetch(self, key: str) -> AgentCard:
+        response = await self._http.get(key + AGENT_CARD_PATH, timeout = self.timeout)
+        response.raise_for_status()
+        card = AgentCard.model_validate_json(response.content)
+        self._cards[key] = (card, time.monotonic())
+        return card
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return url.rstrip("/")
+
+
+# -----------------------------------------------------------------------------
+# Fan-out
+# -----------------------------------------------------------------------------
+
+class AgentResult:
+    """
+    What one agent of a fan-out did.
+
+    Attributes:
+        url: The agent's base URL, as passed to fan_out
+        status: "ok", "failed" (the task ended FAILED or CANCELED), "error", "timeout",
+                "cancelled" (its answer was not needed anymore) or "pending"
+        task: The finished task (status "ok" or "failed")
+        error: What went wrong (status "error" or "timeout")
+        latency: Seconds from the start of the fan-out to this agent's answer
+        attempts: Requests sent to the agent (2 if the request was hedged)
+    """
+
+    __slots__ = ("url", "status", "task", "error", "latency", "attempts")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.status = "pending"
+        self.task: Task | None = None
+        self.error: BaseException | None = None
+        self.latency: float | None = None
+        self.attempts = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def __repr__(self) -> str:
+        return f"AgentResult(url={self.url!r}, status={self.status!r}, latency={self.latency}, attempts={self.attempts})"
+
+
+class Orchestrator:
+    """
+    🕸️ Sends tasks to many agents at once.
+
+    Args:
+        directory: Where agent cards come from (by default a new AgentDirectory on the same pool)
+        http_client: Pool shared by every agent (a private one is created if omitted)
+        timeout: Default seconds to wait for each agent (None = the client's own request timeout)
+        hedge_after: Default seconds before a slow agent gets a second copy of the request (None = no hedging)
+    """
+
+    def __init__(
+        self,
+        directory: AgentDirectory | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        timeout: float | None = 30.0,
+        hedge_after: float | None = None,
+    ):
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self._http = http_client or create_http_client()
+        self._owns_http = http_client is None
+        self.directory = directory or AgentDirectory(http_client = self._http)
+        self._clients: dict[str, A2AClient] = {}  # card URL -> client (all on self._http)
+
+    async def __aenter__(self) -> "Orchestrator":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Closes the connection pool if this orchestrator created it."""
+        await self.directory.aclose()
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def client(self, url: str) -> A2AClient:
+        """Returns the client for the agent at `url`, discovering the agent first if needed."""
+        card = await self.directory.get(url)
+        client = self._clients.get(card.url)
+        if client is None:
+            client = self._clients[card.url] = A2AClient(agent_card = card, http_client = self._http)
+        return client
+
+    async def send(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        timeout: float | None = None,
+        hedge_after: float | None = None,
+    ) -> Task:
+        """
+        Sends one task to one agent (with the same timeout and hedging as fan_out) and returns
+        it once it is finished.
+
+        Raises:
+            asyncio.TimeoutError: no answer within `timeout`
+            A2AClientHTTPError, A2AClientJSONRPCError: the agent failed the request
+        """
+        result = AgentResult(url)
+        await self._run(result, payload, time.perf_counter(), timeout, hedge_after)
+        if result.task is None:
+            raise result.error
+        return result.task
+
+    async def fan_out(
+        self,
+        urls: list[str],
+        payload: dict[str, Any],
+        first_k: int | None = None,
+        timeout: float | None = None,
+        hedge_after: float | None = None,
+    ) -> list[AgentResult]:
+        """
+        Sends the same task to every agent concurrently.
+
+        Args:
+            urls: Base URLs of the agents
+            payload: tasks/send params (each agent gets its own task ID unless payload has one)
+            first_k: Stop once this many agents answered and cancel the rest (None = wait for all)
+            timeout: Seconds to wait for each agent (default: the orchestrator's)
+            hedge_after: Seconds before a slow agent gets a second copy (default: the orchestrator's)
+
+        Returns:
+            One AgentResult per URL, in the same order. Agents that failed or timed out are
+            reported in their result, never raised; with first_k, agents that were cancelled
+            have status "cancelled". If fewer than first_k agents can still succeed, the
+            fan-out stops early.
+        """
+        start = time.perf_counter()
+        results = [AgentResult(url) for url in urls]
+        runs = {
+            asyncio.create_task(self._run(result, payload, start, timeout, hedge_after)): result
+            for result in results
+        }
+        needed = min(first_k, len(runs)) if first_k is not None else None
+        succeeded = 0
+        pending = set(runs)
+        try:
+            #Gather-all waits for every agent; first-k stops once k answered (or k can't be reached anymore)
+            while pending and (needed is None or needed > succeeded and succeeded + len(pending) >= needed):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded += sum(runs[run].ok for run in done)
+        finally:
+            #The losers: stop waiting for them (and for their hedges)
+            for run in pending:
+                run.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        log_event(
+            logger, logging.DEBUG, "fan_out.done", agents=len(urls), succeeded=succeeded,
+            cancelled=len(pending), elapsed=round(time.perf_counter() - start, 4),
+        )
+        return results
+
+    #Runs one agent's part of a fan-out and records the outcome in `result` (never raises, except when cancelled)
+    async def _run(
+        self,
+        result: AgentResult,
+        payload: dict[str, Any],
+        start: float,
+        timeout: float | None,
+        hedge_after: float | None,
+    ) -> None:
+        timeout = self.timeout if timeout is None else timeout
+        hedge_after = self.hedge_after if hedge_after is None else hedge_after
+        try:
+            result.task = await asyncio.wait_for(self._attempts(result, payload, hedge_after), timeout)
+            result.status = "ok" if result.task.status.state == TaskState.COMPLETED else "failed"
+        except asyncio.TimeoutError as e:
+            result.status, result.error = "timeout", e
+        except asyncio.CancelledError:
+            result.status = "cancelled"
+            raise
+        except Exception as e:
+            result.status, result.error = "error", e
+        finally:
+            result.latency = time.perf_counter() - start
+
+    #Sends the task (and a hedge copy if the agent is slow) and returns the first finished answer
+    async def _attempts(self, result: AgentResult, payload: dict[str, Any], hedge_after: float | None) -> Task:
+        client = await self.client(result.url)
+        task_id = payload.get("id") or uuid4().hex
+
+        def attempt(task_id: str) -> asyncio.Task:
+            result.attempts += 1
+            return asyncio.create_task(self._complete(client, {**payload, "id": task_id}))
+
+        pending = {attempt(task_id)}
+        error: BaseException | None = None
+        try:
+            while pending:
+                #Until the hedge is sent, wait at most hedge_after for the first answer
+                wait = hedge_after if result.attempts == 1 else None
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    if finished.exception() is None:
+                        return finished.result()
+                    error = finished.exception()
+                if not done:
+                    #The hedge is a task of its own: the agent would answer a resubmission of the
+                    #same task ID with the first, still running call (see the idempotency window)
+                    pending.add(attempt(f"{task_id}-hedge"))
+            raise error
+        finally:
+            for unfinished in pending:
+                unfinished.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    #tasks/send, then polling until the task is finished (for agents that answer before they are done)
+    @staticmethod
+    async def _complete(client: A2AClient, payload: dict[str, Any]) -> Task:
+        task = await client.send_task(payload)
+        if task.status.state not in TERMINAL_STATES:
+            task = await client.wait_for_task(task.id)
+        return task
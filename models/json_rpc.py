@@ -14,6 +14,8 @@
 # - JSONRPCResponse: The reply to a request (either result or error)
 # - JSONRPCError: The structure of an error response
 # - InternalError: A predefined standard error for unexpected failures
+# - InvalidRequestError: A predefined standard error for malformed requests (e.g. in a batch)
+# - TaskNotFoundError: A predefined A2A error for unknown task IDs
 # =============================================================================
 
 # -----------------------------------------------------------------------------
@@ -94,4 +96,53 @@ class InternalError(JSONRPCError):
     message: str = "Internal error"
 
     # Optional debug details (e.g., traceback or context info)
-    data: Any | None = None
\ No newline at end of file
+    data: Any | None = None
+
+
+# -----------------------------------------------------------------------------
+# InvalidRequestError (subclass of JSONRPCError)
+# -----------------------------------------------------------------------------
+# Returned for a request that is not a valid A2A JSON-RPC request, e.g. one item
+# of a batch with an unknown method or missing params (-32600 in the JSON-RPC spec).
+class InvalidRequestError(JSONRPCError):
+    # Fixed error code for invalid requests
+    code: int = -32600
+
+    # Default error message
+    message: str = "Invalid Request"
+
+    # Optional details (e.g., the validation errors)
+    data: Any | None = None
+
+
+# -----------------------------------------------------------------------------
+# TaskNotFoundError (subclass of JSONRPCError)
+# -----------------------------------------------------------------------------
+# Returned when a request refers to a task ID the agent does not know.
+# -32001 is the A2A-specific error code for this case.
+class TaskNotFoundError(JSONRPCError):
+    # Fixed error code for unknown tasks
+    code: int = -32001
+
+    # Default error message
+    message: str = "Task not found"
+
+    # Optional details (e.g., the task ID that was requested)
+    data: Any | None = None
+
+
+# -----------------------------------------------------------------------------
+# ServerBusyError (subclass of JSONRPCError)
+# -----------------------------------------------------------------------------
+# Returned (with HTTP 429) when the agent's task queue is full or admission control
+# refuses the request (too many agent calls running, or the client is over its rate).
+# -32000 is the first code JSON-RPC reserves for implementation-defined server errors.
+class ServerBusyError(JSONRPCError):
+    # Fixed error code for an overloaded server
+    code: int = -32000
+
+    # Default error message
+    message: str = "Server busy, try again later"
+
+    # Optional details (e.g., how many tasks are queued, or {"reason": ..., "retry_after": seconds})
+    data: Any | None = None
@@ -5,7 +5,7 @@
 # This module defines structured request models used in the A2A (Agent2Agent) protocol.
 #
 # These models represent the different kinds of requests an agent might send or receive,
-# such as sending a task or retrieving a task. Each request adheres to
+# such as sending a task, streaming a task or retrieving a task. Each request adheres to
 # the JSON-RPC 2.0 format.
 #
 # It also includes a discriminated union called `A2ARequest`, which automatically
@@ -13,9 +13,11 @@
 #
 # Included Models:
 # - SendTaskRequest
+# - SendTaskStreamingRequest
 # - GetTaskRequest
 # - A2ARequest (discriminated union)
 # - SendTaskResponse
+# - SendTaskStreamingResponse
 # - GetTaskResponse
 #
 # Note: CancelTaskRequest will be added in a future version if cancellation support is implemented.
@@ -34,7 +36,7 @@ from models.json_rpc import JSONRPCRequest, JSONRPCResponse
 
 # Task-related parameter and return models
 from models.task import Task, TaskSendParams
-from models.task import TaskQueryParams
+from models.task import TaskQueryParams, TaskStatusUpdateEvent
 
 
 # -----------------------------------------------------------------------------
@@ -46,6 +48,15 @@ class SendTaskRequest(JSONRPCRequest):
     params: TaskSendParams                          # Task creation parameters
 
 
+# -----------------------------------------------------------------------------
+# SendTaskStreamingRequest: Send a task and subscribe to its updates (SSE)
+# -----------------------------------------------------------------------------
+
+class SendTaskStreamingRequest(JSONRPCRequest):
+    method: Literal["tasks/sendSubscribe"] = "tasks/sendSubscribe"  # Exact method string required
+    params: TaskSendParams                                          # Same parameters as tasks/send
+
+
 # -----------------------------------------------------------------------------
 # GetTaskRequest: Used to retrieve a task's status or history
 # -----------------------------------------------------------------------------
@@ -64,6 +75,7 @@ A2ARequest = TypeAdapter(
     Annotated[
         Union[
             SendTaskRequest,
+            SendTaskStreamingRequest,
             GetTaskRequest,
             # CancelTaskRequest can be added here in future if implemented
         ],
@@ -80,6 +92,14 @@ class SendTaskResponse(JSONRPCResponse):
     result: Task | None = None                      # The task returned by the agent
 
 
+# -----------------------------------------------------------------------------
+# SendTaskStreamingResponse: One Server-Sent Event of a "tasks/sendSubscribe" stream
+# -----------------------------------------------------------------------------
+
+class SendTaskStreamingResponse(JSONRPCResponse):
+    result: TaskStatusUpdateEvent | None = None     # The status update carried by this event
+
+
 # -----------------------------------------------------------------------------
 # GetTaskResponse: Response model for a "tasks/get" request
 # -----------------------------------------------------------------------------
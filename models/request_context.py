@@ -0,0 +1,36 @@
+# =============================================================================
+# models/request_context.py
+# =============================================================================
+# Purpose:
+# What clients, the router and servers share about the request being handled:
+# the header that carries its ID from one to the next, the ID of the current
+# request, and the call that logs a structured event under it.
+#
+# Kept outside server/ and client/ so both can use it without importing each
+# other. Where log records go (queue, format, sampling) is set up by
+# server/log.py; log_event only creates the record.
+# =============================================================================
+
+import contextvars
+import logging
+from typing import Any
+from uuid import uuid4
+
+#Header used to pass request IDs between clients, routers and servers
+REQUEST_ID_HEADER = "X-Request-ID"
+
+#ID of the request being handled by the current asyncio task (None outside requests)
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar("a2a_request_id", default=None)
+
+
+#Starts a new request ID (or adopts the caller's) for the current context
+def new_request_id(incoming: str | None = None) -> str:
+    request_id = incoming or uuid4().hex
+    request_id_var.set(request_id)
+    return request_id
+
+
+#Logs `event` with structured fields; does nothing (not even build the record) if disabled
+def log_event(logger: logging.Logger, level: int, event: str, **fields: Any) -> None:
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
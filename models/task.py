@@ -7,7 +7,9 @@
 # These models represent:
 # - What a task looks like (`Task`)
 # - The state of the task (`TaskStatus`, `TaskState`)
-# - The messages exchanged during a task (`Message`, `TextPart`)
+# - The messages exchanged during a task (`Message`, `TextPart`, `FilePart`, `DataPart`)
+# - Updates pushed to streaming clients (`TaskStatusUpdateEvent`)
+# - Chunked uploads of file content (`UploadRequest`, `UploadStatus`)
 # - Parameters used when sending, querying, or canceling tasks
 # =============================================================================
 
@@ -18,21 +20,61 @@
 from enum import Enum                          # Used to create fixed-value constants (e.g. task states)
 from uuid import uuid4                         # For generating unique identifiers
 from pydantic import BaseModel, Field          # Pydantic for structured data validation
-from typing import Any, Literal, List          # Type hints for flexibility and structure
+from typing import Annotated, Any, Literal, List, Union  # Type hints for flexibility and structure
 from datetime import datetime                  # To store timestamps
 
 
 # -----------------------------------------------------------------------------
-# Message Part: Currently only text is supported
+# Message Parts: text, files (e.g. images) and structured data
 # -----------------------------------------------------------------------------
 
-# Represents one part of a message, currently only plain text is allowed
+# Represents one part of a message that is plain text
 class TextPart(BaseModel):
     type: Literal["text"] = "text"  # Fixed value field to identify this as a "text" type
     text: str                       # The actual text content (e.g., "What time is it?")
 
-# Alias: For now, "Part" is the same as TextPart (used for easier refactoring in the future)
-Part = TextPart
+
+# Describes a file without carrying its bytes: the content travels out of band
+# (uploaded to the agent's POST /blobs endpoint, fetched from GET /blobs/<id>),
+# so an image is never base64-encoded into the JSON or copied by validation
+class FileContent(BaseModel):
+    uri: str                                # Where the content is, e.g. "http://agent:10002/blobs/<sha256>"
+    mimeType: str | None = None             # e.g. "image/png"
+    name: str | None = None                 # Original file name, if any
+    size: int | None = None                 # Content length in bytes
+
+
+# Starts a chunked upload (POST /uploads): what is about to be sent
+class UploadRequest(BaseModel):
+    size: int = Field(ge=0)                 # Total length in bytes
+    mimeType: str | None = None             # e.g. "image/png"
+    name: str | None = None                 # Original file name, if any
+
+
+# Progress of a chunked upload: chunk i holds bytes [i * chunkSize, (i + 1) * chunkSize)
+class UploadStatus(BaseModel):
+    id: str                                 # Upload ID (PUT /uploads/<id>/<chunk index>)
+    size: int                               # Total length in bytes
+    chunkSize: int                          # Length of every chunk except the last
+    missing: List[int]                      # Indexes of the chunks the server still needs
+
+
+# Represents one part of a message that is a file (e.g. an image to analyse)
+class FilePart(BaseModel):
+    type: Literal["file"] = "file"          # Identifies this as a "file" part
+    file: FileContent                       # Reference to the content
+    metadata: dict[str, Any] | None = None  # Optional extra info (e.g. image dimensions)
+
+
+# Represents one part of a message that is structured data (e.g. detection results)
+class DataPart(BaseModel):
+    type: Literal["data"] = "data"          # Identifies this as a "data" part
+    data: dict[str, Any]                    # Any JSON object
+    metadata: dict[str, Any] | None = None  # Optional extra info
+
+
+# Any message part; the "type" field decides which model parses it
+Part = Annotated[Union[TextPart, FilePart, DataPart], Field(discriminator="type")]
 
 
 # -----------------------------------------------------------------------------
@@ -42,7 +84,11 @@ Part = TextPart
 # A message in the context of a task, either from the user or the agent
 class Message(BaseModel):
     role: Literal["user", "agent"]  # Who sent the message: "user" or "agent"
-    parts: List[Part]               # Messages can have multiple parts (e.g., multiple lines of text)
+    parts: List[Part]               # Messages can have multiple parts (e.g., a question and an image)
+
+    #The text of all text parts (what a text-only agent reads)
+    def text(self) -> str:
+        return "\n".join(part.text for part in self.parts if isinstance(part, TextPart))
 
 
 # -----------------------------------------------------------------------------
@@ -51,7 +97,10 @@ class Message(BaseModel):
 
 class TaskStatus(BaseModel):
     state: str  # A string like "submitted", "working", etc. (defined more precisely in TaskState)
-    
+
+    # Optional message attached to this status (e.g. a chunk of agent output while streaming)
+    message: Message | None = None
+
     # Automatically captures the time when the status is recorded
     timestamp: datetime = Field(default_factory=datetime.now)
 
@@ -66,6 +115,17 @@ class Task(BaseModel):
     history: List[Message]     # Conversation history for the task (what the user said, how the agent replied)
 
 
+# -----------------------------------------------------------------------------
+# TaskStatusUpdateEvent: One update pushed to a streaming ("tasks/sendSubscribe") client
+# -----------------------------------------------------------------------------
+
+class TaskStatusUpdateEvent(BaseModel):
+    id: str                                # ID of the task this update belongs to
+    status: TaskStatus                     # The new status (WORKING updates may carry a partial message)
+    final: bool = False                    # True on the last event of the stream
+    metadata: dict[str, Any] | None = None # Optional extra info about the update
+
+
 # -----------------------------------------------------------------------------
 # Parameter Models for API Requests
 # -----------------------------------------------------------------------------
@@ -106,4 +166,8 @@ class TaskState(str, Enum):
     COMPLETED = "completed"             # Task is done
     CANCELED = "canceled"               # Task was canceled by user or system
     FAILED = "failed"                   # Something went wrong
-    UNKNOWN = "unknown"                 # Fallback for undefined or unrecognized states
\ No newline at end of file
+    UNKNOWN = "unknown"                 # Fallback for undefined or unrecognized states
+
+
+# States after which a task will not change anymore
+TERMINAL_STATES = frozenset({TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED})
@@ -0,0 +1,215 @@
+#  Purpose:
+# Admission control: decides up front whether the server takes on more agent work,
+# so an overload is answered quickly (HTTP 429) instead of slowing every request down.
+#
+# - AdmissionController: a global limit on agent invocations running at once. Extra
+#   callers wait in a short FIFO line (max_waiting, max_wait seconds); when the line
+#   is full or the wait runs out they are rejected.
+# - RateLimiter: one token bucket per client (steady `rate` requests/s, bursts of up
+#   to `burst`), so one busy client can't use up the capacity of everyone else.
+# - In-flight, waiting, wait-time and rejection metrics in /metrics.
+#
+# Limits are per process; in --workers mode every worker enforces its own.
+
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from server import metrics
+
+
+class AdmissionRejected(Exception):
+    """
+    The server will not take this request now.
+
+    Attributes:
+        reason: "queue_full", "timeout" or "rate_limited" (the label in a2a_admission_rejected_total)
+        retry_after: Seconds the client should wait before trying again
+    """
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(f"Request rejected by admission control ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# -----------------------------------------------------------------------------
+# Global concurrency limit
+# -----------------------------------------------------------------------------
+
+class AdmissionController:
+    """
+    🚦 At most `max_in_flight` agent invocations at once.
+
+    Args:
+        max_in_flight: Agent invocations allowed to run at the same time
+        max_waiting: Callers allowed to wait for a free slot (more are rejected at once)
+        max_wait: Seconds a caller waits for a slot before it is rejected
+
+    Usage:
+        async with admission.slot():
+            reply = await agent.invoke(query, session_id)
+    """
+
+    def __init__(self, max_in_flight: int = 32, max_waiting: int = 64, max_wait: float = 5.0):
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()  # FIFO: slots are handed over in arrival order
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, background: bool = False) -> AsyncIterator[None]:
+        """
+        Holds one slot while the block runs.
+
+        Args:
+            background: Wait as long as it takes and don't count against max_waiting
+                        (for work that is already queued, e.g. task queue workers)
+
+        Raises:
+            AdmissionRejected: no slot became free in time (never raised with background=True)
+        """
+        await self.acquire(background)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, background: bool = False) -> None:
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._take()
+            return
+        if not background and len(self._waiters) >= self.max_waiting:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._record()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), None if background else self.max_wait)
+        except asyncio.TimeoutError:
+            self._give_up(waiter)
+            self._reject("timeout")
+        except BaseException:
+            self._give_up(waiter)
+            raise
+        finally:
+            metrics.ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - start)
+        # release() counted the slot as ours when it resolved the waiter
+
+    def release(self) -> None:
+        # Hand the slot straight to the next waiter, so newcomers can't overtake the line
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._record()
+                return
+        self._in_flight -= 1
+        self._record()
+
+    def _take(self) -> None:
+        self._in_flight += 1
+        self._record()
+
+    #A waiter that stops waiting: drop it from the line, or pass on a slot it was just given
+    def _give_up(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        self._record()
+
+    def _reject(self, reason: str) -> None:
+        metrics.ADMISSION_REJECTED.labels(reason).inc()
+        raise AdmissionRejected(reason)
+
+    def _record(self) -> None:
+        metrics.ADMISSION_IN_FLIGHT.set(self._in_flight)
+        metrics.ADMISSION_WAITING.set(len(self._waiters))
+
+
+# -----------------------------------------------------------------------------
+# Per-client rate limit
+# -----------------------------------------------------------------------------
+
+class TokenBucket:
+    """Holds up to `burst` tokens and refills at `rate` tokens per second."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Takes one token. Returns 0 on success, else the seconds until a token is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    🪣 Token bucket per client ID.
+
+    Args:
+        rate: Requests per second each client may send on average
+        burst: Requests a client may send at once after being idle
+        max_clients: Buckets kept (least recently seen clients are forgotten, i.e. start full again)
+    """
+
+    def __init__(self, rate: float, burst: int | None = None, max_clients: int = 10_000):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, math.ceil(rate))
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, client_id: str) -> None:
+        """
+        Counts one request for `client_id`.
+
+        Raises:
+            AdmissionRejected: the client is over its rate ("rate_limited")
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = self._buckets[client_id] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+
+        wait = bucket.take(now)
+        if wait > 0:
+            metrics.ADMISSION_REJECTED.labels("rate_limited").inc()
+            raise AdmissionRejected("rate_limited", retry_after=wait)
@@ -0,0 +1,409 @@
+#  Purpose:
+# Holds the binary content of file parts (e.g. images), so it never has to travel
+# inside the JSON of a task.
+#
+# A client uploads the raw bytes with POST /blobs (no base64, no multipart encoding),
+# gets back a FileContent with the blob's URI and puts it into a FilePart. Whoever
+# needs the content fetches GET /blobs/<id>. The ID is the SHA-256 of the content,
+# so the same image uploaded twice is stored once.
+#
+# Memory:
+# - An upload is read chunk by chunk straight into one buffer of the announced size
+#   (hashing along the way); that buffer is what the store keeps, and downloads are
+#   answered with a read-only view of it: one copy of the content, however big it is
+# - Bounded: max_blob_bytes per blob (larger uploads are refused), max_bytes in
+#   total (least recently used blobs are evicted), and blobs unused for `ttl` seconds
+#   are dropped. A FilePart can outlive its blob: fetch the content when you need it.
+#
+# Backends:
+# - InMemoryBlobStore: one process (the default)
+# - DiskBlobStore: one file per blob in a directory every --workers process opens, so
+#   a blob uploaded through one worker is found by the worker that runs the task
+
+
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import AsyncIterator
+
+from server import metrics
+
+
+class BlobTooLarge(Exception):
+    """The content is bigger than the store accepts for one blob."""
+
+
+class BlobIncomplete(Exception):
+    """The upload ended before the announced number of bytes arrived."""
+
+
+class Blob:
+    """One stored content: a read-only view of its single buffer."""
+
+    __slots__ = ("id", "data", "mime_type", "touched_at")
+
+    def __init__(self, blob_id: str, data: memoryview, mime_type: str):
+        self.id = blob_id
+        self.data = data
+        self.mime_type = mime_type
+        self.touched_at = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return self.data.nbytes
+
+
+#Blob IDs are SHA-256 hex digests (anything else can't name a blob, or a file)
+_BLOB_ID = re.compile(r"[0-9a-f]{64}")
+
+
+class BlobStore(ABC):
+    """Content-addressed storage of file content; every backend implements these methods."""
+
+    max_blob_bytes: int
+
+    @abstractmethod
+    def get(self, blob_id: str) -> Blob | None:
+        """The blob, or None if it was never stored or is gone (evicted / expired)."""
+
+    @abstractmethod
+    def put(
+        self, data: bytes | bytearray | memoryview, mime_type: str = "application/octet-stream", digest: str | None = None,
+    ) -> Blob:
+        """Stores content that is already in memory."""
+
+    async def put_async(
+        self, data: bytes | bytearray | memoryview, mime_type: str = "application/octet-stream", digest: str | None = None,
+    ) -> Blob:
+        """put() without blocking the event loop (backends that write to disk do it on a thread)."""
+        return self.put(data, mime_type, digest)
+
+    @abstractmethod
+    async def put_stream(
+        self, chunks: AsyncIterator[bytes], mime_type: str = "application/octet-stream", size: int | None = None,
+    ) -> Blob:
+        """Stores content arriving in chunks (e.g. a request body)."""
+
+
+class InMemoryBlobStore(BlobStore):
+    """
+    📦 Content-addressed blobs in RAM (LRU by total size, idle TTL).
+
+    Args:
+        max_bytes: Total size of all blobs (least recently used are evicted beyond it)
+        max_blob_bytes: Largest blob accepted
+        ttl: Seconds a blob is kept after its last use (None = until evicted)
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20, max_blob_bytes: int = 32 * 2**20, ttl: float | None = 3600.0):
+        self.max_bytes = max_bytes
+        self.max_blob_bytes = max_blob_bytes
+        self.ttl = ttl
+        self._blobs: OrderedDict[str, Blob] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, blob_id: str) -> Blob | None:
+        self._expire()
+        blob = self._blobs.get(blob_id)
+        if blob is not None:
+            blob.touched_at = time.monotonic()
+            self._blobs.move_to_end(blob_id)
+        return blob
+
+    def put(
+        self, data: bytes | bytearray | memoryview, mime_type: str = "application/octet-stream", digest: str | None = None,
+    ) -> Blob:
+        """
+        Stores content that is already in memory (kept as is, not copied, unless it is a bytearray).
+
+        Args:
+            digest: SHA-256 (hex) of data, if the caller already computed it
+        """
+        view = memoryview(data)
+        if view.nbytes > self.max_blob_bytes:
+            raise BlobTooLarge(f"Blob of {view.nbytes} bytes exceeds the limit of {self.max_blob_bytes}")
+        if isinstance(data, bytearray):
+            view = memoryview(bytes(data))  # The caller could still change a bytearray
+        return self._add(digest or hashlib.sha256(view).hexdigest(), view.toreadonly(), mime_type)
+
+    async def put_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        mime_type: str = "application/octet-stream",
+        size: int | None = None,
+    ) -> Blob:
+        """
+        Stores content arriving in chunks (e.g. a request body), hashing it as it arrives.
+
+        Args:
+            size: Announced length (Content-Length); the buffer is allocated once up front
+
+        Raises:
+            BlobTooLarge: the content is (or is announced to be) over max_blob_bytes
+            BlobIncomplete: fewer than `size` bytes arrived
+        """
+        if size is not None and size > self.max_blob_bytes:
+            raise BlobTooLarge(f"Blob of {size} bytes exceeds the limit of {self.max_blob_bytes}")
+        buffer = bytearray(size) if size is not None else bytearray()
+        hasher = hashlib.sha256()
+        received = 0
+        async for chunk in chunks:
+            end = received + len(chunk)
+            if end > (size if size is not None else self.max_blob_bytes):
+                raise BlobTooLarge(f"Blob exceeds {size if size is not None else self.max_blob_bytes} bytes")
+            if size is not None:
+                buffer[received:end] = chunk  # Into the preallocated buffer, no reallocation
+            else:
+                buffer += chunk
+            hasher.update(chunk)
+            received = end
+        if size is not None and received < size:
+            raise BlobIncomplete(f"Received {received} of {size} bytes")
+        return self._add(hasher.hexdigest(), memoryview(buffer).toreadonly(), mime_type)
+
+    def _add(self, blob_id: str, data: memoryview, mime_type: str) -> Blob:
+        blob = self._blobs.get(blob_id)
+        if blob is not None:
+            #Same content again: keep the stored copy (the new buffer is dropped)
+            blob.touched_at = time.monotonic()
+            self._blobs.move_to_end(blob_id)
+            return blob
+        blob = self._blobs[blob_id] = Blob(blob_id, data, mime_type)
+        self._bytes += blob.size
+        self._expire()
+        while self._bytes > self.max_bytes and len(self._blobs) > 1:
+            self._drop(next(iter(self._blobs)), "size")
+        self._record()
+        return blob
+
+    def _expire(self) -> None:
+        if self.ttl is None:
+            return
+        deadline = time.monotonic() - self.ttl
+        #Least recently used first, so we can stop at the first blob still in use
+        while self._blobs:
+            blob_id, blob = next(iter(self._blobs.items()))
+            if blob.touched_at >= deadline:
+                break
+            self._drop(blob_id, "ttl")
+        self._record()
+
+    def _drop(self, blob_id: str, reason: str) -> None:
+        blob = self._blobs.pop(blob_id)
+        self._bytes -= blob.size
+        metrics.BLOB_EVICTIONS.labels(reason).inc()
+
+    def _record(self) -> None:
+        metrics.BLOB_STORE_BYTES.set(self._bytes)
+        metrics.BLOB_STORE_BLOBS.set(len(self._blobs))
+
+
+class DiskBlobStore(BlobStore):
+    """
+    🗄️ Content-addressed blobs as files in a directory shared by all worker processes.
+
+    Every blob is `<directory>/<id[:2]>/<id>` plus its MIME type in `<id>.type`; a blob's
+    data is a read-only memory map of its file (no copy on the Python heap). Files are
+    written to a temporary name and renamed, so no process ever sees half a blob. The
+    file's mtime is its last use: LRU and TTL work across processes without an index.
+
+    Args:
+        directory: Where blobs are kept (created if needed)
+        max_bytes: Total size of all blobs (least recently used are deleted beyond it)
+        max_blob_bytes: Largest blob accepted
+        ttl: Seconds a blob is kept after its last use (None = until evicted)
+    """
+
+    def __init__(
+        self, directory: str, max_bytes: int = 256 * 2**20, max_blob_bytes: int = 32 * 2**20, ttl: float | None = 3600.0,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_blob_bytes = max_blob_bytes
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok = True)
+
+    def get(self, blob_id: str) -> Blob | None:
+        if not _BLOB_ID.fullmatch(blob_id):
+            return None
+        path = self._path(blob_id)
+        try:
+            with open(path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                if self.ttl is not None and time.time() - stat.st_mtime > self.ttl:
+                    return None  # Expired (deleted by the next write)
+                #The map stays valid after the file is closed (or deleted by another process's eviction)
+                data = memoryview(mmap.mmap(file.fileno(), stat.st_size, access = mmap.ACCESS_READ)) if stat.st_size else memoryview(b"")
+            with open(path + ".type") as type_file:
+                mime_type = type_file.read()
+            os.utime(path)  # Used now: last to be evicted
+        except FileNotFoundError:
+            return None
+        return Blob(blob_id, data, mime_type)
+
+    def put(
+        self, data: bytes | bytearray | memoryview, mime_type: str = "application/octet-stream", digest: str | None = None,
+    ) -> Blob:
+        """
+        Writes content that is already in memory to the blob's file.
+
+        Args:
+            digest: SHA-256 (hex) of data, if the caller already computed it
+        """
+        view = memoryview(data).cast("B")
+        if view.nbytes > self.max_blob_bytes:
+            raise BlobTooLarge(f"Blob of {view.nbytes} bytes exceeds the limit of {self.max_blob_bytes}")
+        blob_id = digest or hashlib.sha256(view).hexdigest()
+        existing = self.get(blob_id)
+        if existing is not None:
+            return existing
+        fd, temp_path = self._temp_file(blob_id)
+        try:
+            _write_all(fd, [view])
+        finally:
+            os.close(fd)
+        return self._add(blob_id, temp_path, mime_type)
+
+    async def put_async(
+        self, data: bytes | bytearray | memoryview, mime_type: str = "application/octet-stream", digest: str | None = None,
+    ) -> Blob:
+        return await asyncio.to_thread(self.put, data, mime_type, digest)
+
+    async def put_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        mime_type: str = "application/octet-stream",
+        size: int | None = None,
+    ) -> Blob:
+        """
+        Writes content arriving in chunks to a temporary file (on a thread, about 1 MB at a
+        time), hashing it along the way, then renames it to the blob's file.
+
+        Raises:
+            BlobTooLarge: the content is (or is announced to be) over max_blob_bytes
+            BlobIncomplete: fewer than `size` bytes arrived
+        """
+        if size is not None and size > self.max_blob_bytes:
+            raise BlobTooLarge(f"Blob of {size} bytes exceeds the limit of {self.max_blob_bytes}")
+        limit = size if size is not None else self.max_blob_bytes
+        hasher = hashlib.sha256()
+        received = 0
+        fd, temp_path = self._temp_file("upload")
+        try:
+            try:
+                pending: list[bytes] = []
+                pending_bytes = 0
+                async for chunk in chunks:
+                    received += len(chunk)
+                    if received > limit:
+                        raise BlobTooLarge(f"Blob exceeds {limit} bytes")
+                    hasher.update(chunk)
+                    pending.append(chunk)
+                    pending_bytes += len(chunk)
+                    if pending_bytes >= _WRITE_BYTES:
+                        await asyncio.to_thread(_write_all, fd, pending)
+                        pending, pending_bytes = [], 0
+                if pending:
+                    await asyncio.to_thread(_write_all, fd, pending)
+            finally:
+                os.close(fd)
+            if size is not None and received < size:
+                raise BlobIncomplete(f"Received {received} of {size} bytes")
+        except BaseException:
+            _unlink(temp_path)
+            raise
+        existing = self.get(hasher.hexdigest())
+        if existing is not None:
+            _unlink(temp_path)  # Same content again: keep the stored file
+            return existing
+        return self._add(hasher.hexdigest(), temp_path, mime_type)
+
+    def _path(self, blob_id: str) -> str:
+        return os.path.join(self.directory, blob_id[:2], blob_id)
+
+    def _temp_file(self, prefix: str) -> tuple[int, str]:
+        return tempfile.mkstemp(dir = self.directory, prefix = f".{prefix}-", suffix = ".part")
+
+    #Moves a finished temporary file into place (type file first: a visible blob always has one)
+    def _add(self, blob_id: str, temp_path: str, mime_type: str) -> Blob:
+        path = self._path(blob_id)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path + ".type", "w") as type_file:
+            type_file.write(mime_type)
+        os.replace(temp_path, path)
+        self._collect(keep = blob_id)
+        blob = self.get(blob_id)
+        if blob is None:
+            raise BlobTooLarge(f"Blob {blob_id} doesn't fit in the store")
+        return blob
+
+    #Every blob file as (path, mtime, size)
+    def _files(self) -> list[tuple[str, float, int]]:
+        files = []
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name.endswith(".type"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process meanwhile
+                files.append((entry.path, stat.st_mtime, stat.st_size))
+        return files
+
+    #Deletes expired blobs, then least recently used ones until the total fits max_bytes (after each write;
+    #a directory scan, cheap for the few thousand blobs a store of this size holds)
+    def _collect(self, keep: str) -> None:
+        files = sorted(self._files(), key = lambda file: file[1])
+        total = sum(size for _, _, size in files)
+        count = len(files)
+        deadline = time.time() - self.ttl if self.ttl is not None else None
+        for path, mtime, size in files:
+            if os.path.basename(path) == keep:
+                continue
+            if deadline is not None and mtime < deadline:
+                reason = "ttl"
+            elif total > self.max_bytes:
+                reason = "size"
+            else:
+                continue
+            _unlink(path)
+            _unlink(path + ".type")
+            total -= size
+            count -= 1
+            metrics.BLOB_EVICTIONS.labels(reason).inc()
+        metrics.BLOB_STORE_BYTES.set(total)
+        metrics.BLOB_STORE_BLOBS.set(count)
+
+
+#Bytes of a streamed upload collected before they are written in one call
+_WRITE_BYTES = 2**20
+
+
+def _write_all(fd: int, buffers: list) -> None:
+    for buffer in buffers:
+        view = memoryview(buffer)
+        while view:
+            view = view[os.write(fd, view):]
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,201 @@
+#  Purpose:
+# Gets images ready for the model without blocking the event loop.
+#
+# Decoding, resizing, format normalization and EXIF stripping are CPU-bound: done on
+# the server's single asyncio loop, one large photo would stall every other request.
+# ImagePreprocessor runs them in a small pool of worker processes instead:
+#
+# - Shared-memory hand-off: the image bytes are copied once into a shared memory block
+#   the worker reads, and the worker writes its result into a second block the server
+#   reads; no multi-megabyte buffers are pickled through the pool's pipes
+# - Bounded: at most `workers` images are processed at once and at most `max_pending`
+#   are in flight (each holds its shared memory), so a burst of uploads waits instead
+#   of piling up memory
+# - Output: fits within `max_size` (never upscaled), EXIF orientation applied and all
+#   metadata dropped, re-encoded as JPEG / PNG / WEBP, or raw RGB pixels ("RGB")
+#
+# Needs the optional Pillow package (pip install ".[images]"), in the worker processes only.
+
+
+import asyncio
+import importlib.util
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from server import metrics
+
+#Output formats and the MIME type of their result
+FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp", "RGB": "application/x-raw-rgb"}
+
+
+#Added to the workers' scheduling niceness (POSIX only)
+WORKER_NICENESS = 10
+
+
+#Parses a "WIDTHxHEIGHT" size (e.g. "1024x768"; a single number means a square)
+def parse_size(text: str) -> tuple[int, int]:
+    width, _, height = text.lower().partition("x")
+    size = (int(width), int(height or width))
+    if min(size) < 1:
+        raise ValueError(f"Invalid image size {text!r}")
+    return size
+
+
+class PreparedImage:
+    """An image ready for the model: encoded bytes (or raw RGB pixels) and its final size."""
+
+    __slots__ = ("data", "mime_type", "width", "height")
+
+    def __init__(self, data: bytes, mime_type: str, width: int, height: int):
+        self.data = data
+        self.mime_type = mime_type
+        self.width = width
+        self.height = height
+
+    def __repr__(self) -> str:
+        return f"PreparedImage({self.mime_type}, {self.width}x{self.height}, {len(self.data)} bytes)"
+
+
+class ImagePreprocessor:
+    """
+    🖼️ Decodes, resizes and re-encodes images in worker processes.
+
+    Args:
+        workers: Worker processes (images processed at the same time)
+        max_size: (width, height) every image is scaled down to fit in
+        format: "JPEG", "PNG", "WEBP" or "RGB" (raw 8-bit pixels, row by row)
+        quality: Encoder quality for JPEG and WEBP (1-100)
+        max_pending: Images in flight (processing or waiting for a worker); default 2 x workers
+
+    Usage:
+        preprocessor = ImagePreprocessor(workers=2, max_size=(1024, 1024))
+        image = await preprocessor.prepare(blob.data)
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_size: tuple[int, int] = (1024, 1024),
+        format: str = "JPEG",
+        quality: int = 85,
+        max_pending: int | None = None,
+    ):
+        if importlib.util.find_spec("PIL") is None:
+            raise ImportError("Image preprocessing needs Pillow (pip install \".[images]\")")
+        #The pool only starts its processes on the first image: fail here, not on every request
+        if multiprocessing.current_process().daemon:
+            raise RuntimeError("ImagePreprocessor can't start worker processes from a daemonic process")
+        self.format = format.upper()
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown image format {format!r} (one of {', '.join(FORMATS)})")
+        self.workers = workers
+        self.max_size = max_size
+        self.quality = quality
+        #spawn: forking a server that runs threads (SQLite writers, log queue) is not safe
+        self._pool = ProcessPoolExecutor(
+            max_workers = workers, mp_context = multiprocessing.get_context("spawn"), initializer = _lower_priority,
+        )
+        self._pending = asyncio.Semaphore(max_pending or 2 * workers)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait = True, cancel_futures = True)
+
+    async def warm_up(self) -> None:
+        """Starts every worker and imports Pillow there, so the first images don't pay for it."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers)))
+
+    async def prepare(self, data: bytes | memoryview, max_size: tuple[int, int] | None = None) -> PreparedImage:
+        """
+        Returns the image in `data` (any format Pillow reads) scaled to fit `max_size`
+        (default: the preprocessor's) and re-encoded in the preprocessor's format.
+
+        Raises:
+            ValueError: `data` is not an image Pillow can read
+        """
+        width, height = max_size or self.max_size
+        source = memoryview(data).cast("B")
+        #Upper bound of the result: raw pixels (+ alpha), plus room for encoder overhead
+        capacity = width * height * 4 + height + 65536
+        async with self._pending:
+            start = time.perf_counter()
+            inbox = shared_memory.SharedMemory(create = True, size = max(source.nbytes, 1))
+            outbox = shared_memory.SharedMemory(create = True, size = capacity)
+            try:
+                inbox.buf[:source.nbytes] = source
+                size, out_width, out_height = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, _prepare_in_worker,
+                    inbox.name, source.nbytes, outbox.name, (width, height), self.format, self.quality,
+                )
+                result = bytes(outbox.buf[:size])
+            except Exception:
+                metrics.IMAGES_PREPROCESSED.labels("error").inc()
+                raise
+            finally:
+                for block in (inbox, outbox):
+                    block.close()
+                    block.unlink()
+            metrics.IMAGES_PREPROCESSED.labels("ok").inc()
+            metrics.IMAGE_PREPROCESS_SECONDS.observe(time.perf_counter() - start)
+        return PreparedImage(result, FORMATS[self.format], out_width, out_height)
+
+
+# -----------------------------------------------------------------------------
+# Worker side (runs in the pool's processes)
+# -----------------------------------------------------------------------------
+
+#Where CPUs are scarce, the server process (answering requests) goes before image work
+def _lower_priority() -> None:
+    if hasattr(os, "nice"):
+        os.nice(WORKER_NICENESS)
+
+
+def _warm_up() -> None:
+    import PIL.Image  # noqa: F401
+
+
+def _prepare_in_worker(
+    in_name: str, in_size: int, out_name: str, max_size: tuple[int, int], format: str, quality: int,
+) -> tuple[int, int, int]:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    inbox = shared_memory.SharedMemory(name = in_name)
+    try:
+        try:
+            image = Image.open(io.BytesIO(inbox.buf[:in_size]))
+            #JPEG: let the decoder scale down by 1/2, 1/4 or 1/8 while decoding (much less work)
+            image.draft("RGB", max_size)
+            image.load()
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            #DecompressionBombError: far more pixels than any real photo (a tiny file that decodes to gigabytes)
+            raise ValueError(f"Not a readable image: {e}") from None
+    finally:
+        inbox.close()
+
+    image = ImageOps.exif_transpose(image)  # Apply the camera's rotation before EXIF is dropped
+    keep_alpha = format in ("PNG", "WEBP") and (image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info)
+    image = image.convert("RGBA" if keep_alpha else "RGB")
+    image.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+    outbox = shared_memory.SharedMemory(name = out_name)
+    try:
+        if format == "RGB":
+            pixels = image.tobytes()
+            outbox.buf[:len(pixels)] = pixels
+            return len(pixels), image.width, image.height
+        encoded = io.BytesIO()
+        #Saved without exif / icc_profile / info: nothing of the original metadata survives
+        options = {"quality": quality} if format in ("JPEG", "WEBP") else {"optimize": False}
+        image.save(encoded, format = format, **options)
+        view = encoded.getbuffer()
+        try:
+            outbox.buf[:view.nbytes] = view
+            return view.nbytes, image.width, image.height
+        finally:
+            view.release()
+    finally:
+        outbox.close()
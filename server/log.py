@@ -0,0 +1,197 @@
+#  Purpose:
+# Structured, low-overhead logging for the A2A server, client and agents.
+#
+# - Off the event loop: log calls only put the record on a queue (QueueHandler);
+#   a background thread (QueueListener) formats it and writes it out
+# - Lazy: messages and structured fields are formatted on that thread, never in the
+#   request path; per-request detail is logged at DEBUG and skipped entirely unless enabled
+# - Sampled: keep only a fraction of requests; all records of a kept request are kept
+#   (warnings and errors are always kept)
+# - Request IDs: every record logged while handling a request carries its ID
+#
+# Configure once at startup:
+#   configure_logging(level="debug", fmt="json", sample_rate=0.01)
+# or through the environment (used by worker processes):
+#   A2A_LOG_LEVEL=debug A2A_LOG_FORMAT=json A2A_LOG_SAMPLE_RATE=0.01
+#
+# Log from anywhere:
+#   log_event(logger, logging.DEBUG, "task.received", task_id=..., body=body)
+
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import zlib
+from datetime import datetime, timezone
+from typing import Any
+
+from pydantic import BaseModel
+
+#Request IDs and log_event are shared with the client (models/request_context.py); re-exported here
+from models.request_context import REQUEST_ID_HEADER, log_event, new_request_id, request_id_var
+
+LEVEL_ENV_VAR = "A2A_LOG_LEVEL"
+FORMAT_ENV_VAR = "A2A_LOG_FORMAT"
+SAMPLE_RATE_ENV_VAR = "A2A_LOG_SAMPLE_RATE"
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+# -----------------------------------------------------------------------------
+# Filters, formatters and the queue handler
+# -----------------------------------------------------------------------------
+
+class RequestIdFilter(logging.Filter):
+    """Stamps every record with the current request ID (runs in the logging thread of origin)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps `rate` (0..1) of requests. The decision is a hash of the request ID, so a
+    request is either logged completely or not at all. WARNING and above always pass.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._threshold = int(rate * 0xFFFFFFFF)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno >= logging.WARNING:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id is None:
+            return random.random() < self.rate
+        return zlib.crc32(request_id.encode()) <= self._threshold
+
+
+#Makes structured fields JSON-friendly (pydantic models, datetimes, anything else via str)
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=_json_default, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines: `<time> <level> <logger> [<request id>] <message> key=value ...`"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={json.dumps(v, default=_json_default, ensure_ascii=False)}" for k, v in fields.items())
+        return line
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that does NOT format the message before queueing it
+    (the stock one does, on the caller's thread). Formatting happens in the listener.
+    Arguments and fields must therefore not be mutated after logging them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            # Tracebacks reference live frames; render them now (errors are rare)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# -----------------------------------------------------------------------------
+# Setup
+# -----------------------------------------------------------------------------
+
+def configure_logging(
+    level: str | None = None,
+    fmt: str | None = None,
+    sample_rate: float | None = None,
+    stream=None,
+) -> None:
+    """
+    Routes all logging through a queue to a background writer thread.
+
+    Args:
+        level: "debug" logs every request (subject to sampling); "info" (default) only
+               lifecycle messages; "off" disables logging
+        fmt: "text" (default) or "json"
+        sample_rate: Fraction of requests whose DEBUG/INFO records are kept (default 1)
+        stream: Where to write (default sys.stderr)
+
+    Unset arguments fall back to A2A_LOG_LEVEL, A2A_LOG_FORMAT and A2A_LOG_SAMPLE_RATE.
+    """
+    global _listener
+
+    level = (level or os.getenv(LEVEL_ENV_VAR) or "info").lower()
+    fmt = (fmt or os.getenv(FORMAT_ENV_VAR) or "text").lower()
+    if sample_rate is None:
+        sample_rate = float(os.getenv(SAMPLE_RATE_ENV_VAR) or 1.0)
+
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if level == "off":
+        root.setLevel(logging.CRITICAL + 1)
+        return
+    root.setLevel(level.upper())
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestIdFilter())   # Must run on the caller's side (context variable)
+    handler.addFilter(SamplingFilter(sample_rate))
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+#Flushes queued records and stops the writer thread
+def stop_logging() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
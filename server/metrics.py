@@ -0,0 +1,328 @@
+#  Purpose:
+# Built-in request tracing and metrics, cheap enough to leave on in production.
+#
+# - Counter / Histogram / Gauge: plain Python objects, updated in O(1) (a dict lookup
+#   and an addition; histograms also bisect a short list of bucket bounds)
+# - span("stage"): times one stage of a request, records it in the a2a_stage_seconds
+#   histogram and, when debug logging is on, logs it with the request ID (a trace)
+# - render(): all metrics in the Prometheus text format, served by A2AServer at /metrics
+#
+# - merge(): several processes' render() output as one, each sample labelled with its
+#   process (the --workers router serves this at /metrics, see server/workers.py)
+#
+# Metrics are per process; in --workers mode every worker keeps its own.
+# Updates are not locked: record them from event-loop code (one thread), not from
+# the SQLite store's background threads.
+
+
+import bisect
+import logging
+import math
+import time
+from enum import Enum
+from typing import Callable, Iterable
+
+from server.log import log_event
+
+logger = logging.getLogger(__name__)
+
+#Default latency buckets (seconds): 0.5 ms .. 60 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+#Default size buckets (messages / items)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+#Default byte buckets: 256 B .. 16 MB
+BYTE_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+#Default token buckets: 64 .. 1M tokens
+TOKEN_BUCKETS = tuple(64 * 2 ** i for i in range(15))
+
+_enabled = True
+
+
+#Turns all recording on or off (off: spans and observations are no-ops)
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = enabled
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# -----------------------------------------------------------------------------
+# Metric types
+# -----------------------------------------------------------------------------
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """The child metric for these label values (cache it for hot paths)."""
+        key = tuple(v.value if isinstance(v, Enum) else str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        if _enabled:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """A number that only goes up (e.g. requests handled)."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def samples(self):
+        for key, child in self._children.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    """A number that goes up and down; `callback` (if given) is read at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback: Callable[[], dict[tuple[str, ...], float]] | None = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def samples(self):
+        values = {key: child.value for key, child in self._children.items()}
+        if self.callback is not None:
+            values.update(self.callback())
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot: above the largest bound
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        if _enabled:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies, sizes) in fixed buckets."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self):
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(child.sum)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+# -----------------------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------------------
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+REGISTRY = Registry()
+
+#Content type of render()'s output
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+#Merges the render() output of several processes: every sample of texts[i] gets the label
+#label="<i>", and each metric's samples stay together under one HELP / TYPE header
+#(the text format wants a metric's samples in one group). None = that process didn't answer.
+def merge(texts: list[str | None], label: str = "worker") -> str:
+    headers: dict[str, list[str]] = {}
+    samples: dict[str, list[str]] = {}
+    missing = []
+    for index, text in enumerate(texts):
+        if text is None:
+            missing.append(index)
+            continue
+        name = ""
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                name = line.split(" ", 3)[2]
+                if len(headers.setdefault(name, [])) < 2 and line not in headers[name]:
+                    headers[name].append(line)
+                samples.setdefault(name, [])
+            elif line and not line.startswith("#"):
+                #The sample name ends at its labels or, without labels, at the value
+                end = min(i for i in (line.find("{"), line.find(" ")) if i >= 0)
+                if line[end] == "{":
+                    line = f'{line[:end]}{{{label}="{index}",{line[end + 1:]}'
+                else:
+                    line = f'{line[:end]}{{{label}="{index}"}}{line[end:]}'
+                samples.setdefault(name, []).append(line)
+    lines = [f"# {label} {index} did not answer" for index in missing]
+    for name, family in samples.items():
+        lines += headers.get(name, [])
+        lines += family
+    return "".join(line + "\n" for line in lines)
+
+
+# -----------------------------------------------------------------------------
+# The server's metrics
+# -----------------------------------------------------------------------------
+
+REQUESTS = REGISTRY.register(Counter("a2a_requests", "JSON-RPC requests handled", ["method", "outcome"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram("a2a_request_seconds", "Time to handle a JSON-RPC request", ["method"]))
+STAGE_SECONDS = REGISTRY.register(Histogram("a2a_stage_seconds", "Time spent in one stage of a request", ["stage"]))
+TASKS = REGISTRY.register(Counter("a2a_tasks", "Task status changes, by new state", ["state"]))
+HISTORY_MESSAGES = REGISTRY.register(Histogram(
+    "a2a_response_history_messages", "Messages in the task history returned to clients", buckets=SIZE_BUCKETS
+))
+RESPONSE_BYTES = REGISTRY.register(Histogram("a2a_response_bytes", "Size of JSON-RPC response bodies", buckets=BYTE_BUCKETS))
+BATCH_ITEMS = REGISTRY.register(Histogram("a2a_batch_items", "Requests per JSON-RPC batch", buckets=SIZE_BUCKETS))
+STORE_SIZE = REGISTRY.register(Gauge("a2a_task_store_size", "Tasks and history messages held by the task store", ["kind"]))
+TASK_QUEUE_DEPTH = REGISTRY.register(Gauge("a2a_task_queue_depth", "Background tasks waiting for a worker"))
+TASKS_RUNNING = REGISTRY.register(Gauge("a2a_tasks_running", "Background tasks being processed by a worker"))
+TASK_QUEUE_REJECTED = REGISTRY.register(Counter("a2a_task_queue_rejected", "Tasks refused because the task queue was full"))
+ADMISSION_IN_FLIGHT = REGISTRY.register(Gauge("a2a_admission_in_flight", "Agent invocations holding an admission slot"))
+ADMISSION_WAITING = REGISTRY.register(Gauge("a2a_admission_waiting", "Requests waiting for an admission slot"))
+ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram("a2a_admission_wait_seconds", "Time spent waiting for an admission slot"))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "a2a_admission_rejected", "Requests refused by admission control, by reason (queue_full, timeout, rate_limited)", ["reason"]
+))
+DUPLICATE_REQUESTS = REGISTRY.register(Counter(
+    "a2a_duplicate_requests", "Resubmitted tasks answered without running the agent again", ["kind"]
+))
+RESPONSE_CACHE_REQUESTS = REGISTRY.register(Counter(
+    "a2a_response_cache_requests", "Response cache lookups by skill and result (hit, miss, shared, bypass)", ["skill", "result"]
+))
+RESPONSE_CACHE_ENTRIES = REGISTRY.register(Gauge("a2a_response_cache_entries", "Replies held by the response cache"))
+PROMPT_TOKENS = REGISTRY.register(Histogram(
+    "a2a_llm_prompt_tokens",
+    "Prompt tokens per model call: history (estimated, before trimming), sent (estimated), reported (by the model)",
+    ["kind"], buckets=TOKEN_BUCKETS,
+))
+CONTEXT_TURNS_DROPPED = REGISTRY.register(Counter(
+    "a2a_context_turns_dropped", "Conversation turns left out of the prompt, by reason (window, budget)", ["reason"]
+))
+STORE_EVICTIONS = REGISTRY.register(Counter("a2a_task_store_evictions", "Tasks dropped by the task store, by reason", ["reason"]))
+BLOB_STORE_BYTES = REGISTRY.register(Gauge("a2a_blob_store_bytes", "Bytes of file content held by the blob store"))
+BLOB_STORE_BLOBS = REGISTRY.register(Gauge("a2a_blob_store_blobs", "Blobs held by the blob store"))
+BLOB_EVICTIONS = REGISTRY.register(Counter("a2a_blob_store_evictions", "Blobs dropped by the blob store, by reason (size, ttl)", ["reason"]))
+UPLOADS_IN_PROGRESS = REGISTRY.register(Gauge("a2a_uploads_in_progress", "Chunked uploads started and not yet completed"))
+UPLOAD_CHUNKS = REGISTRY.register(Counter("a2a_upload_chunks", "Chunks received by chunked uploads, by outcome (ok, error)", ["outcome"]))
+MICRO_BATCHES = REGISTRY.register(Counter("a2a_micro_batches", "Micro-batches of agent calls sent, by reason (size, window)", ["reason"]))
+MICRO_BATCH_SIZE = REGISTRY.register(Histogram("a2a_micro_batch_size", "Agent calls per micro-batch", buckets=SIZE_BUCKETS))
+MICRO_BATCH_WAIT_SECONDS = REGISTRY.register(Histogram("a2a_micro_batch_wait_seconds", "Time the first call of a micro-batch waited for more"))
+ARTIFACT_STORE_BYTES = REGISTRY.register(Gauge("a2a_artifact_store_bytes", "Bytes of distinct artifact content on disk"))
+ARTIFACT_DEDUP_HITS = REGISTRY.register(Counter("a2a_artifact_dedup_hits", "Artifact saves whose content was already stored"))
+ARTIFACT_OBJECTS_REMOVED = REGISTRY.register(Counter(
+    "a2a_artifact_objects_removed", "Artifact content files removed, by reason (size, deleted)", ["reason"]
+))
+IMAGES_PREPROCESSED = REGISTRY.register(Counter("a2a_images_preprocessed", "Images prepared for the model, by outcome (ok, error)", ["outcome"]))
+IMAGE_PREPROCESS_SECONDS = REGISTRY.register(Histogram("a2a_image_preprocess_seconds", "Time to prepare one image (incl. waiting for a worker)"))
+
+
+class span:
+    """
+    Times a stage:  `with span("invoke"): ...`  (works around awaits too).
+    Records a2a_stage_seconds{stage=...} and logs a "span" event at DEBUG.
+    """
+
+    __slots__ = ("stage", "_histogram", "_start")
+
+    _histograms: dict[str, _HistogramChild] = {}
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            histogram = self._histograms[stage] = STAGE_SECONDS.labels(stage)
+        self._histogram = histogram
+
+    def __enter__(self) -> "span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self._start
+        self._histogram.observe(elapsed)
+        if logger.isEnabledFor(logging.DEBUG):
+            log_event(logger, logging.DEBUG, "span", stage=self.stage, duration_ms=round(elapsed * 1000, 3))
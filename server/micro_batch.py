@@ -0,0 +1,93 @@
+#  Purpose:
+# Micro-batching: calls that arrive within a few milliseconds of each other are
+# collected and handed to one batch function together, and each caller gets its own
+# result back.
+#
+#   batcher = MicroBatcher(agent.invoke_batch, window = 0.005, max_batch = 16)
+#   reply = await batcher.submit((query, session_id, images), key = skill)
+#
+# - A batch is sent when it is `max_batch` items big, or `window` seconds after its
+#   first item arrived, whichever comes first: a lone call waits at most `window`
+# - Only items with the same key are batched together (e.g. the same skill)
+# - The batch runs in its own task, so a caller that is cancelled (e.g. a client that
+#   disconnects) doesn't cancel it for the others
+# - batch_fn gets the items in arrival order and must return one result per item; if it
+#   raises, every caller of that batch gets the exception
+
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from server import metrics
+
+
+class _Batch:
+    __slots__ = ("items", "futures", "timer", "started_at")
+
+    def __init__(self):
+        self.items: list[Any] = []
+        self.futures: list[asyncio.Future] = []
+        self.timer: asyncio.TimerHandle | None = None
+        self.started_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    🧺 Collects concurrent calls into batches over a small time / size window.
+
+    Args:
+        batch_fn: async fn(items) -> results (same length and order)
+        window: Seconds the first item of a batch waits for more
+        max_batch: Items per batch (a full batch is sent at once)
+    """
+
+    def __init__(self, batch_fn: Callable[[list[Any]], Awaitable[list[Any]]], window: float = 0.005, max_batch: int = 16):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch = max_batch
+        self._open: dict[Hashable, _Batch] = {}  # key -> batch still collecting items
+        self._running: set[asyncio.Task] = set()
+
+    async def submit(self, item: Any, key: Hashable = None) -> Any:
+        """Adds `item` to the open batch for `key` (starting one if needed) and returns its result."""
+        loop = asyncio.get_running_loop()
+        batch = self._open.get(key)
+        if batch is None:
+            batch = self._open[key] = _Batch()
+            batch.timer = loop.call_later(self.window, self._flush, key, batch, "window")
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch:
+            self._flush(key, batch, "size")
+        return await asyncio.shield(future)
+
+    #Closes a batch (if it is still the open one) and runs it
+    def _flush(self, key: Hashable, batch: _Batch, reason: str) -> None:
+        if self._open.get(key) is not batch:
+            return  # Already sent (full before its window ended)
+        del self._open[key]
+        batch.timer.cancel()
+        metrics.MICRO_BATCHES.labels(reason).inc()
+        metrics.MICRO_BATCH_SIZE.observe(len(batch.items))
+        metrics.MICRO_BATCH_WAIT_SECONDS.observe(time.perf_counter() - batch.started_at)
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)  # Keep a reference until it is done
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: _Batch) -> None:
+        try:
+            results = await self.batch_fn(batch.items)
+            if len(results) != len(batch.items):
+                raise RuntimeError(f"Batch of {len(batch.items)} items got {len(results)} results")
+        except BaseException as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,116 @@
+#  Purpose:
+# A response cache for agent replies, so repeated questions and retries don't each
+# cost a full LLM round trip.
+#
+# - Key: (skill, context, normalized query); the session is NOT part of the key,
+#   so "What time is it?" and "what time is it" from two sessions share an entry
+# - TTL per skill; a TTL of 0 opts a skill out of caching
+# - Bounded size: least recently used entries are evicted first
+# - Single-flight: identical queries that arrive while the first one is still being
+#   answered wait for that answer instead of calling the agent again
+# - Hit / miss counters in /metrics (a2a_response_cache_requests_total)
+#
+# Only use it for skills whose answer doesn't depend on the conversation so far:
+# a cache hit skips the agent, so the turn is not added to the agent's session.
+
+
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from server import metrics
+from server.singleflight import SingleFlight
+
+#Collapses runs of whitespace
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ResponseCache:
+    """
+    🗂️ TTL + LRU cache of agent replies with single-flight de-duplication.
+
+    Args:
+        max_entries: Max cached replies (least recently used are evicted)
+        default_ttl: Seconds a reply stays valid, for skills not in skill_ttls
+        skill_ttls: Per-skill TTL overrides in seconds; 0 disables caching for that skill
+    """
+
+    def __init__(self, max_entries: int = 10_000, default_ttl: float = 300.0, skill_ttls: dict[str, float] | None = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.skill_ttls = dict(skill_ttls or {})
+        self._entries: OrderedDict[tuple, tuple[Any, float]] = OrderedDict()  # key -> (reply, expires_at)
+        self._flight = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl_for(self, skill: str) -> float:
+        return self.skill_ttls.get(skill, self.default_ttl)
+
+    #Lower-cased, whitespace-collapsed query without trailing punctuation
+    @staticmethod
+    def normalize(query: str) -> str:
+        return _WHITESPACE.sub(" ", query).strip().rstrip("?!.").strip().casefold()
+
+    def key(self, skill: str, query: str, context: str = "") -> tuple[str, str, str]:
+        return (skill, context, self.normalize(query))
+
+    def get(self, key: tuple) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value: Any, ttl: float) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        metrics.RESPONSE_CACHE_ENTRIES.set(len(self._entries))
+
+    async def get_or_compute(
+        self,
+        skill: str,
+        query: str,
+        compute: Callable[[], Awaitable[Any]],
+        context: str = "",
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """
+        Returns the cached reply for (skill, context, query), or awaits compute() for it.
+
+        Args:
+            compute: Produces the reply on a miss (e.g. lambda: agent.invoke(query, session_id))
+            context: Anything besides the query that changes the answer (e.g. the model)
+            cacheable: Returns False for replies that must not be cached (e.g. error messages)
+        """
+        ttl = self.ttl_for(skill)
+        if ttl <= 0:
+            metrics.RESPONSE_CACHE_REQUESTS.labels(skill, "bypass").inc()
+            return await compute()
+
+        key = self.key(skill, query, context)
+        value = self.get(key)
+        if value is not None:
+            metrics.RESPONSE_CACHE_REQUESTS.labels(skill, "hit").inc()
+            return value
+
+        async def fill():
+            result = await compute()
+            if cacheable is None or cacheable(result):
+                self.put(key, result, ttl)
+            return result
+
+        value, shared = await self._flight.do(key, fill)
+        metrics.RESPONSE_CACHE_REQUESTS.labels(skill, "shared" if shared else "miss").inc()
+        return value
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "in_flight": len(self._flight)}
@@ -1,56 +1,114 @@
 #Defines a very simple A2A server
 #Supports:
-#-Receiving tasks requests via POST ("/")
+#-Receiving tasks requests via POST ("/"), one at a time or as a JSON-RPC batch (a JSON array)
+#- Streaming task updates as Server-Sent Events for "tasks/sendSubscribe"
 #- LEtting clients discover the agent's details via GET("/.well-known/agent.json")
+#- Binary content of file parts (e.g. images) via POST("/blobs") and GET("/blobs/<id>"), outside the JSON
+#- Large files in resumable chunks via POST("/uploads"), PUT("/uploads/<id>/<chunk>"), POST("/uploads/<id>/complete")
 
 #Starlette is a lightweight web frameowrk for building ASGI apps
 from starlette.applications import Starlette #To create our web app
-from starlette.responses import JSONResponse #To send responses as JSON
+from starlette.responses import Response #To send already-encoded JSON bytes (and /metrics text)
+from starlette.responses import StreamingResponse #To stream Server-Sent Events
 from starlette.requests import Request #Represents incoming HTTP requests
 
 
 from models.agent import AgentCard
-from models.request import A2ARequest, SendTaskRequest
-from models.json_rpc import JSONRPCResponse, InternalError
+from models.task import FileContent, UploadRequest, UploadStatus
+from models.request import A2ARequest, SendTaskRequest, SendTaskStreamingRequest, GetTaskRequest
+from models.json_rpc import JSONRPCResponse, InternalError, InvalidRequestError, ServerBusyError
 from agents.google_adk import task_manager              # Our actual task handling logic (Gemini agent)
 #Server will use this task manager to communicate with agent
 
 #General utilities
-import json
+import asyncio
+import contextlib
 import logging
+from typing import Any, AsyncIterable, Iterable
+import math
+import time
+from server.admission import RateLimiter, AdmissionRejected
+from server.blob_store import Blob, BlobStore, BlobTooLarge, BlobIncomplete
+from server.uploads import (
+    UploadManager, Upload, UploadNotFound, UploadLimitReached, InvalidChunk, ChunkInProgress, UploadIncomplete, UploadCorrupted,
+)
+from server.log import REQUEST_ID_HEADER, log_event, new_request_id
+from server import metrics
+from server.metrics import span
 logger = logging.getLogger(__name__)
 
-#Datetime import for serialization
-from datetime import datetime
+from pydantic import BaseModel, ValidationError
 
-from fastapi.encoders import jsonable_encoder
 
-#Serializer for datetime
-def json_serializer(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+#A JSON response whose body is already encoded (Starlette sends the bytes as they are)
+class RawJSONResponse(Response):
+    media_type = "application/json"
 
 
+#Serializes a pydantic model straight to JSON bytes in one pass (pydantic-core, in Rust)
+#Datetimes come out as ISO 8601 strings, e.g. "2025-01-01T12:00:00.123456"
+def json_response(model: BaseModel, status_code: int = 200, exclude_none: bool = True) -> RawJSONResponse:
+    body = model.__pydantic_serializer__.to_json(model, exclude_none=exclude_none)
+    return RawJSONResponse(body, status_code=status_code)
+
+
+#Header a trusted proxy (e.g. a gateway that authenticated the caller) may send to rate limit
+#under that ID instead of the address; from anyone else it is ignored (a new ID per request
+#would be a new rate limit per request)
+CLIENT_ID_HEADER = "X-Client-ID"
+
+#JSON-RPC batches: max requests in one batch, and how many of them run at once
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_BATCH_CONCURRENCY = 8
+
+
+#The address a request came from. X-Forwarded-For is only believed from a trusted proxy: walking
+#it from the right, the client is the first address not added by one (anyone can put anything
+#further left)
+def client_address(request: Request, trusted_proxies: frozenset[str]) -> str:
+    host = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and host in trusted_proxies:
+        for address in reversed(forwarded.split(",")):
+            host = address.strip()
+            if host not in trusted_proxies:
+                break
+    return host
+
 
 #Core A2A server logic
 class A2AServer:
     #Initialization of app
-    def __init__(self, host = "0.0.0.0", port = 5000, agent_card: AgentCard = None, task_manager = None):
+    def __init__(self, host = "0.0.0.0", port = 5000, agent_card: AgentCard = None, task_manager = None,
+                 rate_limiter: RateLimiter | None = None, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 batch_concurrency: int = DEFAULT_BATCH_CONCURRENCY, blob_store: BlobStore | None = None,
+                 uploads: UploadManager | None = None, trusted_proxies: Iterable[str] = ()):
         """#Constructor for our A2A server
         #Args:
          host: IP adress to ind server to
          port: Port number to listne on
          agent_card: metadata that describes our agent(name, skills, capabiities)
          task_manager: logic to handle the task(using gemini agent here)
+         rate_limiter: optional per-client limit on tasks/send and tasks/sendSubscribe (429 when exceeded)
+         max_batch_size: max requests in one JSON-RPC batch (larger batches are rejected with 400)
+         batch_concurrency: requests of one batch handled at the same time
+         blob_store: where uploaded file content is kept (None = no /blobs endpoints)
+         uploads: chunked, resumable uploads into the blob store (None = no /uploads endpoints)
+         trusted_proxies: addresses of proxies whose X-Forwarded-For names the client (rate limits)
         """
         self.host = host
         self.port = port
         self.agent_card = agent_card
         self.task_manager = task_manager
+        self.rate_limiter = rate_limiter
+        self.max_batch_size = max_batch_size
+        self.batch_concurrency = batch_concurrency
+        self.blob_store = blob_store
+        self.uploads = uploads
+        self.trusted_proxies = frozenset(trusted_proxies)
 
-        #Starlette app init
-        self.app = Starlette()
+        #Starlette app init (the lifespan closes the task manager on shutdown)
+        self.app = Starlette(lifespan = self._lifespan)
 
         #Register a route to handle task requests(JSON-RPC POST)
         self.app.add_route("/",self._handle_request,methods=["POST"])
@@ -58,6 +116,22 @@ class A2AServer:
         #Register a route for agent discovery(metadata as JSON)
         self.app.add_route("/.well-known/agent.json",self._get_agent_card,methods=["GET"]) #This is where discovery from well known location happens
 
+        #Register a route for Prometheus to scrape request/stage timings and task counters
+        self.app.add_route("/metrics",self._get_metrics,methods=["GET"])
+
+        #Register routes for file content referenced by FileParts (raw bytes in, raw bytes out)
+        if blob_store is not None:
+            self.app.add_route("/blobs",self._put_blob,methods=["POST"])
+            self.app.add_route("/blobs/{blob_id}",self._get_blob,methods=["GET"])
+
+        #Register routes for large files sent in chunks (in parallel, resumable after a disconnect)
+        if uploads is not None:
+            self.app.add_route("/uploads",self._create_upload,methods=["POST"])
+            self.app.add_route("/uploads/{upload_id}",self._get_upload,methods=["GET"])
+            self.app.add_route("/uploads/{upload_id}",self._abort_upload,methods=["DELETE"])
+            self.app.add_route("/uploads/{upload_id}/complete",self._complete_upload,methods=["POST"])
+            self.app.add_route("/uploads/{upload_id}/{index:int}",self._put_chunk,methods=["PUT"])
+
     #Now we have a web server, Launch the web server using uvicorn
     def start(self):
         """
@@ -70,17 +144,195 @@ class A2AServer:
         
         #Dynamically import uvicorn so its only loaded when needed
         import uvicorn
-        uvicorn.run(self.app, host = self.host, port = self.port)
-
+        from server.workers import exit_on_sigterm
+        exit_on_sigterm()  # Stop cleanly on SIGTERM too (e.g. the image preprocessing pool)
+        #log_config=None: uvicorn logs through our queued handlers (see server/log.py);
+        #per-request access lines only when debug logging is on; proxy_headers=False: which
+        #X-Forwarded-For to believe is decided by trusted_proxies (see client_address)
+        uvicorn.run(
+            self.app, host = self.host, port = self.port,
+            log_config = None, access_log = logger.isEnabledFor(logging.DEBUG), proxy_headers = False,
+        )
+
+
+    #Runs while the app serves requests; afterwards the task manager releases what it holds
+    @contextlib.asynccontextmanager
+    async def _lifespan(self, app):
+        yield
+        if self.task_manager is not None:
+            await self.task_manager.aclose()
 
     #Return agent's metadata (Get Request) to get agent card
-    def _get_agent_card(self, request: Request) -> JSONResponse:
+    def _get_agent_card(self, request: Request) -> RawJSONResponse:
         """
         Endpoint for agent discovery(GET /.well-known/agent.json)
 
-        Returns  JSONResponse: Agent metadata as Json dict
+        Returns  RawJSONResponse: Agent metadata as Json dict
+        """
+        return json_response(self.agent_card)
+
+    #Return all metrics in the Prometheus text format (GET /metrics)
+    async def _get_metrics(self, request: Request) -> Response:
+        store = getattr(self.task_manager, "store", None)
+        if store is not None:
+            #Task store size and evictions (the store keeps the numbers, read at scrape time;
+            #a database is counted on its reader threads, never on the event loop)
+            stats = await store.stats()
+            metrics.STORE_SIZE.labels("tasks").set(stats.get("tasks", 0))
+            metrics.STORE_SIZE.labels("history_messages").set(stats.get("history_messages", 0))
+            for reason, count in stats.get("evictions", {}).items():
+                metrics.STORE_EVICTIONS.labels(reason).set(count)
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+    #Stores the raw request body as a blob and answers with the FileContent that references it
+    async def _put_blob(self, request: Request) -> Response:
+        """
+        POST /blobs, body = the file's bytes, Content-Type = its MIME type, optional ?name=<file name>.
+
+        Returns 201 with a FileContent (uri, mimeType, name, size) to put into a FilePart;
+        413 if the content is too large, 400 if the upload was cut short.
+        """
+        start = time.perf_counter()
+        length = request.headers.get("content-length")
+        mime_type = request.headers.get("content-type") or "application/octet-stream"
+        try:
+            blob = await self.blob_store.put_stream(request.stream(), mime_type, int(length) if length else None)
+        except BlobTooLarge as e:
+            self._record_request("blobs/put", "error", start)
+            return Response(str(e), status_code = 413)
+        except (BlobIncomplete, ValueError) as e:
+            self._record_request("blobs/put", "error", start)
+            return Response(str(e), status_code = 400)
+        self._record_request("blobs/put", "ok", start)
+        return json_response(self._file_content(request, blob, request.query_params.get("name")), status_code = 201)
+
+    #Returns a blob's bytes as they are stored (a view of the buffer, not a copy)
+    def _get_blob(self, request: Request) -> Response:
+        start = time.perf_counter()
+        blob = self.blob_store.get(request.path_params["blob_id"])
+        if blob is None:
+            self._record_request("blobs/get", "error", start)
+            return Response("Blob not found", status_code = 404)
+        metrics.RESPONSE_BYTES.observe(blob.size)
+        self._record_request("blobs/get", "ok", start)
+        #The ID is the content's hash, so the content behind a URI never changes
+        return Response(
+            blob.data, media_type = blob.mime_type,
+            headers = {"ETag": f'"{blob.id}"', "Cache-Control": "public, max-age=31536000, immutable"},
+        )
+
+    #Starts a chunked upload; the answer says how to cut the file and which chunks to send
+    async def _create_upload(self, request: Request) -> Response:
+        """
+        POST /uploads, body = UploadRequest (size, mimeType, name).
+
+        Returns 201 with an UploadStatus; 413 if the file is too large, 503 if too many
+        uploads are in progress.
         """
-        return JSONResponse(self.agent_card.model_dump(exclude_none=True))
+        start = time.perf_counter()
+        try:
+            params = UploadRequest.model_validate_json(await request.body())
+            upload = self.uploads.create(params.size, params.mimeType or "application/octet-stream", params.name)
+        except ValidationError as e:
+            self._record_request("uploads/create", "error", start)
+            return Response(str(e), status_code = 400)
+        except BlobTooLarge as e:
+            self._record_request("uploads/create", "error", start)
+            return Response(str(e), status_code = 413)
+        except UploadLimitReached as e:
+            self._record_request("uploads/create", "error", start)
+            return Response(str(e), status_code = 503, headers = {"Retry-After": "1"})
+        self._record_request("uploads/create", "ok", start)
+        return json_response(self._upload_status(upload), status_code = 201)
+
+    #Which chunks of an upload are still missing (how a client resumes)
+    def _get_upload(self, request: Request) -> Response:
+        try:
+            upload = self.uploads.get(request.path_params["upload_id"])
+        except UploadNotFound as e:
+            return Response(str(e), status_code = 404)
+        return json_response(self._upload_status(upload))
+
+    def _abort_upload(self, request: Request) -> Response:
+        try:
+            self.uploads.abort(self.uploads.get(request.path_params["upload_id"]))
+        except UploadNotFound as e:
+            return Response(str(e), status_code = 404)
+        return Response(status_code = 204)
+
+    #Writes one chunk to disk as it arrives (chunks may come in any order, several at once)
+    async def _put_chunk(self, request: Request) -> Response:
+        """
+        PUT /uploads/<id>/<index>, body = the chunk's bytes.
+
+        Returns 204; 404 for an unknown upload, 400 if the chunk doesn't fit, 409 if the
+        same chunk is already being received.
+        """
+        start = time.perf_counter()
+        try:
+            upload = self.uploads.get(request.path_params["upload_id"])
+            await self.uploads.write_chunk(upload, request.path_params["index"], request.stream())
+        except UploadNotFound as e:
+            self._record_request("uploads/chunk", "error", start)
+            return Response(str(e), status_code = 404)
+        except InvalidChunk as e:
+            self._record_request("uploads/chunk", "error", start)
+            return Response(str(e), status_code = 400)
+        except ChunkInProgress as e:
+            self._record_request("uploads/chunk", "error", start)
+            return Response(str(e), status_code = 409)
+        self._record_request("uploads/chunk", "ok", start)
+        return Response(status_code = 204)
+
+    #Turns a fully received upload into a blob
+    async def _complete_upload(self, request: Request) -> Response:
+        """
+        POST /uploads/<id>/complete, optional ?sha256=<hex> to verify the content.
+
+        Returns 201 with the FileContent of the blob (as POST /blobs does); 409 with the
+        UploadStatus if chunks are missing, 400 if the content doesn't match the hash.
+        """
+        start = time.perf_counter()
+        try:
+            upload = self.uploads.get(request.path_params["upload_id"])
+            blob = await self.uploads.complete(upload, request.query_params.get("sha256"))
+        except UploadNotFound as e:
+            self._record_request("uploads/complete", "error", start)
+            return Response(str(e), status_code = 404)
+        except UploadIncomplete:
+            self._record_request("uploads/complete", "error", start)
+            return json_response(self._upload_status(upload), status_code = 409)
+        except UploadCorrupted as e:
+            self._record_request("uploads/complete", "error", start)
+            return Response(str(e), status_code = 400)
+        self._record_request("uploads/complete", "ok", start)
+        return json_response(self._file_content(request, blob, upload.name), status_code = 201)
+
+    @staticmethod
+    def _upload_status(upload: Upload) -> UploadStatus:
+        return UploadStatus(id = upload.id, size = upload.size, chunkSize = upload.chunk_size, missing = upload.missing())
+
+    def _file_content(self, request: Request, blob: Blob, name: str | None) -> FileContent:
+        return FileContent(uri = self._blob_uri(request, blob.id), mimeType = blob.mime_type, name = name, size = blob.size)
+
+    #Public URI of a blob: under the agent card's URL (what clients know), else under the request's
+    def _blob_uri(self, request: Request, blob_id: str) -> str:
+        base = self.agent_card.url if self.agent_card is not None else str(request.base_url)
+        return f"{base.rstrip('/')}/blobs/{blob_id}"
+
+    #Records the request counter and latency histogram for one finished request
+    @staticmethod
+    def _record_request(method: str, outcome: str, start: float) -> None:
+        metrics.REQUESTS.labels(method, outcome).inc()
+        metrics.REQUEST_SECONDS.labels(method).observe(time.perf_counter() - start)
+
+    #Who a request counts against for rate limiting: X-Client-ID set by a trusted proxy, else the
+    #caller's address
+    def _client_id(self, request: Request) -> str:
+        client_id = request.headers.get(CLIENT_ID_HEADER)
+        if client_id and request.client is not None and request.client.host in self.trusted_proxies:
+            return client_id
+        return client_address(request, self.trusted_proxies)
 
     #Handle incoming POST requests for tasks, this is where the task manager is used to process the task
     async def _handle_request(self, request: Request):
@@ -90,44 +342,194 @@ class A2AServer:
         -Validates the JSON-RPC message
         -For supported tasks, deleeates to task manager
         -Returns response or error
+        -A JSON array is a batch: see _handle_batch
         """
 
-        try: 
-            #Step 1: Parse incoming JSON body
-            body = await request.json()
-            print("\n Incoming JSON:", json.dumps(body, indent=2)) #Log input for visibility
-
-            #Step 2: Parse an validate request using discriminated union
-            json_rpc = A2ARequest.validate_python(body)
+        #Every log record written while handling this request carries its ID
+        request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+        start = time.perf_counter()
+        method = "invalid"  #Until the body has been parsed
 
-
-            #Step 3: If it is a send-task request, call task manager to handle it
-            if isinstance(json_rpc, SendTaskRequest):
-                result = await self.task_manager.on_send_task(json_rpc)
+        try: 
+            with span("parse"):
+                #Step 1: Parse incoming JSON body
+                body = await request.json()
+
+                #Step 2: Parse an validate request using discriminated union (batch items are validated one by one)
+                json_rpc = A2ARequest.validate_python(body) if not isinstance(body, list) else None
+            if json_rpc is None:
+                method = "batch"
+                response, outcome = await self._handle_batch(request, body)
+                self._record_request(method, outcome, start)
+                response.headers[REQUEST_ID_HEADER] = request_id
+                return response
+            method = json_rpc.method
+            #Log input for visibility (only built and written when debug logging is on)
+            log_event(logger, logging.DEBUG, "request.received", method=method, body=body)
+
+            #Requests that start agent work count against the client's rate limit (polling doesn't)
+            limited = self._check_rate_limit(request, json_rpc)
+            if limited is not None:
+                response = self._create_response(limited)
+                self._record_request(method, "rate_limited", start)
+                response.headers[REQUEST_ID_HEADER] = request_id
+                return response
+
+
+            #Step 3: If it is a send-task or get-task request, call task manager to handle it
+            if isinstance(json_rpc, (SendTaskRequest, GetTaskRequest)):
+                result = await self._call(json_rpc)
+            elif isinstance(json_rpc, SendTaskStreamingRequest):
+                #Streaming: hand the task manager's async generator to an SSE response
+                #(the request is recorded once the stream ends)
+                response = self._create_stream_response(
+                    json_rpc, self.task_manager.on_send_task_subscribe(json_rpc), start
+                )
+                response.headers[REQUEST_ID_HEADER] = request_id
+                return response
             else:
                 raise ValueError(f"Unsupported A2A method: {type(json_rpc)}")
 
             #Step 4: Convert result into proper JSON response
-            return self._create_response(result) 
+            response = self._create_response(result)
+            outcome = "error" if result.error is not None else "ok"
         except Exception as e:
-            logger.error(f"Exception: {e}")
-            return JSONResponse(
-                JSONRPCResponse(id=None, error = InternalError(message=str(e))).model_dump(), status_code = 400
+            logger.error("Exception: %s", e)
+            response = json_response(
+                JSONRPCResponse(id=None, error = InternalError(message=str(e))), status_code = 400, exclude_none = False
             )
+            outcome = "exception"
+        self._record_request(method, outcome, start)
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    #Returns a "Rate limit exceeded" response if the client is over its rate, else None
+    def _check_rate_limit(self, request: Request, json_rpc) -> JSONRPCResponse | None:
+        if self.rate_limiter is None or not isinstance(json_rpc, (SendTaskRequest, SendTaskStreamingRequest)):
+            return None
+        try:
+            self.rate_limiter.check(self._client_id(request))
+        except AdmissionRejected as e:
+            error = ServerBusyError(message="Rate limit exceeded", data={"reason": e.reason, "retry_after": round(e.retry_after, 3)})
+            return JSONRPCResponse(id=json_rpc.id, error=error)
+        return None
+
+    #Runs one non-streaming request through the task manager
+    async def _call(self, json_rpc) -> JSONRPCResponse:
+        if isinstance(json_rpc, SendTaskRequest):
+            return await self.task_manager.on_send_task(json_rpc)
+        #Polling: return the stored task (optionally only its last N messages)
+        return await self.task_manager.on_get_task(json_rpc)
+
+    #Handles a JSON-RPC batch: a JSON array of tasks/send and tasks/get requests
+    async def _handle_batch(self, request: Request, items: list[Any]) -> tuple[RawJSONResponse, str]:
+        """
+        Runs the requests of a batch concurrently (at most batch_concurrency at once) and answers
+        with one JSON array holding their responses in the same order.
 
-    #Converts result object into JSONResponse
+        Every request succeeds or fails on its own: an invalid item, a rate-limited send or a
+        failing task only turns its own entry into an error, and the batch is answered with 200.
+        Each item is also counted in the request metrics under its own method.
+        tasks/sendSubscribe can't be batched (its answer is a stream).
+        """
+        if not items or len(items) > self.max_batch_size:
+            message = "Empty batch" if not items else f"Batch too large ({len(items)} requests, max {self.max_batch_size})"
+            error = JSONRPCResponse(id=None, error=InvalidRequestError(message=message))
+            return json_response(error, status_code = 400, exclude_none = False), "error"
+        metrics.BATCH_ITEMS.observe(len(items))
+        limit = asyncio.Semaphore(self.batch_concurrency)
+
+        async def run(item: Any) -> JSONRPCResponse:
+            start = time.perf_counter()
+            item_id = item.get("id") if isinstance(item, dict) else None
+            item_id = item_id if isinstance(item_id, (int, str)) else None  #Only a valid ID is echoed back
+            method, outcome = "invalid", "error"
+            try:
+                try:
+                    json_rpc = A2ARequest.validate_python(item)
+                except ValidationError as e:
+                    return JSONRPCResponse(id=item_id, error=InvalidRequestError(data=e.errors(include_url=False, include_context=False, include_input=False)))
+                method = json_rpc.method
+                if isinstance(json_rpc, SendTaskStreamingRequest):
+                    return JSONRPCResponse(id=json_rpc.id, error=InvalidRequestError(message=f"{method} can't be batched"))
+                result = self._check_rate_limit(request, json_rpc)
+                if result is not None:
+                    outcome = "rate_limited"
+                    return result
+                async with limit:
+                    result = await self._call(json_rpc)
+                outcome = "error" if result.error is not None else "ok"
+                return result
+            except Exception as e:
+                logger.error("Exception in batch request: %s", e)
+                outcome = "exception"
+                return JSONRPCResponse(id=item_id, error=InternalError(message=str(e)))
+            finally:
+                self._record_request(method, outcome, start)
+
+        results = await asyncio.gather(*(run(item) for item in items))
+        with span("encode"):
+            #One pass per response, joined into the array (errors without an ID keep "id": null)
+            body = b"[" + b",".join(
+                result.__pydantic_serializer__.to_json(result, exclude_none=result.id is not None)
+                for result in results
+            ) + b"]"
+        metrics.RESPONSE_BYTES.observe(len(body))
+        failed = sum(result.error is not None for result in results)
+        return RawJSONResponse(body), "ok" if not failed else "partial" if failed < len(results) else "error"
+
+    #Converts result object into a JSON HTTP response
     def _create_response(self,result):
         """
         Converts the JSONRPCResponse result object into a JSON HTTP response
         result: response object(must be JSONRPCResponse)
-        Returns JSONResponse: HTTP response with JSON body
+        Returns RawJSONResponse: HTTP response with JSON body
         """
 
         if isinstance(result, JSONRPCResponse):
-            return JSONResponse(content=jsonable_encoder(result.model_dump(exclude_none=True)))
+            #A full task queue or an admission refusal is reported as HTTP 429 so clients and proxies back off
+            busy = isinstance(result.error, ServerBusyError)
+            #One pass over the task (and its history), no intermediate dicts
+            with span("encode"):
+                response = json_response(result, status_code = 429 if busy else 200)
+            if busy:
+                data = result.error.data if isinstance(result.error.data, dict) else {}
+                response.headers["Retry-After"] = str(max(1, math.ceil(data.get("retry_after", 1))))
+            history = getattr(result.result, "history", None)
+            if history is not None:
+                metrics.HISTORY_MESSAGES.observe(len(history))
+            metrics.RESPONSE_BYTES.observe(len(response.body))
+            return response
         else:
             raise ValueError("Invalid response type")
 
+    #Converts a stream of JSONRPCResponse objects into a Server-Sent Events response
+    def _create_stream_response(self, request, events: AsyncIterable[JSONRPCResponse], start: float | None = None) -> StreamingResponse:
+        """
+        Sends every item yielded by the task manager as one SSE "data:" line, as soon as it is produced.
+        If the stream fails halfway, a final JSON-RPC error event is sent instead of dropping the connection.
+        """
+
+        async def event_stream():
+            outcome = "ok"
+            try:
+                async for item in events:
+                    yield f"data: {item.model_dump_json(exclude_none=True)}\n\n"
+            except Exception as e:
+                logger.error("Exception while streaming: %s", e)
+                outcome = "exception"
+                error = JSONRPCResponse(id=request.id, error=InternalError(message=str(e)))
+                yield f"data: {error.model_dump_json(exclude_none=True)}\n\n"
+            finally:
+                if start is not None:
+                    self._record_request(request.method, outcome, start)
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
 
 
     
@@ -0,0 +1,42 @@
+#  Purpose:
+# Single-flight de-duplication: when several coroutines ask for the same key at the
+# same time, the work runs once and every caller gets its result.
+#
+#   flight = SingleFlight()
+#   result, shared = await flight.do(key, lambda: expensive(key))
+#
+# The work runs in its own task, so a caller that is cancelled (e.g. a client that
+# disconnects) doesn't cancel it for the others.
+
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Runs fn() for `key` unless a call for the same key is already in flight.
+
+        Returns:
+            (result, shared): shared is True if this caller joined an earlier call
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task), shared
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved, even if every caller gave up waiting
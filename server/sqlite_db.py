@@ -0,0 +1,173 @@
+#  Purpose:
+# The SQLite plumbing shared by our durable stores (standard-library `sqlite3`):
+# the task store (server/sqlite_task_store.py) and the ADK session / memory /
+# artifact services (agents/google_adk/sqlite_services.py).
+#
+# How it stays fast:
+# - WAL journal mode: readers never block the writer and the writer never blocks readers
+# - Batched writes (group commit): a single writer thread drains all queued writes and
+#   commits them in one transaction, so N concurrent writes cost one fsync instead of N
+# - Prepared statements: every query is a constant SQL string, which sqlite3 compiles once
+#   per connection and then reuses from its statement cache
+# - Reads run on a small thread pool with one connection per thread, so the event loop
+#   never waits on disk
+
+
+import asyncio                                  # Bridge between the event loop and SQLite threads
+import queue                                    # Hand-off of writes to the writer thread
+import sqlite3                                  # The database itself
+import threading                                # Writer thread and per-thread read connections
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+# _WriteOp: One queued write and the future its caller is awaiting
+
+class _WriteOp:
+    __slots__ = ("fn", "loop", "future")
+
+    def __init__(self, fn: Callable[[sqlite3.Connection], Any], loop: asyncio.AbstractEventLoop):
+        self.fn = fn
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def resolve(self, result: Any, error: BaseException | None) -> None:
+        def _set():
+            if self.future.done():
+                return  # Caller gave up (e.g. cancelled)
+            if error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+        self.loop.call_soon_threadsafe(_set)
+
+
+# SQLiteDatabase
+
+class SQLiteDatabase:
+    """
+    🗄️ One SQLite file with a batching writer thread and a pool of reader threads.
+
+    Args:
+        path: Database file (shared by every process that should see the same data)
+        schema: SQL script run once at startup (CREATE TABLE IF NOT EXISTS ...)
+        max_batch: Max writes committed together in one transaction
+        readers: Threads (and connections) used for reads
+        synchronous: SQLite `synchronous` pragma; "NORMAL" is crash-safe in WAL mode
+                     (only a power loss can drop the last commits), "FULL" is fsync-per-commit
+        busy_timeout_ms: How long to wait for another process holding the write lock
+        after_batch: Called on the writer thread after every committed batch (e.g. purging)
+        name: Prefix of the thread names
+    """
+
+    def __init__(
+        self,
+        path: str,
+        schema: str = "",
+        max_batch: int = 256,
+        readers: int = 4,
+        synchronous: str = "NORMAL",
+        busy_timeout_ms: int = 5000,
+        after_batch: Callable[[sqlite3.Connection], None] | None = None,
+        name: str = "sqlite",
+    ):
+        self.path = path
+        self.max_batch = max_batch
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.after_batch = after_batch
+
+        # Create the schema (and switch to WAL, which is persistent) before anyone uses the file
+        setup = self.connect()
+        if schema:
+            setup.executescript(schema)
+        setup.close()
+
+        self._local = threading.local()  # Per-thread read connection
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix=f"{name}-read")
+        self._writes: queue.SimpleQueue[_WriteOp | None] = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name=f"{name}-write", daemon=True)
+        self._writer.start()
+        self._closed = False
+
+    def close(self) -> None:
+        """Flushes queued writes and stops the writer and reader threads."""
+        if self._closed:
+            return
+        self._closed = True
+        self._writes.put(None)
+        self._writer.join()
+        self._readers.shutdown(wait=True)
+
+    def connect(self) -> sqlite3.Connection:
+        # isolation_level=None: we issue BEGIN / COMMIT ourselves (needed for batching)
+        conn = sqlite3.connect(self.path, isolation_level=None, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    async def read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Runs fn(conn) on a reader thread (no transaction: use it for self-consistent reads)."""
+        def run():
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = self.connect()
+            return fn(conn)
+        return await asyncio.get_running_loop().run_in_executor(self._readers, run)
+
+    async def write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Runs fn(conn) inside the writer's transaction; returns once it is committed."""
+        op = _WriteOp(fn, asyncio.get_running_loop())
+        self._writes.put(op)
+        return await op.future
+
+    # The writer thread: commits queued writes in batches
+    def _write_loop(self) -> None:
+        conn = self.connect()
+        stopping = False
+        while not stopping:
+            op = self._writes.get()
+            if op is None:
+                break
+
+            # Group commit: take everything that queued up while the last batch was committing
+            batch = [op]
+            while len(batch) < self.max_batch:
+                try:
+                    op = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if op is None:
+                    stopping = True
+                    break
+                batch.append(op)
+
+            self._commit_batch(conn, batch)
+            if self.after_batch is not None:
+                self.after_batch(conn)
+        conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list[_WriteOp]) -> None:
+        results: list[tuple[_WriteOp, Any, BaseException | None]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op in batch:
+                # A savepoint per write: one failing write doesn't undo the others in the batch
+                conn.execute("SAVEPOINT op")
+                try:
+                    results.append((op, op.fn(conn), None))
+                    conn.execute("RELEASE op")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    results.append((op, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            results = [(op, None, e) for op in batch]
+
+        # Only wake callers once their write is committed
+        for op, result, error in results:
+            op.resolve(result, error)
@@ -0,0 +1,255 @@
+#  Purpose:
+# A durable TaskStore backed by SQLite (standard-library `sqlite3`).
+#
+# Tasks survive restarts and can be shared by several worker processes on one machine.
+#
+# How it stays fast:
+# - Append-only history: every message is its own row, so adding a message never rewrites
+#   the task's earlier history; the `tasks` row only holds the (small) current status
+# - WAL mode, batched writes (group commit), prepared statements and reads on a thread
+#   pool: see server/sqlite_db.py
+
+
+import sqlite3                                  # The database itself
+import time                                     # Timestamps for terminal_ttl / idle_ttl
+from collections import Counter
+
+from models.task import Task, TaskSendParams, TaskStatus, TaskState, Message, TextPart, TERMINAL_STATES
+from server.task_store import ACTIVE_STATES, TaskStore
+from server.sqlite_db import SQLiteDatabase     # Writer thread (group commit) + reader threads
+
+
+# -----------------------------------------------------------------------------
+# SQL (constant strings, so sqlite3 prepares each of them once per connection)
+# -----------------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id            TEXT PRIMARY KEY,
+    session_id    TEXT NOT NULL,
+    state         TEXT NOT NULL,
+    status        TEXT NOT NULL,      -- TaskStatus as JSON
+    message_count INTEGER NOT NULL,   -- Number of rows in `messages` for this task
+    updated_at    REAL NOT NULL       -- Unix time of the last write
+);
+CREATE INDEX IF NOT EXISTS tasks_state_updated ON tasks (state, updated_at);
+CREATE INDEX IF NOT EXISTS tasks_updated ON tasks (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    task_id TEXT NOT NULL,
+    seq     INTEGER NOT NULL,         -- 0, 1, 2, ... in history order
+    body    TEXT NOT NULL,            -- Message as JSON
+    PRIMARY KEY (task_id, seq)
+) WITHOUT ROWID;
+"""
+
+_SELECT_TASK = "SELECT status, message_count FROM tasks WHERE id = ?"
+_SELECT_MESSAGES = "SELECT body FROM messages WHERE task_id = ? AND seq >= ? AND seq < ? ORDER BY seq"
+_INSERT_TASK = (
+    "INSERT INTO tasks (id, session_id, state, status, message_count, updated_at) VALUES (?, ?, ?, ?, 1, ?)"
+)
+_UPDATE_TASK_STATUS = (
+    "UPDATE tasks SET state = ?, status = ?, message_count = message_count + ?, updated_at = ? WHERE id = ?"
+)
+#A new message starts a new turn: the task is SUBMITTED again (so purging leaves it alone)
+_BUMP_TASK = "UPDATE tasks SET state = ?, status = ?, message_count = message_count + 1, updated_at = ? WHERE id = ?"
+_INSERT_MESSAGE = "INSERT INTO messages (task_id, seq, body) VALUES (?, ?, ?)"
+_SELECT_EXPIRED = "SELECT id FROM tasks WHERE state = ? AND updated_at < ?"
+#Tasks not in progress, least recently written first (idle_ttl and max_tasks never touch active tasks)
+_SELECT_IDLE = (
+    "SELECT id FROM tasks WHERE updated_at < ? AND state NOT IN ("
+    + ", ".join(f"'{state.value}'" for state in sorted(ACTIVE_STATES)) + ")"
+)
+_SELECT_OLDEST = (
+    "SELECT id FROM tasks WHERE state NOT IN ("
+    + ", ".join(f"'{state.value}'" for state in sorted(ACTIVE_STATES)) + ") ORDER BY updated_at LIMIT ?"
+)
+#Tasks left in progress by a server that stopped
+_FAIL_ACTIVE = (
+    "UPDATE tasks SET state = ?, status = ?, updated_at = ? WHERE state IN ("
+    + ", ".join(f"'{state.value}'" for state in sorted(ACTIVE_STATES)) + ")"
+)
+_DELETE_TASK = "DELETE FROM tasks WHERE id = ?"
+_DELETE_MESSAGES = "DELETE FROM messages WHERE task_id = ?"
+_COUNT_TASKS = "SELECT COUNT(*), COALESCE(SUM(message_count), 0) FROM tasks"
+
+
+# SQLiteTaskStore
+
+class SQLiteTaskStore(TaskStore):
+    """
+    💾 Task store persisted in a SQLite database file.
+
+    Args:
+        path: Database file (shared by every process that should see the same tasks)
+        max_batch: Max writes committed together in one transaction
+        readers: Threads (and connections) used for reads
+        synchronous: SQLite `synchronous` pragma; "NORMAL" is crash-safe in WAL mode
+                     (only a power loss can drop the last commits), "FULL" is fsync-per-commit
+        terminal_ttl: Seconds to keep completed / failed / canceled tasks (None = forever)
+        idle_ttl: Seconds a task that is not in progress is kept after its last write (None = forever)
+        max_tasks: Max stored tasks; the least recently written ones not in progress go first
+        busy_timeout_ms: How long to wait for another process holding the write lock
+
+    The limits are applied by the writer thread after a write, at most once a minute, so the
+    store can briefly hold more (or older) tasks than they allow. Tasks still being worked on
+    (submitted / working) are never removed: a slow agent call keeps its task.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_batch: int = 256,
+        readers: int = 4,
+        synchronous: str = "NORMAL",
+        terminal_ttl: float | None = None,
+        idle_ttl: float | None = None,
+        max_tasks: int | None = None,
+        busy_timeout_ms: int = 5000,
+    ):
+        self.path = path
+        self.terminal_ttl = terminal_ttl
+        self.idle_ttl = idle_ttl
+        self.max_tasks = max_tasks
+        self.evictions: Counter[str] = Counter()
+        self._last_purge = time.monotonic()
+        self._db = SQLiteDatabase(
+            path,
+            _SCHEMA,
+            max_batch = max_batch,
+            readers = readers,
+            synchronous = synchronous,
+            busy_timeout_ms = busy_timeout_ms,
+            after_batch = self._maybe_purge,
+            name = "sqlite-task",
+        )
+
+    def close(self) -> None:
+        """Flushes queued writes and stops the writer and reader threads."""
+        self._db.close()
+
+    # -------------------------------------------------------------------------
+    # TaskStore interface
+    # -------------------------------------------------------------------------
+
+    async def get_task(self, task_id: str, history_length: int | None = None) -> Task | None:
+        return await self._db.read(lambda conn: self._snapshot(conn, task_id, history_length))
+
+    async def upsert_task(self, params: TaskSendParams, history_length: int | None = None) -> Task:
+        body = params.message.model_dump_json()
+        submitted = TaskStatus(state=TaskState.SUBMITTED)
+
+        def write(conn: sqlite3.Connection) -> Task:
+            now = time.time()
+            row = conn.execute(_SELECT_TASK, (params.id,)).fetchone()
+            if row is None:
+                # If task doesn't exist, create it with a "submitted" status
+                conn.execute(_INSERT_TASK, (params.id, params.sessionId, submitted.state, submitted.model_dump_json(), now))
+                conn.execute(_INSERT_MESSAGE, (params.id, 0, body))
+            else:
+                # If task exists, append one history row (earlier rows are untouched)
+                conn.execute(_INSERT_MESSAGE, (params.id, row[1], body))
+                conn.execute(_BUMP_TASK, (submitted.state, submitted.model_dump_json(), now, params.id))
+            return self._snapshot(conn, params.id, history_length)
+
+        return await self._db.write(write)
+
+    async def update_task(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        message: Message | None = None,
+        history_length: int | None = None,
+    ) -> Task:
+        status_json = status.model_dump_json()
+        body = message.model_dump_json() if message is not None else None
+
+        def write(conn: sqlite3.Connection) -> Task:
+            row = conn.execute(_SELECT_TASK, (task_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Task {task_id} not found")
+            if body is not None:
+                conn.execute(_INSERT_MESSAGE, (task_id, row[1], body))
+            conn.execute(_UPDATE_TASK_STATUS, (status.state, status_json, 1 if body is not None else 0, time.time(), task_id))
+            return self._snapshot(conn, task_id, history_length)
+
+        return await self._db.write(write)
+
+    async def fail_interrupted(self) -> int:
+        """
+        Marks every submitted / working task FAILED; returns how many.
+
+        Only for startup, before any process serves this file: the server that was running
+        them stopped (or crashed), so nobody will ever finish them, and size limits never
+        evict tasks in progress.
+        """
+        message = Message(role="agent", parts=[TextPart(text="Task interrupted: the server stopped before it finished")])
+        status_json = TaskStatus(state=TaskState.FAILED, message=message).model_dump_json()
+        return await self._db.write(lambda conn: conn.execute(_FAIL_ACTIVE, (TaskState.FAILED.value, status_json, time.time())).rowcount)
+
+    async def stats(self) -> dict[str, int | dict[str, int]]:
+        """Current size of the store and eviction counts (for metrics); counted on a reader thread."""
+        tasks, messages = await self._db.read(lambda conn: conn.execute(_COUNT_TASKS).fetchone())
+        return {"tasks": tasks, "history_messages": messages, "evictions": dict(self.evictions)}
+
+    # -------------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------------
+
+    # Reads one task (status row + the last `history_length` message rows)
+    @staticmethod
+    def _snapshot(conn: sqlite3.Connection, task_id: str, history_length: int | None) -> Task | None:
+        row = conn.execute(_SELECT_TASK, (task_id,)).fetchone()
+        if row is None:
+            return None
+        status_json, count = row
+        start = 0 if history_length is None else max(count - history_length, 0)
+        history = []
+        if start < count:
+            # Messages are append-only, so rows below `count` can be read without a transaction
+            history = [
+                Message.model_validate_json(body)
+                for (body,) in conn.execute(_SELECT_MESSAGES, (task_id, start, count))
+            ]
+        return Task.model_construct(id=task_id, status=TaskStatus.model_validate_json(status_json), history=history)
+
+    # Applies terminal_ttl, idle_ttl and max_tasks (at most once a minute)
+    def _maybe_purge(self, conn: sqlite3.Connection) -> None:
+        if self.terminal_ttl is None and self.idle_ttl is None and self.max_tasks is None:
+            return
+        if time.monotonic() - self._last_purge < 60:
+            return
+        self._last_purge = time.monotonic()
+        self.purge(conn)
+
+    def purge(self, conn: sqlite3.Connection) -> int:
+        """Deletes the tasks the limits no longer allow, in one transaction; returns how many."""
+        now = time.time()
+        victims: list[tuple[str, str]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if self.terminal_ttl is not None:
+                for state in TERMINAL_STATES:
+                    rows = conn.execute(_SELECT_EXPIRED, (state.value, now - self.terminal_ttl)).fetchall()
+                    victims += [(task_id, "terminal_ttl") for (task_id,) in rows]
+            if self.idle_ttl is not None:
+                done = {task_id for task_id, _ in victims}
+                rows = conn.execute(_SELECT_IDLE, (now - self.idle_ttl,)).fetchall()
+                victims += [(task_id, "idle_ttl") for (task_id,) in rows if task_id not in done]
+            for task_id, _ in victims:
+                conn.execute(_DELETE_MESSAGES, (task_id,))
+                conn.execute(_DELETE_TASK, (task_id,))
+            if self.max_tasks is not None:
+                (count,) = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+                if count > self.max_tasks:
+                    for (task_id,) in conn.execute(_SELECT_OLDEST, (count - self.max_tasks,)).fetchall():
+                        conn.execute(_DELETE_MESSAGES, (task_id,))
+                        conn.execute(_DELETE_TASK, (task_id,))
+                        victims.append((task_id, "max_tasks"))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return 0
+        for _, reason in victims:
+            self.evictions[reason] += 1
+        return len(victims)
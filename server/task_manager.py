@@ -3,17 +3,17 @@
 #
 # Includes:
 # - A base abstract class `TaskManager` that outlines required methods
-# - A simple `InMemoryTaskManager` that keeps tasks temporarily in memory
+# - A simple `InMemoryTaskManager` that keeps tasks in a `TaskStore` (in memory by default)
 #
 # Does not include:
 # - Cancel task functionality
-# - Push notifications or real-time updates
-# - Persistent storage (like a database)
+# - Push notifications (streaming updates are supported via tasks/sendSubscribe)
 
 
 from abc import ABC, abstractmethod        # Lets us define abstract base classes (like an interface)
-from typing import Dict                    # Dict is a dictionary type for storing key-value pairs
-import asyncio                             # Used here for locks to safely handle concurrency (async operations)
+from typing import AsyncIterable, Awaitable, Callable  # Streamed task updates, idempotent runs
+import asyncio                             # Futures for requests that are still running
+from datetime import datetime, timedelta   # Age of completed tasks (duplicate window)
 
 
 
@@ -21,6 +21,7 @@ import asyncio                             # Used here for locks to safely handl
 
 from models.request import (
     SendTaskRequest, SendTaskResponse,    # For sending tasks to the agent
+    SendTaskStreamingRequest, SendTaskStreamingResponse,  # For streaming task updates (SSE)
     GetTaskRequest, GetTaskResponse       # For querying task info from the agent
 )
 
@@ -29,6 +30,11 @@ from models.task import (
     TaskStatus, TaskState, Message          # Task metadata and history objects
 )
 
+from models.json_rpc import TaskNotFoundError  # Structured error for unknown task IDs
+
+from server.task_store import TaskStore, InMemoryTaskStore, ACTIVE_STATES  # Where tasks are actually kept
+from server.metrics import TASKS, DUPLICATE_REQUESTS, span   # Stage timings and task counters
+
 
 # TaskManager (Abstract Base Class)
 
@@ -36,8 +42,9 @@ class TaskManager(ABC):
     """
     🔧 This is a base interface class.
 
-    All Task Managers must implement these two async methods:
+    All Task Managers must implement these async methods:
     - on_send_task(): to receive and process new tasks
+    - on_send_task_subscribe(): to process a task while streaming its updates
     - on_get_task(): to fetch the current status or conversation history of a task
 
     This makes sure all implementations follow a consistent structure.
@@ -48,57 +55,157 @@ class TaskManager(ABC):
         """📥 This method will handle new incoming tasks."""
         pass
 
+    @abstractmethod
+    def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """📡 This method will handle a task and yield its status updates as they happen."""
+        pass
+
     @abstractmethod
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         """📤 This method will return task details by task ID."""
         pass
 
+    def close(self) -> None:
+        """🔌 Releases resources (worker processes, threads) when the server shuts down. No-op by default."""
+        pass
+
+    async def aclose(self) -> None:
+        """🔌 Stops background work on the event loop, then close(). The server awaits this on shutdown."""
+        self.close()
+
 
 # InMemoryTaskManager
 
 class InMemoryTaskManager(TaskManager):
     """
-    🧠 A simple, temporary task manager that stores everything in memory (RAM).
+    🧠 A simple task manager that keeps its tasks in a TaskStore.
 
-    Great for:
+    By default the store is an `InMemoryTaskStore` (RAM), which is great for:
     - Demos
     - Local development
     - Single-session interactions
 
-    ❗ Not for production: Data is lost when the app stops or restarts.
+    ❗ With the in-memory store, data is lost when the app stops or restarts.
+
+    🔁 Resubmitting a task while it runs (same task ID and same message, e.g. a client retry
+    after a timeout) does not run the agent twice; with an `idempotency_window`, neither does
+    a resubmission shortly after it completed. See `run_idempotent()`.
     """
 
-    def __init__(self):
-        self.tasks: Dict[str, Task] = {}   # 🗃️ Dictionary where key = task ID, value = Task object
-        self.lock = asyncio.Lock()         # 🔐 Async lock to ensure two requests don't modify data at the same time
+    def __init__(self, store: TaskStore | None = None, idempotency_window: float = 0.0):
+        # 🗃️ Storage backend (per-task locking, lock-free snapshot reads)
+        self.store: TaskStore = store if store is not None else InMemoryTaskStore()
+
+        # Seconds after completion during which a resubmitted task gets its stored result (0 = off:
+        # sending the same question again asks it again, which is what a client may mean by it)
+        self.idempotency_window = idempotency_window
+        # Task ID -> (message being processed, future done when processing ends)
+        self._in_flight: dict[str, tuple[Message, asyncio.Future]] = {}
+
+    def close(self) -> None:
+        """🔌 Closes the store (a SQLite store writes its queued updates first)."""
+        self.store.close()
 
-    # upsert_task: Create or update a task in memory    
-    async def upsert_task(self, params: TaskSendParams) -> Task:
+    # upsert_task: Create or update a task in the store
+    async def upsert_task(self, params: TaskSendParams, history_length: int | None = None) -> Task:
         """
         Create a new task if it doesn’t exist, or update the history if it does.
 
         Args:
             params: TaskSendParams – includes task ID, session ID, and message
+            history_length: How many of the latest messages the returned snapshot holds (None = all)
+
+        Returns:
+            Task – a snapshot of the newly created or updated task
+        """
+        # Timed stage includes any wait for the task's write lock
+        with span("task_upsert"):
+            task = await self.store.upsert_task(params, history_length)
+        if task.status.state == TaskState.SUBMITTED:
+            TASKS.labels(TaskState.SUBMITTED).inc()
+        return task
+
+    # update_task: Change a task's status (and optionally add a message to its history)
+    async def update_task(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        message: Message | None = None,
+        history_length: int | None = None,
+    ) -> Task:
+        """
+        Returns:
+            Task – a snapshot of the updated task (only the last `history_length` messages)
+        """
+        with span("task_update"):
+            task = await self.store.update_task(task_id, status, message, history_length)
+        TASKS.labels(status.state).inc()
+        return task
+
+    # run_idempotent: Process a tasks/send at most once per (task ID, message)
+    async def run_idempotent(
+        self,
+        params: TaskSendParams,
+        process: Callable[[], Awaitable[Task]],
+        history_length: int | None = None,
+        attach_active: bool = False,
+    ) -> Task:
+        """
+        Runs `process()` (upsert + agent + update) unless this is a resubmission:
+        - The same task ID is still being processed: wait for that run and return its result
+          (if the message differs, wait for it to finish and then process this one normally)
+        - The task completed within `idempotency_window` seconds and its last user message
+          is this same message: return the stored result without processing again
+        - attach_active=True (background execution): the task is still queued or running
+          with this same message: return its current state
 
         Returns:
-            Task – the newly created or updated task
+            Task – the processed (or stored) task, with its last `history_length` messages
         """
-        async with self.lock:
-            task = self.tasks.get(params.id)  # Try to find an existing task with this ID
-
-            if task is None:
-                # If task doesn't exist, create it with a "submitted" status
-                task = Task(
-                    id=params.id,
-                    status=TaskStatus(state=TaskState.SUBMITTED),
-                    history=[params.message]
-                )
-                self.tasks[params.id] = task
-            else:
-                # If task exists, add the new message to its history
-                task.history.append(params.message)
-
-            return task
+        while True:
+            running = self._in_flight.get(params.id)
+            if running is None:
+                break
+            message, future = running
+            await asyncio.shield(future)
+            if message == params.message:
+                DUPLICATE_REQUESTS.labels("in_flight").inc()
+                return await self.store.get_task(params.id, history_length)
+            # A different message for the same task: process it after the running one
+
+        # Registered before the first await, so a retry arriving now attaches to this run
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[params.id] = (params.message, future)
+        try:
+            if self.idempotency_window > 0 or attach_active:
+                # Last two messages: the user message and the agent's reply to it
+                existing = await self.store.get_task(params.id, history_length=2)
+                kind = self._duplicate_kind(existing, params.message, attach_active)
+                if kind is not None:
+                    DUPLICATE_REQUESTS.labels(kind).inc()
+                    return await self.store.get_task(params.id, history_length)
+            return await process()
+        finally:
+            del self._in_flight[params.id]
+            future.set_result(None)
+
+    #"completed" / "active" if `task` already holds `message` as its latest user message, else None
+    def _duplicate_kind(self, task: Task | None, message: Message, attach_active: bool) -> str | None:
+        if task is None:
+            return None
+        last_user = next((m for m in reversed(task.history) if m.role == "user"), None)
+        if last_user != message:
+            return None
+        if attach_active and task.status.state in ACTIVE_STATES:
+            return "active"
+        if (
+            task.status.state == TaskState.COMPLETED
+            and datetime.now() - task.status.timestamp <= timedelta(seconds=self.idempotency_window)
+        ):
+            return "completed"
+        return None
 
     #  on_send_task: Must be implemented by any subclass
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
@@ -111,6 +218,19 @@ class InMemoryTaskManager(TaskManager):
         """
         raise NotImplementedError("on_send_task() must be implemented in subclass")
 
+    #  on_send_task_subscribe: Must be implemented by any subclass that supports streaming
+    def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """
+        This method is intentionally not implemented here.
+        Subclasses like `AgentTaskManager` should override it with an async generator.
+
+        Raises:
+            NotImplementedError: if someone tries to use it directly
+        """
+        raise NotImplementedError("on_send_task_subscribe() must be implemented in subclass")
+
     # on_get_task: Fetch a task by its ID
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         """
@@ -122,19 +242,13 @@ class InMemoryTaskManager(TaskManager):
         Returns:
             GetTaskResponse – contains the task if found, or an error message
         """
-        async with self.lock:
-            query: TaskQueryParams = request.params
-            task = self.tasks.get(query.id)
-
-            if not task:
-                # If task not found, return a structured error
-                return GetTaskResponse(id=request.id, error={"message": "Task not found"})
-
-            # Optional: Trim the history to only show the last N messages
-            task_copy = task.model_copy()  # Make a copy so we don't affect the original
-            if query.historyLength is not None:
-                task_copy.history = task_copy.history[-query.historyLength:]  # Get last N messages
-            else:
-                task_copy.history = task_copy.history
-
-            return GetTaskResponse(id=request.id, result=task_copy)
\ No newline at end of file
+        query: TaskQueryParams = request.params
+
+        # Lock-free read: the store returns an immutable snapshot holding only the last N messages
+        task = await self.store.get_task(query.id, query.historyLength)
+
+        if not task:
+            # If task not found, return a structured error
+            return GetTaskResponse(id=request.id, error=TaskNotFoundError(data={"id": query.id}))
+
+        return GetTaskResponse(id=request.id, result=task)
\ No newline at end of file
@@ -0,0 +1,103 @@
+#  Purpose:
+# A bounded queue of background jobs drained by a fixed number of worker coroutines.
+#
+# Used for asynchronous task execution: tasks/send stores the task, puts the agent
+# call on this queue and answers right away (SUBMITTED); the client then polls
+# tasks/get. The number of agent calls running at once is `concurrency`, no matter
+# how many HTTP connections are open, and at most `max_queued` more may wait.
+#
+# Backpressure: when the queue is full, reserve() raises QueueFullError and the
+# server answers 429 / a "server busy" JSON-RPC error instead of queueing more work.
+
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from server import metrics
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class QueueFullError(Exception):
+    """The task queue has no room left; the caller should retry later."""
+
+
+class TaskQueue:
+    """
+    ⏳ Bounded job queue with `concurrency` workers.
+
+    Usage (reserve first, so a full queue is detected before any work is done):
+        queue.reserve()          # raises QueueFullError if full
+        try:
+            ...prepare...
+        except BaseException:
+            queue.release()
+            raise
+        queue.put(job)           # job: async callable, run by a worker
+    """
+
+    def __init__(self, concurrency: int = 16, max_queued: int = 1000):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self._queue: asyncio.Queue[Job] | None = None  # Created on first use (needs a running loop)
+        self._workers: list[asyncio.Task] = []
+        self._reserved = 0   # Slots taken by reserve() but not yet put()
+        self._running = 0
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting for a worker (including reserved slots)."""
+        return (self._queue.qsize() if self._queue else 0) + self._reserved
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def reserve(self) -> None:
+        if self.depth >= self.max_queued:
+            metrics.TASK_QUEUE_REJECTED.inc()
+            raise QueueFullError(f"Task queue is full ({self.max_queued} waiting)")
+        self._reserved += 1
+
+    def release(self) -> None:
+        self._reserved -= 1
+
+    def put(self, job: Job) -> None:
+        """Queues a job for a slot taken with reserve()."""
+        if self._queue is None:
+            self._start()
+        self._reserved -= 1
+        self._queue.put_nowait(job)
+        metrics.TASK_QUEUE_DEPTH.set(self.depth)
+
+    async def aclose(self) -> None:
+        """Stops the workers (queued jobs that haven't started are dropped)."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._queue = None
+
+    def _start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"task-worker-{i}") for i in range(self.concurrency)
+        ]
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._running += 1
+            metrics.TASK_QUEUE_DEPTH.set(self.depth)
+            metrics.TASKS_RUNNING.set(self._running)
+            try:
+                await job()
+            except Exception:
+                logger.exception("Background task failed")
+            finally:
+                self._running -= 1
+                metrics.TASKS_RUNNING.set(self._running)
+                self._queue.task_done()
@@ -0,0 +1,358 @@
+#  Purpose:
+# This file defines where task state is stored, separately from how tasks are processed.
+#
+# Includes:
+# - A base abstract class `TaskStore` that every storage backend implements
+# - `ShardedLock`: a fixed set of asyncio locks picked by hashing the task ID
+# - `InMemoryTaskStore`: a dictionary-backed store with per-shard write locks,
+#   lock-free reads of immutable snapshots, and optional TTL / LRU eviction
+#
+# Why not one global lock?
+# A single lock makes every session in the process wait for every other session,
+# including read-only polls. Here writers only lock the shard their task hashes to,
+# and readers never lock at all.
+
+
+from abc import ABC, abstractmethod        # Lets us define abstract base classes (like an interface)
+from collections import Counter, OrderedDict  # Eviction counters and LRU ordering
+import asyncio                             # asyncio locks for writers
+import time                                # Monotonic clock for TTLs
+
+from models.task import Task, TaskSendParams, TaskStatus, TaskState, Message, TextPart, FilePart, TERMINAL_STATES
+
+
+# States in which a task is still being processed (never evicted for size, only for idleness)
+ACTIVE_STATES = frozenset({TaskState.SUBMITTED, TaskState.WORKING})
+
+
+# TaskStore (Abstract Base Class)
+
+class TaskStore(ABC):
+    """
+    🗄️ Interface for task storage backends.
+
+    Every method returns a *snapshot*: a Task that will never change after it is returned,
+    even if the stored task is updated later. Callers never mutate stored tasks directly;
+    they call upsert_task() / update_task() instead.
+    """
+
+    @abstractmethod
+    async def get_task(self, task_id: str, history_length: int | None = None) -> Task | None:
+        """📤 Returns a snapshot of the task (only its last `history_length` messages), or None."""
+        pass
+
+    @abstractmethod
+    async def upsert_task(self, params: TaskSendParams, history_length: int | None = None) -> Task:
+        """📥 Creates the task (SUBMITTED) or appends the incoming message to its history (a new turn: SUBMITTED again)."""
+        pass
+
+    @abstractmethod
+    async def update_task(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        message: Message | None = None,
+        history_length: int | None = None,
+    ) -> Task:
+        """✏️ Sets the task's status and optionally appends a message to its history."""
+        pass
+
+    async def stats(self) -> dict[str, int | dict[str, int]]:
+        """📊 Size of the store ("tasks", "history_messages") and "evictions" by reason, for metrics."""
+        return {}
+
+    def close(self) -> None:
+        """🔌 Releases resources held by the store (threads, connections). No-op by default."""
+        pass
+
+
+# ShardedLock: N locks, picked by hashing a key
+
+class ShardedLock:
+    """
+    A fixed pool of asyncio locks. Two keys share a lock only if they hash to the same shard,
+    so unrelated tasks almost never wait for each other.
+    """
+
+    def __init__(self, shards: int = 64):
+        self._locks = [asyncio.Lock() for _ in range(shards)]
+
+    def __call__(self, key: str) -> asyncio.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+
+# _TaskRecord: How one task is kept inside InMemoryTaskStore
+
+class _TaskRecord:
+    """
+    Mutable storage for one task.
+
+    - `status` is replaced (never mutated) on every update
+    - `history` is append-only
+
+    Together that means a reader can take a consistent snapshot without a lock:
+    it grabs the current status object and slices the history up to its current length.
+    """
+
+    __slots__ = ("id", "session_id", "status", "history", "history_bytes", "touched_at")
+
+    def __init__(self, task_id: str, session_id: str, status: TaskStatus, history: list[Message]):
+        self.id = task_id
+        self.session_id = session_id
+        self.status = status
+        self.history = history
+        self.history_bytes = sum(message_size(message) for message in history)
+        self.touched_at = time.monotonic()  # Last read or write, for idle expiry
+
+    def snapshot(self, history_length: int | None = None) -> Task:
+        history = self.history
+        end = len(history)
+        start = 0 if history_length is None else max(end - history_length, 0)
+        # Slicing copies only the references we return: O(history_length), not O(len(history))
+        # model_construct skips validation: every message was validated when it was stored
+        return Task.model_construct(id=self.id, status=self.status, history=history[start:end])
+
+
+#Approximate payload size of a message in bytes (what counts against max_history_bytes)
+#File parts only count their reference: the content itself lives in the blob store
+def message_size(message: Message) -> int:
+    size = 0
+    for part in message.parts:
+        if isinstance(part, TextPart):
+            size += len(part.text.encode("utf-8"))
+        elif isinstance(part, FilePart):
+            size += len(part.file.uri)
+        else:
+            size += len(part.__pydantic_serializer__.to_json(part))
+    return size
+
+
+# InMemoryTaskStore
+
+class InMemoryTaskStore(TaskStore):
+    """
+    🧠 Keeps tasks in a dictionary in RAM.
+
+    - Writes take only the lock of the shard the task ID hashes to
+    - Reads take no lock and return immutable snapshots
+
+    Optional limits keep memory bounded on long-running processes:
+    - max_tasks:            max number of stored tasks
+    - max_history_messages: max number of messages across all task histories
+    - max_history_bytes:    max approximate size of all task histories
+    - terminal_ttl:         seconds a completed / failed / canceled task is kept
+    - idle_ttl:             seconds a task that is not being worked on may go untouched (no reads or
+                            writes) before it is dropped
+
+    When a size limit is exceeded, the least recently used tasks are evicted first.
+    Tasks that are still being worked on (submitted / working) are never evicted, however long
+    the agent takes: the limits can be exceeded while many of them are in progress.
+    Every eviction is counted by reason in `evictions` (see stats()).
+
+    ❗ Data is lost when the process stops (see other TaskStore backends for durability).
+    """
+
+    def __init__(
+        self,
+        lock_shards: int = 64,
+        max_tasks: int | None = None,
+        max_history_messages: int | None = None,
+        max_history_bytes: int | None = None,
+        terminal_ttl: float | None = None,
+        idle_ttl: float | None = None,
+    ):
+        # Ordered from least to most recently used (reads and writes move a task to the end)
+        self._tasks: OrderedDict[str, _TaskRecord] = OrderedDict()
+        # Finished tasks ordered by the time they finished, for terminal_ttl
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self.lock_for = ShardedLock(lock_shards)  # lock_for(task_id) -> that task's shard lock
+
+        self.max_tasks = max_tasks
+        self.max_history_messages = max_history_messages
+        self.max_history_bytes = max_history_bytes
+        self.terminal_ttl = terminal_ttl
+        self.idle_ttl = idle_ttl
+
+        # Running totals, so limits are checked in O(1)
+        self.history_messages = 0
+        self.history_bytes = 0
+        # Evictions so far, by reason ("terminal_ttl", "idle_ttl", "max_tasks", ...)
+        self.evictions: Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def stats(self) -> dict[str, int | dict[str, int]]:
+        """Current size of the store and eviction counts (for metrics)."""
+        return {
+            "tasks": len(self._tasks),
+            "history_messages": self.history_messages,
+            "history_bytes": self.history_bytes,
+            "evictions": dict(self.evictions),
+        }
+
+    async def get_task(self, task_id: str, history_length: int | None = None) -> Task | None:
+        # No lock: records are only ever appended to / have their status replaced
+        record = self._tasks.get(task_id)
+        if record is None or self._expiry_reason(record, time.monotonic()):
+            return None
+        self._touch(record)
+        return record.snapshot(history_length)
+
+    async def upsert_task(self, params: TaskSendParams, history_length: int | None = None) -> Task:
+        async with self.lock_for(params.id):
+            record = self._tasks.get(params.id)
+
+            # An expired task that was not swept yet is replaced by a fresh one
+            if record is not None:
+                reason = self._expiry_reason(record, time.monotonic())
+                if reason:
+                    self._remove(params.id, reason)
+                    record = None
+
+            if record is None:
+                # If task doesn't exist, create it with a "submitted" status
+                record = _TaskRecord(
+                    params.id,
+                    params.sessionId,
+                    TaskStatus(state=TaskState.SUBMITTED),
+                    [params.message],
+                )
+                self._tasks[params.id] = record
+                self.history_messages += 1
+                self.history_bytes += record.history_bytes
+            else:
+                # If task exists, add the new message to its history
+                self._append(record, params.message)
+                # It is being worked on again: no longer finished, so neither terminal_ttl nor the
+                # size limits may drop it before the new turn's reply is stored
+                record.status = TaskStatus(state=TaskState.SUBMITTED)
+                self._finished.pop(params.id, None)
+                self._touch(record)
+
+            snapshot = record.snapshot(history_length)
+
+        self.evict()
+        return snapshot
+
+    async def update_task(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        message: Message | None = None,
+        history_length: int | None = None,
+    ) -> Task:
+        async with self.lock_for(task_id):
+            record = self._tasks.get(task_id)
+            if record is None:
+                raise KeyError(f"Task {task_id} not found")
+
+            if message is not None:
+                self._append(record, message)
+            record.status = status
+            self._touch(record)
+
+            # Start (or stop) the terminal_ttl clock
+            if status.state in TERMINAL_STATES:
+                self._finished[task_id] = time.monotonic()
+                self._finished.move_to_end(task_id)
+            else:
+                self._finished.pop(task_id, None)
+
+            snapshot = record.snapshot(history_length)
+
+        self.evict()
+        return snapshot
+
+    # evict: Enforce TTLs and size limits
+    def evict(self) -> int:
+        """
+        Drops expired tasks, then least recently used tasks until every size limit holds.
+        Runs after every write; call it periodically as well if TTLs must apply while idle.
+
+        Returns:
+            int – number of tasks evicted
+        """
+        now = time.monotonic()
+        evicted = 0
+
+        # 1. terminal_ttl: oldest finished tasks are at the front of _finished
+        if self.terminal_ttl is not None:
+            while self._finished:
+                task_id, finished_at = next(iter(self._finished.items()))
+                if now - finished_at < self.terminal_ttl:
+                    break
+                evicted += self._remove(task_id, "terminal_ttl")
+
+        # 2. idle_ttl: least recently touched tasks are at the front of _tasks; tasks in progress
+        #    are skipped (a slow agent call must still find its task when it is done)
+        if self.idle_ttl is not None:
+            idle = []
+            for record in self._tasks.values():
+                if now - record.touched_at < self.idle_ttl:
+                    break
+                if record.status.state not in ACTIVE_STATES:
+                    idle.append(record.id)
+            for task_id in idle:
+                evicted += self._remove(task_id, "idle_ttl")
+
+        # 3. Size limits: evict least recently used tasks that are not in progress
+        if self._over_limit(0, 0, 0):
+            # Pick victims first (can't remove while iterating), walking from least recently used
+            victims, tasks, messages, size = [], 0, 0, 0
+            for record in self._tasks.values():
+                if record.status.state in ACTIVE_STATES:
+                    continue  # Someone is about to write to it
+                victims.append((record.id, self._over_limit(tasks, messages, size)))
+                tasks, messages, size = tasks + 1, messages + len(record.history), size + record.history_bytes
+                if not self._over_limit(tasks, messages, size):
+                    break
+            for task_id, reason in victims:
+                evicted += self._remove(task_id, reason)
+
+        return evicted
+
+    # Returns the first size limit still exceeded after removing the given amounts (or None)
+    def _over_limit(self, tasks: int, messages: int, size: int) -> str | None:
+        if self.max_tasks is not None and len(self._tasks) - tasks > self.max_tasks:
+            return "max_tasks"
+        if self.max_history_messages is not None and self.history_messages - messages > self.max_history_messages:
+            return "max_history_messages"
+        if self.max_history_bytes is not None and self.history_bytes - size > self.max_history_bytes:
+            return "max_history_bytes"
+        return None
+
+    # Lazily applies TTLs to a single record (so expired tasks are never served)
+    def _expiry_reason(self, record: _TaskRecord, now: float) -> str | None:
+        if (
+            self.idle_ttl is not None
+            and now - record.touched_at >= self.idle_ttl
+            and record.status.state not in ACTIVE_STATES
+        ):
+            return "idle_ttl"
+        if self.terminal_ttl is not None:
+            finished_at = self._finished.get(record.id)
+            if finished_at is not None and now - finished_at >= self.terminal_ttl:
+                return "terminal_ttl"
+        return None
+
+    def _touch(self, record: _TaskRecord) -> None:
+        record.touched_at = time.monotonic()
+        self._tasks.move_to_end(record.id)
+
+    def _append(self, record: _TaskRecord, message: Message) -> None:
+        size = message_size(message)
+        record.history.append(message)
+        record.history_bytes += size
+        self.history_messages += 1
+        self.history_bytes += size
+
+    def _remove(self, task_id: str, reason: str) -> int:
+        record = self._tasks.pop(task_id, None)
+        self._finished.pop(task_id, None)
+        if record is None:
+            return 0
+        self.history_messages -= len(record.history)
+        self.history_bytes -= record.history_bytes
+        self.evictions[reason] += 1
+        return 1
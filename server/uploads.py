@@ -0,0 +1,317 @@
+#  Purpose:
+# Chunked, resumable uploads of large files (e.g. images), for when one POST /blobs
+# of the whole file is too fragile: one dropped connection and everything is resent.
+#
+# Protocol (routes in server/server.py):
+#   POST   /uploads                   {"size", "mimeType", "name"} -> UploadStatus (id, chunkSize, missing)
+#   PUT    /uploads/<id>/<index>      body = chunk <index> (bytes index*chunkSize ...), any order, in parallel
+#   GET    /uploads/<id>              UploadStatus: which chunks are still missing (to resume)
+#   POST   /uploads/<id>/complete     [?sha256=<hex>] -> FileContent of the finished blob
+#   DELETE /uploads/<id>              abandon the upload
+#
+# - Chunks are written straight to a file on disk as they arrive (no chunk is ever held
+#   in memory whole); resending a chunk just overwrites the same bytes
+# - Incremental hashing: the SHA-256 advances over the received prefix of the file while
+#   later chunks are still arriving, so completing the upload doesn't hash everything again
+# - Completing maps the file into memory and hands it to the blob store (the file is
+#   unlinked, its pages stay until the blob is evicted): the content is never copied into
+#   the Python heap (a DiskBlobStore writes it to its own file, on a thread). The blob ID
+#   is the hash, as for POST /blobs
+# - Resending a chunk that was already hashed restarts the hash from the first byte, so the
+#   blob ID is always the hash of the bytes actually stored
+# - Abandoning an upload while a chunk is being written deletes its file at once, but
+#   closes the file only once that write is done (it runs on a thread)
+# - Bounded: at most `max_uploads` at once, each at most the blob store's max_blob_bytes;
+#   uploads left alone for `ttl` seconds are dropped
+
+
+import asyncio
+import hashlib
+import math
+import mmap
+import os
+import tempfile
+import time
+from typing import AsyncIterator
+from uuid import uuid4
+
+from server import metrics
+from server.blob_store import Blob, BlobStore, BlobTooLarge
+
+#Size of the chunks clients are told to send
+DEFAULT_CHUNK_BYTES = 4 * 2**20
+#Bytes of a chunk collected before they are written to the file in one call
+WRITE_BYTES = 2**20
+
+
+class UploadNotFound(Exception):
+    """No upload with this ID (never created, completed, abandoned or expired)."""
+
+
+class UploadLimitReached(Exception):
+    """Too many uploads are in progress."""
+
+
+class InvalidChunk(Exception):
+    """The chunk doesn't fit the upload (bad index or length)."""
+
+
+class ChunkInProgress(Exception):
+    """The same chunk is being received by another request right now."""
+
+
+class UploadIncomplete(Exception):
+    """The upload can't be completed yet: chunks are missing or still arriving."""
+
+
+class UploadCorrupted(Exception):
+    """The uploaded content doesn't match the hash the client sent (the upload is dropped)."""
+
+
+class Upload:
+    """One upload in progress: a file of the final size, filled chunk by chunk."""
+
+    __slots__ = ("id", "size", "mime_type", "name", "chunk_size", "path", "fd",
+                 "received", "writing", "hasher", "hashed", "hash_lock", "touched_at", "users", "aborted")
+
+    def __init__(self, upload_id: str, size: int, mime_type: str, name: str | None, chunk_size: int, path: str, fd: int):
+        self.id = upload_id
+        self.size = size
+        self.mime_type = mime_type
+        self.name = name
+        self.chunk_size = chunk_size
+        self.path = path
+        self.fd = fd
+        self.received: set[int] = set()  # Indexes of the chunks fully written
+        self.writing: set[int] = set()   # Indexes of the chunks arriving right now
+        self.hasher = hashlib.sha256()
+        self.hashed = 0                  # Bytes from the start of the file fed to the hasher
+        self.hash_lock = asyncio.Lock()
+        self.touched_at = time.monotonic()
+        self.users = 0                   # Writes / hashing using fd right now (it is closed after the last)
+        self.aborted = False
+
+    @property
+    def chunks(self) -> int:
+        return math.ceil(self.size / self.chunk_size)  # 0 for an empty file: nothing to send
+
+    def chunk_length(self, index: int) -> int:
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def missing(self) -> list[int]:
+        return [index for index in range(self.chunks) if index not in self.received]
+
+
+class UploadManager:
+    """
+    📤 Chunked, resumable uploads written to disk, finished into a blob store.
+
+    Args:
+        blob_store: Where completed uploads go (its max_blob_bytes limits the upload size)
+        directory: Where partial uploads are written (default: a new temporary directory)
+        chunk_size: Bytes per chunk
+        max_uploads: Uploads in progress at once
+        ttl: Seconds an upload may go without a chunk before it is dropped
+    """
+
+    def __init__(
+        self,
+        blob_store: BlobStore,
+        directory: str | None = None,
+        chunk_size: int = DEFAULT_CHUNK_BYTES,
+        max_uploads: int = 64,
+        ttl: float = 3600.0,
+    ):
+        self.blob_store = blob_store
+        self.directory = directory or tempfile.mkdtemp(prefix = "a2a-uploads-")
+        os.makedirs(self.directory, exist_ok = True)
+        self.chunk_size = chunk_size
+        self.max_uploads = max_uploads
+        self.ttl = ttl
+        self._uploads: dict[str, Upload] = {}
+
+    def __len__(self) -> int:
+        return len(self._uploads)
+
+    def create(self, size: int, mime_type: str = "application/octet-stream", name: str | None = None) -> Upload:
+        """
+        Starts an upload of `size` bytes (the file is created sparse: no disk space is used yet).
+
+        Raises:
+            BlobTooLarge: size is over the blob store's max_blob_bytes
+            UploadLimitReached: max_uploads uploads are in progress
+        """
+        if size < 0:
+            raise ValueError("Upload size can't be negative")
+        if size > self.blob_store.max_blob_bytes:
+            raise BlobTooLarge(f"Upload of {size} bytes exceeds the limit of {self.blob_store.max_blob_bytes}")
+        self._expire()
+        if len(self._uploads) >= self.max_uploads:
+            raise UploadLimitReached(f"{len(self._uploads)} uploads in progress")
+        upload_id = uuid4().hex
+        path = os.path.join(self.directory, f"{upload_id}.part")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+        os.ftruncate(fd, size)
+        upload = self._uploads[upload_id] = Upload(upload_id, size, mime_type, name, self.chunk_size, path, fd)
+        metrics.UPLOADS_IN_PROGRESS.set(len(self._uploads))
+        return upload
+
+    def get(self, upload_id: str) -> Upload:
+        """Raises UploadNotFound if there is no such upload (anymore)."""
+        self._expire()
+        upload = self._uploads.get(upload_id)
+        if upload is None:
+            raise UploadNotFound(f"Upload {upload_id} not found")
+        return upload
+
+    async def write_chunk(self, upload: Upload, index: int, chunks: AsyncIterator[bytes]) -> None:
+        """
+        Writes chunk `index` of the upload as its bytes arrive.
+
+        Raises:
+            InvalidChunk: no such chunk, or the body is longer or shorter than the chunk
+            ChunkInProgress: the same chunk is being written by another request
+        """
+        if not 0 <= index < upload.chunks:
+            raise InvalidChunk(f"Chunk {index} out of range (0-{upload.chunks - 1})")
+        if index in upload.writing:
+            raise ChunkInProgress(f"Chunk {index} is already being uploaded")
+        length = upload.chunk_length(index)
+        start = index * upload.chunk_size
+        upload.writing.add(index)
+        upload.received.discard(index)  # Overwritten: not complete until this write is
+        upload.users += 1
+        try:
+            #Bytes the hasher already saw are about to change: start over (hashing stops at
+            #this chunk until it is received again)
+            async with upload.hash_lock:
+                if start < upload.hashed:
+                    upload.hasher = hashlib.sha256()
+                    upload.hashed = 0
+            written = 0
+            pending: list[bytes] = []
+            pending_bytes = 0
+            async for data in chunks:
+                if written + pending_bytes + len(data) > length:
+                    raise InvalidChunk(f"Chunk {index} is longer than {length} bytes")
+                pending.append(data)
+                pending_bytes += len(data)
+                if pending_bytes >= WRITE_BYTES:
+                    await asyncio.to_thread(_write_all, upload.fd, pending, start + written)
+                    written += pending_bytes
+                    pending, pending_bytes = [], 0
+                    upload.touched_at = time.monotonic()
+            if pending:
+                await asyncio.to_thread(_write_all, upload.fd, pending, start + written)
+                written += pending_bytes
+            if written != length:
+                raise InvalidChunk(f"Chunk {index} has {written} of {length} bytes")
+            if upload.aborted:
+                raise UploadNotFound(f"Upload {upload.id} was abandoned")
+        except BaseException:
+            metrics.UPLOAD_CHUNKS.labels("error").inc()
+            raise
+        finally:
+            upload.writing.discard(index)
+            self._release(upload)
+        upload.received.add(index)
+        upload.touched_at = time.monotonic()
+        metrics.UPLOAD_CHUNKS.labels("ok").inc()
+        await self._advance_hash(upload)
+
+    async def complete(self, upload: Upload, sha256: str | None = None) -> Blob:
+        """
+        Turns a fully received upload into a blob (and ends the upload).
+
+        Args:
+            sha256: Hash the client computed; the upload is dropped if the content doesn't match
+
+        Raises:
+            UploadIncomplete: chunks are missing or still arriving (the upload stays)
+            UploadCorrupted: the content doesn't match `sha256` (the upload is dropped)
+        """
+        if upload.writing or len(upload.received) < upload.chunks:
+            raise UploadIncomplete(f"Missing chunks: {upload.missing()}")
+        await self._advance_hash(upload)
+        #A chunk may have been resent (or the upload abandoned) while the hash caught up
+        if upload.aborted:
+            raise UploadNotFound(f"Upload {upload.id} was abandoned")
+        if upload.writing or upload.hashed < upload.size:
+            raise UploadIncomplete(f"Missing chunks: {upload.missing()}")
+        digest = upload.hasher.hexdigest()
+        if sha256 is not None and sha256.lower() != digest:
+            self.abort(upload)
+            raise UploadCorrupted(f"Content hash {digest} doesn't match {sha256}")
+        existing = self.blob_store.get(digest)
+        if existing is not None:
+            self.abort(upload)  # Someone uploaded the same content before
+            return existing
+        if upload.size:
+            #The blob is a view of the mapped file: the pages stay reachable after the unlink
+            data = memoryview(mmap.mmap(upload.fd, upload.size, access = mmap.ACCESS_READ))
+        else:
+            data = memoryview(b"")
+        self.abort(upload)
+        return await self.blob_store.put_async(data, upload.mime_type, digest = digest)
+
+    def abort(self, upload: Upload) -> None:
+        """Ends the upload and deletes its file (closed once no chunk write is using it)."""
+        if self._uploads.pop(upload.id, None) is None:
+            return
+        upload.aborted = True
+        try:
+            os.unlink(upload.path)
+        except OSError:
+            pass
+        if not upload.users:
+            os.close(upload.fd)
+        metrics.UPLOADS_IN_PROGRESS.set(len(self._uploads))
+
+    #Ends one use of the upload's file; the last one after an abort closes it
+    def _release(self, upload: Upload) -> None:
+        upload.users -= 1
+        if upload.aborted and not upload.users:
+            os.close(upload.fd)
+
+    #Feeds the hasher every chunk that now continues the hashed prefix (read back from the
+    #file, which is still in the page cache; on a thread, hashlib releases the GIL)
+    async def _advance_hash(self, upload: Upload) -> None:
+        async with upload.hash_lock:
+            if upload.aborted:
+                return
+            upload.users += 1
+            try:
+                while upload.hashed < upload.size:
+                    index = upload.hashed // upload.chunk_size
+                    if index not in upload.received:
+                        return
+                    length = upload.chunk_length(index)
+                    await asyncio.to_thread(_hash_range, upload.hasher, upload.fd, upload.hashed, length)
+                    upload.hashed += length
+            finally:
+                self._release(upload)
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.ttl
+        for upload in [upload for upload in self._uploads.values() if upload.touched_at < deadline and not upload.writing]:
+            self.abort(upload)
+
+
+#pwrite of several buffers at one offset (all of them, even if the OS writes less per call)
+def _write_all(fd: int, buffers: list[bytes], offset: int) -> None:
+    for buffer in buffers:
+        view = memoryview(buffer)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+
+
+def _hash_range(hasher, fd: int, offset: int, length: int) -> None:
+    while length:
+        data = os.pread(fd, min(length, WRITE_BYTES), offset)
+        if not data:
+            raise OSError(f"Upload file ended at {offset}")
+        hasher.update(data)
+        offset += len(data)
+        length -= len(data)
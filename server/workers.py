@@ -0,0 +1,335 @@
+#  Purpose:
+# Runs an A2A server as several worker processes so it can use more than one CPU core.
+#
+# Layout:
+#
+#   client ──► router (host:port) ──► worker 0 (127.0.0.1:<private port>)
+#                                 ├─► worker 1
+#                                 └─► ...
+#
+# - Every worker is a normal single-process uvicorn server built by an "app factory"
+# - The router forwards each request to one worker, chosen by hashing the request's
+#   sessionId, so all requests of a session land on the same worker (and its in-process
+#   ADK session). tasks/get follows the worker that handled the task. A JSON-RPC batch
+#   is split into one batch per worker and the answers are merged back in order.
+# - /metrics is answered by the router: it scrapes every worker and serves all of their
+#   metrics at once, each sample labelled worker="<index>" (sum over workers for totals;
+#   the task store size is the shared store's, so every worker reports the same number)
+# - Other paths (agent card, /blobs uploads and downloads, chunked /uploads) all go to
+#   worker 0, so every chunk of an upload reaches the same worker. Blobs themselves must
+#   live in a store every worker can see (DiskBlobStore on a shared directory): the
+#   worker running a task reads the images attached to it.
+# - Task state must live in a store every worker can see (e.g. SQLiteTaskStore on a
+#   shared file) so any worker can answer for any task after a restart or reroute.
+
+
+import asyncio
+import contextlib
+import importlib
+import json
+import logging
+import multiprocessing
+import signal
+import socket
+import sys
+import time
+import zlib                                   # crc32: a hash that is stable across processes / restarts
+from collections import OrderedDict
+from typing import Any
+
+import httpx
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from client.client import create_http_client  # Pooled, keep-alive connections to the workers
+from server import metrics
+from server.log import REQUEST_ID_HEADER, configure_logging
+from server.server import CLIENT_ID_HEADER, client_address
+
+logger = logging.getLogger(__name__)
+
+# Headers that only describe one hop and must not be forwarded
+_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "te", "upgrade", "host", "content-length"}
+
+
+#Imports "package.module:attribute"
+def import_string(path: str) -> Any:
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+# -----------------------------------------------------------------------------
+# SessionRouter: the front process
+# -----------------------------------------------------------------------------
+
+class SessionRouter:
+    """
+    A tiny reverse proxy that sends every request of one session to the same worker.
+
+    Routing key, in order:
+    1. params.sessionId (tasks/send, tasks/sendSubscribe)
+    2. the worker that handled params.id before (tasks/get after tasks/send)
+    3. params.id
+    Requests without a JSON-RPC body (e.g. the agent card) go to worker 0.
+    A JSON-RPC batch is split per worker by the same rules and its answers are put back
+    in order (a batch whose requests all go to one worker is passed through as it is).
+    GET /metrics is the metrics of all workers together (see metrics.merge).
+    Workers get the client's address as the only entry of X-Forwarded-For (taken from the
+    incoming X-Forwarded-For only if the router's caller is one of `trusted_proxies`).
+    """
+
+    def __init__(self, worker_urls: list[str], max_remembered_tasks: int = 100_000, trusted_proxies: frozenset[str] = frozenset()):
+        self.worker_urls = worker_urls
+        self.max_remembered_tasks = max_remembered_tasks
+        self.trusted_proxies = trusted_proxies
+        self._task_workers: OrderedDict[str, int] = OrderedDict()  # task ID -> worker index (bounded LRU)
+        # No overall timeout: streamed responses can stay open for a whole LLM turn
+        self._http = create_http_client(
+            max_connections = 1000, max_keepalive_connections = 200, timeout = None
+        )
+
+        self.app = Starlette(lifespan=self._lifespan)
+        self.app.add_route("/metrics", self._get_metrics, methods=["GET"])
+        self.app.add_route("/{path:path}", self._forward, methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD"])
+
+    #Closes the pooled worker connections when the router shuts down
+    @contextlib.asynccontextmanager
+    async def _lifespan(self, app):
+        yield
+        await self._http.aclose()
+
+    #Scrapes every worker at once; a worker that doesn't answer is listed as such, not fatal
+    async def _get_metrics(self, request: Request) -> Response:
+        async def scrape(url: str) -> str | None:
+            try:
+                response = await self._http.get(url + "metrics", timeout=5)
+                response.raise_for_status()
+                return response.text
+            except Exception as e:
+                logger.warning("Could not scrape %smetrics: %s", url, e)
+                return None
+
+        texts = await asyncio.gather(*(scrape(url) for url in self.worker_urls))
+        return Response(metrics.merge(list(texts)), media_type=metrics.CONTENT_TYPE)
+
+    #Worker of one JSON-RPC request (anything without params goes to worker 0)
+    def pick_worker(self, payload: Any) -> int:
+        params = payload.get("params") if isinstance(payload, dict) else None
+        if not isinstance(params, dict):
+            return 0
+
+        session_id, task_id = params.get("sessionId"), params.get("id")
+        if session_id:
+            index = zlib.crc32(str(session_id).encode()) % len(self.worker_urls)
+        elif task_id in self._task_workers:
+            index = self._task_workers[task_id]
+        elif task_id:
+            index = zlib.crc32(str(task_id).encode()) % len(self.worker_urls)
+        else:
+            return 0
+
+        if task_id:
+            self._remember(str(task_id), index)
+        return index
+
+    def _remember(self, task_id: str, index: int) -> None:
+        self._task_workers[task_id] = index
+        self._task_workers.move_to_end(task_id)
+        if len(self._task_workers) > self.max_remembered_tasks:
+            self._task_workers.popitem(last=False)
+
+    #Headers for the worker: the client's, minus hop-by-hop ones, plus the client's address
+    def _upstream_headers(self, request: Request) -> list[tuple[str, str]]:
+        #The workers trust what the router sends: pass on X-Client-ID only from a proxy the router trusts
+        peer_trusted = request.client is not None and request.client.host in self.trusted_proxies
+        dropped = {"x-forwarded-for"} if peer_trusted else {"x-forwarded-for", CLIENT_ID_HEADER.lower()}
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS and k.lower() not in dropped]
+        # The worker only sees the router's address: pass the client's on (per-client rate limits)
+        headers.append(("x-forwarded-for", client_address(request, self.trusted_proxies)))
+        return headers
+
+    def _upstream_url(self, index: int, request: Request) -> str:
+        url = self.worker_urls[index] + request.url.path.lstrip("/")
+        if request.url.query:
+            url += "?" + request.url.query
+        return url
+
+    async def _forward(self, request: Request) -> Response:
+        if request.url.path == "/":
+            body = await request.body()
+            try:
+                payload = json.loads(body) if body and request.method == "POST" else None
+            except ValueError:
+                payload = None
+            if isinstance(payload, list) and payload:
+                #Every request of a batch goes to its own session's worker
+                indexes = [self.pick_worker(item) for item in payload]
+                if len(set(indexes)) > 1:
+                    return await self._forward_split_batch(request, payload, indexes)
+                index = indexes[0]
+            else:
+                index = self.pick_worker(payload)
+        else:
+            #Everything else (agent card, blobs, uploads) is served by worker 0; an upload is streamed
+            #through as it arrives instead of being buffered (and parsed) here first
+            body = request.stream() if request.method in ("POST", "PUT", "PATCH") else b""
+            index = 0
+
+        headers = self._upstream_headers(request)
+        if not isinstance(body, bytes) and "content-length" in request.headers:
+            headers.append(("content-length", request.headers["content-length"]))
+        upstream = await self._http.send(
+            self._http.build_request(request.method, self._upstream_url(index, request), headers=headers, content=body),
+            stream=True,
+        )
+        # Stream the worker's bytes straight through (works for JSON and for SSE)
+        return StreamingResponse(
+            upstream.aiter_raw(),
+            status_code = upstream.status_code,
+            headers = {k: v for k, v in upstream.headers.items() if k.lower() not in _HOP_HEADERS},
+            background = BackgroundTask(upstream.aclose),
+        )
+
+    async def _forward_split_batch(self, request: Request, batch: list[Any], indexes: list[int]) -> Response:
+        """
+        Sends the requests of a batch that spans workers to their workers as one smaller batch
+        each (all at once), and answers with their responses put back in the batch's order.
+
+        A worker's answer that isn't one response per request (e.g. "Batch too large") is
+        returned as the answer to the whole batch.
+        """
+        positions: dict[int, list[int]] = {}  # worker index -> positions of its requests in the batch
+        for position, index in enumerate(indexes):
+            positions.setdefault(index, []).append(position)
+        headers = self._upstream_headers(request)
+
+        async def send(index: int, part: list[int]) -> httpx.Response:
+            content = json.dumps([batch[position] for position in part]).encode()
+            return await self._http.post(self._upstream_url(index, request), headers=headers, content=content)
+
+        upstreams = await asyncio.gather(*(send(index, part) for index, part in positions.items()))
+        results: list[Any] = [None] * len(batch)
+        for part, upstream in zip(positions.values(), upstreams):
+            try:
+                responses = upstream.json() if upstream.status_code == 200 else None
+            except ValueError:
+                responses = None
+            if not isinstance(responses, list) or len(responses) != len(part):
+                #.content is already decoded: its original encoding and length no longer apply
+                skipped = _HOP_HEADERS | {"content-encoding"}
+                return Response(
+                    upstream.content,
+                    status_code = upstream.status_code,
+                    headers = {k: v for k, v in upstream.headers.items() if k.lower() not in skipped},
+                )
+            for position, response in zip(part, responses):
+                results[position] = response
+
+        response = Response(json.dumps(results), media_type="application/json")
+        if REQUEST_ID_HEADER in upstreams[0].headers:
+            response.headers[REQUEST_ID_HEADER] = upstreams[0].headers[REQUEST_ID_HEADER]
+        return response
+
+
+# -----------------------------------------------------------------------------
+# Worker processes
+# -----------------------------------------------------------------------------
+
+#uvicorn shuts down gracefully on SIGTERM, then raises it again: with the default handler the
+#process dies right there, skipping finally blocks and atexit (so worker processes and their
+#process pools would be left running). Exiting through SystemExit runs them.
+def exit_on_sigterm() -> None:
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+
+#Entry point of one worker process
+def _worker_main(app_factory: str, factory_kwargs: dict[str, Any], port: int, log_level: str) -> None:
+    import uvicorn
+
+    configure_logging()  # Settings come from the A2A_LOG_* environment variables set by the parent
+    exit_on_sigterm()
+    app = import_string(app_factory)(**factory_kwargs)
+    # proxy_headers=False: the app decides whose X-Forwarded-For to believe (trusted_proxies)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level=log_level, log_config=None, access_log=False, proxy_headers=False)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+#Blocks until something accepts TCP connections on 127.0.0.1:port
+def _wait_for_port(port: int, process: multiprocessing.Process, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise RuntimeError(f"Worker on port {port} exited during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Worker on port {port} did not start within {timeout}s")
+
+
+def run_workers(
+    app_factory: str,
+    factory_kwargs: dict[str, Any],
+    host: str,
+    port: int,
+    workers: int,
+    log_level: str = "info",
+    trusted_proxies: tuple[str, ...] = (),
+) -> None:
+    """
+    Starts `workers` worker processes and a session-affinity router in this process.
+    Blocks until the router is stopped (Ctrl+C), then stops the workers.
+
+    Args:
+        app_factory: "module:function" returning the ASGI app; it is imported and called
+                     in every worker with **factory_kwargs (which must be picklable)
+        host, port: Public address of the router
+        workers: Number of worker processes
+        trusted_proxies: Proxies in front of the router whose X-Forwarded-For is believed
+                         (the workers trust the router: factory_kwargs should say so)
+    """
+    import uvicorn
+
+    # "spawn" gives each worker a clean interpreter (no inherited event loop, threads or sockets)
+    context = multiprocessing.get_context("spawn")
+    # Not daemonic: a worker may start processes of its own (e.g. ImagePreprocessor's pool),
+    # which daemonic processes can't; the finally block below stops and joins every worker
+    ports = [_free_port() for _ in range(workers)]
+    processes = [
+        context.Process(
+            target=_worker_main,
+            args=(app_factory, factory_kwargs, worker_port, log_level),
+            name=f"a2a-worker-{index}",
+            daemon=False,
+        )
+        for index, worker_port in enumerate(ports)
+    ]
+
+    exit_on_sigterm()
+    try:
+        for process in processes:
+            process.start()
+        for process, worker_port in zip(processes, ports):
+            _wait_for_port(worker_port, process)
+
+        logger.info("Started %d workers on ports %s, routing from %s:%d", workers, ports, host, port)
+        router = SessionRouter(
+            [f"http://127.0.0.1:{worker_port}/" for worker_port in ports], trusted_proxies = frozenset(trusted_proxies),
+        )
+        uvicorn.run(router.app, host=host, port=port, log_level=log_level, log_config=None, access_log=False, proxy_headers=False)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+                process.join()
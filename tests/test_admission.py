@@ -0,0 +1,83 @@
+#  Purpose:
+# Per-client rate limits (server/admission.py) and who counts as the client
+# (server.server.client_address): X-Forwarded-For only counts from trusted proxies.
+
+
+import asyncio
+
+import httpx
+import pytest
+
+from server.admission import AdmissionRejected, RateLimiter
+from server.server import CLIENT_ID_HEADER, A2AServer, client_address
+
+
+class FakeRequest:
+    def __init__(self, host: str, forwarded: str | None = None):
+        self.client = type("Client", (), {"host": host})()
+        self.headers = {"x-forwarded-for": forwarded} if forwarded else {}
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies():
+    assert client_address(FakeRequest("127.0.0.1", "6.6.6.6"), frozenset()) == "127.0.0.1"
+    assert client_address(FakeRequest("8.8.8.8", "6.6.6.6"), frozenset({"127.0.0.1"})) == "8.8.8.8"
+
+
+def test_forwarded_for_is_walked_past_trusted_proxies_only():
+    trusted = frozenset({"127.0.0.1", "10.0.0.1"})
+    #Whatever the client put on the left is skipped: the first untrusted hop from the right wins
+    assert client_address(FakeRequest("127.0.0.1", "1.1.1.1, 6.6.6.6, 10.0.0.1"), trusted) == "6.6.6.6"
+    assert client_address(FakeRequest("127.0.0.1", "10.0.0.1"), trusted) == "10.0.0.1"
+
+
+def test_rate_limiter_allows_a_burst_then_rejects():
+    limiter = RateLimiter(rate=1, burst=2)
+    limiter.check("a")
+    limiter.check("a")
+    limiter.check("b")  # Every client has its own bucket
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.check("a")
+    assert rejected.value.reason == "rate_limited" and rejected.value.retry_after > 0
+
+
+def test_spoofed_forwarded_for_does_not_escape_the_rate_limit():
+    server = A2AServer(rate_limiter=RateLimiter(rate=0.01, burst=1))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app, client=("203.0.113.7", 4000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://agent") as http:
+            statuses = []
+            for index in range(2):
+                request = {
+                    "jsonrpc": "2.0", "id": index, "method": "tasks/send",
+                    "params": {"id": f"t{index}", "message": {"role": "user", "parts": [{"type": "text", "text": "hi"}]}},
+                }
+                response = await http.post("/", json=request, headers={"x-forwarded-for": f"198.51.100.{index}"})
+                statuses.append(response.status_code)
+            return statuses
+
+    #A new X-Forwarded-For per request is still the same client (no task manager: only the limiter matters)
+    first, second = asyncio.run(scenario())
+    assert first != 429 and second == 429
+
+
+def test_client_id_header_counts_only_from_trusted_proxies():
+    async def statuses(server: A2AServer, peer: str) -> list[int]:
+        transport = httpx.ASGITransport(app=server.app, client=(peer, 4000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://agent") as http:
+            result = []
+            for index in range(3):
+                request = {
+                    "jsonrpc": "2.0", "id": index, "method": "tasks/send",
+                    "params": {"id": f"t{index}", "message": {"role": "user", "parts": [{"type": "text", "text": "hi"}]}},
+                }
+                response = await http.post("/", json=request, headers={CLIENT_ID_HEADER: f"client-{index}"})
+                result.append(response.status_code)
+            return result
+
+    #A new X-Client-ID per request from an ordinary caller is still one client
+    direct = asyncio.run(statuses(A2AServer(rate_limiter=RateLimiter(rate=0.01, burst=1)), "203.0.113.7"))
+    assert direct[1:] == [429, 429]
+    #A trusted gateway names its callers: each ID has its own limit
+    gateway = A2AServer(rate_limiter=RateLimiter(rate=0.01, burst=1), trusted_proxies=["10.0.0.1"])
+    assert 429 not in asyncio.run(statuses(gateway, "10.0.0.1"))
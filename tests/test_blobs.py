@@ -0,0 +1,103 @@
+#  Purpose:
+# Blob stores (server/blob_store.py) and the /blobs routes: content goes in and comes
+# back unchanged, the same content is stored once, and oversized content is refused.
+
+
+import asyncio
+import hashlib
+import os
+
+import httpx
+import pytest
+
+from client.client import A2AClient, A2AClientHTTPError
+from server.blob_store import BlobTooLarge, DiskBlobStore, InMemoryBlobStore
+from server.server import A2AServer
+
+DATA = os.urandom(5000)
+
+
+async def body(data: bytes, pieces: int = 3):
+    step = max(1, len(data) // pieces)
+    for start in range(0, len(data), step):
+        yield data[start:start + step]
+
+
+@pytest.fixture(params=["memory", "disk"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryBlobStore(max_bytes=2**20, max_blob_bytes=2**13)
+    return DiskBlobStore(str(tmp_path), max_bytes=2**20, max_blob_bytes=2**13)
+
+
+def test_put_and_get_round_trip(store):
+    blob = store.put(DATA, "image/png")
+    assert blob.id == hashlib.sha256(DATA).hexdigest()
+    stored = store.get(blob.id)
+    assert bytes(stored.data) == DATA and stored.mime_type == "image/png" and stored.size == len(DATA)
+    assert store.get("0" * 64) is None
+
+
+def test_same_content_is_stored_once(store, tmp_path):
+    async def scenario():
+        first = store.put(DATA, "image/png")
+        second = await store.put_stream(body(DATA), "image/png", size=len(DATA))
+        third = await store.put_stream(body(DATA, pieces=7), "image/png")  # Length not announced
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first.id == second.id == third.id
+    if isinstance(store, InMemoryBlobStore):
+        assert len(store) == 1 and store.total_bytes == len(DATA)
+    else:
+        #One blob file (plus its .type) and no temporary files left behind
+        files = [name for _, _, names in os.walk(tmp_path) for name in names]
+        assert sorted(files) == [first.id, first.id + ".type"]
+
+
+def test_content_over_the_limit_is_refused(store):
+    too_big = os.urandom(store.max_blob_bytes + 1)
+
+    async def scenario():
+        with pytest.raises(BlobTooLarge):
+            await store.put_stream(body(too_big), size=len(too_big))
+        with pytest.raises(BlobTooLarge):
+            await store.put_stream(body(too_big))  # Found out while the chunks arrive
+
+    with pytest.raises(BlobTooLarge):
+        store.put(too_big)
+    asyncio.run(scenario())
+    assert store.get(hashlib.sha256(too_big).hexdigest()) is None
+
+
+def test_least_recently_used_blob_is_evicted():
+    store = InMemoryBlobStore(max_bytes=2 * len(DATA), max_blob_bytes=2**13)
+    first = store.put(DATA)
+    second = store.put(DATA[::-1])
+    store.get(first.id)  # Used again: now the second one is the oldest
+    store.put(os.urandom(len(DATA)))
+    assert store.get(first.id) is not None and store.get(second.id) is None
+
+
+# -----------------------------------------------------------------------------
+# Through the HTTP routes with A2AClient
+# -----------------------------------------------------------------------------
+
+def test_client_upload_and_download(tmp_path):
+    server = A2AServer(blob_store=DiskBlobStore(str(tmp_path), max_blob_bytes=2**13))
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app)) as http:
+            client = A2AClient(url="http://agent/", http_client=http)
+            part = await client.upload_file(DATA, "image/png", name="photo.png")
+            again = await client.upload_file(bytearray(DATA), "image/png")
+            downloaded = await client.download_file(part)
+            with pytest.raises(A2AClientHTTPError) as refused:
+                await client.upload_file(os.urandom(2**13 + 1))
+            return part, again, downloaded, refused.value.args[0]
+
+    part, again, downloaded, refused = asyncio.run(scenario())
+    assert downloaded == DATA
+    assert part.file.uri == again.file.uri and part.file.uri.endswith(hashlib.sha256(DATA).hexdigest())
+    assert part.file.mimeType == "image/png" and part.file.name == "photo.png"
+    assert refused == 413
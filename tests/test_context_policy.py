@@ -0,0 +1,61 @@
+#  Purpose:
+# The context window (agents/google_adk/context_policy.py): the prompt keeps only the
+# newest turns that fit, never drops the current one, and can carry a summary of the rest.
+
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from agents.google_adk.context_policy import SUMMARY_KEY, ContextPolicy, split_turns
+
+
+class FakeCallbackContext:
+    def __init__(self):
+        self.state: dict = {}
+
+
+def text(role: str, value: str) -> types.Content:
+    return types.Content(role=role, parts=[types.Part(text=value)])
+
+
+#`turns` questions and answers, then the current question
+def conversation(turns: int, words: int = 1) -> list[types.Content]:
+    contents = []
+    for turn in range(turns):
+        contents += [text("user", f"q{turn} " + "word " * words), text("model", f"a{turn}")]
+    return contents + [text("user", "now?")]
+
+
+def sent(policy: ContextPolicy, contents: list[types.Content], context=None) -> list[str]:
+    request = LlmRequest(contents=contents)
+    assert policy.before_model(context or FakeCallbackContext(), request) is None  # The model is still called
+    return [content.parts[0].text.split()[0] for content in request.contents]
+
+
+def test_split_turns_keeps_tool_calls_with_their_turn():
+    call = types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name="now"))])
+    response = types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(name="now", response={}))])
+    turns = split_turns([text("user", "q0"), call, response, text("model", "a0"), text("user", "q1")])
+    assert [len(turn) for turn in turns] == [4, 1]
+
+
+def test_window_keeps_the_newest_turns():
+    assert sent(ContextPolicy(max_turns=2), conversation(3)) == ["q2", "a2", "now?"]
+    assert sent(ContextPolicy(max_turns=10), conversation(3)) == ["q0", "a0", "q1", "a1", "q2", "a2", "now?"]
+
+
+def test_budget_drops_oldest_turns_but_never_the_current_one():
+    #Each old turn is about 100 / 4 tokens of question plus the answer
+    assert sent(ContextPolicy(max_tokens=60), conversation(3, words=20)) == ["q1", "a1", "q2", "a2", "now?"]
+    huge = conversation(1) + [text("user", "now " + "word " * 1000)]
+    assert sent(ContextPolicy(max_tokens=10), huge) == ["now"]
+
+
+def test_summary_of_dropped_turns_is_sent_first_and_kept_in_state():
+    context = FakeCallbackContext()
+    policy = ContextPolicy(max_turns=1, summarize=True)
+    first = sent(policy, conversation(2), context)
+    second = sent(policy, conversation(3), context)  # The next call: one more turn has left the window
+
+    assert first == ["Summary", "now?"] and second == ["Summary", "now?"]
+    assert context.state[SUMMARY_KEY].splitlines() == ["user: q0 word -> a0", "user: q1 word -> a1", "user: q2 word -> a2"]
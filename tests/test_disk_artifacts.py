@@ -0,0 +1,122 @@
+#  Purpose:
+# DiskArtifactService (agents/google_adk/disk_artifacts.py): content stored once per
+# digest, least recently used content collected beyond max_bytes, orphans deleted, and
+# an indexed object always has its file.
+
+
+import asyncio
+import threading
+
+from google.genai import types
+
+from agents.google_adk.disk_artifacts import DiskArtifactService
+
+APP, USER = "app", "user"
+
+
+def image(data: bytes) -> types.Part:
+    return types.Part(inline_data=types.Blob(mime_type="image/png", data=data))
+
+
+async def save(service: DiskArtifactService, session_id: str, data: bytes, filename: str = "a.png") -> int:
+    return await service.save_artifact(app_name=APP, user_id=USER, session_id=session_id, filename=filename, artifact=image(data))
+
+
+async def load(service: DiskArtifactService, session_id: str, filename: str = "a.png") -> bytes | None:
+    part = await service.load_artifact(app_name=APP, user_id=USER, session_id=session_id, filename=filename)
+    return part.inline_data.data if part is not None else None
+
+
+def object_files(service: DiskArtifactService) -> list[str]:
+    return sorted(path.name for path in (service.root / "objects").rglob("*") if path.is_file())
+
+
+def test_same_content_is_one_object(tmp_path):
+    service = DiskArtifactService(tmp_path)
+    data = b"png" * 100
+
+    async def scenario():
+        versions = [await save(service, "s1", data), await save(service, "s1", data), await save(service, "s2", data)]
+        view = await service.open_artifact(app_name=APP, user_id=USER, session_id="s2", filename="a.png")
+        return versions, await load(service, "s1"), bytes(view)
+
+    try:
+        versions, loaded, opened = asyncio.run(scenario())
+    finally:
+        service.close()
+    assert versions == [0, 1, 0]  # Versions count per session, the content is shared
+    assert loaded == opened == data
+    assert len(object_files(service)) == 1
+
+
+def test_least_recently_used_content_is_collected(tmp_path):
+    service = DiskArtifactService(tmp_path, max_bytes=250)
+    old, recent, new = b"a" * 100, b"b" * 100, b"c" * 100
+
+    async def scenario():
+        await save(service, "s1", old)
+        await save(service, "s2", recent)
+        await load(service, "s1")  # Used again: now s2's content is the oldest
+        await save(service, "s3", new)  # 300 bytes > 250: one object must go
+        versions = await service.list_versions(app_name=APP, user_id=USER, session_id="s2", filename="a.png")
+        return await load(service, "s1"), await load(service, "s2"), await load(service, "s3"), versions
+
+    try:
+        first, second, third, versions = asyncio.run(scenario())
+    finally:
+        service.close()
+    assert (first, second, third) == (old, None, new)
+    assert versions == []  # The versions that referenced it went with it
+    assert len(object_files(service)) == 2
+
+
+def test_delete_removes_only_unreferenced_objects(tmp_path):
+    service = DiskArtifactService(tmp_path)
+    shared, own = b"shared" * 50, b"own" * 50
+
+    async def scenario():
+        await save(service, "s1", shared)
+        await save(service, "s1", own)  # Second version of s1's a.png
+        await save(service, "s2", shared)
+        await service.delete_artifact(app_name=APP, user_id=USER, session_id="s1", filename="a.png")
+        after_first = len(object_files(service))
+        await service.delete_artifact(app_name=APP, user_id=USER, session_id="s2", filename="a.png")
+        return after_first, await load(service, "s1")
+
+    try:
+        after_first, deleted = asyncio.run(scenario())
+    finally:
+        service.close()
+    assert after_first == 1  # s1's own content is gone, the shared one is still s2's
+    assert deleted is None and object_files(service) == []
+
+
+def test_save_that_dedups_against_a_deleted_object_keeps_its_content(tmp_path):
+    service = DiskArtifactService(tmp_path)
+    data = b"png" * 100
+
+    async def scenario():
+        await save(service, "s1", data)
+        #s2 saves the same content: it finds s1's file, then s1's artifact is deleted before s2's index write
+        found, resume = threading.Event(), threading.Event()
+        write_object = service._write_object
+
+        def paused(content: bytes):
+            result = write_object(content)
+            found.set()
+            resume.wait()
+            return result
+
+        service._write_object = paused
+        saving = asyncio.create_task(save(service, "s2", data))
+        await asyncio.to_thread(found.wait)
+        service._write_object = write_object
+        await service.delete_artifact(app_name=APP, user_id=USER, session_id="s1", filename="a.png")
+        resume.set()
+        await saving
+        return await load(service, "s2"), await load(service, "s1")
+
+    try:
+        assert asyncio.run(scenario()) == (data, None)
+    finally:
+        service.close()
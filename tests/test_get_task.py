@@ -0,0 +1,69 @@
+#  Purpose:
+# tasks/get (InMemoryTaskManager.on_get_task, A2AClient.get_task): historyLength returns
+# only the newest messages, from either store, and a snapshot never changes afterwards.
+
+
+import asyncio
+
+import httpx
+import pytest
+
+from client.client import A2AClient, A2AClientJSONRPCError
+from models.task import Message, TaskSendParams, TaskState, TaskStatus, TextPart
+from server.server import A2AServer
+from server.sqlite_task_store import SQLiteTaskStore
+from server.task_manager import InMemoryTaskManager
+from server.task_store import InMemoryTaskStore
+
+
+def message(role: str, text: str) -> Message:
+    return Message(role=role, parts=[TextPart(text=text)])
+
+
+#One task with a conversation of `turns` questions and answers: q0, a0, q1, a1, ...
+async def converse(manager: InMemoryTaskManager, turns: int) -> None:
+    for turn in range(turns):
+        await manager.upsert_task(TaskSendParams(id="t", sessionId="s", message=message("user", f"q{turn}")))
+        await manager.update_task("t", TaskStatus(state=TaskState.COMPLETED), message("agent", f"a{turn}"))
+
+
+def texts(task) -> list[str]:
+    return [m.parts[0].text for m in task.history]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def manager(request, tmp_path):
+    store = InMemoryTaskStore() if request.param == "memory" else SQLiteTaskStore(str(tmp_path / "tasks.db"))
+    yield InMemoryTaskManager(store=store)
+    store.close()
+
+
+def test_history_length_returns_the_newest_messages(manager):
+    server = A2AServer(task_manager=manager)
+
+    async def scenario():
+        await converse(manager, 3)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app)) as http:
+            client = A2AClient(url="http://agent/", http_client=http)
+            windows = {n: await client.get_task({"id": "t", "historyLength": n}) for n in (None, 0, 1, 3, 100)}
+            with pytest.raises(A2AClientJSONRPCError):
+                await client.get_task({"id": "missing"})
+            return windows
+
+    windows = asyncio.run(scenario())
+    assert texts(windows[None]) == texts(windows[100]) == ["q0", "a0", "q1", "a1", "q2", "a2"]
+    assert texts(windows[0]) == []
+    assert texts(windows[1]) == ["a2"]
+    assert texts(windows[3]) == ["a1", "q2", "a2"]
+    assert windows[0].status.state == TaskState.COMPLETED
+
+
+def test_snapshot_is_not_changed_by_later_turns(manager):
+    async def scenario():
+        await converse(manager, 1)
+        before = await manager.store.get_task("t", 2)
+        await converse(manager, 1)
+        return before
+
+    before = asyncio.run(scenario())
+    assert texts(before) == ["q0", "a0"]
@@ -0,0 +1,78 @@
+#  Purpose:
+# Resubmitted tasks (InMemoryTaskManager.run_idempotent): a retry while the task runs
+# joins that run; a retry after it completed is replayed only within idempotency_window.
+
+
+import asyncio
+
+from models.task import Message, TaskSendParams, TaskState, TaskStatus, TextPart
+from server.task_manager import InMemoryTaskManager
+
+
+def params(text: str = "What time is it?") -> TaskSendParams:
+    return TaskSendParams(id="task-1", sessionId="s", message=Message(role="user", parts=[TextPart(text=text)]))
+
+
+class FakeAgent:
+    """🤖 Counts its calls; every call answers "answer <n>" after `delay` seconds."""
+
+    def __init__(self, manager: InMemoryTaskManager, delay: float = 0.0):
+        self.manager = manager
+        self.delay = delay
+        self.calls = 0
+
+    async def send(self, request: TaskSendParams):
+        async def process():
+            await self.manager.upsert_task(request)
+            self.calls += 1
+            answer = f"answer {self.calls}"
+            await asyncio.sleep(self.delay)
+            reply = Message(role="agent", parts=[TextPart(text=answer)])
+            return await self.manager.update_task(request.id, TaskStatus(state=TaskState.COMPLETED), reply)
+
+        task = await self.manager.run_idempotent(request, process)
+        return task.history[-1].parts[0].text
+
+
+def test_window_off_by_default_asks_again():
+    async def scenario():
+        agent = FakeAgent(InMemoryTaskManager())
+        return [await agent.send(params()), await agent.send(params())], agent.calls
+
+    replies, calls = asyncio.run(scenario())
+    assert replies == ["answer 1", "answer 2"]
+    assert calls == 2
+
+
+def test_completed_task_is_replayed_within_window():
+    async def scenario():
+        agent = FakeAgent(InMemoryTaskManager(idempotency_window=60))
+        first = await agent.send(params())
+        retry = await agent.send(params())
+        other = await agent.send(params("And now?"))  # Same task, new message: a new turn
+        return [first, retry, other], agent.calls
+
+    replies, calls = asyncio.run(scenario())
+    assert replies == ["answer 1", "answer 1", "answer 2"]
+    assert calls == 2
+
+
+def test_replay_ends_with_the_window():
+    async def scenario():
+        agent = FakeAgent(InMemoryTaskManager(idempotency_window=0.05))
+        first = await agent.send(params())
+        await asyncio.sleep(0.1)
+        return [first, await agent.send(params())]
+
+    assert asyncio.run(scenario()) == ["answer 1", "answer 2"]
+
+
+def test_concurrent_retry_joins_the_running_call():
+    async def scenario():
+        agent = FakeAgent(InMemoryTaskManager(), delay=0.05)
+        replies = await asyncio.gather(agent.send(params()), agent.send(params()), agent.send(params()))
+        return replies, agent.calls
+
+    replies, calls = asyncio.run(scenario())
+    assert replies == ["answer 1"] * 3
+    assert calls == 1
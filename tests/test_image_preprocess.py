@@ -0,0 +1,80 @@
+#  Purpose:
+# Image preprocessing in worker processes (server/image_preprocess.py): images are
+# scaled down to fit, re-encoded without their metadata, and bad input is refused.
+
+
+import asyncio
+import io
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+from server.image_preprocess import ImagePreprocessor, parse_size  # noqa: E402
+
+
+def encode(image: Image.Image, format: str, **options) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def preprocessor():
+    #One pool for the module: starting spawned workers is the slow part
+    preprocessor = ImagePreprocessor(workers=1, max_size=(100, 100), format="JPEG")
+    yield preprocessor
+    preprocessor.close()
+
+
+def test_parse_size():
+    assert parse_size("1024x768") == (1024, 768)
+    assert parse_size("512") == (512, 512)
+    with pytest.raises(ValueError):
+        parse_size("0x10")
+
+
+def test_large_image_is_scaled_down_and_stripped(preprocessor):
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"  # Make
+    photo = encode(Image.new("RGBA", (400, 200), (255, 0, 0, 128)), "PNG", exif=exif.tobytes())
+
+    prepared = asyncio.run(preprocessor.prepare(photo))
+    assert (prepared.width, prepared.height) == (100, 50)  # Aspect ratio kept
+    assert prepared.mime_type == "image/jpeg"
+    result = Image.open(io.BytesIO(prepared.data))
+    assert result.format == "JPEG" and result.size == (100, 50) and result.mode == "RGB"
+    assert not result.getexif()
+
+
+def test_small_image_is_not_upscaled(preprocessor):
+    prepared = asyncio.run(preprocessor.prepare(encode(Image.new("RGB", (40, 30)), "JPEG")))
+    assert (prepared.width, prepared.height) == (40, 30)
+
+
+def test_max_size_per_call(preprocessor):
+    prepared = asyncio.run(preprocessor.prepare(encode(Image.new("RGB", (400, 200)), "PNG"), max_size=(40, 40)))
+    assert (prepared.width, prepared.height) == (40, 20)
+
+
+def test_not_an_image_is_a_value_error(preprocessor):
+    with pytest.raises(ValueError):
+        asyncio.run(preprocessor.prepare(b"definitely not an image"))
+    #The pool still works afterwards
+    assert asyncio.run(preprocessor.prepare(encode(Image.new("RGB", (10, 10)), "PNG"))).width == 10
+
+
+def test_raw_rgb_output():
+    preprocessor = ImagePreprocessor(workers=1, max_size=(8, 8), format="RGB")
+    try:
+        prepared = asyncio.run(preprocessor.prepare(encode(Image.new("RGB", (16, 16), (1, 2, 3)), "PNG")))
+    finally:
+        preprocessor.close()
+    assert (prepared.width, prepared.height) == (8, 8) and prepared.mime_type == "application/x-raw-rgb"
+    assert prepared.data == bytes((1, 2, 3)) * 64
+
+
+def test_unknown_format_is_refused():
+    with pytest.raises(ValueError):
+        ImagePreprocessor(format="GIF")
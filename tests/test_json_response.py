@@ -0,0 +1,33 @@
+#  Purpose:
+# One-pass JSON responses (server.server.json_response): the same JSON the model dumps
+# to, ISO 8601 datetimes, and `"id": null` kept on errors as JSON-RPC requires.
+
+
+import json
+from datetime import datetime
+
+from models.json_rpc import InternalError, JSONRPCResponse
+from models.request import GetTaskResponse
+from models.task import Message, Task, TaskState, TaskStatus, TextPart
+from server.server import json_response
+
+
+def test_body_matches_the_models_json():
+    status = TaskStatus(state=TaskState.COMPLETED, message=Message(role="agent", parts=[TextPart(text="12:00 ✓")]))
+    task = Task(id="t", status=status, history=[Message(role="user", parts=[TextPart(text="Time?")])])
+    response = json_response(GetTaskResponse(id=1, result=task))
+
+    assert response.media_type == "application/json"
+    body = json.loads(response.body)
+    assert body == GetTaskResponse(id=1, result=task).model_dump(mode="json", exclude_none=True)
+    assert "error" not in body  # None fields are left out by default
+    assert datetime.fromisoformat(body["result"]["status"]["timestamp"]) == status.timestamp
+
+
+def test_error_keeps_null_fields_when_asked():
+    response = json_response(JSONRPCResponse(id=None, error=InternalError(message="boom")), status_code=400, exclude_none=False)
+
+    body = json.loads(response.body)
+    assert response.status_code == 400
+    assert body["id"] is None and body["result"] is None
+    assert body["error"]["message"] == "boom"
@@ -0,0 +1,137 @@
+#  Purpose:
+# JSON-RPC batches (A2AServer._handle_batch, A2AClient.send_tasks, SessionRouter): one HTTP
+# request, one response per item in the same order, every item failing only on its own.
+
+
+import asyncio
+import zlib
+
+import httpx
+
+from client.client import A2AClient, A2AClientJSONRPCError
+from models.json_rpc import InternalError
+from models.request import SendTaskRequest, SendTaskResponse
+from models.task import Message, TaskState, TaskStatus, TextPart
+from server.server import A2AServer
+from server.task_manager import InMemoryTaskManager
+from server.workers import SessionRouter
+
+
+class EchoTaskManager(InMemoryTaskManager):
+    """🔁 Completes every task with its own question; "boom" raises instead."""
+
+    async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        text = request.params.message.text()
+        if text == "boom":
+            raise RuntimeError("agent exploded")
+        await self.upsert_task(request.params)
+        reply = Message(role="agent", parts=[TextPart(text=text)])
+        task = await self.update_task(request.params.id, TaskStatus(state=TaskState.COMPLETED), reply)
+        return SendTaskResponse(id=request.id, result=task)
+
+
+def send(request_id, task_id: str, text: str, method: str = "tasks/send") -> dict:
+    message = {"role": "user", "parts": [{"type": "text", "text": text}]}
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": {"id": task_id, "message": message}}
+
+
+async def post(server: A2AServer, body) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://agent") as http:
+        return await http.post("/", json=body)
+
+
+def test_batch_answers_every_item_in_order():
+    server = A2AServer(task_manager=EchoTaskManager())
+    body = [
+        send(1, "t1", "first"),
+        {"jsonrpc": "2.0", "id": 2, "method": "tasks/unknown", "params": {}},
+        send(3, "t3", "boom"),
+        send("four", "t4", "streamed", method="tasks/sendSubscribe"),
+        send(5, "t5", "last"),
+    ]
+    response = asyncio.run(post(server, body))
+
+    assert response.status_code == 200
+    items = response.json()
+    assert [item["id"] for item in items] == [1, 2, 3, "four", 5]
+    assert items[0]["result"]["history"][-1]["parts"][0]["text"] == "first"
+    assert items[1]["error"]["code"] == -32600  # Not a valid A2A request
+    assert items[2]["error"]["code"] == InternalError().code  # Only this item failed
+    assert "can't be batched" in items[3]["error"]["message"]
+    assert items[4]["result"]["status"]["state"] == "completed"
+
+
+def test_empty_or_oversized_batch_is_rejected():
+    server = A2AServer(task_manager=EchoTaskManager(), max_batch_size=2)
+    empty = asyncio.run(post(server, []))
+    large = asyncio.run(post(server, [send(i, f"t{i}", "hi") for i in range(3)]))
+
+    assert empty.status_code == 400 and empty.json()["error"]["message"] == "Empty batch"
+    assert large.status_code == 400 and "too large" in large.json()["error"]["message"]
+
+
+def test_client_send_tasks_splits_into_batches():
+    server = A2AServer(task_manager=EchoTaskManager())
+    requests = []
+
+    async def record(request: httpx.Request) -> None:
+        requests.append(request)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, event_hooks={"request": [record]}) as http:
+            client = A2AClient(url="http://agent/", http_client=http)
+            payloads = [{"id": f"t{i}", "message": {"role": "user", "parts": [{"type": "text", "text": f"q{i}"}]}} for i in range(5)]
+            tasks = await client.send_tasks(payloads, batch_size=2)
+            assert len(requests) == 3  # 2 + 2 + 1
+            failed = await client.send_tasks(
+                [payloads[0], {**payloads[1], "message": {"role": "user", "parts": [{"type": "text", "text": "boom"}]}}],
+                return_exceptions=True,
+            )
+            return tasks, failed
+
+    tasks, failed = asyncio.run(scenario())
+    assert [task.history[-1].parts[0].text for task in tasks] == [f"q{i}" for i in range(5)]
+    assert failed[0].status.state == TaskState.COMPLETED
+    assert isinstance(failed[1], A2AClientJSONRPCError)
+
+
+class WorkerTransport(httpx.AsyncBaseTransport):
+    """🧭 Sends http://w<index>/ to worker <index>, in process; counts the requests each one gets."""
+
+    def __init__(self, workers: list[A2AServer]):
+        self._inner = [httpx.ASGITransport(app=worker.app) for worker in workers]
+        self.requests = [0] * len(workers)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        index = int(request.url.host[1:])
+        self.requests[index] += 1
+        return await self._inner[index].handle_async_request(request)
+
+
+def test_router_splits_a_batch_across_workers():
+    workers = [A2AServer(task_manager=EchoTaskManager()) for _ in range(2)]
+    router = SessionRouter(["http://w0/", "http://w1/"])
+    transport = WorkerTransport(workers)
+    router._http = httpx.AsyncClient(transport=transport)
+    #Sessions s0, s1, ... that hash to worker 0 and to worker 1
+    sessions = {zlib.crc32(f"s{i}".encode()) % 2: f"s{i}" for i in range(10)}
+    body = [send(i, f"t{i}", f"q{i}") for i in range(4)]
+    for i, item in enumerate(body):
+        item["params"]["sessionId"] = sessions[i % 2]
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=router.app), base_url="http://router") as http:
+            batch = (await http.post("/", json=body)).json()
+            polled = [
+                (await http.post("/", json={"jsonrpc": "2.0", "id": i, "method": "tasks/get", "params": {"id": f"t{i}"}})).json()
+                for i in range(4)
+            ]
+            return batch, polled
+
+    batch, polled = asyncio.run(scenario())
+    assert transport.requests == [3, 3]  # One sub-batch each, then two polls each
+    assert [item["id"] for item in batch] == [0, 1, 2, 3]
+    assert [item["result"]["history"][-1]["parts"][0]["text"] for item in batch] == ["q0", "q1", "q2", "q3"]
+    #Every task is found again where it ran
+    assert all(item["result"]["status"]["state"] == "completed" for item in polled)
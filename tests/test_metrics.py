@@ -0,0 +1,63 @@
+#  Purpose:
+# Metrics (server/metrics.py, GET /metrics): the Prometheus text format, the merged
+# output of several workers, and what a request records.
+
+
+import asyncio
+
+import httpx
+
+from server import metrics
+from server.server import A2AServer
+from server.task_manager import InMemoryTaskManager
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test latency", ["stage"], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.labels("parse").observe(value)
+
+    assert histogram.render().splitlines() == [
+        "# HELP test_seconds Test latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="parse",le="0.1"} 1',
+        'test_seconds_bucket{stage="parse",le="1"} 3',
+        'test_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'test_seconds_sum{stage="parse"} 6.05',
+        'test_seconds_count{stage="parse"} 4',
+    ]
+
+
+def test_merge_labels_every_worker_and_keeps_families_together():
+    first = "# HELP a Things\n# TYPE a counter\na_total 1\n# HELP b Size\n# TYPE b gauge\nb{kind=\"x\"} 2\n"
+    second = "# HELP a Things\n# TYPE a counter\na_total 3\n"
+
+    assert metrics.merge([first, None, second]).splitlines() == [
+        "# worker 1 did not answer",
+        "# HELP a Things",
+        "# TYPE a counter",
+        'a_total{worker="0"} 1',
+        'a_total{worker="2"} 3',
+        "# HELP b Size",
+        "# TYPE b gauge",
+        'b{worker="0",kind="x"} 2',
+    ]
+
+
+def test_metrics_endpoint_counts_requests_and_store_size():
+    server = A2AServer(task_manager=InMemoryTaskManager())
+    request = {"jsonrpc": "2.0", "id": 1, "method": "tasks/get", "params": {"id": "missing"}}
+    outcome = metrics.REQUESTS.labels("tasks/get", "error")
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://agent") as http:
+            before = outcome.value
+            await http.post("/", json=request)
+            counted = outcome.value - before
+            return counted, await http.get("/metrics")
+
+    counted, response = asyncio.run(scenario())
+    assert counted == 1  # An unknown task is answered with an error, not an exception
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert 'a2a_requests_total{method="tasks/get",outcome="error"}' in response.text
+    assert 'a2a_task_store_size{kind="tasks"} 0' in response.text
@@ -0,0 +1,98 @@
+#  Purpose:
+# Micro-batching (server/micro_batch.py, TellTimeAgent.invoke_batch): concurrent questions
+# share a model call, and each batched turn still ends up in its session.
+
+
+import asyncio
+
+import pytest
+
+from agents.google_adk.agent import TellTimeAgent
+from server.micro_batch import MicroBatcher
+
+
+# -----------------------------------------------------------------------------
+# MicroBatcher
+# -----------------------------------------------------------------------------
+
+def test_calls_in_one_window_share_a_batch():
+    batches = []
+
+    async def upper(items):
+        batches.append(list(items))
+        return [item.upper() for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(upper, window=0.02, max_batch=3)
+        return await asyncio.gather(*(batcher.submit(item, key=item[0]) for item in ("a1", "b1", "a2", "a3", "a4")))
+
+    assert asyncio.run(scenario()) == ["A1", "B1", "A2", "A3", "A4"]
+    #Full batches go at once, the rest when their window ends; keys are never mixed
+    assert sorted(batches) == [["a1", "a2", "a3"], ["a4"], ["b1"]]
+
+
+def test_batch_failure_reaches_every_caller():
+    async def fail(items):
+        raise RuntimeError("model down")
+
+    async def scenario():
+        batcher = MicroBatcher(fail, window=0.01)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert [str(result) for result in asyncio.run(scenario())] == ["model down", "model down"]
+
+
+# -----------------------------------------------------------------------------
+# TellTimeAgent.invoke_batch (stub model, no network)
+# -----------------------------------------------------------------------------
+
+def test_split_batch_reply():
+    assert TellTimeAgent._split_batch_reply('Sure: ["12:00", "13:00"]', 2) == ["12:00", "13:00"]
+    assert TellTimeAgent._split_batch_reply('["12:00"]', 2) is None
+    assert TellTimeAgent._split_batch_reply("no list here", 1) is None
+
+
+@pytest.fixture
+def agent():
+    agent = TellTimeAgent(model="stub:latency_ms=1,tokens_per_s=0")
+    agent.batched = []
+    call_model_batch = agent._call_model_batch
+
+    async def counting(questions, current_time):
+        agent.batched.append(len(questions))
+        return await call_model_batch(questions, current_time)
+
+    agent._call_model_batch = counting
+    return agent
+
+
+async def session_events(agent: TellTimeAgent, session_id: str) -> list[str]:
+    session = await agent._runner.session_service.get_session(
+        app_name=agent._agent.name, user_id=agent._user_id, session_id=session_id,
+    )
+    return [event.author for event in session.events]
+
+
+def test_batched_turns_are_added_to_their_sessions(agent):
+    async def scenario():
+        replies = await agent.invoke_batch([("What time is it?", "s1", None), ("And the date?", "s2", None)])
+        return replies, await session_events(agent, "s1"), await session_events(agent, "s2")
+
+    replies, s1, s2 = asyncio.run(scenario())
+    assert len(replies) == 2 and all(replies)
+    assert agent.batched == [2]
+    assert s1 == s2 == ["user", agent._agent.name]
+
+
+def test_sessions_with_history_are_not_batched(agent):
+    async def scenario():
+        await agent.invoke("What time is it?", "old")
+        replies = await agent.invoke_batch([
+            ("And now?", "old", None), ("What time is it?", "new1", None), ("What time is it?", "new2", None),
+        ])
+        return replies, await session_events(agent, "old")
+
+    replies, old = asyncio.run(scenario())
+    assert len(replies) == 3 and all(replies)
+    assert agent.batched == [2]  # Only the two new conversations
+    assert old.count("user") == 2  # The follow-up was a normal turn in its conversation
@@ -0,0 +1,89 @@
+#  Purpose:
+# Fan-out (client/orchestrator.py): first-k returns as soon as k agents answered and
+# cancels the rest, a slow agent gets a hedged copy, failures stay in their own result.
+
+
+import asyncio
+import json
+import time
+
+import httpx
+
+from client.orchestrator import Orchestrator
+from models.agent import AgentCapabilities, AgentCard
+
+
+class FakeAgents(httpx.AsyncBaseTransport):
+    """
+    🎭 Agents at http://<name>/, all in process. An agent answers tasks/send after
+    delays[name][attempt] seconds (its last delay for later attempts); agents in `failing`
+    answer with a FAILED task.
+    """
+
+    def __init__(self, delays: dict[str, list[float]], failing: set[str] = frozenset()):
+        self.delays = delays
+        self.failing = failing
+        self.sent: list[tuple[str, str]] = []       # (agent, task ID) of every tasks/send
+        self.cancelled: list[tuple[str, str]] = []  # Requests abandoned while the agent was working
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        name = request.url.host
+        if name not in self.delays:
+            return httpx.Response(404)
+        if request.method == "GET":
+            card = AgentCard(name=name, description="test", url=f"http://{name}/", version="1", capabilities=AgentCapabilities(), skills=[])
+            return httpx.Response(200, json=card.model_dump(mode="json"))
+        body = json.loads(await request.aread())
+        task_id = body["params"]["id"]
+        delays = self.delays[name]
+        delay = delays[min(sum(agent == name for agent, _ in self.sent), len(delays) - 1)]
+        self.sent.append((name, task_id))
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append((name, task_id))
+            raise
+        state = "failed" if name in self.failing else "completed"
+        task = {"id": task_id, "status": {"state": state, "message": {"role": "agent", "parts": [{"type": "text", "text": name}]}}, "history": []}
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": task})
+
+
+PAYLOAD = {"id": "t", "message": {"role": "user", "parts": [{"type": "text", "text": "What time is it?"}]}}
+
+
+async def fan_out(agents: FakeAgents, names: list[str], **options):
+    async with httpx.AsyncClient(transport=agents) as http:
+        async with Orchestrator(http_client=http) as orchestrator:
+            start = time.perf_counter()
+            results = await orchestrator.fan_out([f"http://{name}/" for name in names], PAYLOAD, **options)
+            return results, time.perf_counter() - start
+
+
+def test_first_k_returns_early_and_cancels_the_rest():
+    agents = FakeAgents({"fast": [0.01], "medium": [0.05], "slow": [5]})
+    results, elapsed = asyncio.run(fan_out(agents, ["slow", "fast", "medium"], first_k=2))
+
+    assert [result.status for result in results] == ["cancelled", "ok", "ok"]  # In the order of the URLs
+    assert results[1].task.status.message.parts[0].text == "fast"
+    assert elapsed < 1
+    assert agents.cancelled == [("slow", "t")]
+
+
+def test_gather_all_reports_every_outcome():
+    agents = FakeAgents({"ok": [0.01], "broken": [0.01], "stuck": [5]}, failing={"broken"})
+    results, elapsed = asyncio.run(fan_out(agents, ["ok", "broken", "stuck", "unknown"], timeout=0.2))
+
+    assert [result.status for result in results] == ["ok", "failed", "timeout", "error"]
+    assert results[1].task is not None  # A FAILED task is still an answer
+    assert results[3].error is not None  # No agent card there
+    assert elapsed < 1
+
+
+def test_slow_agent_gets_a_hedged_copy():
+    agents = FakeAgents({"flaky": [5, 0.01]})  # The first request hangs, the second is fast
+    results, elapsed = asyncio.run(fan_out(agents, ["flaky"], hedge_after=0.05))
+
+    assert results[0].ok and results[0].attempts == 2
+    assert agents.sent == [("flaky", "t"), ("flaky", "t-hedge")]  # The hedge is a task of its own
+    assert agents.cancelled == [("flaky", "t")]  # The losing copy is abandoned
+    assert elapsed < 1
@@ -0,0 +1,65 @@
+#  Purpose:
+# The response cache (server/response_cache.py): identical questions asked at once share
+# one agent call, repeats are hits until the TTL ends, opted-out skills always ask.
+
+
+import asyncio
+
+from server.response_cache import ResponseCache
+
+
+class CountingAgent:
+    """🔢 Answers "reply <n>" after `delay` seconds, counting its calls."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def invoke(self) -> str:
+        self.calls += 1
+        answer = f"reply {self.calls}"
+        await asyncio.sleep(self.delay)
+        return answer
+
+
+def test_concurrent_identical_questions_share_one_call():
+    cache = ResponseCache()
+    agent = CountingAgent(delay=0.05)
+
+    async def scenario():
+        queries = ["What time is it?", "what  time is it", "WHAT TIME IS IT!"]  # Normalized to one key
+        replies = await asyncio.gather(*(cache.get_or_compute("time", query, agent.invoke) for query in queries))
+        later = await cache.get_or_compute("time", "What time is it?", agent.invoke)
+        return replies, later
+
+    replies, later = asyncio.run(scenario())
+    assert replies == ["reply 1"] * 3 and later == "reply 1"
+    assert agent.calls == 1
+
+
+def test_zero_ttl_skill_bypasses_the_cache():
+    cache = ResponseCache(skill_ttls={"live": 0})
+    agent = CountingAgent()
+
+    async def scenario():
+        return [await cache.get_or_compute("live", "What time is it?", agent.invoke) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["reply 1", "reply 2"]
+    assert len(cache) == 0
+
+
+def test_context_expiry_and_uncacheable_replies_ask_again():
+    cache = ResponseCache(default_ttl=0.05)
+    agent = CountingAgent()
+
+    async def scenario():
+        ask = lambda context="", cacheable=None: cache.get_or_compute("time", "Time?", agent.invoke, context, cacheable)
+        first = await ask()
+        other_model = await ask(context="stub")  # Another context is another entry
+        await asyncio.sleep(0.1)
+        expired = await ask()
+        error = await ask(context="error", cacheable=lambda reply: False)
+        error_again = await ask(context="error")
+        return [first, other_model, expired, error, error_again]
+
+    assert asyncio.run(scenario()) == ["reply 1", "reply 2", "reply 3", "reply 4", "reply 5"]
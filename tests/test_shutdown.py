@@ -0,0 +1,97 @@
+#  Purpose:
+# Server shutdown (TaskManager.close / aclose): background tasks stop first, then every
+# store is flushed and its threads stopped; tasks left in progress fail on the next start.
+
+
+import asyncio
+import threading
+
+from agents.google_adk.agent import TellTimeAgent
+from agents.google_adk.task_manager import AgentTaskManager
+from models.request import SendTaskRequest
+from models.task import Message, TaskSendParams, TaskState, TextPart
+from server.server import A2AServer
+from server.sqlite_task_store import SQLiteTaskStore
+from server.task_queue import TaskQueue
+
+
+def params(task_id: str, session_id: str = "s") -> TaskSendParams:
+    return TaskSendParams(id=task_id, sessionId=session_id, message=Message(role="user", parts=[TextPart(text="What time is it?")]))
+
+
+def writer_threads() -> set[str]:
+    return {thread.name for thread in threading.enumerate() if thread.name.endswith("-write")}
+
+
+def make_agent(tmp_path) -> TellTimeAgent:
+    return TellTimeAgent(
+        model="stub:latency_ms=1,tokens_per_s=0", session_db=str(tmp_path / "adk.db"), artifact_dir=str(tmp_path / "artifacts"),
+    )
+
+
+def test_close_flushes_the_task_store_and_the_agents_stores(tmp_path):
+    before = writer_threads()
+    manager = AgentTaskManager(agent=make_agent(tmp_path), store=SQLiteTaskStore(str(tmp_path / "tasks.db")))
+    response = asyncio.run(manager.on_send_task(SendTaskRequest(id=1, params=params("t1"))))
+    assert response.result.status.state == TaskState.COMPLETED
+    assert len(writer_threads() - before) == 3  # Task store, ADK sessions, artifact index
+    manager.close()
+    assert writer_threads() - before == set()
+
+    async def reopened():
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"))
+        agent = make_agent(tmp_path)
+        try:
+            task = await store.get_task("t1")
+            session = await agent._runner.session_service.get_session(
+                app_name=agent._agent.name, user_id=agent._user_id, session_id="s",
+            )
+            return task, session
+        finally:
+            store.close()
+            agent.close()
+
+    task, session = asyncio.run(reopened())
+    assert task.status.state == TaskState.COMPLETED
+    assert [event.author for event in session.events][0] == "user"
+
+
+class SlowAgent:
+    """🐢 Answers after `delay` seconds."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def invoke(self, query: str, session_id: str) -> str:
+        await asyncio.sleep(self.delay)
+        return "12:00"
+
+
+def test_aclose_stops_the_queue_and_the_next_start_fails_its_tasks(tmp_path):
+    path = str(tmp_path / "tasks.db")
+
+    async def serve_then_stop():
+        queue = TaskQueue(concurrency=1)
+        manager = AgentTaskManager(agent=SlowAgent(delay=60), store=SQLiteTaskStore(path), task_queue=queue)
+        server = A2AServer(task_manager=manager)
+        async with server.app.router.lifespan_context(server.app):  # Shuts down like uvicorn does
+            for task_id in ("running", "queued"):
+                await manager.on_send_task(SendTaskRequest(id=task_id, params=params(task_id)))
+            await asyncio.sleep(0.05)  # "running" is now WORKING
+        return queue
+
+    async def restart():
+        store = SQLiteTaskStore(path)
+        try:
+            failed = await store.fail_interrupted()
+            return failed, [await store.get_task(task_id) for task_id in ("running", "queued")], await store.fail_interrupted()
+        finally:
+            store.close()
+
+    before = writer_threads()
+    queue = asyncio.run(serve_then_stop())
+    assert queue._workers == [] and writer_threads() - before == set()
+    failed, tasks, failed_again = asyncio.run(restart())
+    assert failed == 2 and failed_again == 0
+    assert [task.status.state for task in tasks] == [TaskState.FAILED, TaskState.FAILED]
+    assert "interrupted" in tasks[0].status.message.parts[0].text
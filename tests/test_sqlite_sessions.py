@@ -0,0 +1,85 @@
+#  Purpose:
+# SQLite ADK services (agents/google_adk/sqlite_services.py): sessions, state and memory
+# survive a restart; long sessions load only their newest turns and compact into memory.
+
+
+import asyncio
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+from agents.google_adk.sqlite_services import ADK_SCHEMA, SQLiteMemoryService, SQLiteSessionService
+from server.sqlite_db import SQLiteDatabase
+
+APP, USER = "app", "user"
+
+
+def event(author: str, text: str, state_delta: dict | None = None) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(
+        invocation_id="i", author=author, content=types.Content(role=role, parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+
+
+def texts(session) -> list[str]:
+    return [e.content.parts[0].text for e in session.events]
+
+
+def open_services(path: str, **options) -> tuple[SQLiteDatabase, SQLiteSessionService, SQLiteMemoryService]:
+    db = SQLiteDatabase(path, ADK_SCHEMA)
+    memory = SQLiteMemoryService(db)
+    return db, SQLiteSessionService(db, memory=memory, **options), memory
+
+
+def test_sessions_and_state_survive_a_restart(tmp_path):
+    path = str(tmp_path / "adk.db")
+
+    async def first_run():
+        db, sessions, _ = open_services(path)
+        try:
+            session = await sessions.create_session(app_name=APP, user_id=USER, session_id="s1", state={"topic": "time"})
+            await sessions.append_event(session, event("user", "What time is it?", {"user:zone": "UTC", "temp:scratch": 1}))
+            await sessions.append_event(session, event("agent", "12:00", {"answers": 1}))
+        finally:
+            db.close()
+
+    async def second_run():
+        db, sessions, _ = open_services(path)
+        try:
+            s1 = await sessions.get_session(app_name=APP, user_id=USER, session_id="s1")
+            s2 = await sessions.create_session(app_name=APP, user_id=USER, session_id="s2")
+            return s1, s2, await sessions.get_session(app_name=APP, user_id=USER, session_id="missing")
+        finally:
+            db.close()
+
+    asyncio.run(first_run())
+    s1, s2, missing = asyncio.run(second_run())
+    assert texts(s1) == ["What time is it?", "12:00"]
+    assert s1.state == {"topic": "time", "answers": 1, "user:zone": "UTC"}  # temp: state is never stored
+    assert s2.state == {"user:zone": "UTC"}  # user: state is shared by the user's sessions
+    assert missing is None
+
+
+def test_long_sessions_load_recent_turns_and_compact_into_memory(tmp_path):
+    async def scenario():
+        db, sessions, memory = open_services(str(tmp_path / "adk.db"), max_events=3, keep_events=4)
+        try:
+            session = await sessions.create_session(app_name=APP, user_id=USER, session_id="s")
+            for turn in range(5):
+                await sessions.append_event(session, event("user", f"question {turn} about tides"))
+                await sessions.append_event(session, event("agent", f"answer {turn}"))
+            loaded = await sessions.get_session(app_name=APP, user_id=USER, session_id="s")
+            stored = await sessions.get_session(app_name=APP, user_id=USER, session_id="s", config=GetSessionConfig(num_recent_events=100))
+            found = await memory.search_memory(app_name=APP, user_id=USER, query="tides")
+            return loaded, stored, [m.content.parts[0].text for m in found.memories]
+        finally:
+            db.close()
+
+    loaded, stored, remembered = asyncio.run(scenario())
+    #The newest 3 events would start at an answer: the window starts at the next question instead
+    assert texts(loaded) == ["question 4 about tides", "answer 4"]
+    #Compacted turns are gone from the session but can still be found
+    assert len(stored.events) < 10 and texts(stored)[0].startswith("question")
+    assert "question 0 about tides" in remembered
@@ -0,0 +1,71 @@
+#  Purpose:
+# tasks/sendSubscribe (AgentTaskManager.on_send_task_subscribe, A2AClient.send_task_subscribe):
+# SUBMITTED, WORKING, one WORKING per chunk, then a final COMPLETED, or FAILED if the agent fails.
+
+
+import asyncio
+
+import httpx
+
+from agents.google_adk.task_manager import AgentTaskManager
+from client.client import A2AClient
+from models.task import TaskState
+from server.server import A2AServer
+
+
+class StreamingAgent:
+    """📡 Streams `chunks`, then the whole reply; with `fail`, raises instead of finishing."""
+
+    def __init__(self, chunks: list[str], fail: bool = False):
+        self.chunks = chunks
+        self.fail = fail
+
+    async def stream(self, query: str, session_id: str):
+        for chunk in self.chunks:
+            yield {"is_task_complete": False, "content": chunk}
+        if self.fail:
+            raise RuntimeError("model down")
+        yield {"is_task_complete": True, "content": "".join(self.chunks)}
+
+
+def payload(task_id: str) -> dict:
+    return {"id": task_id, "sessionId": "s", "message": {"role": "user", "parts": [{"type": "text", "text": "What time is it?"}]}}
+
+
+async def subscribe(agent: StreamingAgent, task_id: str):
+    manager = AgentTaskManager(agent=agent)
+    server = A2AServer(task_manager=manager)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app)) as http:
+        client = A2AClient(url="http://agent/", http_client=http)
+        events = [event async for event in client.send_task_subscribe(payload(task_id))]
+    return events, await manager.store.get_task(task_id)
+
+
+def summary(events) -> list[tuple[str, str | None, bool]]:
+    result = []
+    for event in events:
+        message = event.result.status.message
+        result.append((event.result.status.state, message.parts[0].text if message else None, bool(event.result.final)))
+    return result
+
+
+def test_stream_sends_every_step_in_order():
+    events, task = asyncio.run(subscribe(StreamingAgent(["It is ", "12:00"]), "t1"))
+    assert summary(events) == [
+        (TaskState.SUBMITTED, None, False),
+        (TaskState.WORKING, None, False),
+        (TaskState.WORKING, "It is ", False),
+        (TaskState.WORKING, "12:00", False),
+        (TaskState.COMPLETED, "It is 12:00", True),
+    ]
+    assert task.status.state == TaskState.COMPLETED
+    assert task.history[-1].parts[0].text == "It is 12:00"
+
+
+def test_failing_agent_ends_the_stream_with_failed():
+    events, task = asyncio.run(subscribe(StreamingAgent(["It is "], fail=True), "t2"))
+    states = [state for state, _, _ in summary(events)]
+    assert states == [TaskState.SUBMITTED, TaskState.WORKING, TaskState.WORKING, TaskState.FAILED]
+    assert events[-1].result.final and "model down" in events[-1].result.status.message.parts[0].text
+    #The stored task isn't left WORKING either
+    assert task.status.state == TaskState.FAILED
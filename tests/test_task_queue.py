@@ -0,0 +1,57 @@
+#  Purpose:
+# Background tasks (--async-tasks: TaskQueue, AgentTaskManager._enqueue_task): tasks/send
+# answers SUBMITTED at once, a full queue is answered with 429, and polling finds the reply.
+
+
+import asyncio
+
+import httpx
+
+from agents.google_adk.task_manager import AgentTaskManager
+from client.client import A2AClient
+from models.json_rpc import ServerBusyError
+from models.task import TaskState
+from server.server import A2AServer
+from server.task_queue import TaskQueue
+
+
+class GatedAgent:
+    """🚧 Every call waits until `gate` is set, then answers with the question."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+
+    async def invoke(self, query: str, session_id: str) -> str:
+        await self.gate.wait()
+        return f"re: {query}"
+
+
+def send(task_id: str) -> dict:
+    message = {"role": "user", "parts": [{"type": "text", "text": task_id}]}
+    return {"jsonrpc": "2.0", "id": task_id, "method": "tasks/send", "params": {"id": task_id, "message": message}}
+
+
+def test_full_queue_is_refused_and_queued_tasks_complete():
+    agent = GatedAgent()
+    manager = AgentTaskManager(agent=agent, task_queue=TaskQueue(concurrency=1, max_queued=1))
+    server = A2AServer(task_manager=manager)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://agent") as http:
+            running = await http.post("/", json=send("running"))
+            await asyncio.sleep(0.01)  # The only worker takes it
+            queued = await http.post("/", json=send("queued"))
+            refused = await http.post("/", json=send("refused"))
+            agent.gate.set()
+            client = A2AClient(url="http://agent/", http_client=http)
+            done = [await client.wait_for_task(task_id, poll_interval=0.01, timeout=5) for task_id in ("running", "queued")]
+            return running, queued, refused, done, await manager.store.get_task("refused")
+
+    running, queued, refused, done, stored = asyncio.run(scenario())
+    assert running.json()["result"]["status"]["state"] == queued.json()["result"]["status"]["state"] == "submitted"
+    assert refused.status_code == 429
+    assert refused.json()["error"]["code"] == ServerBusyError().code
+    assert refused.json()["error"]["data"] == {"queued": 1}
+    assert stored is None  # Refused before anything was stored
+    assert [task.status.state for task in done] == [TaskState.COMPLETED] * 2
+    assert done[1].history[-1].parts[0].text == "re: queued"
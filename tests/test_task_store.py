@@ -0,0 +1,198 @@
+#  Purpose:
+# Eviction in the task stores (server/task_store.py, server/sqlite_task_store.py):
+# TTLs and size limits drop finished / idle tasks, never tasks still in progress.
+
+
+import asyncio
+
+from models.task import Message, TaskSendParams, TaskState, TaskStatus, TextPart
+from server.sqlite_task_store import SQLiteTaskStore
+from server.task_store import InMemoryTaskStore
+
+
+def params(task_id: str, text: str = "What time is it?") -> TaskSendParams:
+    return TaskSendParams(id=task_id, sessionId="s", message=Message(role="user", parts=[TextPart(text=text)]))
+
+
+def reply(text: str = "12:00") -> Message:
+    return Message(role="agent", parts=[TextPart(text=text)])
+
+
+async def complete(store, task_id: str) -> None:
+    await store.upsert_task(params(task_id))
+    await store.update_task(task_id, TaskStatus(state=TaskState.COMPLETED), reply())
+
+
+# -----------------------------------------------------------------------------
+# InMemoryTaskStore
+# -----------------------------------------------------------------------------
+
+def test_max_tasks_evicts_least_recently_used():
+    async def scenario():
+        store = InMemoryTaskStore(max_tasks=2)
+        for task_id in ("a", "b"):
+            await complete(store, task_id)
+        await store.get_task("a")  # "b" is now the least recently used
+        await complete(store, "c")
+        return store
+
+    store = asyncio.run(scenario())
+    assert [task_id for task_id in ("a", "b", "c") if task_id in store._tasks] == ["a", "c"]
+    assert store.evictions == {"max_tasks": 1}
+
+
+def test_max_history_messages_counts_every_message():
+    async def scenario():
+        store = InMemoryTaskStore(max_history_messages=4)
+        for task_id in ("a", "b", "c"):
+            await complete(store, task_id)  # Two messages each
+        return await store.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["tasks"] == 2
+    assert stats["history_messages"] == 4
+    assert stats["evictions"] == {"max_history_messages": 1}
+
+
+def test_size_limits_never_evict_tasks_in_progress():
+    async def scenario():
+        store = InMemoryTaskStore(max_tasks=1)
+        await store.upsert_task(params("a"))
+        await store.update_task("a", TaskStatus(state=TaskState.WORKING))
+        await store.upsert_task(params("b"))
+        return store
+
+    store = asyncio.run(scenario())
+    assert len(store) == 2  # Over the limit while both are being worked on
+    assert not store.evictions
+
+
+def test_resent_finished_task_is_in_progress_again():
+    async def scenario():
+        store = InMemoryTaskStore(max_tasks=1)
+        await complete(store, "a")
+        resent = await store.upsert_task(params("a", "And now?"))  # A new turn of a finished task
+        await complete(store, "b")  # Over the limit while "a" is being answered
+        #The new turn's reply still finds its task
+        return resent, await store.update_task("a", TaskStatus(state=TaskState.COMPLETED), reply("12:01"))
+
+    resent, task = asyncio.run(scenario())
+    assert resent.status.state == TaskState.SUBMITTED
+    assert task.status.state == TaskState.COMPLETED and len(task.history) == 4
+
+
+def test_terminal_ttl_drops_finished_tasks():
+    async def scenario():
+        store = InMemoryTaskStore(terminal_ttl=0.05)
+        await complete(store, "done")
+        await store.upsert_task(params("running"))
+        await asyncio.sleep(0.1)
+        return store, await store.get_task("done"), await store.get_task("running")
+
+    store, done, running = asyncio.run(scenario())
+    assert done is None  # Expired tasks are never served, even before a sweep
+    assert running is not None
+    store.evict()
+    assert store.evictions == {"terminal_ttl": 1}
+
+
+def test_idle_ttl_skips_active_tasks():
+    async def scenario():
+        store = InMemoryTaskStore(idle_ttl=0.05)
+        await complete(store, "idle")
+        await store.upsert_task(params("submitted"))
+        await store.upsert_task(params("working"))
+        await store.update_task("working", TaskStatus(state=TaskState.WORKING))
+        await asyncio.sleep(0.1)
+        store.evict()
+        #A slow agent call still finds its task when it is done
+        await store.update_task("working", TaskStatus(state=TaskState.COMPLETED), reply())
+        return store
+
+    store = asyncio.run(scenario())
+    assert sorted(store._tasks) == ["submitted", "working"]
+    assert store.evictions == {"idle_ttl": 1}
+
+
+# -----------------------------------------------------------------------------
+# SQLiteTaskStore
+# -----------------------------------------------------------------------------
+
+#Runs purge() the way the writer thread does, on a connection of its own
+def purge(store: SQLiteTaskStore) -> int:
+    conn = store._db.connect()
+    try:
+        return store.purge(conn)
+    finally:
+        conn.close()
+
+
+#Moves a task's last write `seconds` into the past
+def backdate(store: SQLiteTaskStore, task_id: str, seconds: float) -> None:
+    conn = store._db.connect()
+    try:
+        conn.execute("UPDATE tasks SET updated_at = updated_at - ? WHERE id = ?", (seconds, task_id))
+    finally:
+        conn.close()
+
+
+def test_sqlite_purge_applies_ttls_and_max_tasks(tmp_path):
+    async def scenario():
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), terminal_ttl=60, max_tasks=2)
+        try:
+            for task_id in ("old", "a", "b", "c", "running"):
+                await complete(store, task_id)
+            await store.upsert_task(params("running"))
+            await store.update_task("running", TaskStatus(state=TaskState.WORKING))  # In progress again
+            backdate(store, "old", 120)
+            backdate(store, "a", 30)   # The least recently written of the rest
+            backdate(store, "b", 20)
+            backdate(store, "running", 100)
+
+            purged = purge(store)
+            remaining = [task_id for task_id in ("old", "a", "b", "c", "running") if await store.get_task(task_id)]
+            return purged, remaining, await store.stats()
+        finally:
+            store.close()
+
+    purged, remaining, stats = asyncio.run(scenario())
+    assert purged == 3
+    assert remaining == ["c", "running"]  # "running" is the oldest, but in progress
+    assert stats["evictions"] == {"terminal_ttl": 1, "max_tasks": 2}
+    assert stats["tasks"] == 2 and stats["history_messages"] == 5
+
+
+def test_sqlite_idle_ttl_skips_active_tasks(tmp_path):
+    async def scenario():
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), idle_ttl=60)
+        try:
+            await complete(store, "idle")
+            await store.upsert_task(params("submitted"))
+            backdate(store, "idle", 120)
+            backdate(store, "submitted", 120)
+            purge(store)
+            return await store.get_task("idle"), await store.get_task("submitted")
+        finally:
+            store.close()
+
+    idle, submitted = asyncio.run(scenario())
+    assert idle is None
+    assert submitted is not None and submitted.status.state == TaskState.SUBMITTED
+
+
+def test_sqlite_resent_finished_task_is_not_purged(tmp_path):
+    async def scenario():
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), max_tasks=1)
+        try:
+            await complete(store, "a")
+            await complete(store, "b")
+            resent = await store.upsert_task(params("a", "And now?"))
+            backdate(store, "a", 60)  # The least recently written, but answering a new message
+            purge(store)
+            return resent, await store.get_task("a"), await store.get_task("b")
+        finally:
+            store.close()
+
+    resent, a, b = asyncio.run(scenario())
+    assert resent.status.state == TaskState.SUBMITTED
+    assert a is not None and b is None
@@ -0,0 +1,208 @@
+#  Purpose:
+# Chunked, resumable uploads (server/uploads.py, the /uploads routes and
+# A2AClient.upload_file_resumable): chunks in any order, only missing ones resent.
+
+
+import asyncio
+import hashlib
+import os
+
+import httpx
+import pytest
+
+from client.client import A2AClient, A2AClientUploadError
+from server.blob_store import InMemoryBlobStore
+from server.server import A2AServer
+from server.uploads import InvalidChunk, UploadCorrupted, UploadIncomplete, UploadManager, UploadNotFound
+
+CHUNK = 1024
+DATA = os.urandom(3 * CHUNK + 100)  # Four chunks, the last one short
+
+
+async def body(data: bytes, pieces: int = 3):
+    step = max(1, len(data) // pieces)
+    for start in range(0, len(data), step):
+        yield data[start:start + step]
+
+
+def chunk(index: int) -> bytes:
+    return DATA[index * CHUNK:(index + 1) * CHUNK]
+
+
+def is_open(fd: int) -> bool:
+    try:
+        os.fstat(fd)
+    except OSError:
+        return False
+    return True
+
+
+def make_manager(tmp_path) -> UploadManager:
+    return UploadManager(InMemoryBlobStore(max_bytes=2**20, max_blob_bytes=2**16), directory=str(tmp_path), chunk_size=CHUNK)
+
+
+# -----------------------------------------------------------------------------
+# UploadManager
+# -----------------------------------------------------------------------------
+
+def test_chunks_in_any_order_make_the_blob(tmp_path):
+    manager = make_manager(tmp_path)
+
+    async def scenario():
+        upload = manager.create(len(DATA), "image/png")
+        for index in (3, 1):
+            await manager.write_chunk(upload, index, body(chunk(index)))
+        missing = upload.missing()
+        with pytest.raises(UploadIncomplete):
+            await manager.complete(upload)
+        for index in (0, 2):
+            await manager.write_chunk(upload, index, body(chunk(index)))
+        return missing, await manager.complete(upload, sha256=hashlib.sha256(DATA).hexdigest())
+
+    missing, blob = asyncio.run(scenario())
+    assert missing == [0, 2]
+    assert bytes(blob.data) == DATA and blob.mime_type == "image/png"
+    assert len(manager) == 0 and not os.listdir(tmp_path)  # The partial file is gone
+
+
+def test_bad_chunk_stays_missing_and_can_be_resent(tmp_path):
+    manager = make_manager(tmp_path)
+
+    async def scenario():
+        upload = manager.create(len(DATA))
+        with pytest.raises(InvalidChunk):
+            await manager.write_chunk(upload, 0, body(chunk(0) + b"extra"))
+        with pytest.raises(InvalidChunk):
+            await manager.write_chunk(upload, 1, body(chunk(1)[:10]))
+        missing = upload.missing()
+        for index in range(4):
+            await manager.write_chunk(upload, index, body(chunk(index)))
+        return missing, await manager.complete(upload)
+
+    missing, blob = asyncio.run(scenario())
+    assert missing == [0, 1, 2, 3]
+    assert bytes(blob.data) == DATA
+
+
+def test_hash_mismatch_drops_the_upload(tmp_path):
+    manager = make_manager(tmp_path)
+
+    async def scenario():
+        upload = manager.create(len(DATA))
+        for index in range(4):
+            await manager.write_chunk(upload, index, body(chunk(index)))
+        with pytest.raises(UploadCorrupted):
+            await manager.complete(upload, sha256="0" * 64)
+
+    asyncio.run(scenario())
+    assert len(manager) == 0
+
+
+def test_rewritten_chunk_is_hashed_again(tmp_path):
+    manager = make_manager(tmp_path)
+    rewritten = b"X" * CHUNK + DATA[CHUNK:]
+
+    async def scenario():
+        upload = manager.create(len(DATA))
+        for index in range(4):
+            await manager.write_chunk(upload, index, body(chunk(index)))
+        await manager.write_chunk(upload, 0, body(b"X" * CHUNK))  # After it was hashed
+        with pytest.raises(UploadCorrupted):
+            await manager.complete(upload, sha256=hashlib.sha256(DATA).hexdigest())
+        upload = manager.create(len(DATA))
+        for index in range(4):
+            await manager.write_chunk(upload, index, body(chunk(index)))
+        await manager.write_chunk(upload, 0, body(b"X" * CHUNK))
+        return await manager.complete(upload)
+
+    blob = asyncio.run(scenario())
+    #The blob ID is the hash of the bytes stored, never of bytes that were overwritten
+    assert blob.id == hashlib.sha256(rewritten).hexdigest()
+    assert bytes(blob.data) == rewritten
+    assert manager.blob_store.get(hashlib.sha256(DATA).hexdigest()) is None
+
+
+def test_abort_waits_for_the_chunk_being_written(tmp_path):
+    manager = make_manager(tmp_path)
+
+    async def scenario():
+        upload = manager.create(len(DATA))
+        arrived = asyncio.Event()
+
+        async def slow_body():
+            yield chunk(0)[:10]
+            arrived.set()
+            await asyncio.sleep(0.05)
+            yield chunk(0)[10:]
+
+        write = asyncio.create_task(manager.write_chunk(upload, 0, slow_body()))
+        await arrived.wait()
+        manager.abort(upload)
+        fd_open_after_abort = is_open(upload.fd)
+        with pytest.raises(UploadNotFound):
+            await write
+        return fd_open_after_abort, is_open(upload.fd)
+
+    open_after_abort, open_after_write = asyncio.run(scenario())
+    assert open_after_abort and not open_after_write
+    assert len(manager) == 0 and not os.listdir(tmp_path)
+
+
+# -----------------------------------------------------------------------------
+# Through the HTTP routes, with a connection that drops chunks
+# -----------------------------------------------------------------------------
+
+class FlakyTransport(httpx.AsyncBaseTransport):
+    """🔌 Fails the first `failures` PUTs of chunk `index` as if the connection dropped."""
+
+    def __init__(self, app, index: int, failures: int):
+        self._inner = httpx.ASGITransport(app=app)
+        self.index = index
+        self.failures = failures
+        self.puts: list[int] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "PUT":
+            index = int(request.url.path.rsplit("/", 1)[-1])
+            self.puts.append(index)
+            if index == self.index and self.failures:
+                self.failures -= 1
+                raise httpx.ConnectError("connection dropped", request=request)
+        return await self._inner.handle_async_request(request)
+
+
+def make_server(tmp_path) -> A2AServer:
+    blob_store = InMemoryBlobStore(max_bytes=2**20, max_blob_bytes=2**16)
+    return A2AServer(blob_store=blob_store, uploads=UploadManager(blob_store, directory=str(tmp_path), chunk_size=CHUNK))
+
+
+def test_client_resends_only_the_missing_chunk(tmp_path):
+    transport = FlakyTransport(make_server(tmp_path).app, index=1, failures=1)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport) as http:
+            client = A2AClient(url="http://agent/", http_client=http)
+            part = await client.upload_file_resumable(DATA, "image/png", concurrency=2)
+            return part, await client.download_file(part)
+
+    part, downloaded = asyncio.run(scenario())
+    assert downloaded == DATA
+    assert part.file.uri.endswith(hashlib.sha256(DATA).hexdigest())
+    assert sorted(transport.puts) == [0, 1, 1, 2, 3]
+
+
+def test_client_resumes_an_upload_by_id(tmp_path):
+    transport = FlakyTransport(make_server(tmp_path).app, index=2, failures=1)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport) as http:
+            client = A2AClient(url="http://agent/", http_client=http)
+            with pytest.raises(A2AClientUploadError) as stopped:
+                await client.upload_file_resumable(DATA, retries=0)
+            part = await client.upload_file_resumable(DATA, upload_id=stopped.value.upload_id)
+            return stopped.value.missing, part, await client.download_file(part)
+
+    missing, part, downloaded = asyncio.run(scenario())
+    assert missing == [2]
+    assert downloaded == DATA
+    assert sorted(transport.puts) == [0, 1, 2, 2, 3]